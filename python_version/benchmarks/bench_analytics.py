@@ -0,0 +1,123 @@
+"""
+Analytics Benchmark
+Times the demographics reports over a NumPy snapshot against the same
+figures computed with pure-Python loops over Patient records, and the
+cost of building and re-using the cached snapshot.
+
+Run from python_version/:
+    python -m benchmarks.bench_analytics [count]
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+sys.path.insert(0, ".")
+
+from core.analytics import AGE_BAND_EDGES, PatientAnalytics, PatientSnapshot
+from core.columnar import PatientColumns
+from core.patient_repository import INSERT_SQL, PatientRepository
+from core.patients import Patient
+from core.storage import Database
+
+DEFAULT_COUNT = 1_000_000
+GENDERS = ["Male", "Female", "Other"]
+FIRST_DAY = date(2016, 1, 1)
+REPEATS = 3
+
+
+def make_patients(count: int):
+    """Random ages, genders and ten years of registration dates"""
+    rng = random.Random(7)
+    days = [(FIRST_DAY + timedelta(days=d)).isoformat() for d in range(3650)]
+    return [
+        Patient(f"P{i:07d}", f"Patient {i}", rng.randint(1, 95), rng.choice(GENDERS),
+                "", "", "", registered_date=rng.choice(days))
+        for i in range(1, count + 1)
+    ]
+
+
+def python_reports(patients):
+    """The snapshot's reports as plain loops"""
+    bands = [0] * (len(AGE_BAND_EDGES) - 1)
+    for patient in patients:
+        for i in range(len(bands)):
+            if AGE_BAND_EDGES[i] <= patient.age < AGE_BAND_EDGES[i + 1]:
+                bands[i] += 1
+                break
+    ages = sorted(patient.age for patient in patients)
+    percentiles = statistics.quantiles(ages, n=100, method='inclusive')
+    by_gender = defaultdict(list)
+    for patient in patients:
+        by_gender[patient.gender].append(patient.age)
+    groups = {g: (len(a), sum(a) / len(a), statistics.median(a)) for g, a in by_gender.items()}
+    months = Counter(patient.registered_date[:7] for patient in patients)
+    return bands, percentiles, groups, sorted(months.items())
+
+
+def numpy_reports(snapshot: PatientSnapshot):
+    """Every demographics report over one snapshot"""
+    return (snapshot.age_bands(), snapshot.age_percentiles(),
+            snapshot.age_by_gender(), snapshot.registrations("M"))
+
+
+def best_of(function, *args) -> float:
+    """Fastest of REPEATS runs, in milliseconds"""
+    times = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        function(*args)
+        times.append((time.perf_counter() - started) * 1000)
+    return min(times)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COUNT
+    print(f"Generating {count:,} patients...")
+    patients = make_patients(count)
+
+    snapshot = PatientSnapshot.from_columns(PatientColumns.from_patients(patients))
+    bands, _, groups, months = python_reports(patients)
+    assert [band.count for band in snapshot.age_bands()] == bands
+    assert {g.gender: (g.count, g.median_age) for g in snapshot.age_by_gender()} == {
+        gender: (size, median) for gender, (size, _, median) in groups.items()
+    }
+    assert snapshot.registrations("M") == months
+
+    python_ms = best_of(python_reports, patients)
+    numpy_ms = best_of(numpy_reports, snapshot)
+    print(f"    pure Python reports   {python_ms:9.1f} ms")
+    print(f"    NumPy reports         {numpy_ms:9.1f} ms  ({python_ms / numpy_ms:.0f}x)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(os.path.join(directory, "bench.db"))
+        PatientRepository(database)
+        with database.transaction() as connection:
+            connection.executemany(INSERT_SQL, (
+                (i, p.id, p.name, p.age, p.gender, p.contact, p.email, p.address, p.registered_date)
+                for i, p in enumerate(patients, 1)
+            ))
+        analytics = PatientAnalytics(database)
+
+        started = time.perf_counter()
+        analytics.snapshot()
+        build_ms = (time.perf_counter() - started) * 1000
+        cached_ms = best_of(analytics.snapshot)
+        print(f"    snapshot from SQLite  {build_ms:9.1f} ms")
+        print(f"    cached snapshot       {cached_ms:9.3f} ms")
+
+        PatientRepository(database).add(Patient("P9999999", "New", 30, "Female", "", "", ""))
+        started = time.perf_counter()
+        rebuilt = analytics.snapshot()
+        print(f"    rebuild after write   {(time.perf_counter() - started) * 1000:9.1f} ms "
+              f"({len(rebuilt):,} rows)")
+        database.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+API Benchmark
+Paging the patient list through the API server on localhost: pooled
+keep-alive connections against a new connection per request, the
+table's projected fields against whole records, and an ETag
+revalidation against downloading an unchanged page again.
+
+Run from python_version/:
+    python -m benchmarks.bench_api [patients]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, ".")
+
+from core.api_client import TABLE_FIELDS, ApiClient
+from core.api_server import PATIENT_FIELDS, ApiServer
+from core.patient_repository import PatientRepository, patient_id
+from core.patients import Patient
+from core.storage import Database
+
+DEFAULT_PATIENTS = 20_000
+PAGE_SIZE = 200
+PAGES = 50
+
+
+def build(path: str, patients: int):
+    repository = PatientRepository(Database(path))
+    with repository.batch():
+        repository.add_many(
+            Patient(patient_id(seq), f"Patient {seq}", 30, "Female", f"09{seq:09d}",
+                    f"patient{seq}@example.com", f"{seq} Osmeña Boulevard, Barangay Capitol Site, Cebu City")
+            for seq in repository.ids.take(patients)
+        )
+    repository.database.close()
+
+
+def serve(path: str) -> ApiServer:
+    """Start a server on a free port, on its own event loop thread"""
+    server = ApiServer(Database(path), port=0)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    async def run():
+        await server.start()
+        started.set()
+        await server.serve_forever()
+
+    threading.Thread(target=loop.run_until_complete, args=(run(),), daemon=True).start()
+    started.wait()
+    return server
+
+
+def read_pages(client: ApiClient, fields, cache: bool = False, fresh_connections: bool = False) -> float:
+    """Seconds to read PAGES pages of the list, following the cursor"""
+    params = {'after': 0, 'limit': PAGE_SIZE, 'fields': ",".join(fields)}
+    started = time.perf_counter()
+    for _ in range(PAGES):
+        if fresh_connections:
+            client.pool.close()
+        params['after'] = client.get("/patients", params, cache=cache)['next']
+    return time.perf_counter() - started
+
+
+def main():
+    patients = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PATIENTS
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "clinic.db")
+        build(path, patients)
+        server = serve(path)
+        url = f"http://127.0.0.1:{server.port}"
+        print(f"    {patients:,} patients, {PAGES} pages of {PAGE_SIZE}")
+
+        keep_alive = ApiClient(url)
+        read_pages(keep_alive, TABLE_FIELDS)
+        pooled = read_pages(keep_alive, TABLE_FIELDS)
+        print(f"    keep-alive pool:     {pooled / PAGES * 1000:6.2f} ms per page, "
+              f"{keep_alive.pool.opened} connections opened in {2 * PAGES} requests")
+
+        reconnecting = ApiClient(url)
+        fresh = read_pages(reconnecting, TABLE_FIELDS, fresh_connections=True)
+        print(f"    connection per page: {fresh / PAGES * 1000:6.2f} ms per page, "
+              f"{reconnecting.pool.opened} connections opened")
+
+        keep_alive.bytes_received = 0
+        read_pages(keep_alive, TABLE_FIELDS)
+        projected = keep_alive.bytes_received
+        keep_alive.bytes_received = 0
+        read_pages(keep_alive, PATIENT_FIELDS)
+        whole = keep_alive.bytes_received
+        print(f"    table fields:        {projected / PAGES / 1024:6.1f} KiB per page "
+              f"(whole records {whole / PAGES / 1024:.1f} KiB, {projected / whole:.0%})")
+
+        cached = ApiClient(url)
+        full = read_pages(cached, TABLE_FIELDS, cache=True)
+        cached.bytes_received = 0
+        revalidated = read_pages(cached, TABLE_FIELDS, cache=True)
+        assert cached.not_modified == PAGES
+        print(f"    unchanged page:      {revalidated / PAGES * 1000:6.2f} ms per page with ETag "
+              f"(full {full / PAGES * 1000:.2f} ms), {cached.bytes_received} body bytes")
+
+        for client in (keep_alive, reconnecting, cached):
+            client.close()
+
+
+if __name__ == '__main__':
+    main()
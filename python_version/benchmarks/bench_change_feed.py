@@ -0,0 +1,84 @@
+"""
+Change Feed Benchmark
+Catching up on a few edits made at another terminal, through the change
+log, against reloading every patient, at two registry sizes: the first
+should stay flat as the registry grows, the second grows with it.
+
+Run from python_version/:
+    python -m benchmarks.bench_change_feed [patients]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+from core.change_feed import ChangeFeed, keys_by_table
+from core.patient_repository import PatientRepository, patient_id
+from core.patients import Patient
+from core.storage import Database
+
+DEFAULT_PATIENTS = 200_000
+EDITS = 20
+ROUNDS = 10
+
+
+def build(path: str, patients: int) -> PatientRepository:
+    repository = PatientRepository(Database(path))
+    with repository.batch():
+        repository.add_many(
+            Patient(patient_id(seq), f"Patient {seq}", 30, "Female", f"09{seq:09d}", "", "Cebu City")
+            for seq in repository.ids.take(patients)
+        )
+    return repository
+
+
+def edit(repository: PatientRepository, first: int):
+    """The other terminal: a few edits, an add and a delete"""
+    for seq in range(first, first + EDITS - 2):
+        patient = repository.get(patient_id(seq))
+        patient.address = "Davao City"
+        repository.update(patient)
+    repository.add(Patient(repository.next_id(), "Walk-in", 41, "Male", "", "", ""))
+    repository.delete(patient_id(first + EDITS))
+
+
+def run(patients: int, directory: str):
+    path = os.path.join(directory, f"clinic_{patients}.db")
+    build(path, patients).database.close()
+    writer = PatientRepository(Database(path))
+    reader = PatientRepository(Database(path))
+    feed = ChangeFeed(reader.database, ('patients',))
+
+    catch_up = reload = 0.0
+    for round_number in range(ROUNDS):
+        edit(writer, 1 + round_number * (EDITS + 1))
+
+        started = time.perf_counter()
+        changes = feed.read()
+        patient_ids = keys_by_table(changes)['patients']
+        stored = reader.get_many(patient_ids)
+        catch_up += time.perf_counter() - started
+        assert len(patient_ids) == EDITS and len(stored) == EDITS - 1
+
+        started = time.perf_counter()
+        everyone = list(reader.iter_all())
+        reload += time.perf_counter() - started
+        # Each round adds one patient and deletes one
+        assert len(everyone) == patients
+
+    print(f"    {patients:>9,} patients, {EDITS} changes per round: change feed "
+          f"{catch_up / ROUNDS * 1000:6.2f} ms, full reload {reload / ROUNDS * 1000:8.1f} ms")
+
+
+def main():
+    patients = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PATIENTS
+    with tempfile.TemporaryDirectory() as directory:
+        run(patients // 10, directory)
+        run(patients, directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Chart Benchmark
+Frame times of the trend chart while zooming and panning a long daily
+series, against drawing every point.
+
+Run from python_version/ (offscreen, no window needed):
+    python -m benchmarks.bench_chart [days]
+"""
+
+import math
+import os
+import random
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, ".")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QPointF, QThreadPool
+from PyQt6.QtGui import QImage, QPainter, QPolygonF
+from PyQt6.QtWidgets import QApplication
+
+DEFAULT_DAYS = 20 * 365
+WIDTH, HEIGHT = 1200, 400
+FRAME_BUDGET_MS = 1000 / 60
+
+
+def make_series(days: int):
+    rng = random.Random(5)
+    return [max(0.0, 1000 + 400 * math.sin(i / 58) + rng.gauss(0, 150)) for i in range(days)]
+
+
+def frame(widget, image: QImage) -> float:
+    """Milliseconds to paint the widget once"""
+    started = time.perf_counter()
+    widget.render(image)
+    return (time.perf_counter() - started) * 1000
+
+
+def full_polyline(values, image: QImage) -> float:
+    """Milliseconds to draw every point as one antialiased polyline"""
+    started = time.perf_counter()
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    top = max(values)
+    step = WIDTH / len(values)
+    painter.drawPolyline(QPolygonF([QPointF(i * step, HEIGHT - v / top * HEIGHT) for i, v in enumerate(values)]))
+    painter.end()
+    return (time.perf_counter() - started) * 1000
+
+
+def report(label: str, samples):
+    samples = sorted(samples)
+    worst = samples[-1]
+    print(f"    {label:<26} median {samples[len(samples) // 2]:6.2f} ms  worst {worst:6.2f} ms  "
+          f"{'within' if worst <= FRAME_BUDGET_MS else 'over'} the 60 fps budget")
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_DAYS
+    app = QApplication([])
+    from ui.widgets.time_series_chart import TimeSeriesChart
+
+    values = make_series(days)
+    chart = TimeSeriesChart()
+    chart.resize(WIDTH, HEIGHT)
+    image = QImage(WIDTH, HEIGHT, QImage.Format.Format_ARGB32_Premultiplied)
+
+    started = time.perf_counter()
+    chart.set_series(date(2006, 1, 1), values)
+    print(f"{days:,} daily values; set_series {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    frame(chart, image)  # first paint loads fonts and glyph caches
+    report("full view", [frame(chart, image) for _ in range(30)])
+
+    # Zoom in around the middle, one wheel notch per frame, then pan
+    zoom = []
+    for _ in range(30):
+        span = (chart.view_end - chart.view_start) / chart.ZOOM_STEP
+        middle = (chart.view_start + chart.view_end) / 2
+        chart.set_view(middle - span / 2, middle + span / 2)
+        zoom.append(frame(chart, image))
+    report("zooming (stand-in levels)", zoom)
+    QThreadPool.globalInstance().waitForDone()
+    app.processEvents()
+
+    pan = []
+    for _ in range(60):
+        shift = (chart.view_end - chart.view_start) / 20
+        chart.set_view(chart.view_start - shift, chart.view_end - shift)
+        pan.append(frame(chart, image))
+    report("panning", pan)
+    print(f"    zoom levels built: {sorted(chart.pyramid.levels)}")
+
+    report("every point, no decimation", [full_polyline(values, image) for _ in range(10)])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Data Access Benchmark
+Time the GUI thread spends in storage calls: made directly from a slot
+against handed to DataAccess, for a page of the patient table, a
+search-result page and an add. Also counts queries for a burst of
+identical reads, as when several views ask for the same page at once.
+
+Run from python_version/:
+    python -m benchmarks.bench_data_access [patients]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+from PyQt6.QtCore import QCoreApplication
+
+from core.patient_repository import PatientRepository, patient_id
+from core.patients import Patient
+from core.storage import Database
+from ui.data_access import DataAccess
+
+DEFAULT_PATIENTS = 200_000
+PAGE_SIZE = 200
+ROUNDS = 50
+BURST = 8
+
+
+def build(path: str, patients: int) -> PatientRepository:
+    repository = PatientRepository(Database(path))
+    with repository.batch():
+        repository.add_many(
+            Patient(patient_id(seq), f"Patient {seq}", 30, "Female", f"09{seq:09d}", "", "Cebu City")
+            for seq in repository.ids.take(patients)
+        )
+    return repository
+
+
+def wait_for(application: QCoreApplication, delivered: list, count: int):
+    """Run the event loop until count results have been delivered"""
+    while len(delivered) < count:
+        application.processEvents()
+        time.sleep(0.0005)
+
+
+def walk_in(repository: PatientRepository) -> Patient:
+    patient = Patient(repository.next_id(), "Walk-in", 41, "Male", "", "", "")
+    repository.add(patient)
+    return patient
+
+
+def main():
+    patients = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PATIENTS
+    application = QCoreApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as directory:
+        repository = build(os.path.join(directory, "clinic.db"), patients)
+        data = DataAccess()
+        step = patients // ROUNDS
+        calls = {
+            'table page': lambda i: repository.page(i * step, PAGE_SIZE),
+            'search page': lambda i: repository.get_many(
+                [patient_id(seq) for seq in range(1 + i * step, patients, ROUNDS)][:PAGE_SIZE]),
+            'add patient': lambda i: walk_in(repository),
+        }
+
+        print(f"    {patients:,} patients, GUI thread time per call over {ROUNDS} rounds")
+        for name, call in calls.items():
+            started = time.perf_counter()
+            for i in range(ROUNDS):
+                call(i)
+            direct = (time.perf_counter() - started) / ROUNDS
+
+            submit = data.write if name == 'add patient' else data.read
+            delivered = []
+            blocked = 0.0
+            for i in range(ROUNDS):
+                started = time.perf_counter()
+                submit(lambda i=i: call(i), delivered.append)
+                blocked += time.perf_counter() - started
+                wait_for(application, delivered, i + 1)
+            print(f"    {name:<12} direct {direct * 1000:7.3f} ms, through DataAccess {blocked / ROUNDS * 1000:6.3f} ms")
+
+        run, joined = data.reads_run, data.reads_joined
+        delivered = []
+        for i in range(ROUNDS):
+            for _ in range(BURST):
+                data.read(lambda i=i: repository.page(i * step, PAGE_SIZE), delivered.append,
+                          key=('page', i * step))
+            wait_for(application, delivered, (i + 1) * BURST)
+        print(f"    {ROUNDS} bursts of {BURST} identical page reads: {data.reads_run - run} queries run, "
+              f"{data.reads_joined - joined} joined, {len(delivered)} results delivered")
+        data.close()
+        repository.database.close()
+
+
+if __name__ == '__main__':
+    main()
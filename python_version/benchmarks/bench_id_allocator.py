@@ -0,0 +1,124 @@
+"""
+ID Allocator Stress Test
+Several processes add patients to one database at once, one by one like
+a front desk and in bulk like an import, and every ID handed out is
+checked: unique, increasing per process, and sorted as text in numeric
+order past P9999. The old MAX(seq) + 1 scheme runs under the same load
+for comparison.
+
+Run from python_version/:
+    python -m benchmarks.bench_id_allocator [processes]
+"""
+
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+from core.patient_repository import MAX_SEQ_SQL, PatientRepository, patient_id, patient_seq
+from core.patients import Patient
+from core.storage import Database
+
+DEFAULT_PROCESSES = 4
+# Patients already stored, so allocation crosses from P9999 to PA10000
+EXISTING = 9_990
+# Per process: single adds, then bulk batches of BULK_SIZE
+SINGLE_ADDS = 300
+BULK_BATCHES = 20
+BULK_SIZE = 200
+
+
+def make_patient(pid: str, worker: int, number: int) -> Patient:
+    return Patient(pid, f"Worker {worker} patient {number}", 30, "Female",
+                   f"0917{worker:02d}{number:05d}", "", "Quezon City")
+
+
+def legacy_next_id(repository: PatientRepository) -> str:
+    """The ID scheme before the allocator: one more than the highest stored"""
+    seq = repository.database.connection.execute(MAX_SEQ_SQL).fetchone()[0] + 1
+    return f"P{seq:04d}"
+
+
+def worker(path: str, worker_number: int, legacy: bool, start_at: float):
+    """Add patients as fast as possible; returns (IDs added, failed adds, seconds)"""
+    database = Database(path)
+    repository = PatientRepository(database)
+    added, failures = [], 0
+    while time.time() < start_at:
+        time.sleep(0.001)
+    started = time.perf_counter()
+
+    for number in range(SINGLE_ADDS):
+        pid = legacy_next_id(repository) if legacy else repository.next_id()
+        try:
+            repository.add(make_patient(pid, worker_number, number))
+            added.append(pid)
+        except sqlite3.IntegrityError:
+            failures += 1
+
+    for batch in range(BULK_BATCHES):
+        numbers = range(SINGLE_ADDS + batch * BULK_SIZE, SINGLE_ADDS + (batch + 1) * BULK_SIZE)
+        try:
+            with repository.batch():
+                if legacy:
+                    seq = patient_seq(legacy_next_id(repository))
+                    ids = [f"P{seq + k:04d}" for k in range(BULK_SIZE)]
+                else:
+                    ids = [patient_id(seq) for seq in repository.ids.take(BULK_SIZE)]
+                repository.add_many(make_patient(pid, worker_number, n) for pid, n in zip(ids, numbers))
+            added.extend(ids)
+        except sqlite3.IntegrityError:
+            failures += BULK_SIZE
+
+    elapsed = time.perf_counter() - started
+    database.close()
+    return added, failures, elapsed
+
+
+def seed(path: str):
+    repository = PatientRepository(Database(path))
+    repository.add_many(make_patient(patient_id(seq), 99, seq) for seq in range(1, EXISTING + 1))
+    repository.database.close()
+
+
+def run(processes: int, legacy: bool, directory: str):
+    path = os.path.join(directory, f"{'legacy' if legacy else 'allocator'}.db")
+    seed(path)
+    start_at = time.time() + 0.5
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.starmap(worker, [(path, number, legacy, start_at) for number in range(processes)])
+
+    ids = [pid for added, _, _ in results for pid in added]
+    failures = sum(failed for _, failed, _ in results)
+    stored = PatientRepository(Database(path)).count() - EXISTING
+    slowest = max(elapsed for _, _, elapsed in results)
+    attempted = processes * (SINGLE_ADDS + BULK_BATCHES * BULK_SIZE)
+    name = "MAX(seq) + 1" if legacy else "IdAllocator"
+    print(f"    {name:<13} {attempted:,} adds in {slowest:5.2f} s: stored {stored:,}, "
+          f"failed as duplicate IDs {failures:,}")
+    if legacy:
+        return
+
+    assert len(set(ids)) == len(ids) == stored == attempted, "duplicate or lost IDs"
+    for added, _, _ in results:
+        seqs = [patient_seq(pid) for pid in added]
+        assert seqs == sorted(seqs), "IDs went backwards within a process"
+    assert sorted(ids) == sorted(ids, key=patient_seq), "text order differs from numeric order"
+    print(f"    unique, increasing per process, text-sortable: "
+          f"{min(ids, key=patient_seq)} .. {max(ids, key=patient_seq)}")
+
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PROCESSES
+    print(f"{processes} processes, {EXISTING:,} patients stored beforehand")
+    with tempfile.TemporaryDirectory() as directory:
+        run(processes, False, directory)
+        run(processes, True, directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Invoice Export Memory Benchmark
+Exports small and large invoice runs to CSV and PDF, for one month and
+for the whole year, and compares peak traced memory, which should stay
+flat as the run grows.
+
+Run from python_version/:
+    python -m benchmarks.bench_invoice_export [large patient count]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, ".")
+
+from benchmarks.bench_month_end import PERIOD, YEAR_START, fill
+from core.invoice_export import FORMAT_CSV, FORMAT_PDF, export_period
+from core.invoicing import InvoiceRepository
+from core.storage import Database
+
+SMALL_PATIENTS = 1_000
+DEFAULT_LARGE_PATIENTS = 50_000
+
+YEAR_PERIODS = [f"{YEAR_START.year}-{month:02d}" for month in range(1, 13)]
+RANGES = {
+    "1 month": (PERIOD, PERIOD),
+    "12 months": (YEAR_PERIODS[0], YEAR_PERIODS[-1]),
+}
+
+
+def measure(patient_count: int, directory: str):
+    """Fill a database, issue a year of invoices, then export them in both formats"""
+    database = Database(os.path.join(directory, f"bench-{patient_count}.db"))
+    fill(database, patient_count)
+    invoices = InvoiceRepository(database)
+    for period in YEAR_PERIODS:
+        invoices.generate_month_end(period, workers=1)
+
+    for export_format in (FORMAT_CSV, FORMAT_PDF):
+        for name, (first_period, last_period) in RANGES.items():
+            path = os.path.join(directory, f"invoices-{patient_count}.{export_format}")
+            tracemalloc.start()
+            start = time.perf_counter()
+            count = export_period(invoices, first_period, last_period, path, export_format)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            size = os.path.getsize(path) / 1024 / 1024
+            print(f"  {export_format.upper()}  {name:<9}  {count:>9,} invoices  {elapsed:7.2f} s  "
+                  f"{size:7.1f} MB file  peak {peak / 1024:8.0f} KB")
+    database.close()
+
+
+def main():
+    large = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LARGE_PATIENTS
+    with tempfile.TemporaryDirectory() as directory:
+        for patient_count in (SMALL_PATIENTS, large):
+            print(f"{patient_count:,} patients")
+            measure(patient_count, directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Login Latency Benchmark
+Measures credential lookup and verification against a 10k-user store at
+several scrypt cost settings, next to the old linear scan for reference.
+
+Run from python_version/:
+    python -m benchmarks.bench_login [user count]
+"""
+
+import statistics
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from core.auth import CredentialStore, KdfParams, UserRecord, hash_password
+
+DEFAULT_USERS = 10_000
+REPEATS = 5
+COST_SETTINGS = [
+    KdfParams(n=2 ** 12),
+    KdfParams(n=2 ** 14),
+    KdfParams(n=2 ** 15),
+    KdfParams(n=2 ** 16),
+]
+# Filler accounts are hashed cheaply; only the measured account's cost matters
+FILLER_PARAMS = KdfParams(n=2 ** 4, r=1)
+
+
+def timed(func, repeats: int = REPEATS) -> float:
+    """Median wall time of func() in milliseconds"""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def build_store(user_count: int, params: KdfParams) -> CredentialStore:
+    store = CredentialStore(params)
+    filler_hash = hash_password("filler-password", FILLER_PARAMS)
+    for i in range(user_count - 1):
+        store.add_record(UserRecord(str(i), f"user{i:05d}", "Employee", f"User {i}", filler_hash))
+    store.add_user("target", "target.user", "correct horse", "Employee", "Target User")
+    return store
+
+
+def main():
+    user_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_USERS
+
+    # The previous implementation: linear scan, plaintext comparison
+    users = [{'username': f"user{i:05d}", 'password': "pw", 'role': "Employee"} for i in range(user_count)]
+    def linear_scan():
+        for user in users:
+            if user['username'] == "missing" and user['password'] == "pw":
+                return user
+    print(f"{user_count:,} users")
+    print(f"    linear scan (old, worst case)     {timed(linear_scan, 50):9.3f} ms")
+
+    for params in COST_SETTINGS:
+        store = build_store(user_count, params)
+        lookup = timed(lambda: store.get("target.user"), 50)
+        success = timed(lambda: store.verify("target.user", "correct horse", "Employee"))
+        wrong_password = timed(lambda: store.verify("target.user", "wrong", "Employee"))
+        unknown_user = timed(lambda: store.verify("nobody", "wrong", "Employee"))
+        memory_mib = 128 * params.r * params.n / 2 ** 20
+        print(f"    scrypt n=2^{params.n.bit_length() - 1:<2} r={params.r} ({memory_mib:5.1f} MiB)  "
+              f"lookup {lookup:.4f} ms  ok {success:8.1f} ms  "
+              f"bad password {wrong_password:8.1f} ms  unknown user {unknown_user:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Month-End Invoicing Benchmark
+Fills a scratch database with a year of ledger activity and times the
+month-end invoice run in-process and across a process pool.
+
+Run from python_version/:
+    python -m benchmarks.bench_month_end [patient count]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, ".")
+
+from core.billing import (
+    APPLY_BALANCE_SQL, INSERT_ENTRY_SQL, KIND_CHARGE, KIND_PAYMENT, POSTED_FORMAT, Ledger
+)
+from core.invoicing import InvoiceRepository
+from core.storage import Database
+
+DEFAULT_PATIENTS = 100_000
+ENTRIES_PER_PATIENT = 12
+# A year that has ended, since invoices are only issued for past months
+PERIOD = "2025-06"
+YEAR_START = datetime(2025, 1, 1)
+
+
+def fill(database: Database, patient_count: int):
+    """Post ENTRIES_PER_PATIENT charges and payments per patient over the year"""
+    Ledger(database)
+    rng = random.Random(7)
+    with database.transaction() as connection:
+        for seq in range(1, patient_count + 1):
+            patient_id = f"P{seq:04d}"
+            for _ in range(ENTRIES_PER_PATIENT):
+                posted = YEAR_START + timedelta(minutes=rng.randrange(365 * 24 * 60))
+                if rng.random() < 0.6:
+                    kind, cents = KIND_CHARGE, rng.randrange(50_000, 500_000)
+                else:
+                    kind, cents = KIND_PAYMENT, -rng.randrange(50_000, 300_000)
+                entry_id = connection.execute(INSERT_ENTRY_SQL, (
+                    patient_id, kind, cents, "", "", posted.strftime(POSTED_FORMAT)
+                )).lastrowid
+                connection.execute(APPLY_BALANCE_SQL, (patient_id, cents, entry_id))
+
+
+def run(database: Database, workers: int) -> float:
+    """Seconds for one month-end run into an empty invoices table"""
+    database.connection.execute("DROP TABLE IF EXISTS invoices")
+    invoices = InvoiceRepository(database)
+    start = time.perf_counter()
+    issued = invoices.generate_month_end(PERIOD, workers=workers)
+    elapsed = time.perf_counter() - start
+    print(f"  workers={workers:<3} {issued:>9,} invoices  {elapsed:7.2f} s")
+    return elapsed
+
+
+def main():
+    patient_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PATIENTS
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(os.path.join(directory, "bench.db"))
+        start = time.perf_counter()
+        fill(database, patient_count)
+        print(f"{patient_count:,} patients, {patient_count * ENTRIES_PER_PATIENT:,} ledger entries "
+              f"(filled in {time.perf_counter() - start:.1f} s)")
+
+        run(database, workers=1)
+        run(database, workers=max(2, os.cpu_count() or 1))
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
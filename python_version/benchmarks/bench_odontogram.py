@@ -0,0 +1,102 @@
+"""
+Odontogram Benchmark
+Time to switch the tooth chart between patients: loading the chart,
+deriving tooth states and repainting the changed teeth.
+
+Run from python_version/ (offscreen, no window needed):
+    python -m benchmarks.bench_odontogram [patients] [scale]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, ".")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+if len(sys.argv) > 2:
+    os.environ["QT_SCALE_FACTOR"] = sys.argv[2]
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication
+
+DEFAULT_PATIENTS = 2000
+RECORDS_PER_PATIENT = 12
+FRAME_BUDGET_MS = 1000 / 60
+
+CODES = ("D2391", "D2392", "D2740", "D3330", "D7140", "D0120")
+
+
+def make_records(patients: int):
+    from core.treatments import STATUSES, SURFACES, TreatmentRecord
+    rng = random.Random(19)
+    for number in range(1, patients + 1):
+        for _ in range(RECORDS_PER_PATIENT):
+            surfaces = "".join(rng.sample(SURFACES, rng.randint(0, 3)))
+            yield TreatmentRecord(
+                None, f"P{number:04d}", rng.randint(1, 32), surfaces, rng.choice(CODES),
+                rng.choice(STATUSES), "Dr. Santos", date(2020, 1, 1) + timedelta(days=rng.randint(0, 1500)), ""
+            )
+
+
+def report(label: str, samples):
+    samples = sorted(samples)
+    worst = samples[-1]
+    print(f"    {label:<30} median {samples[len(samples) // 2]:6.2f} ms  p99 "
+          f"{samples[int(len(samples) * 0.99)]:6.2f} ms  "
+          f"{'within' if worst <= FRAME_BUDGET_MS else 'over'} the 60 fps budget")
+
+
+def main():
+    patients = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PATIENTS
+    QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
+    app = QApplication([])
+    from core.storage import Database
+    from core.treatments import TreatmentHistory
+    from ui.widgets.odontogram import Odontogram
+
+    history = TreatmentHistory(Database(":memory:"))
+    history.add_many(make_records(patients))
+
+    widget = Odontogram()
+    widget.resize(900, widget.sizeHint().height())
+    widget.show()
+    app.processEvents()
+    painted = []
+    paint_event = widget.paintEvent
+
+    def timed_paint(event):
+        started = time.perf_counter()
+        paint_event(event)
+        painted.append((time.perf_counter() - started) * 1000)
+
+    widget.paintEvent = timed_paint
+    print(f"{patients:,} patients x {RECORDS_PER_PATIENT} records; "
+          f"device pixel ratio {widget.devicePixelRatioF():g}")
+
+    ids = [f"P{number:04d}" for number in range(1, patients + 1)]
+    load, switch = [], []
+    for patient_id in ids:
+        started = time.perf_counter()
+        states = history.chart(patient_id).tooth_states()
+        loaded = time.perf_counter()
+        widget.set_states(states)
+        app.processEvents()
+        load.append((loaded - started) * 1000)
+        switch.append((time.perf_counter() - started) * 1000)
+    report("chart query + tooth states", load)
+    report("paint (changed teeth only)", painted)
+    report("whole switch", switch)
+    print(f"    distinct tooth pixmaps cached: {len(widget._teeth)}")
+
+    full = []
+    for _ in range(50):
+        started = time.perf_counter()
+        widget.repaint()
+        full.append((time.perf_counter() - started) * 1000)
+    report("full repaint (layers warm)", full)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Patient Import Benchmark
+Throughput and peak memory of the streaming CSV import at two file
+sizes; the peak should not grow with the file.
+
+Run from python_version/:
+    python -m benchmarks.bench_patient_import [rows]
+"""
+
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, ".")
+
+from core.jobs import CancellationToken, JobContext
+from core.patient_import import PatientImport
+from core.storage import Database
+
+DEFAULT_ROWS = 200_000
+# Share of rows repeating an earlier contact, and of rows with a bad age
+DUPLICATE_SHARE = 0.05
+INVALID_SHARE = 0.01
+
+
+def write_csv(path: str, rows: int):
+    rng = random.Random(21)
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Name", "Age", "Gender", "Phone", "Email", "Address", "Registered"])
+        for number in range(rows):
+            contact = f"09{number:09d}"
+            if number and rng.random() < DUPLICATE_SHARE:
+                contact = f"09{rng.randrange(number):09d}"
+            age = "n/a" if rng.random() < INVALID_SHARE else str(rng.randrange(1, 95))
+            writer.writerow([
+                f"Patient {number}", age, rng.choice(("Male", "Female")), contact,
+                f"patient{number}@example.com", f"{number} Mabini St", "2020-01-15",
+            ])
+
+
+def import_once(csv_path: str, db_path: str):
+    database = Database(db_path)
+    try:
+        return PatientImport(csv_path)(JobContext(database, CancellationToken()))
+    finally:
+        database.close()
+
+
+def run(rows: int, directory: str):
+    csv_path = os.path.join(directory, f"patients_{rows}.csv")
+    write_csv(csv_path, rows)
+
+    started = time.perf_counter()
+    summary = import_once(csv_path, os.path.join(directory, f"timed_{rows}.db"))
+    elapsed = time.perf_counter() - started
+
+    # A second import into a fresh database under tracemalloc, which slows it down
+    tracemalloc.start()
+    import_once(csv_path, os.path.join(directory, f"traced_{rows}.db"))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"    {rows:>9,} rows ({os.path.getsize(csv_path) / 2**20:5.1f} MB): {elapsed:6.2f} s, "
+          f"{rows / elapsed:8,.0f} rows/s, peak Python memory {peak / 2**20:5.2f} MB; "
+          f"imported {summary.imported:,}, duplicates {summary.duplicates:,}, invalid {summary.invalid:,}")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    with tempfile.TemporaryDirectory() as directory:
+        run(rows // 10, directory)
+        run(rows, directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Patient Memory Benchmark
+Compares memory per record of the original Patient class, the slotted
+Patient and the columnar store.
+
+Run from python_version/:
+    python -m benchmarks.bench_patient_memory [counts...]
+"""
+
+import gc
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, ".")
+
+from core.columnar import PatientColumns
+from core.patients import Patient
+
+DEFAULT_COUNTS = [100_000, 1_000_000]
+GENDERS = ["Male", "Female", "Other"]
+
+
+class LegacyPatient:
+    """The Patient class as it was before slots (one __dict__ per record)"""
+    def __init__(self, id, name, age, gender, contact, email, address):
+        self.id = id
+        self.name = name
+        self.age = age
+        self.gender = gender
+        self.contact = contact
+        self.email = email
+        self.address = address
+        self.registered_date = datetime.now().strftime("%Y-%m-%d")
+
+
+def record_fields(i: int):
+    """Distinct field values for record i, like a real import would have"""
+    return (
+        f"P{i:08d}", f"Patient Name {i}", 20 + i % 60,
+        # Built per record so each one is a fresh string, as parsed input would be
+        GENDERS[i % 3].encode().decode(),
+        f"555-{i:07d}", f"patient{i}@example.com", f"{i} Main Street",
+    )
+
+
+def measure(build) -> int:
+    """Bytes still allocated after build() returns its result"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    gc.collect()
+    return current
+
+
+def run(count: int):
+    legacy = measure(lambda: [LegacyPatient(*record_fields(i)) for i in range(count)])
+    slotted = measure(lambda: [Patient(*record_fields(i)) for i in range(count)])
+    columnar = measure(lambda: PatientColumns.from_patients(
+        Patient(*record_fields(i), registered_date="2024-01-15") for i in range(count)
+    ))
+
+    print(f"{count:>10,} records")
+    for label, size in (("legacy class", legacy), ("slotted Patient", slotted), ("PatientColumns", columnar)):
+        print(f"    {label:<16} {size / 2**20:9.1f} MiB  {size / count:7.1f} B/record  "
+              f"{size / legacy:6.1%} of legacy")
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or DEFAULT_COUNTS
+    for count in counts:
+        run(count)
+
+
+if __name__ == '__main__':
+    main()
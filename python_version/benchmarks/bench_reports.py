@@ -0,0 +1,113 @@
+"""
+Reports Benchmark
+Fills five years of patients, appointments and charges, then times the
+dashboard rolled up from daily aggregates against the same figures
+computed by scanning the raw tables.
+
+Run from python_version/:
+    python -m benchmarks.bench_reports
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, ".")
+
+from core.appointment_repository import INSERT_SQL as INSERT_APPOINTMENT_SQL, TIME_FORMAT
+from core.billing import INSERT_ENTRY_SQL, KIND_CHARGE, POSTED_FORMAT
+from core.patient_repository import INSERT_SQL as INSERT_PATIENT_SQL
+from core.reports import PERIOD_MONTH, PERIOD_WEEK, PERIOD_YEAR, ReportStore
+from core.storage import Database
+
+YEARS = 5
+FIRST_DAY = date(2021, 1, 1)
+PATIENTS_PER_DAY = 40
+APPOINTMENTS_PER_DAY = 60
+CHARGES_PER_DAY = 80
+DENTISTS = ["Dr. Admin User", "Dr. Santos", "Dr. Reyes"]
+STATUSES = ["Completed"] * 8 + ["No-show", "Cancelled"]
+TREATMENTS = ["D0120", "D1110", "D2391", "D2740", "D3310", "D7140", "D8080"]
+
+RAW_QUERIES = {
+    "new patients": "SELECT substr(registered_date, 1, 7), COUNT(*) FROM patients "
+                    "WHERE registered_date BETWEEN ? AND ? GROUP BY 1",
+    "appointments": "SELECT substr(start, 1, 7), status, COUNT(*) FROM appointments "
+                    "WHERE start BETWEEN ? AND ? GROUP BY 1, 2",
+    "revenue": "SELECT substr(posted_at, 1, 7), treatment, SUM(amount_cents) FROM ledger_entries "
+               "WHERE kind = 'charge' AND posted_at BETWEEN ? AND ? GROUP BY 1, 2",
+    "utilization": "SELECT substr(start, 1, 7), dentist, "
+                   "SUM((julianday(end) - julianday(start)) * 1440) FROM appointments "
+                   "WHERE status != 'Cancelled' AND start BETWEEN ? AND ? GROUP BY 1, 2",
+}
+
+
+def fill(database: Database):
+    """Write YEARS of records through the normal tables (triggers fire)"""
+    ReportStore(database)
+    rng = random.Random(3)
+    seq = 0
+    with database.transaction() as connection:
+        for offset in range(YEARS * 365):
+            day = FIRST_DAY + timedelta(days=offset)
+            patients = []
+            for _ in range(PATIENTS_PER_DAY):
+                seq += 1
+                patients.append((seq, f"P{seq:06d}", "Patient", 30, "Female", "", "", "", day.isoformat()))
+            connection.executemany(INSERT_PATIENT_SQL, patients)
+
+            appointments = []
+            for _ in range(APPOINTMENTS_PER_DAY):
+                start = datetime.combine(day, datetime.min.time()) + timedelta(minutes=420 + 15 * rng.randrange(44))
+                appointments.append((
+                    f"P{rng.randint(1, seq):06d}", rng.choice(DENTISTS), "Chair 1",
+                    start.strftime(TIME_FORMAT), (start + timedelta(minutes=30)).strftime(TIME_FORMAT),
+                    rng.choice(STATUSES), "",
+                ))
+            connection.executemany(INSERT_APPOINTMENT_SQL, appointments)
+
+            charges = []
+            for _ in range(CHARGES_PER_DAY):
+                posted = datetime.combine(day, datetime.min.time()) + timedelta(minutes=rng.randrange(1440))
+                charges.append((
+                    f"P{rng.randint(1, seq):06d}", KIND_CHARGE, rng.randrange(50_000, 500_000),
+                    "", rng.choice(TREATMENTS), posted.strftime(POSTED_FORMAT),
+                ))
+            connection.executemany(INSERT_ENTRY_SQL, charges)
+
+
+def timed(func) -> float:
+    """Best of three wall times of func() in milliseconds"""
+    samples = []
+    for _ in range(3):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return min(samples)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(os.path.join(directory, "bench.db"))
+        start = time.perf_counter()
+        fill(database)
+        days = YEARS * 365
+        print(f"{YEARS} years: {days * PATIENTS_PER_DAY:,} patients, {days * APPOINTMENTS_PER_DAY:,} "
+              f"appointments, {days * CHARGES_PER_DAY:,} charges (filled in {time.perf_counter() - start:.1f} s)")
+
+        reports = ReportStore(database)
+        first, last = FIRST_DAY, FIRST_DAY + timedelta(days=days - 1)
+        for period in (PERIOD_WEEK, PERIOD_MONTH, PERIOD_YEAR):
+            print(f"  dashboard by {period:<6} {timed(lambda: reports.dashboard(first, last, period)):8.1f} ms")
+
+        bounds = (first.isoformat(), (last + timedelta(days=1)).isoformat())
+        raw = timed(lambda: [database.connection.execute(sql, bounds).fetchall() for sql in RAW_QUERIES.values()])
+        print(f"  raw table scans (monthly)  {raw:8.1f} ms")
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
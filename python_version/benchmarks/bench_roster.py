@@ -0,0 +1,90 @@
+"""
+Roster Benchmark
+Availability checks and "who is free for 45 minutes on Tuesday" on slot
+bitsets, against walking each member's shifts slot by slot.
+
+Run from python_version/:
+    python -m benchmarks.bench_roster [members]
+"""
+
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, ".")
+
+from core.staff import (
+    ROLES, SLOT_MINUTES, SLOTS_PER_DAY, Roster, Shift, StaffMember, TimeOff, slots_for
+)
+from core.storage import Database
+
+DEFAULT_MEMBERS = 200
+TUESDAY = date(2026, 10, 20)
+CHECKS = 100_000
+
+
+def build(members: int) -> Roster:
+    rng = random.Random(20)
+    roster = Roster(Database(":memory:"))
+    for number in range(members):
+        member = roster.save(StaffMember(None, f"Staff {number:03d}", rng.choice(ROLES)))
+        shifts = []
+        for weekday in range(6):
+            start = rng.randrange(7 * 60, 11 * 60, SLOT_MINUTES)
+            lunch = start + rng.randrange(3 * 60, 5 * 60, SLOT_MINUTES)
+            shifts.append(Shift(weekday, start, lunch))
+            shifts.append(Shift(weekday, lunch + 60, min(lunch + 60 + 4 * 60, 20 * 60)))
+        roster.set_shifts(member.id, shifts)
+        if rng.random() < 0.2:
+            off = rng.randrange(8 * 60, 16 * 60, SLOT_MINUTES)
+            roster.add_time_off(TimeOff(None, member.id, TUESDAY, off, off + 90))
+    return roster
+
+
+def free_by_walking(roster: Roster, day: date, minutes: int):
+    """The nested-loop answer: every member, every start slot, every slot of the stretch"""
+    slots = slots_for(minutes)
+    found = []
+    for member in roster.all():
+        shifts = [s for s in roster.shifts(member.id) if s.weekday == day.weekday()]
+        away = roster.time_off(member.id, day, day)
+
+        def works(slot):
+            minute = slot * SLOT_MINUTES
+            return (any(s.start_minute <= minute < s.end_minute for s in shifts)
+                    and not any(t.start_minute <= minute < t.end_minute for t in away))
+
+        if any(all(works(start + k) for k in range(slots)) for start in range(SLOTS_PER_DAY - slots + 1)):
+            found.append(member)
+    return found
+
+
+def main():
+    members = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MEMBERS
+    roster = build(members)
+    print(f"{members} staff, 12 shifts each")
+
+    started = time.perf_counter()
+    free = roster.free_members(TUESDAY, 45)
+    bitset_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    walked = free_by_walking(roster, TUESDAY, 45)
+    walk_ms = (time.perf_counter() - started) * 1000
+    assert [m.id for m, _ in free] == [m.id for m in walked]
+    print(f"    free for 45 min on Tuesday: {len(free)} staff; bitsets {bitset_ms:.2f} ms, "
+          f"slot walk {walk_ms:.1f} ms")
+
+    rng = random.Random(1)
+    names = [member.name for member in roster.all()]
+    starts = [datetime(2026, 10, 19 + rng.randrange(7), rng.randrange(7, 19), rng.choice((0, 15, 30, 45)))
+              for _ in range(CHECKS)]
+    started = time.perf_counter()
+    for moment in starts:
+        roster.is_available(rng.choice(names), moment, moment + timedelta(minutes=45))
+    per_check = (time.perf_counter() - started) / CHECKS * 1e6
+    print(f"    is_available (Scheduler callback): {per_check:.2f} us per check")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+# Core Package
\ No newline at end of file
@@ -0,0 +1,231 @@
+"""
+Patient Analytics
+Vectorized demographics over a cached NumPy snapshot of the patients table
+"""
+
+import threading
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # analytics are optional; the rest of the app runs without NumPy
+    np = None
+
+from .columnar import PatientColumns
+from .jobs import CancellationToken
+from .patient_repository import SCHEMA as PATIENT_SCHEMA
+from .storage import Database
+
+SNAPSHOT_SQL = "SELECT age, gender, registered_date FROM patients ORDER BY seq"
+
+# Rows fetched per round trip while building a snapshot
+SNAPSHOT_BATCH = 50_000
+
+# Ages are clamped to [0, AGE_LIMIT) when a snapshot is built
+AGE_LIMIT = 200
+
+# Default age bands: 0-9, 10-19, ... 80-89, 90+
+AGE_BAND_EDGES = (0, 10, 20, 30, 40, 50, 60, 70, 80, 90, AGE_LIMIT)
+
+# Proleptic ordinal of 1970-01-01, to convert date ordinals to datetime64 days
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def analytics_available() -> bool:
+    """Check whether NumPy is installed"""
+    return np is not None
+
+
+class AgeBand(NamedTuple):
+    """Patients in one age band"""
+    label: str
+    count: int
+    share: float
+
+
+class GroupStats(NamedTuple):
+    """Age figures for one gender"""
+    gender: str
+    count: int
+    mean_age: float
+    median_age: float
+
+
+class PatientSnapshot:
+    """
+    The analysed patient columns as NumPy arrays
+
+    ages: int32; genders: int32 codes into gender_labels; registered:
+    datetime64[D]. Immutable once built; a write produces a new one.
+    Entered ages have no upper bound and gender is free text, so both
+    are coded wide enough for whatever an import brings in.
+
+    Ages are small integers, so per-age counts (one bincount pass) stand
+    in for sorting: percentiles and medians are read off cumulative sums.
+    """
+
+    def __init__(self, ages, gender_codes, gender_labels: List[str], registered, version: int):
+        self.ages = np.clip(ages, 0, AGE_LIMIT - 1)
+        self.gender_codes = gender_codes
+        self.gender_labels = gender_labels
+        self.registered = registered
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.ages)
+
+    @classmethod
+    def from_cursor(cls, cursor, version: int = 0,
+                    token: Optional[CancellationToken] = None) -> 'PatientSnapshot':
+        """Build from a cursor over (age, gender, registered_date) rows, a batch at a time"""
+        age_chunks = [np.zeros(0, np.int32)]
+        code_chunks = [np.zeros(0, np.int32)]
+        date_chunks = [np.zeros(0, "datetime64[D]")]
+        codes: Dict[str, int] = {}
+        while True:
+            if token:
+                token.check()
+            batch = cursor.fetchmany(SNAPSHOT_BATCH)
+            if not batch:
+                break
+            ages, genders, registered = zip(*batch)
+            age_chunks.append(np.array(ages, dtype=np.int32))
+            code_chunks.append(np.array(
+                [codes.setdefault(gender, len(codes)) for gender in genders], dtype=np.int32
+            ))
+            date_chunks.append(np.array(registered, dtype="datetime64[D]"))
+        return cls(np.concatenate(age_chunks), np.concatenate(code_chunks), list(codes),
+                   np.concatenate(date_chunks), version)
+
+    @classmethod
+    def from_columns(cls, columns: PatientColumns, version: int = 0) -> 'PatientSnapshot':
+        """Build from a columnar store; ages and dates are copied straight from its arrays"""
+        labels = sorted(set(columns.genders))
+        code_of = {label: code for code, label in enumerate(labels)}
+        return cls(
+            np.frombuffer(columns.ages, dtype=np.int32),
+            np.fromiter((code_of[g] for g in columns.genders), dtype=np.int32, count=len(columns)),
+            labels,
+            (np.frombuffer(columns.registered, dtype=np.int32) - _EPOCH_ORDINAL).astype("datetime64[D]"),
+            version,
+        )
+
+    # === Reports ===
+
+    def age_counts(self, codes=None):
+        """Patients per age (index = age), overall or for one gender code"""
+        ages = self.ages if codes is None else self.ages[self.gender_codes == codes]
+        return np.bincount(ages, minlength=AGE_LIMIT)
+
+    def age_bands(self, edges: Sequence[int] = AGE_BAND_EDGES) -> List[AgeBand]:
+        """Histogram of ages over [edges[i], edges[i+1]) bands"""
+        counts, _ = np.histogram(self.ages, bins=edges)
+        total = max(len(self), 1)
+        bands = []
+        for i, count in enumerate(counts):
+            low, high = edges[i], edges[i + 1]
+            label = f"{low}+" if i == len(counts) - 1 else f"{low}-{high - 1}"
+            bands.append(AgeBand(label, int(count), float(count / total)))
+        return bands
+
+    def age_percentiles(self, percentiles: Sequence[float] = (25, 50, 75, 90)) -> Dict[float, float]:
+        """Age at each percentile (linear interpolation, as numpy.percentile)"""
+        values = _percentiles_from_counts(self.age_counts(), percentiles)
+        return dict(zip(percentiles, values))
+
+    def gender_breakdown(self) -> Dict[str, int]:
+        """Patient count per gender"""
+        counts = np.bincount(self.gender_codes, minlength=len(self.gender_labels))
+        return {label: int(counts[code]) for code, label in enumerate(self.gender_labels)}
+
+    def age_by_gender(self) -> List[GroupStats]:
+        """Count, mean and median age per gender from one combined bincount"""
+        groups = len(self.gender_labels)
+        width = AGE_LIMIT
+        grid = np.bincount(self.gender_codes.astype(np.int64) * width + self.ages,
+                           minlength=groups * width).reshape(groups, width)
+        stats = []
+        for code, label in enumerate(self.gender_labels):
+            counts = grid[code]
+            count = int(counts.sum())
+            if not count:
+                continue
+            mean = float(np.dot(counts, np.arange(width)) / count)
+            stats.append(GroupStats(label, count, mean, _percentiles_from_counts(counts, (50,))[0]))
+        return stats
+
+    def registrations(self, unit: str = "M", start: Optional[date] = None,
+                      end: Optional[date] = None) -> List[Tuple[str, int]]:
+        """New registrations per day ('D'), month ('M') or year ('Y') within [start, end]"""
+        registered = self.registered
+        if start is not None:
+            registered = registered[registered >= np.datetime64(start, "D")]
+        if end is not None:
+            registered = registered[registered <= np.datetime64(end, "D")]
+        if not len(registered):
+            return []
+
+        # Count per day first, then convert only the distinct days to buckets
+        days = registered.astype(np.int64)
+        first = days.min()
+        per_day = np.bincount(days - first)
+        present = np.flatnonzero(per_day)
+        buckets = (present + first).astype("datetime64[D]").astype(f"datetime64[{unit}]")
+        labels, index = np.unique(buckets, return_inverse=True)
+        counts = np.bincount(index, weights=per_day[present]).astype(np.int64)
+        return [(str(label), int(count)) for label, count in zip(labels, counts)]
+
+
+def _percentiles_from_counts(counts, percentiles: Sequence[float]) -> List[float]:
+    """Percentiles of the values 0..len(counts)-1 given how often each occurs"""
+    total = int(counts.sum())
+    if not total:
+        return [0.0 for _ in percentiles]
+    cumulative = np.cumsum(counts)
+    positions = np.asarray(percentiles, dtype=float) / 100 * (total - 1)
+    lower = np.floor(positions)
+    # The value at sorted position k is the first one whose cumulative count exceeds k
+    below = np.searchsorted(cumulative, lower, side='right')
+    above = np.searchsorted(cumulative, np.minimum(lower + 1, total - 1), side='right')
+    return [float(v) for v in below + (above - below) * (positions - lower)]
+
+
+class PatientAnalytics:
+    """
+    Snapshot cache over the patients table
+
+    The snapshot is rebuilt only when the table's write counter
+    (Database.track_writes) has moved since it was taken, so repeated
+    reports cost one counter read. Snapshots are never modified, so one
+    can be handed to other threads.
+    """
+
+    def __init__(self, database: Database):
+        if np is None:
+            raise RuntimeError("Patient analytics need NumPy (pip install numpy)")
+        self.database = database
+        self.database.connection.executescript(PATIENT_SCHEMA)
+        self.database.track_writes("patients")
+        self._snapshot: Optional[PatientSnapshot] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Drop the cached snapshot"""
+        with self._lock:
+            self._snapshot = None
+
+    def snapshot(self, database: Optional[Database] = None,
+                 token: Optional[CancellationToken] = None) -> PatientSnapshot:
+        """
+        The current snapshot, rebuilt if patients were written since the last one
+
+        Background jobs pass their own database (connection) and token.
+        """
+        database = database or self.database
+        with self._lock:
+            version = database.write_version("patients")
+            if self._snapshot is None or self._snapshot.version != version:
+                cursor = database.connection.execute(SNAPSHOT_SQL)
+                self._snapshot = PatientSnapshot.from_cursor(cursor, version, token)
+            return self._snapshot
@@ -0,0 +1,351 @@
+"""
+API Client
+Clinic data through the API server: pooled keep-alive connections and
+ETag-revalidated reads, behind the same interfaces as local storage
+"""
+
+import http.client
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote, urlencode, urlsplit
+
+from .change_feed import Change
+from .patient_repository import PatientPage
+from .patients import Patient
+
+# Environment variable naming the server to use instead of the local database,
+# e.g. http://192.168.1.10:8765
+SERVER_URL_ENV = "SMILEY_DENTAL_SERVER"
+
+# Idle connections kept per client. An idle one is trusted for less than the
+# server's keep-alive timeout, so a reused connection is never one it dropped.
+POOL_SIZE = 4
+POOL_IDLE_SECONDS = 20
+
+# Long enough for a /changes long poll
+REQUEST_TIMEOUT = 60
+CHANGE_WAIT_SECONDS = 25
+
+# Revalidated GET responses kept per client, least recently used dropped first
+MAX_CACHED_RESPONSES = 256
+
+# Columns the patients table shows; the rest is fetched when a record is opened
+TABLE_FIELDS = ('id', 'name', 'age', 'gender', 'contact', 'email', 'registered_date')
+
+# IDs per ?ids= request, keeping the URL short
+IDS_PER_REQUEST = 200
+
+# Safe to send again when a reused connection turns out to be closed
+RETRY_METHODS = ('GET', 'PUT', 'DELETE')
+
+
+class ApiError(Exception):
+    """A request the server refused (status >= 400) or could not be reached (status 0)"""
+
+    def __init__(self, status: int, message: str, body: Optional[Dict] = None):
+        super().__init__(message)
+        self.status = status
+        self.body = body or {}
+
+
+class ConnectionPool:
+    """Keep-alive HTTP connections to one server, shared by threads"""
+
+    def __init__(self, host: str, port: int, size: int = POOL_SIZE, timeout: float = REQUEST_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self._idle: List[Tuple[http.client.HTTPConnection, float]] = []
+        self._lock = threading.Lock()
+        # Connections opened so far; a warm pool stops adding to it
+        self.opened = 0
+
+    def acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """A connection and whether it was reused; opens one when none is idle"""
+        with self._lock:
+            while self._idle:
+                connection, since = self._idle.pop()
+                if time.monotonic() - since < POOL_IDLE_SECONDS:
+                    return connection, True
+                connection.close()
+            self.opened += 1
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout), False
+
+    def release(self, connection: http.client.HTTPConnection):
+        """Return a connection after its response was read in full"""
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((connection, time.monotonic()))
+                return
+        connection.close()
+
+    def close(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            connection.close()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+class ApiClient:
+    """
+    JSON requests to the API server
+
+    GET responses that carry an ETag are kept; asking again sends
+    If-None-Match, and a 304 answer (no body) reuses the kept copy, so
+    re-reading unchanged data costs a round trip and nothing more.
+    """
+
+    def __init__(self, base_url: str, pool_size: int = POOL_SIZE):
+        url = urlsplit(base_url)
+        self.base_url = base_url.rstrip("/")
+        self.pool = ConnectionPool(url.hostname, url.port or 80, pool_size)
+        self._cache: 'OrderedDict[str, Tuple[str, object]]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Response body bytes received and 304 answers, for benchmarks
+        self.bytes_received = 0
+        self.not_modified = 0
+
+    def get(self, path: str, params: Optional[Dict] = None, cache: bool = True):
+        """GET a resource, revalidating a kept copy instead of downloading it again"""
+        target = path + ("?" + urlencode(params) if params else "")
+        if not cache:
+            return self.request('GET', target)[2]
+        with self._cache_lock:
+            cached = self._cache.get(target)
+        headers = {'If-None-Match': cached[0]} if cached else {}
+        status, etag, data = self.request('GET', target, headers=headers)
+        with self._cache_lock:
+            if status == 304 and cached:
+                self.not_modified += 1
+                self._cache.move_to_end(target)
+                return cached[1]
+            if etag:
+                self._cache[target] = (etag, data)
+                self._cache.move_to_end(target)
+                while len(self._cache) > MAX_CACHED_RESPONSES:
+                    self._cache.popitem(last=False)
+        return data
+
+    def post(self, path: str, body: Optional[Dict] = None, params: Optional[Dict] = None):
+        return self.request('POST', path + ("?" + urlencode(params) if params else ""), body)[2]
+
+    def put(self, path: str, body: Dict):
+        return self.request('PUT', path, body)[2]
+
+    def delete(self, path: str):
+        return self.request('DELETE', path)[2]
+
+    def request(self, method: str, target: str, body: Optional[Dict] = None,
+                headers: Optional[Dict[str, str]] = None) -> Tuple[int, Optional[str], object]:
+        """Send one request on a pooled connection: (status, ETag, decoded body)"""
+        payload = json.dumps(body, default=_json_default).encode("utf-8") if body is not None else None
+        headers = dict(headers or {})
+        if payload is not None:
+            headers['Content-Type'] = "application/json"
+
+        while True:
+            connection, reused = self.pool.acquire()
+            try:
+                connection.request(method, target, body=payload, headers=headers)
+                response = connection.getresponse()
+                raw = response.read()
+            except (OSError, http.client.HTTPException) as error:
+                connection.close()
+                # The server closes idle connections; a request that met one is sent again
+                if reused and method in RETRY_METHODS:
+                    continue
+                raise ApiError(0, f"Cannot reach the server at {self.base_url}: {error}") from error
+            break
+
+        if response.will_close:
+            connection.close()
+        else:
+            self.pool.release(connection)
+        self.bytes_received += len(raw)
+        try:
+            data = json.loads(raw) if raw else None
+        except ValueError as error:
+            raise ApiError(response.status, f"Unreadable response from {self.base_url}: {error}") from error
+        if response.status >= 400:
+            message = data.get('error') if isinstance(data, dict) else response.reason
+            raise ApiError(response.status, message or response.reason, data if isinstance(data, dict) else None)
+        return response.status, response.getheader('ETag'), data
+
+    def appointments(self, start: datetime, end: datetime, fields: Optional[Sequence[str]] = None) -> List[Dict]:
+        """Appointment records (occurrences included) in [start, end), every page"""
+        params = {'start': start.isoformat(), 'end': end.isoformat()}
+        if fields:
+            params['fields'] = ",".join(fields)
+        records = []
+        while True:
+            data = self.get("/appointments", params)
+            records.extend(data['items'])
+            if data['next'] is None:
+                return records
+            params['offset'] = data['next']
+
+    def account(self, patient_id: str, limit: int = 100) -> Dict:
+        """A patient's balance and newest ledger entries"""
+        return self.get(f"/billing/{quote(patient_id)}", {'limit': limit})
+
+    def dashboard(self, start: date, end: date, period: str) -> Dict:
+        """Every report for [start, end] rolled up by period"""
+        return self.get("/reports/dashboard", {'start': start.isoformat(), 'end': end.isoformat(), 'period': period})
+
+    def close(self):
+        self.pool.close()
+
+
+def patient_from_record(record: Dict) -> Patient:
+    """Build a Patient from an API record, which may hold only some fields"""
+    return Patient(
+        id=record['id'],
+        name=record.get('name', ""),
+        age=record.get('age', 0),
+        gender=record.get('gender', ""),
+        contact=record.get('contact', ""),
+        email=record.get('email', ""),
+        address=record.get('address', ""),
+        registered_date=record.get('registered_date'),
+    )
+
+
+def patient_body(patient: Patient) -> Dict:
+    return {field: getattr(patient, field) for field in Patient.__slots__}
+
+
+class RemoteChangeFeed:
+    """ChangeFeed's interface over the server's /changes long poll"""
+
+    def __init__(self, client: ApiClient, tables: Sequence[str]):
+        self.client = client
+        self.tables = tuple(tables)
+        self.position = self.latest()
+
+    def latest(self) -> int:
+        return self.client.request('GET', "/changes/latest")[2]['latest']
+
+    def read(self, wait: int = 0) -> Optional[List[Change]]:
+        """
+        Entries since the last read, None when the reader should reload;
+        with wait, the server holds the request until there is one
+        """
+        data = self.client.request('GET', "/changes?" + urlencode({
+            'after': self.position, 'tables': ",".join(self.tables), 'wait': wait,
+        }))[2]
+        self.position = data['position']
+        if data.get('resync'):
+            return None
+        return [Change(*change) for change in data['changes']]
+
+    def skip(self):
+        self.position = self.latest()
+
+
+class RemotePatientRepository:
+    """
+    PatientRepository's interface over the API, for thin clients
+
+    Lists fetch only TABLE_FIELDS; get() fetches the whole record, for
+    editing. Each call is one request on a pooled connection, and pages
+    read again while unchanged come back as 304 from the ETag cache.
+    """
+
+    DEFAULT_PAGE_SIZE = 200
+
+    def __init__(self, client: ApiClient, fields: Sequence[str] = TABLE_FIELDS):
+        self.client = client
+        self.fields = ",".join(fields)
+
+    def batch(self):
+        """Writes are committed by the server one request at a time"""
+        return nullcontext()
+
+    def next_id(self) -> str:
+        """Allocate the ID for a new patient"""
+        return self.client.post("/patient-ids")['ids'][0]
+
+    def add(self, patient: Patient):
+        self.client.post("/patients", patient_body(patient))
+
+    def add_many(self, patients):
+        for patient in patients:
+            self.add(patient)
+
+    def update(self, patient: Patient):
+        self.client.put(f"/patients/{quote(patient.id)}", patient_body(patient))
+
+    def delete(self, patient_id: str):
+        self.client.delete(f"/patients/{quote(patient_id)}")
+
+    def get(self, patient_id: str) -> Optional[Patient]:
+        try:
+            return patient_from_record(self.client.get(f"/patients/{quote(patient_id)}"))
+        except ApiError as error:
+            if error.status == 404:
+                return None
+            raise
+
+    def get_many(self, patient_ids: Sequence[str]) -> List[Patient]:
+        """Get patients by ID, in the order the IDs were given"""
+        found = {}
+        for start in range(0, len(patient_ids), IDS_PER_REQUEST):
+            chunk = patient_ids[start:start + IDS_PER_REQUEST]
+            data = self.client.get("/patients", {'ids': ",".join(chunk), 'fields': self.fields})
+            for record in data['items']:
+                found[record['id']] = patient_from_record(record)
+        return [found[pid] for pid in patient_ids if pid in found]
+
+    def count(self) -> int:
+        return self.client.get("/patients/count")['count']
+
+    def page(self, cursor: int = 0, limit: int = DEFAULT_PAGE_SIZE) -> PatientPage:
+        data = self.client.get("/patients", {'after': cursor, 'limit': limit, 'fields': self.fields})
+        patients = [patient_from_record(record) for record in data['items']]
+        return PatientPage(patients, data['next'] if data['next'] is not None else cursor)
+
+    def iter_all(self, page_size: int = 1000) -> Iterator[Patient]:
+        """Stream every patient page by page; read once, so not kept in the response cache"""
+        cursor = 0
+        while True:
+            params = {'after': cursor, 'limit': page_size, 'fields': self.fields}
+            data = self.client.get("/patients", params, cache=False)
+            for record in data['items']:
+                yield patient_from_record(record)
+            if data['next'] is None:
+                return
+            cursor = data['next']
+
+    def change_feed(self) -> RemoteChangeFeed:
+        """Patients written by other clients, through the server"""
+        return RemoteChangeFeed(self.client, ('patients',))
+
+
+_default_client: Optional[ApiClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_client() -> Optional[ApiClient]:
+    """The application-wide client when SMILEY_DENTAL_SERVER names a server, else None"""
+    global _default_client
+    url = os.environ.get(SERVER_URL_ENV)
+    if not url:
+        return None
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = ApiClient(url)
+        return _default_client
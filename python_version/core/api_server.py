@@ -0,0 +1,499 @@
+"""
+API Server
+Local HTTP/JSON access to patients, appointments, billing and reports on asyncio
+"""
+
+import asyncio
+import json
+import re
+import sqlite3
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Dict, NamedTuple, Optional, Sequence
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from .appointment_repository import AppointmentRepository
+from .billing import Ledger, LedgerEntry
+from .change_feed import ChangeFeed
+from .patient_repository import PatientRepository
+from .patients import Patient, clean_patient_fields
+from .reports import PERIOD_DAY, PERIOD_MONTH, PERIOD_WEEK, PERIOD_YEAR, ReportStore
+from .scheduling import Appointment, Scheduler, SchedulingConflict
+from .staff import Roster
+from .storage import Database
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Largest page a client may ask for, and the page it gets when it does not ask
+MAX_PAGE_SIZE = 1000
+DEFAULT_PAGE_SIZE = 200
+
+# An idle keep-alive connection is closed after this long (seconds)
+KEEP_ALIVE_TIMEOUT = 30
+MAX_BODY_BYTES = 1 << 20
+
+# Longest a /changes request may wait for a change, and how often it looks (seconds)
+MAX_CHANGE_WAIT = 25
+CHANGE_CHECK_INTERVAL = 0.25
+
+REPORT_PERIODS = (PERIOD_DAY, PERIOD_WEEK, PERIOD_MONTH, PERIOD_YEAR)
+
+PATIENT_FIELDS = Patient.__slots__
+APPOINTMENT_FIELDS = Appointment.__slots__ + ('series_id',)
+ENTRY_FIELDS = LedgerEntry._fields
+
+# Tables whose write counters make up the ETags
+PATIENT_TABLES = ('patients',)
+APPOINTMENT_TABLES = ('appointments', 'appointment_series', 'appointment_exceptions')
+LEDGER_TABLES = ('ledger_entries',)
+REPORT_TABLES = ('patients', 'appointments', 'ledger_entries')
+
+STATUS_TEXT = {
+    200: "OK", 201: "Created", 204: "No Content", 304: "Not Modified",
+    400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+
+class HttpError(Exception):
+    """A request the API refuses, answered with status and {"error": message}"""
+
+    def __init__(self, status: int, message: str, **details):
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+
+class Request(NamedTuple):
+    """A parsed request"""
+    method: str
+    path: str
+    query: Dict[str, str]
+    headers: Dict[str, str]
+    body: bytes
+
+    def json(self) -> Dict:
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            raise HttpError(400, "Body is not valid JSON") from None
+        if not isinstance(data, dict):
+            raise HttpError(400, "Body must be a JSON object")
+        return data
+
+
+class Response(NamedTuple):
+    """What a handler answers"""
+    status: int
+    body: Optional[object] = None
+    etag: Optional[str] = None
+
+
+class Route(NamedTuple):
+    """A handler for one method and path pattern; tables set makes GETs conditional"""
+    method: str
+    pattern: 're.Pattern'
+    handler: Callable[..., Response]
+    tables: Sequence[str]
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def encode_json(body) -> bytes:
+    """Compact JSON; amounts as strings, times as ISO-8601"""
+    return json.dumps(body, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+def fields_param(query: Dict[str, str], allowed: Sequence[str]) -> Sequence[str]:
+    """The fields a client asked for (?fields=id,name), all of them if it did not ask"""
+    text = query.get('fields')
+    if not text:
+        return allowed
+    fields = [field for field in text.split(",") if field]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise HttpError(400, f"Unknown fields: {', '.join(unknown)}", allowed=list(allowed))
+    return fields
+
+
+def int_param(query: Dict[str, str], name: str, default: int, lowest: int = 0,
+              highest: Optional[int] = None) -> int:
+    """An integer query parameter, clamped to [lowest, highest]"""
+    text = query.get(name)
+    if text is None:
+        return default
+    try:
+        value = int(text)
+    except ValueError:
+        raise HttpError(400, f"{name} must be a whole number") from None
+    value = max(value, lowest)
+    return min(value, highest) if highest is not None else value
+
+
+def datetime_param(query: Dict[str, str], name: str) -> datetime:
+    """A required ISO-8601 date or date-time query parameter"""
+    text = query.get(name)
+    if not text:
+        raise HttpError(400, f"{name} is required")
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        raise HttpError(400, f"{name} must be ISO-8601, not '{text}'") from None
+
+
+def patient_record(patient: Patient, fields: Sequence[str]) -> Dict:
+    return {field: getattr(patient, field) for field in fields}
+
+
+def appointment_record(appointment: Appointment, fields: Sequence[str]) -> Dict:
+    record = {}
+    for field in fields:
+        if field == 'series_id':
+            record[field] = appointment.series.id if appointment.series is not None else None
+        else:
+            record[field] = getattr(appointment, field)
+    return record
+
+
+def entry_record(entry: LedgerEntry, fields: Sequence[str]) -> Dict:
+    return {field: getattr(entry, field) for field in fields}
+
+
+class ApiServer:
+    """
+    Clinic data over HTTP/1.1 and JSON, for thin clients on the same network
+
+    Connections are kept alive between requests, so a client pays for
+    the TCP handshake once. Lists are paginated (patients by keyset
+    cursor, windows by offset) and every record route takes ?fields= to
+    send only the columns a client displays.
+
+    GET responses carry an ETag made of the write counters of the tables
+    behind them (Database.track_writes), so a client revalidating with
+    If-None-Match gets 304 Not Modified without the query even running.
+
+    SQLite work runs on one worker thread, off the event loop, so slow
+    reads never hold up other connections' I/O.
+    """
+
+    def __init__(self, database: Database, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.database = database
+        self.host = host
+        self.port = port
+        self.patients = PatientRepository(database)
+        self.appointments = AppointmentRepository(database)
+        self.roster = Roster(database)
+        self.ledger = Ledger(database)
+        self.reports = ReportStore(database)
+        for table in set(PATIENT_TABLES + APPOINTMENT_TABLES + LEDGER_TABLES + REPORT_TABLES):
+            database.track_writes(table)
+        # One thread owns the database connection
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-database")
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.routes = [
+            Route('GET', re.compile(r"/patients"), self.list_patients, PATIENT_TABLES),
+            Route('GET', re.compile(r"/patients/count"), self.count_patients, PATIENT_TABLES),
+            Route('GET', re.compile(r"/patients/([^/]+)"), self.get_patient, PATIENT_TABLES),
+            Route('POST', re.compile(r"/patients"), self.add_patient, ()),
+            Route('PUT', re.compile(r"/patients/([^/]+)"), self.update_patient, ()),
+            Route('DELETE', re.compile(r"/patients/([^/]+)"), self.delete_patient, ()),
+            Route('POST', re.compile(r"/patient-ids"), self.allocate_patient_ids, ()),
+            Route('GET', re.compile(r"/appointments"), self.list_appointments, APPOINTMENT_TABLES),
+            Route('POST', re.compile(r"/appointments"), self.book_appointment, ()),
+            Route('GET', re.compile(r"/billing/([^/]+)"), self.get_account, LEDGER_TABLES),
+            Route('POST', re.compile(r"/billing/([^/]+)/payments"), self.post_payment, ()),
+            Route('GET', re.compile(r"/reports/dashboard"), self.get_dashboard, REPORT_TABLES),
+            Route('GET', re.compile(r"/changes/latest"), self.latest_change, ()),
+        ]
+
+    # === Serving ===
+
+    async def start(self):
+        """Listen; with port 0 the system picks one, stored back in self.port"""
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """Listen and answer requests until cancelled"""
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self):
+        """Stop listening and release the database thread"""
+        if self.server is not None:
+            self.server.close()
+        self.executor.shutdown(wait=True)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer requests on one connection until the client closes it or goes idle"""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, asyncio.LimitOverrunError):
+                    return
+                try:
+                    request = await self.read_request(head, reader)
+                    response = await self.respond(request)
+                    keep_alive = request.headers.get('connection', "").lower() != "close"
+                except HttpError as error:
+                    response = Response(error.status, {'error': str(error), **error.details})
+                    keep_alive = False
+                except Exception as error:
+                    traceback.print_exc()
+                    response = Response(500, {'error': str(error)})
+                    keep_alive = False
+                writer.write(self.encode_response(response, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            return
+        finally:
+            writer.close()
+
+    async def read_request(self, head: bytes, reader: asyncio.StreamReader) -> Request:
+        """Parse the request line and headers, then read the body they announce"""
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "Malformed request line") from None
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length') or 0)
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        url = urlsplit(target)
+        return Request(method.upper(), unquote(url.path).rstrip("/") or "/", dict(parse_qsl(url.query)), headers, body)
+
+    async def respond(self, request: Request) -> Response:
+        """Route a request; database work happens on the worker thread"""
+        if request.method == 'GET' and request.path == "/changes":
+            return await self.wait_for_changes(request)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.dispatch, request)
+
+    def dispatch(self, request: Request) -> Response:
+        """Find the route and run it, answering 304 when the client's copy is current"""
+        allowed = []
+        for route in self.routes:
+            match = route.pattern.fullmatch(request.path)
+            if match is None:
+                continue
+            if route.method != request.method:
+                allowed.append(route.method)
+                continue
+            etag = self.etag(route.tables) if route.tables else None
+            if etag is not None and request.headers.get('if-none-match') == etag:
+                return Response(304, etag=etag)
+            try:
+                response = route.handler(request, *match.groups())
+            except ValueError as error:
+                raise HttpError(400, str(error)) from None
+            return response._replace(etag=etag)
+        if allowed:
+            raise HttpError(405, f"{request.method} is not allowed on {request.path}")
+        raise HttpError(404, f"No such resource: {request.path}")
+
+    def etag(self, tables: Sequence[str]) -> str:
+        """Changes whenever any of the tables is written, by any process"""
+        return '"' + "-".join(str(self.database.write_version(table)) for table in tables) + '"'
+
+    @staticmethod
+    def encode_response(response: Response, keep_alive: bool) -> bytes:
+        head = [f"HTTP/1.1 {response.status} {STATUS_TEXT.get(response.status, '')}"]
+        body = b""
+        if response.body is not None and response.status not in (204, 304):
+            body = encode_json(response.body)
+            head.append("Content-Type: application/json")
+        if response.status != 304:
+            head.append(f"Content-Length: {len(body)}")
+        if response.etag:
+            head.append(f"ETag: {response.etag}")
+        head.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+    # === Patients ===
+
+    def list_patients(self, request: Request) -> Response:
+        """A page after ?after= (keyset cursor), or the patients named by ?ids="""
+        fields = fields_param(request.query, PATIENT_FIELDS)
+        if 'ids' in request.query:
+            ids = [pid for pid in request.query['ids'].split(",") if pid][:MAX_PAGE_SIZE]
+            patients = self.patients.get_many(ids)
+            return Response(200, {'items': [patient_record(p, fields) for p in patients]})
+
+        limit = int_param(request.query, 'limit', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+        page = self.patients.page(int_param(request.query, 'after', 0), limit)
+        return Response(200, {
+            'items': [patient_record(p, fields) for p in page.patients],
+            'next': page.cursor if len(page.patients) == limit else None,
+        })
+
+    def count_patients(self, request: Request) -> Response:
+        return Response(200, {'count': self.patients.count()})
+
+    def get_patient(self, request: Request, patient_id: str) -> Response:
+        patient = self.patients.get(patient_id)
+        if patient is None:
+            raise HttpError(404, f"No patient {patient_id}")
+        return Response(200, patient_record(patient, fields_param(request.query, PATIENT_FIELDS)))
+
+    @staticmethod
+    def patient_fields(data: Dict) -> Dict:
+        """A request body's patient fields under the same rules as the dialog"""
+        return clean_patient_fields(*(
+            str(data.get(field, "")) for field in ('name', 'age', 'gender', 'contact', 'email', 'address')
+        ))
+
+    def add_patient(self, request: Request) -> Response:
+        """Add a patient under the ID in the body (from /patient-ids) or a new one"""
+        data = request.json()
+        patient = Patient(
+            id=data.get('id') or self.patients.next_id(),
+            registered_date=data.get('registered_date'),
+            **self.patient_fields(data),
+        )
+        try:
+            self.patients.add(patient)
+        except sqlite3.IntegrityError:
+            raise HttpError(409, f"Patient {patient.id} already exists") from None
+        return Response(201, patient_record(patient, PATIENT_FIELDS))
+
+    def update_patient(self, request: Request, patient_id: str) -> Response:
+        stored = self.patients.get(patient_id)
+        if stored is None:
+            raise HttpError(404, f"No patient {patient_id}")
+        patient = Patient(id=patient_id, registered_date=stored.registered_date,
+                          **self.patient_fields(request.json()))
+        self.patients.update(patient)
+        return Response(200, patient_record(patient, PATIENT_FIELDS))
+
+    def delete_patient(self, request: Request, patient_id: str) -> Response:
+        self.patients.delete(patient_id)
+        return Response(204)
+
+    def allocate_patient_ids(self, request: Request) -> Response:
+        """Reserve IDs for patients a client is about to add (?count=)"""
+        count = int_param(request.query, 'count', 1, 1, MAX_PAGE_SIZE)
+        return Response(200, {'ids': [self.patients.next_id() for _ in range(count)]})
+
+    # === Appointments ===
+
+    def list_appointments(self, request: Request) -> Response:
+        """Appointments and series occurrences in [start, end), paged by ?offset="""
+        start = datetime_param(request.query, 'start')
+        end = datetime_param(request.query, 'end')
+        fields = fields_param(request.query, APPOINTMENT_FIELDS)
+        offset = int_param(request.query, 'offset', 0)
+        limit = int_param(request.query, 'limit', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+        # A fresh scheduler each time: bookings from any terminal are in storage
+        window = list(Scheduler(self.appointments).window(start, end))
+        items = window[offset:offset + limit]
+        return Response(200, {
+            'items': [appointment_record(a, fields) for a in items],
+            'next': offset + limit if offset + limit < len(window) else None,
+        })
+
+    def book_appointment(self, request: Request) -> Response:
+        """Book with the same conflict and shift checks as the calendar; 409 on a clash"""
+        data = request.json()
+        try:
+            appointment = Appointment(
+                None, data['patient_id'], data['dentist'], data['chair'],
+                datetime.fromisoformat(data['start']), datetime.fromisoformat(data['end']),
+                notes=data.get('notes', ""),
+            )
+        except KeyError as error:
+            raise HttpError(400, f"{error.args[0]} is required") from None
+        scheduler = Scheduler(self.appointments, self.roster.is_available, self.roster.next_available)
+        self.roster.refresh()
+        try:
+            scheduler.book(appointment)
+        except SchedulingConflict as error:
+            raise HttpError(409, str(error), conflicts=[
+                appointment_record(a, APPOINTMENT_FIELDS) for a in error.conflicts
+            ]) from None
+        return Response(201, appointment_record(appointment, APPOINTMENT_FIELDS))
+
+    # === Billing ===
+
+    def get_account(self, request: Request, patient_id: str) -> Response:
+        """Balance and the newest ?limit= entries of one account"""
+        limit = int_param(request.query, 'limit', 100, 1, MAX_PAGE_SIZE)
+        fields = fields_param(request.query, ENTRY_FIELDS)
+        return Response(200, {
+            'patient_id': patient_id,
+            'balance': self.ledger.balance(patient_id),
+            'entries': [entry_record(e, fields) for e in self.ledger.recent_entries(patient_id, limit)],
+        })
+
+    def post_payment(self, request: Request, patient_id: str) -> Response:
+        data = request.json()
+        entry = self.ledger.payment(patient_id, data.get('amount', "0"), data.get('description') or "Payment")
+        return Response(201, entry_record(entry, ENTRY_FIELDS))
+
+    # === Reports ===
+
+    def get_dashboard(self, request: Request) -> Response:
+        """Every report for [start, end] rolled up by ?period="""
+        period = request.query.get('period', PERIOD_DAY)
+        if period not in REPORT_PERIODS:
+            raise HttpError(400, f"period must be one of {', '.join(REPORT_PERIODS)}")
+        dashboard = self.reports.dashboard(
+            datetime_param(request.query, 'start').date(), datetime_param(request.query, 'end').date(), period
+        )
+        return Response(200, {
+            'start': dashboard.start,
+            'end': dashboard.end,
+            'period': dashboard.period,
+            'new_patients': [list(row) for row in dashboard.new_patients],
+            'appointments': [list(row) for row in dashboard.appointments],
+            'revenue': [list(row) for row in dashboard.revenue],
+            'utilization': [list(row) for row in dashboard.utilization],
+        })
+
+    # === Change feed ===
+
+    def latest_change(self, request: Request) -> Response:
+        """Id of the newest change log entry, where a new reader starts"""
+        return Response(200, {'latest': ChangeFeed(self.database, ()).latest()})
+
+    async def wait_for_changes(self, request: Request) -> Response:
+        """
+        Change log entries after ?after= for ?tables= (all if none), waiting up to ?wait=
+        seconds for the first one (a long poll), so a client learns of a
+        change as it commits without asking over and over
+        """
+        tables = [table for table in request.query.get('tables', "").split(",") if table]
+        after = int_param(request.query, 'after', 0)
+        wait = int_param(request.query, 'wait', 0, 0, MAX_CHANGE_WAIT)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+
+        feed = await loop.run_in_executor(self.executor, ChangeFeed, self.database, tables)
+        feed.position = after
+        while True:
+            changes = await loop.run_in_executor(self.executor, feed.read)
+            if changes is None:
+                return Response(200, {'resync': True, 'position': feed.position})
+            if changes or loop.time() >= deadline:
+                return Response(200, {'changes': [list(change) for change in changes], 'position': feed.position})
+            await asyncio.sleep(CHANGE_CHECK_INTERVAL)
@@ -0,0 +1,236 @@
+"""
+Appointment Repository
+SQLite-backed appointment storage queried by time window
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence
+
+from .patient_repository import MAX_QUERY_PARAMETERS
+from .recurrence import Occurrence, RecurrenceRule, Series
+from .scheduling import INACTIVE_STATUSES, Appointment
+from .storage import Database
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS appointments (
+    id INTEGER PRIMARY KEY,
+    patient_id TEXT NOT NULL,
+    dentist TEXT NOT NULL,
+    chair TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    status TEXT NOT NULL,
+    notes TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_appointments_start ON appointments (start);
+CREATE INDEX IF NOT EXISTS idx_appointments_dentist ON appointments (dentist, start);
+CREATE INDEX IF NOT EXISTS idx_appointments_chair ON appointments (chair, start);
+CREATE INDEX IF NOT EXISTS idx_appointments_patient ON appointments (patient_id, start);
+CREATE TABLE IF NOT EXISTS appointment_series (
+    id INTEGER PRIMARY KEY,
+    patient_id TEXT NOT NULL,
+    dentist TEXT NOT NULL,
+    chair TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    frequency TEXT NOT NULL,
+    interval INTEGER NOT NULL,
+    count INTEGER,
+    until TEXT,
+    notes TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS appointment_exceptions (
+    series_id INTEGER NOT NULL REFERENCES appointment_series (id) ON DELETE CASCADE,
+    original_start TEXT NOT NULL,
+    start TEXT NOT NULL,
+    end TEXT NOT NULL,
+    status TEXT NOT NULL,
+    notes TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (series_id, original_start)
+) WITHOUT ROWID;
+"""
+
+COLUMNS = "id, patient_id, dentist, chair, start, end, status, notes"
+
+INSERT_SQL = (
+    "INSERT INTO appointments (patient_id, dentist, chair, start, end, status, notes) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+UPDATE_SQL = (
+    "UPDATE appointments SET patient_id = ?, dentist = ?, chair = ?, start = ?, end = ?, "
+    "status = ?, notes = ? WHERE id = ?"
+)
+WINDOW_SQL = f"SELECT {COLUMNS} FROM appointments WHERE start >= ? AND start < ? ORDER BY start"
+GET_MANY_SQL = f"SELECT {COLUMNS} FROM appointments WHERE id IN ({{placeholders}})"
+PATIENT_SQL = f"SELECT {COLUMNS} FROM appointments WHERE patient_id = ? ORDER BY start"
+OVERLAPPING_SQL = (
+    f"SELECT {COLUMNS} FROM appointments "
+    "WHERE (dentist = ? OR chair = ?) AND start >= ? AND start < ? AND end > ? AND id IS NOT ? "
+    f"AND status NOT IN ({', '.join('?' * len(INACTIVE_STATUSES))}) ORDER BY start"
+)
+
+SERIES_COLUMNS = "id, patient_id, dentist, chair, start, end, frequency, interval, count, until, notes"
+
+INSERT_SERIES_SQL = (
+    "INSERT INTO appointment_series "
+    "(patient_id, dentist, chair, start, end, frequency, interval, count, until, notes) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+UPDATE_SERIES_SQL = "UPDATE appointment_series SET count = ?, until = ?, notes = ? WHERE id = ?"
+ALL_SERIES_SQL = f"SELECT {SERIES_COLUMNS} FROM appointment_series ORDER BY id"
+SAVE_EXCEPTION_SQL = (
+    "INSERT OR REPLACE INTO appointment_exceptions "
+    "(series_id, original_start, start, end, status, notes) VALUES (?, ?, ?, ?, ?, ?)"
+)
+DELETE_LATER_EXCEPTIONS_SQL = "DELETE FROM appointment_exceptions WHERE series_id = ? AND original_start > ?"
+ALL_EXCEPTIONS_SQL = (
+    "SELECT series_id, original_start, start, end, status, notes FROM appointment_exceptions"
+)
+
+# Stored as ISO-8601 text, which sorts chronologically
+TIME_FORMAT = "%Y-%m-%dT%H:%M"
+
+
+def _format(moment: Optional[datetime]) -> Optional[str]:
+    return moment.strftime(TIME_FORMAT) if moment is not None else None
+
+
+def _parse(text: Optional[str]) -> Optional[datetime]:
+    return datetime.strptime(text, TIME_FORMAT) if text is not None else None
+
+
+def appointment_from_row(row) -> Appointment:
+    """Build an Appointment from an appointments table row"""
+    return Appointment(
+        id=row["id"],
+        patient_id=row["patient_id"],
+        dentist=row["dentist"],
+        chair=row["chair"],
+        start=_parse(row["start"]),
+        end=_parse(row["end"]),
+        status=row["status"],
+        notes=row["notes"],
+    )
+
+
+class AppointmentRepository:
+    """Appointment storage; reads are range scans on the start index"""
+
+    def __init__(self, database: Database):
+        self.database = database
+        self.database.connection.executescript(SCHEMA)
+        # Bookings made at other terminals reach open calendars through the change log
+        self.database.log_changes('appointments', 'id')
+        self.database.log_changes('appointment_series', 'id')
+        self.database.log_changes('appointment_exceptions', 'series_id')
+
+    def add(self, appointment: Appointment) -> int:
+        """Insert an appointment and return its new ID"""
+        with self.database.transaction() as connection:
+            cursor = connection.execute(INSERT_SQL, (
+                appointment.patient_id, appointment.dentist, appointment.chair,
+                _format(appointment.start), _format(appointment.end),
+                appointment.status, appointment.notes,
+            ))
+            return cursor.lastrowid
+
+    def update(self, appointment: Appointment):
+        """Save a changed appointment"""
+        with self.database.transaction() as connection:
+            connection.execute(UPDATE_SQL, (
+                appointment.patient_id, appointment.dentist, appointment.chair,
+                _format(appointment.start), _format(appointment.end),
+                appointment.status, appointment.notes, appointment.id,
+            ))
+
+    def starting_between(self, start: datetime, end: datetime) -> List[Appointment]:
+        """Appointments starting in [start, end)"""
+        rows = self.database.connection.execute(
+            WINDOW_SQL, (_format(start), _format(end))
+        )
+        return [appointment_from_row(row) for row in rows]
+
+    def overlapping(self, dentist: str, chair: str, start: datetime, end: datetime,
+                    ignore_id: Optional[int] = None) -> List[Appointment]:
+        """
+        Active appointments of the dentist or chair overlapping [start, end),
+        as stored now rather than as any Scheduler has them cached
+        """
+        # Appointments are at most a day long (see Scheduler.ensure_loaded),
+        # which bounds the index range scanned
+        rows = self.database.connection.execute(OVERLAPPING_SQL, (
+            dentist, chair, _format(start - timedelta(days=1)), _format(end), _format(start),
+            ignore_id, *INACTIVE_STATUSES,
+        ))
+        return [appointment_from_row(row) for row in rows]
+
+    def get_many(self, appointment_ids: Sequence[int]) -> List[Appointment]:
+        """Appointments by ID; IDs no longer stored are left out"""
+        found = []
+        for start in range(0, len(appointment_ids), MAX_QUERY_PARAMETERS):
+            chunk = appointment_ids[start:start + MAX_QUERY_PARAMETERS]
+            rows = self.database.connection.execute(
+                GET_MANY_SQL.format(placeholders=", ".join("?" * len(chunk))), chunk
+            )
+            found.extend(appointment_from_row(row) for row in rows)
+        return found
+
+    def for_patient(self, patient_id: str) -> List[Appointment]:
+        """All appointments of one patient"""
+        rows = self.database.connection.execute(PATIENT_SQL, (patient_id,))
+        return [appointment_from_row(row) for row in rows]
+
+    # === Recurring series ===
+
+    def add_series(self, series: Series) -> int:
+        """Insert a series rule and return its new ID"""
+        rule = series.rule
+        with self.database.transaction() as connection:
+            cursor = connection.execute(INSERT_SERIES_SQL, (
+                series.patient_id, series.dentist, series.chair,
+                _format(series.start), _format(series.start + series.duration),
+                rule.frequency, rule.interval, rule.count, _format(rule.until), series.notes,
+            ))
+            return cursor.lastrowid
+
+    def update_series(self, series: Series):
+        """Save a series' bounds and drop exceptions past its new end"""
+        with self.database.transaction() as connection:
+            connection.execute(UPDATE_SERIES_SQL, (
+                series.rule.count, _format(series.rule.until), series.notes, series.id
+            ))
+            if series.rule.until is not None:
+                connection.execute(DELETE_LATER_EXCEPTIONS_SQL, (series.id, _format(series.rule.until)))
+
+    def save_exception(self, occurrence: Occurrence):
+        """Store an occurrence that differs from its series' template"""
+        with self.database.transaction() as connection:
+            connection.execute(SAVE_EXCEPTION_SQL, (
+                occurrence.series.id, _format(occurrence.original_start),
+                _format(occurrence.start), _format(occurrence.end),
+                occurrence.status, occurrence.notes,
+            ))
+
+    def all_series(self) -> List[Series]:
+        """Every series with its exceptions; rules are small, occurrences are never stored"""
+        connection = self.database.connection
+        series_by_id = {}
+        for row in connection.execute(ALL_SERIES_SQL):
+            series_by_id[row["id"]] = Series(
+                id=row["id"],
+                patient_id=row["patient_id"],
+                dentist=row["dentist"],
+                chair=row["chair"],
+                start=_parse(row["start"]),
+                end=_parse(row["end"]),
+                rule=RecurrenceRule(row["frequency"], row["interval"], row["count"], _parse(row["until"])),
+                notes=row["notes"],
+            )
+        for row in connection.execute(ALL_EXCEPTIONS_SQL):
+            series = series_by_id.get(row["series_id"])
+            if series is not None:
+                series.override(Occurrence(
+                    series, _parse(row["original_start"]), _parse(row["start"]), _parse(row["end"]),
+                    row["status"], row["notes"],
+                ))
+        return list(series_by_id.values())
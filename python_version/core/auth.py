@@ -0,0 +1,153 @@
+"""
+Authentication
+Credential store with salted scrypt password hashes
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from typing import Dict, Iterable, NamedTuple, Optional
+
+HASH_SCHEME = "scrypt"
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+class KdfParams(NamedTuple):
+    """
+    scrypt cost parameters
+
+    n (CPU/memory cost, a power of two) is the main knob: memory use is
+    128 * r * n bytes, and time grows linearly with n.
+    """
+    n: int = 2 ** 14
+    r: int = 8
+    p: int = 1
+
+    def max_memory(self) -> int:
+        """Memory limit to pass to hashlib.scrypt, with headroom"""
+        return 2 * 128 * self.r * self.n * self.p + (1 << 20)
+
+
+DEFAULT_KDF = KdfParams()
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def _derive(password: str, salt: bytes, params: KdfParams) -> bytes:
+    return hashlib.scrypt(
+        password.encode("utf-8"), salt=salt,
+        n=params.n, r=params.r, p=params.p,
+        maxmem=params.max_memory(), dklen=KEY_BYTES,
+    )
+
+
+def hash_password(password: str, params: KdfParams = DEFAULT_KDF) -> str:
+    """Hash a password as 'scrypt$n$r$p$salt$key' with a fresh random salt"""
+    salt = os.urandom(SALT_BYTES)
+    key = _derive(password, salt, params)
+    return "$".join((
+        HASH_SCHEME, str(params.n), str(params.r), str(params.p),
+        _b64encode(salt), _b64encode(key),
+    ))
+
+
+def parse_hash(encoded: str):
+    """Split an encoded hash into (params, salt, key)"""
+    scheme, n, r, p, salt, key = encoded.split("$")
+    if scheme != HASH_SCHEME:
+        raise ValueError(f"Unsupported password hash scheme: {scheme}")
+    return KdfParams(int(n), int(r), int(p)), base64.b64decode(salt), base64.b64decode(key)
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    """Check a password against an encoded hash in constant time"""
+    params, salt, expected = parse_hash(encoded)
+    return hmac.compare_digest(_derive(password, salt, params), expected)
+
+
+class UserRecord(NamedTuple):
+    """A stored user account"""
+    id: str
+    username: str
+    role: str
+    full_name: str
+    password_hash: str
+
+
+class CredentialStore:
+    """
+    User accounts keyed by username
+
+    Lookup is a dict access instead of a scan over all users. Unknown
+    usernames are checked against a dummy hash of the same cost, so a
+    failed login takes as long whether or not the username exists.
+
+    verify() does the expensive KDF work and is meant to be called off
+    the GUI thread.
+    """
+
+    def __init__(self, params: KdfParams = DEFAULT_KDF):
+        self.params = params
+        self._users: Dict[str, UserRecord] = {}
+        self._dummy_hash: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def add_user(self, id: str, username: str, password: str, role: str, full_name: str):
+        """Add or replace an account, hashing its password"""
+        self.add_record(UserRecord(id, username, role, full_name, hash_password(password, self.params)))
+
+    def add_record(self, record: UserRecord):
+        """Add an account whose password is already hashed"""
+        with self._lock:
+            self._users[record.username] = record
+
+    def get(self, username: str) -> Optional[UserRecord]:
+        """Look up an account by username"""
+        return self._users.get(username)
+
+    def _get_dummy_hash(self) -> str:
+        with self._lock:
+            if self._dummy_hash is None:
+                self._dummy_hash = hash_password(_b64encode(os.urandom(SALT_BYTES)), self.params)
+            return self._dummy_hash
+
+    def verify(self, username: str, password: str, role: Optional[str] = None) -> Optional[UserRecord]:
+        """
+        Check credentials and return the matching account, or None
+
+        The role is compared only after the password check so it does not
+        change how long a failed attempt takes.
+        """
+        record = self._users.get(username)
+        encoded = record.password_hash if record else self._get_dummy_hash()
+        password_ok = verify_password(password, encoded)
+        if record is None or not password_ok:
+            return None
+        if role is not None and not hmac.compare_digest(record.role.encode(), role.encode()):
+            return None
+        return record
+
+    def needs_rehash(self, username: str) -> bool:
+        """Check whether an account's hash uses different cost parameters"""
+        record = self._users.get(username)
+        return record is not None and parse_hash(record.password_hash)[0] != self.params
+
+    @classmethod
+    def from_accounts(cls, accounts: Iterable[Dict[str, str]],
+                      params: KdfParams = DEFAULT_KDF) -> 'CredentialStore':
+        """Build a store from dicts with id, username, password, role, full_name"""
+        store = cls(params)
+        for account in accounts:
+            store.add_user(
+                account['id'], account['username'], account['password'],
+                account['role'], account['full_name']
+            )
+        return store
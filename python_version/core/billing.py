@@ -0,0 +1,208 @@
+"""
+Billing Ledger
+Append-only ledger of charges, payments and adjustments with running balances
+"""
+
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable, List, NamedTuple, Optional, Union
+
+from .storage import Database
+
+KIND_CHARGE = 'charge'
+KIND_PAYMENT = 'payment'
+KIND_ADJUSTMENT = 'adjustment'
+
+KINDS = (KIND_CHARGE, KIND_PAYMENT, KIND_ADJUSTMENT)
+
+# Amounts are stored as integer cents; Decimal is used at the edges
+CENT = Decimal("0.01")
+
+POSTED_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ledger_entries (
+    id INTEGER PRIMARY KEY,
+    patient_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    amount_cents INTEGER NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    treatment TEXT NOT NULL DEFAULT '',
+    posted_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ledger_patient ON ledger_entries (patient_id, posted_at);
+CREATE INDEX IF NOT EXISTS idx_ledger_posted ON ledger_entries (posted_at);
+CREATE TRIGGER IF NOT EXISTS ledger_no_update BEFORE UPDATE ON ledger_entries
+BEGIN
+    SELECT RAISE(ABORT, 'ledger entries are append-only');
+END;
+CREATE TRIGGER IF NOT EXISTS ledger_no_delete BEFORE DELETE ON ledger_entries
+BEGIN
+    SELECT RAISE(ABORT, 'ledger entries are append-only');
+END;
+CREATE TABLE IF NOT EXISTS ledger_balances (
+    patient_id TEXT PRIMARY KEY,
+    balance_cents INTEGER NOT NULL,
+    last_entry_id INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+ENTRY_COLUMNS = "id, patient_id, kind, amount_cents, description, treatment, posted_at"
+
+INSERT_ENTRY_SQL = (
+    "INSERT INTO ledger_entries (patient_id, kind, amount_cents, description, treatment, posted_at) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+# The balance moves with every append, in the same transaction
+APPLY_BALANCE_SQL = (
+    "INSERT INTO ledger_balances (patient_id, balance_cents, last_entry_id) VALUES (?, ?, ?) "
+    "ON CONFLICT (patient_id) DO UPDATE SET "
+    "balance_cents = balance_cents + excluded.balance_cents, last_entry_id = excluded.last_entry_id"
+)
+BALANCE_SQL = "SELECT balance_cents FROM ledger_balances WHERE patient_id = ?"
+RECENT_SQL = (
+    f"SELECT {ENTRY_COLUMNS} FROM ledger_entries WHERE patient_id = ? "
+    "ORDER BY posted_at DESC, id DESC LIMIT ?"
+)
+PERIOD_SQL = (
+    f"SELECT {ENTRY_COLUMNS} FROM ledger_entries "
+    "WHERE patient_id = ? AND posted_at >= ? AND posted_at < ? ORDER BY posted_at, id"
+)
+REBUILD_BALANCES_SQL = """
+DELETE FROM ledger_balances;
+INSERT INTO ledger_balances (patient_id, balance_cents, last_entry_id)
+    SELECT patient_id, SUM(amount_cents), MAX(id) FROM ledger_entries GROUP BY patient_id;
+"""
+
+Money = Union[Decimal, int, str]
+
+
+def to_cents(amount: Money) -> int:
+    """Convert an amount to integer cents, rounding half up"""
+    return int((Decimal(amount).quantize(CENT, rounding=ROUND_HALF_UP) * 100))
+
+
+def from_cents(cents: int) -> Decimal:
+    """Convert integer cents to a two-place Decimal"""
+    return (Decimal(cents) / 100).quantize(CENT)
+
+
+def format_money(amount: Decimal) -> str:
+    """Format an amount for display, e.g. 1,234.50"""
+    return f"{amount:,.2f}"
+
+
+class LedgerEntry(NamedTuple):
+    """
+    One posting to a patient's account
+
+    amount is the effect on the balance: charges are positive, payments
+    negative, adjustments either.
+    """
+    id: Optional[int]
+    patient_id: str
+    kind: str
+    amount: Decimal
+    description: str
+    treatment: str
+    posted_at: datetime
+
+
+def entry_from_row(row) -> LedgerEntry:
+    """Build a LedgerEntry from a ledger_entries row"""
+    return LedgerEntry(
+        id=row["id"],
+        patient_id=row["patient_id"],
+        kind=row["kind"],
+        amount=from_cents(row["amount_cents"]),
+        description=row["description"],
+        treatment=row["treatment"],
+        posted_at=datetime.fromisoformat(row["posted_at"]),
+    )
+
+
+class Ledger:
+    """
+    Patient accounts as an append-only ledger
+
+    Entries are never changed or deleted (triggers refuse it); a mistake
+    is corrected by posting an adjustment. Each append also moves the
+    patient's row in ledger_balances, so opening an account is one
+    primary-key read however long its history is.
+    """
+
+    def __init__(self, database: Database):
+        self.database = database
+        self.database.connection.executescript(SCHEMA)
+
+    def post(self, entry: LedgerEntry) -> LedgerEntry:
+        """Append one entry and return it with its ID"""
+        return self.post_many([entry])[0]
+
+    def post_many(self, entries: Iterable[LedgerEntry]) -> List[LedgerEntry]:
+        """Append entries and update their balances in one transaction"""
+        posted = []
+        with self.database.transaction() as connection:
+            for entry in entries:
+                if entry.kind not in KINDS:
+                    raise ValueError(f"Unknown ledger entry kind: {entry.kind}")
+                cents = to_cents(entry.amount)
+                entry_id = connection.execute(INSERT_ENTRY_SQL, (
+                    entry.patient_id, entry.kind, cents, entry.description,
+                    entry.treatment, entry.posted_at.strftime(POSTED_FORMAT),
+                )).lastrowid
+                connection.execute(APPLY_BALANCE_SQL, (entry.patient_id, cents, entry_id))
+                posted.append(entry._replace(id=entry_id, amount=from_cents(cents)))
+        return posted
+
+    def charge(self, patient_id: str, amount: Money, description: str,
+               treatment: str = "", posted_at: Optional[datetime] = None) -> LedgerEntry:
+        """Post a line item for work done"""
+        if Decimal(amount) <= 0:
+            raise ValueError("A charge must be a positive amount")
+        return self.post(LedgerEntry(
+            None, patient_id, KIND_CHARGE, Decimal(amount), description, treatment,
+            posted_at or datetime.now()
+        ))
+
+    def payment(self, patient_id: str, amount: Money, description: str = "Payment",
+                posted_at: Optional[datetime] = None) -> LedgerEntry:
+        """Post a payment received; amount is given as a positive number"""
+        if Decimal(amount) <= 0:
+            raise ValueError("A payment must be a positive amount")
+        return self.post(LedgerEntry(
+            None, patient_id, KIND_PAYMENT, -Decimal(amount), description, "",
+            posted_at or datetime.now()
+        ))
+
+    def adjust(self, patient_id: str, amount: Money, description: str,
+               posted_at: Optional[datetime] = None) -> LedgerEntry:
+        """Post a correction; positive raises the balance, negative lowers it"""
+        return self.post(LedgerEntry(
+            None, patient_id, KIND_ADJUSTMENT, Decimal(amount), description, "",
+            posted_at or datetime.now()
+        ))
+
+    def balance(self, patient_id: str) -> Decimal:
+        """Current balance owed by a patient"""
+        row = self.database.connection.execute(BALANCE_SQL, (patient_id,)).fetchone()
+        return from_cents(row[0] if row else 0)
+
+    def recent_entries(self, patient_id: str, limit: int = 100) -> List[LedgerEntry]:
+        """A patient's latest entries, newest first"""
+        rows = self.database.connection.execute(RECENT_SQL, (patient_id, limit))
+        return [entry_from_row(row) for row in rows]
+
+    def entries_between(self, patient_id: str, start: datetime, end: datetime) -> List[LedgerEntry]:
+        """A patient's entries posted in [start, end), oldest first"""
+        rows = self.database.connection.execute(PERIOD_SQL, (
+            patient_id, start.strftime(POSTED_FORMAT), end.strftime(POSTED_FORMAT)
+        ))
+        return [entry_from_row(row) for row in rows]
+
+    def rebuild_balances(self):
+        """Recompute every balance from the ledger (repair tool, not used on normal paths)"""
+        with self.database.transaction() as connection:
+            for statement in REBUILD_BALANCES_SQL.strip().split(";"):
+                if statement.strip():
+                    connection.execute(statement)
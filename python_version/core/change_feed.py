@@ -0,0 +1,105 @@
+"""
+Change Feed
+Rows written by other terminals, read from the shared change log
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from .storage import CHANGE_LOG_SCHEMA, Database
+
+# Entries left when the log is trimmed; a reader further behind reloads
+CHANGE_LOG_KEEP = 100_000
+
+# Past this many entries in one read, reloading beats applying them row by row
+DEFAULT_RESYNC_AFTER = 500
+
+LATEST_SQL = "SELECT COALESCE(MAX(id), 0) FROM change_log"
+FIRST_SQL = "SELECT MIN(id) FROM change_log"
+TRIM_SQL = "DELETE FROM change_log WHERE id <= ?"
+
+
+class Change(NamedTuple):
+    """One logged write: which row of which table, and how"""
+    id: int
+    table: str
+    key: str
+    operation: str
+
+
+def keys_by_table(changes: Sequence[Change]) -> Dict[str, List[str]]:
+    """Changed row keys per table, each once, in the order first changed"""
+    keys: Dict[str, Dict[str, None]] = {}
+    for change in changes:
+        keys.setdefault(change.table, {})[change.key] = None
+    return {table: list(table_keys) for table, table_keys in keys.items()}
+
+
+def trim_change_log(database: Database, keep: int = CHANGE_LOG_KEEP):
+    """Drop all but the newest keep entries of the change log"""
+    database.connection.executescript(CHANGE_LOG_SCHEMA)
+    with database.transaction() as connection:
+        latest = connection.execute(LATEST_SQL).fetchone()[0]
+        connection.execute(TRIM_SQL, (latest - keep,))
+
+
+class ChangeFeed:
+    """
+    One reader's position in the change log, for the tables it follows
+    (every table when none are given)
+
+    The log is written by triggers (Database.log_changes) in the writer's
+    transaction, whichever terminal or process wrote, and entry ids only
+    grow, so everything after the position is exactly what the reader
+    has not seen. Each read is one range scan on the primary key; its
+    cost follows the number of changes, not the size of the tables.
+
+    A new feed starts at the end of the log: create it before loading
+    what it keeps up to date. Entries the reader's own writes produced
+    come back too, so applying them must be harmless.
+    """
+
+    def __init__(self, database: Database, tables: Sequence[str],
+                 resync_after: int = DEFAULT_RESYNC_AFTER):
+        self.database = database
+        self.tables = tuple(tables)
+        self.resync_after = resync_after
+        self.database.connection.executescript(CHANGE_LOG_SCHEMA)
+        # No tables means all of them
+        in_tables = f"AND name IN ({', '.join('?' * len(self.tables))}) " if self.tables else ""
+        self._read_sql = (
+            "SELECT id, name, row_key, operation FROM change_log "
+            f"WHERE id > ? {in_tables}ORDER BY id LIMIT ?"
+        )
+        self.position = self.latest()
+
+    def latest(self) -> int:
+        """Id of the newest log entry (0 for an empty log)"""
+        return self.database.connection.execute(LATEST_SQL).fetchone()[0]
+
+    def read(self) -> Optional[List[Change]]:
+        """
+        Entries for the followed tables since the last read
+
+        Returns None when applying them is not worth it: more than
+        resync_after entries, or older ones already trimmed from the log.
+        The position then moves to the end and the reader should reload.
+        """
+        connection = self.database.connection
+        first = connection.execute(FIRST_SQL).fetchone()[0]
+        if first is not None and first > self.position + 1:
+            self.skip()
+            return None
+
+        rows = connection.execute(
+            self._read_sql, (self.position, *self.tables, self.resync_after + 1)
+        ).fetchall()
+        if len(rows) > self.resync_after:
+            self.skip()
+            return None
+        if rows:
+            self.position = rows[-1][0]
+        return [Change(*row) for row in rows]
+
+    def skip(self):
+        """Move to the end of the log, after reloading everything followed"""
+        self.position = self.latest()
@@ -0,0 +1,82 @@
+"""
+Columnar Patient Store
+Compact read-only storage for bulk-loaded patient records
+"""
+
+import sys
+from array import array
+from datetime import date
+from typing import Iterable, Iterator, List
+
+from .patients import Patient
+
+
+class PatientColumns:
+    """
+    Read-only patient records stored one column per array
+
+    Intended for bulk data that is only read (imports, report snapshots):
+    - ages are a 32-bit integer array (entered ages have no upper bound)
+    - registration dates are proleptic ordinals in a 32-bit array
+    - gender strings are interned, so each distinct value is stored once
+    - the remaining text columns are plain lists of str
+
+    Rows are materialized as Patient objects only when indexed.
+    """
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.ages = array('i')
+        self.genders: List[str] = []
+        self.contacts: List[str] = []
+        self.emails: List[str] = []
+        self.addresses: List[str] = []
+        self.registered = array('i')
+
+    @classmethod
+    def from_patients(cls, patients: Iterable[Patient]) -> 'PatientColumns':
+        """Build a store from patient objects (or any objects with the same fields)"""
+        columns = cls()
+        intern = sys.intern
+        ordinal_cache = {}
+        for patient in patients:
+            columns.ids.append(patient.id)
+            columns.names.append(patient.name)
+            columns.ages.append(patient.age)
+            columns.genders.append(intern(patient.gender))
+            columns.contacts.append(patient.contact)
+            columns.emails.append(patient.email)
+            columns.addresses.append(patient.address)
+
+            # Many patients share a registration day; parse each one once
+            registered = patient.registered_date
+            ordinal = ordinal_cache.get(registered)
+            if ordinal is None:
+                ordinal = date.fromisoformat(registered).toordinal()
+                ordinal_cache[registered] = ordinal
+            columns.registered.append(ordinal)
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, row: int) -> Patient:
+        return Patient(
+            id=self.ids[row],
+            name=self.names[row],
+            age=self.ages[row],
+            gender=self.genders[row],
+            contact=self.contacts[row],
+            email=self.emails[row],
+            address=self.addresses[row],
+            registered_date=self.registered_date(row),
+        )
+
+    def __iter__(self) -> Iterator[Patient]:
+        for row in range(len(self)):
+            yield self[row]
+
+    def registered_date(self, row: int) -> str:
+        """Get a row's registration date as YYYY-MM-DD"""
+        return date.fromordinal(self.registered[row]).isoformat()
@@ -0,0 +1,105 @@
+"""
+Series Decimation
+Min/max envelopes of long daily series at power-of-two zoom levels
+"""
+
+import threading
+from array import array
+from typing import Dict, Optional, Sequence, Tuple
+
+Envelope = Tuple[array, array]
+
+
+def min_max_buckets(values: Sequence[float], bucket: int) -> Envelope:
+    """Minimum and maximum of each run of `bucket` values (the last run may be shorter)"""
+    mins, maxs = array('d'), array('d')
+    for start in range(0, len(values), bucket):
+        chunk = values[start:start + bucket]
+        mins.append(min(chunk))
+        maxs.append(max(chunk))
+    return mins, maxs
+
+
+def halve(envelope: Envelope) -> Envelope:
+    """The next coarser level: adjacent bucket pairs merged"""
+    mins, maxs = envelope
+    coarse_mins = array('d', map(min, mins[0::2], mins[1::2]))
+    coarse_maxs = array('d', map(max, maxs[0::2], maxs[1::2]))
+    if len(mins) % 2:
+        coarse_mins.append(mins[-1])
+        coarse_maxs.append(maxs[-1])
+    return coarse_mins, coarse_maxs
+
+
+class MinMaxPyramid:
+    """
+    Min/max envelopes of one dense series, one per zoom level
+
+    Level k has one bucket per 2**k consecutive values, aligned to the
+    start of the series, so panning at a zoom level reuses the same
+    buckets and only zooming needs a new level. Drawn as a vertical
+    min-max stroke per bucket, a level with about one bucket per pixel
+    looks the same as the raw series, spikes included.
+
+    Coarser levels are derived from a finer one by halving; a finer
+    level than any built needs a pass over the raw values, so views
+    draw the nearest built level and ask a worker thread to build()
+    the exact one. Built levels are kept; the lock makes that safe.
+    """
+
+    def __init__(self, values: Sequence[float]):
+        self.values = array('d', values)
+        self.levels: Dict[int, Envelope] = {0: (self.values, self.values)}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @staticmethod
+    def level_for(span: float, pixels: int) -> int:
+        """Coarsest level that still gives at least one bucket per pixel over span values"""
+        level = 0
+        while span / (2 ** (level + 1)) >= max(pixels, 1):
+            level += 1
+        return level
+
+    def get(self, level: int) -> Optional[Envelope]:
+        """A level if it has been built"""
+        return self.levels.get(level)
+
+    def nearest(self, level: int) -> Tuple[int, Envelope]:
+        """
+        The closest built level at or above the requested one, else the coarsest below
+
+        A coarser stand-in draws blockier but never more points than the
+        exact level would.
+        """
+        with self._lock:
+            coarser = [k for k in self.levels if k >= level]
+            chosen = min(coarser) if coarser else max(self.levels)
+            return chosen, self.levels[chosen]
+
+    def build(self, level: int) -> Envelope:
+        """Build a level from the nearest finer one, keeping any levels built on the way"""
+        with self._lock:
+            if level in self.levels:
+                return self.levels[level]
+            finer = max(k for k in self.levels if k < level)
+            envelope = self.levels[finer]
+        if finer == 0:
+            # One pass of C-level min()/max() over slices beats halving from raw
+            return self.build_direct(level)
+        for k in range(finer + 1, level + 1):
+            envelope = halve(envelope)
+            with self._lock:
+                envelope = self.levels.setdefault(k, envelope)
+        return envelope
+
+    def build_direct(self, level: int) -> Envelope:
+        """Build one level in a single pass over the raw values (for the first, coarse view)"""
+        with self._lock:
+            if level in self.levels:
+                return self.levels[level]
+        envelope = min_max_buckets(self.values, 2 ** level)
+        with self._lock:
+            return self.levels.setdefault(level, envelope)
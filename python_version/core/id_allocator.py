@@ -0,0 +1,111 @@
+"""
+ID Allocator
+Block-reserved record numbers from a persisted high-water mark, and the
+sortable ID format built from them
+"""
+
+import string
+import threading
+from typing import List, Optional
+
+from .storage import Database
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS id_sequences (
+    name TEXT PRIMARY KEY,
+    high_water INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+HIGH_WATER_SQL = "SELECT high_water FROM id_sequences WHERE name = ?"
+SET_HIGH_WATER_SQL = "INSERT OR REPLACE INTO id_sequences (name, high_water) VALUES (?, ?)"
+
+# Digits of the original IDs (P0001..P9999), which stay valid as they are
+BASE_WIDTH = 4
+
+# Width markers for longer numbers: PA10000, PB100000, ... Upper-case letters
+# sort after digits, and each marker has one fixed width, so the text order
+# of IDs is their numeric order all the way through.
+WIDTH_MARKERS = string.ascii_uppercase
+
+
+def sortable_id(prefix: str, seq: int) -> str:
+    """Format a positive record number as an ID that sorts by number as text"""
+    digits = str(seq)
+    if len(digits) <= BASE_WIDTH:
+        return f"{prefix}{seq:0{BASE_WIDTH}d}"
+    extra = len(digits) - BASE_WIDTH - 1
+    if extra >= len(WIDTH_MARKERS):
+        raise ValueError(f"Record number too large for an ID: {seq}")
+    return f"{prefix}{WIDTH_MARKERS[extra]}{digits}"
+
+
+def id_seq(prefix: str, record_id: str) -> int:
+    """Get the record number back from an ID made by sortable_id()"""
+    return int(record_id[len(prefix):].lstrip(WIDTH_MARKERS))
+
+
+class IdAllocator:
+    """
+    Hands out record numbers for one sequence, a block at a time
+
+    A block is reserved by raising the sequence's high-water mark in
+    id_sequences inside a BEGIN IMMEDIATE transaction, so two processes
+    (front-desk terminals, a bulk import) never receive the same number,
+    and numbers are then handed out from memory until the block runs out.
+    Numbers are increasing within a process; across processes each block
+    is higher than every block reserved before it. Numbers of a block a
+    process never used are skipped, not reused.
+
+    seed_sql returns the highest number already in use. The mark never
+    falls below it, so rows written without the allocator (older
+    versions, restored backups) are stepped over rather than collided
+    with.
+    """
+
+    DEFAULT_BLOCK_SIZE = 32
+
+    def __init__(self, database: Database, name: str, seed_sql: Optional[str] = None,
+                 block_size: int = DEFAULT_BLOCK_SIZE):
+        self.database = database
+        self.name = name
+        self.seed_sql = seed_sql
+        self.block_size = block_size
+        self.database.connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        # Unused part of the current block: next_seq up to (not including) block_end
+        self._next_seq = 0
+        self._block_end = 0
+
+    def next(self) -> int:
+        """Get one new record number"""
+        return self.take(1)[0]
+
+    def take(self, count: int) -> List[int]:
+        """Get count new record numbers, in increasing order"""
+        with self._lock:
+            taken = []
+            while len(taken) < count:
+                if self._next_seq >= self._block_end:
+                    self._reserve(max(self.block_size, count - len(taken)))
+                stop = min(self._block_end, self._next_seq + count - len(taken))
+                taken.extend(range(self._next_seq, stop))
+                self._next_seq = stop
+            return taken
+
+    def _reserve(self, size: int):
+        """Raise the persisted high-water mark by size and keep the numbers below it"""
+        with self.database.transaction() as connection:
+            row = connection.execute(HIGH_WATER_SQL, (self.name,)).fetchone()
+            high_water = row[0] if row else 0
+            if self.seed_sql:
+                high_water = max(high_water, connection.execute(self.seed_sql).fetchone()[0])
+            connection.execute(SET_HIGH_WATER_SQL, (self.name, high_water + size))
+            # Inside a caller's transaction the block only counts once that commits
+            self.database.on_rollback(self._discard_block)
+        self._next_seq = high_water + 1
+        self._block_end = high_water + size + 1
+
+    def _discard_block(self):
+        """Forget a block whose reservation was rolled back"""
+        self._next_seq = self._block_end = 0
@@ -0,0 +1,138 @@
+"""
+Invoice Export
+Streaming CSV and PDF export of a range of billing periods
+"""
+
+import csv
+import os
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from .billing import LedgerEntry, format_money
+from .invoicing import Invoice, InvoiceRepository
+from .pdf_writer import LINES_PER_PAGE, StreamingPdfWriter
+
+FORMAT_CSV = 'csv'
+FORMAT_PDF = 'pdf'
+
+CSV_HEADER = [
+    "invoice_id", "patient_id", "period", "opening", "charges",
+    "payments", "adjustments", "closing", "issued_at",
+]
+
+# How often (in invoices) progress is reported and cancellation checked
+PROGRESS_INTERVAL = 200
+
+InvoiceWithLines = Tuple[Invoice, List[LedgerEntry]]
+
+
+class ExportCancelled(Exception):
+    """Raised inside an export when its is_cancelled callback returns True"""
+
+
+def csv_rows(invoices: Iterable[InvoiceWithLines]) -> Iterator[List[str]]:
+    """One summary row per invoice"""
+    for invoice, _ in invoices:
+        yield [
+            str(invoice.id), invoice.patient_id, invoice.period,
+            str(invoice.opening), str(invoice.charges), str(invoice.payments),
+            str(invoice.adjustments), str(invoice.closing), invoice.issued_at,
+        ]
+
+
+def invoice_pages(invoice: Invoice, lines: List[LedgerEntry]) -> Iterator[List[str]]:
+    """
+    Render one invoice as pages of text lines
+
+    Long statements continue on further pages; the totals always follow
+    the last line item.
+    """
+    heading = [
+        f"**Smiley Dental - Statement {invoice.period}",
+        f"Invoice #{invoice.id}    Patient {invoice.patient_id}    Issued {invoice.issued_at[:10]}",
+        "",
+        f"**{'Date':<12}{'Description':<44}{'Treatment':<12}{'Amount':>12}",
+    ]
+    totals = [
+        "",
+        f"{'Opening balance':<68}{format_money(invoice.opening):>12}",
+        f"{'Charges':<68}{format_money(invoice.charges):>12}",
+        f"{'Payments':<68}{format_money(invoice.payments):>12}",
+        f"{'Adjustments':<68}{format_money(invoice.adjustments):>12}",
+        f"**{'Balance due':<68}{format_money(invoice.closing):>12}",
+    ]
+
+    page = list(heading)
+    for entry in lines:
+        if len(page) == LINES_PER_PAGE:
+            yield page
+            page = list(heading[:2]) + ["(continued)", heading[3]]
+        page.append(
+            f"{entry.posted_at:%Y-%m-%d}  {entry.description[:42]:<44}"
+            f"{entry.treatment[:10]:<12}{format_money(entry.amount):>12}"
+        )
+    if len(page) + len(totals) > LINES_PER_PAGE:
+        yield page
+        page = list(heading[:2])
+    yield page + totals
+
+
+def _report(done: int, total: int, progress: Optional[Callable[[int, int], None]],
+            is_cancelled: Optional[Callable[[], bool]]):
+    if is_cancelled and is_cancelled():
+        raise ExportCancelled()
+    if progress:
+        progress(done, total)
+
+
+def export_period(invoices: InvoiceRepository, first_period: str, last_period: str, path: str,
+                  export_format: str, progress: Optional[Callable[[int, int], None]] = None,
+                  is_cancelled: Optional[Callable[[], bool]] = None) -> int:
+    """
+    Write the invoices of first_period..last_period ('YYYY-MM', both
+    included) to a CSV or PDF file and return how many
+
+    Invoices are read a page at a time (InvoiceRepository.iter_periods),
+    rendered by generators and written as they are produced, so peak
+    memory is one page of invoices whether one month or a year is
+    exported.
+    The file is written under a temporary name and renamed when
+    complete; a cancelled or failed export leaves no partial file.
+    """
+    if first_period > last_period:
+        raise ValueError(f"The export starts ({first_period}) after it ends ({last_period})")
+    total = invoices.count_for_periods(first_period, last_period)
+    stream = invoices.iter_periods(first_period, last_period, with_lines=export_format == FORMAT_PDF)
+    temporary_path = path + ".part"
+    done = 0
+    try:
+        if export_format == FORMAT_CSV:
+            with open(temporary_path, "w", newline="", encoding="utf-8") as output:
+                writer = csv.writer(output)
+                writer.writerow(CSV_HEADER)
+                for row in csv_rows(stream):
+                    writer.writerow(row)
+                    done += 1
+                    if done % PROGRESS_INTERVAL == 0:
+                        _report(done, total, progress, is_cancelled)
+        elif export_format == FORMAT_PDF:
+            with open(temporary_path, "wb") as output:
+                pdf = StreamingPdfWriter(output)
+                for invoice, lines in stream:
+                    for page in invoice_pages(invoice, lines):
+                        pdf.add_page(page)
+                    done += 1
+                    if done % PROGRESS_INTERVAL == 0:
+                        _report(done, total, progress, is_cancelled)
+                pdf.close()
+        else:
+            raise ValueError(f"Unknown export format: {export_format}")
+        os.replace(temporary_path, path)
+    except BaseException:
+        stream.close()
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+    if progress:
+        progress(done, total)
+    return done
@@ -0,0 +1,287 @@
+"""
+Month-End Invoicing
+Batch invoice generation from the billing ledger across a process pool
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .billing import (
+    ENTRY_COLUMNS, POSTED_FORMAT, KIND_ADJUSTMENT, KIND_CHARGE, KIND_PAYMENT,
+    LedgerEntry, entry_from_row, from_cents
+)
+from .storage import Database
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS invoices (
+    id INTEGER PRIMARY KEY,
+    patient_id TEXT NOT NULL,
+    period TEXT NOT NULL,
+    opening_cents INTEGER NOT NULL,
+    charges_cents INTEGER NOT NULL,
+    payments_cents INTEGER NOT NULL,
+    adjustments_cents INTEGER NOT NULL,
+    closing_cents INTEGER NOT NULL,
+    issued_at TEXT NOT NULL,
+    UNIQUE (patient_id, period)
+);
+CREATE INDEX IF NOT EXISTS idx_invoices_period ON invoices (period);
+"""
+
+INVOICE_COLUMNS = (
+    "id, patient_id, period, opening_cents, charges_cents, payments_cents, "
+    "adjustments_cents, closing_cents, issued_at"
+)
+
+INSERT_INVOICE_SQL = (
+    "INSERT OR IGNORE INTO invoices (patient_id, period, opening_cents, charges_cents, "
+    "payments_cents, adjustments_cents, closing_cents, issued_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+PATIENT_INVOICES_SQL = f"SELECT {INVOICE_COLUMNS} FROM invoices WHERE patient_id = ? ORDER BY period DESC"
+PERIOD_COUNT_SQL = "SELECT COUNT(*) FROM invoices WHERE period BETWEEN ? AND ?"
+# Keyset pages in (period, id) order; the period index carries id as its rowid
+PERIOD_PAGE_SQL = (
+    f"SELECT {INVOICE_COLUMNS} FROM invoices "
+    "WHERE period BETWEEN ? AND ? AND (period, id) > (?, ?) ORDER BY period, id LIMIT ?"
+)
+ACCOUNT_IDS_SQL = "SELECT patient_id FROM ledger_balances ORDER BY patient_id"
+
+# Per chunk of accounts: current balances, the period's totals by kind, and
+# everything posted after the period (to step the balance back to month end)
+CHUNK_BALANCES_SQL = (
+    "SELECT patient_id, balance_cents FROM ledger_balances WHERE patient_id BETWEEN ? AND ?"
+)
+CHUNK_PERIOD_SQL = (
+    "SELECT patient_id, kind, SUM(amount_cents) FROM ledger_entries "
+    "WHERE patient_id BETWEEN ? AND ? AND posted_at >= ? AND posted_at < ? "
+    "GROUP BY patient_id, kind"
+)
+CHUNK_LATER_SQL = (
+    "SELECT patient_id, SUM(amount_cents) FROM ledger_entries "
+    "WHERE patient_id BETWEEN ? AND ? AND posted_at >= ? GROUP BY patient_id"
+)
+
+# Accounts per unit of work handed to a pool process
+DEFAULT_CHUNK_SIZE = 5000
+
+# Invoices per page when streaming a period out
+EXPORT_PAGE_SIZE = 500
+
+# Row layout shared by the workers and INSERT_INVOICE_SQL (without issued_at)
+InvoiceRow = Tuple[str, str, int, int, int, int, int]
+
+
+class Invoice(NamedTuple):
+    """A patient's statement for one month"""
+    id: int
+    patient_id: str
+    period: str
+    opening: Decimal
+    charges: Decimal
+    payments: Decimal
+    adjustments: Decimal
+    closing: Decimal
+    issued_at: str
+
+
+def invoice_from_row(row) -> Invoice:
+    """Build an Invoice from an invoices table row"""
+    return Invoice(
+        id=row["id"],
+        patient_id=row["patient_id"],
+        period=row["period"],
+        opening=from_cents(row["opening_cents"]),
+        charges=from_cents(row["charges_cents"]),
+        payments=from_cents(row["payments_cents"]),
+        adjustments=from_cents(row["adjustments_cents"]),
+        closing=from_cents(row["closing_cents"]),
+        issued_at=row["issued_at"],
+    )
+
+
+def month_bounds(period: str) -> Tuple[datetime, datetime]:
+    """[start, end) of a 'YYYY-MM' period"""
+    start = datetime.strptime(period, "%Y-%m")
+    if start.month == 12:
+        return start, start.replace(year=start.year + 1, month=1)
+    return start, start.replace(month=start.month + 1)
+
+
+def compute_invoice_rows(connection, period: str, first_id: str, last_id: str) -> List[InvoiceRow]:
+    """
+    Invoice figures for the accounts with IDs in [first_id, last_id]
+
+    Three grouped queries per chunk, all in integer cents. The closing
+    balance is the running balance minus what was posted after the
+    month, so no account's full history is summed. The queries share
+    one read transaction: in WAL mode each would otherwise see the
+    ledger as of its own start, and an entry posted in between would
+    make the closing balance wrong by its amount.
+    """
+    start, end = month_bounds(period)
+    start_text, end_text = start.strftime(POSTED_FORMAT), end.strftime(POSTED_FORMAT)
+
+    own_transaction = not connection.in_transaction
+    if own_transaction:
+        connection.execute("BEGIN")
+    try:
+        balances = dict(connection.execute(CHUNK_BALANCES_SQL, (first_id, last_id)).fetchall())
+        later = dict(connection.execute(CHUNK_LATER_SQL, (first_id, last_id, end_text)).fetchall())
+        totals = {}
+        for patient_id, kind, cents in connection.execute(
+                CHUNK_PERIOD_SQL, (first_id, last_id, start_text, end_text)):
+            totals.setdefault(patient_id, {})[kind] = cents
+    finally:
+        if own_transaction:
+            connection.execute("COMMIT")
+
+    rows = []
+    for patient_id, balance in balances.items():
+        closing = balance - later.get(patient_id, 0)
+        by_kind = totals.get(patient_id)
+        if by_kind is None and closing == 0:
+            continue
+        by_kind = by_kind or {}
+        charges = by_kind.get(KIND_CHARGE, 0)
+        payments = by_kind.get(KIND_PAYMENT, 0)
+        adjustments = by_kind.get(KIND_ADJUSTMENT, 0)
+        opening = closing - charges - payments - adjustments
+        rows.append((patient_id, period, opening, charges, payments, adjustments, closing))
+    return rows
+
+
+def _invoice_chunk(database_path: str, period: str, first_id: str, last_id: str) -> List[InvoiceRow]:
+    """Pool entry point: read one chunk on the worker's own connection"""
+    database = Database(database_path)
+    try:
+        return compute_invoice_rows(database.connection, period, first_id, last_id)
+    finally:
+        database.close()
+
+
+class InvoiceRepository:
+    """
+    Monthly invoices derived from the ledger
+
+    Month-end runs split the accounts into ID ranges and compute each
+    range in a separate process; the parent only writes the results.
+    Re-running a month leaves invoices already issued untouched.
+    """
+
+    def __init__(self, database: Database):
+        self.database = database
+        self.database.connection.executescript(SCHEMA)
+
+    def for_patient(self, patient_id: str) -> List[Invoice]:
+        """A patient's invoices, newest first"""
+        rows = self.database.connection.execute(PATIENT_INVOICES_SQL, (patient_id,))
+        return [invoice_from_row(row) for row in rows]
+
+    def count_for_period(self, period: str) -> int:
+        """Number of invoices issued for a period"""
+        return self.count_for_periods(period, period)
+
+    def count_for_periods(self, first_period: str, last_period: str) -> int:
+        """Number of invoices issued for the periods first_period..last_period"""
+        return self.database.connection.execute(PERIOD_COUNT_SQL, (first_period, last_period)).fetchone()[0]
+
+    def iter_periods(self, first_period: str, last_period: str, page_size: int = EXPORT_PAGE_SIZE,
+                     with_lines: bool = True) -> Iterator[Tuple[Invoice, List[LedgerEntry]]]:
+        """
+        Stream the invoices of first_period..last_period with their line
+        items, page by page in period order
+
+        Each page is one keyset query for the invoices and one per period
+        on the page for their ledger entries (skipped when with_lines is
+        False), so memory is bounded by page_size however many months
+        are exported. Uses its own connection so it can run on a worker
+        thread.
+        """
+        connection = self.database.connect()
+        try:
+            cursor = (first_period, 0)
+            while True:
+                invoices = [
+                    invoice_from_row(row)
+                    for row in connection.execute(PERIOD_PAGE_SQL, (first_period, last_period, *cursor, page_size))
+                ]
+                if not invoices:
+                    return
+                cursor = (invoices[-1].period, invoices[-1].id)
+                if not with_lines:
+                    yield from ((invoice, []) for invoice in invoices)
+                    continue
+                lines = {(invoice.period, invoice.patient_id): [] for invoice in invoices}
+                for period in dict.fromkeys(invoice.period for invoice in invoices):
+                    patient_ids = [patient_id for (invoice_period, patient_id) in lines if invoice_period == period]
+                    start, end = month_bounds(period)
+                    rows = connection.execute(
+                        f"SELECT {ENTRY_COLUMNS} FROM ledger_entries "
+                        f"WHERE patient_id IN ({', '.join('?' * len(patient_ids))}) "
+                        "AND posted_at >= ? AND posted_at < ? ORDER BY patient_id, posted_at, id",
+                        (*patient_ids, start.strftime(POSTED_FORMAT), end.strftime(POSTED_FORMAT))
+                    )
+                    for row in rows:
+                        lines[period, row["patient_id"]].append(entry_from_row(row))
+                for invoice in invoices:
+                    yield invoice, lines[invoice.period, invoice.patient_id]
+        finally:
+            connection.close()
+
+    def _account_ranges(self, chunk_size: int) -> Iterator[Tuple[str, str]]:
+        """Consecutive [first, last] patient ID ranges of chunk_size accounts"""
+        chunk = []
+        for (patient_id,) in self.database.connection.execute(ACCOUNT_IDS_SQL):
+            chunk.append(patient_id)
+            if len(chunk) == chunk_size:
+                yield chunk[0], chunk[-1]
+                chunk = []
+        if chunk:
+            yield chunk[0], chunk[-1]
+
+    def _store(self, rows: List[InvoiceRow], issued_at: str):
+        with self.database.transaction() as connection:
+            connection.executemany(INSERT_INVOICE_SQL, (row + (issued_at,) for row in rows))
+
+    def generate_month_end(self, period: str, workers: Optional[int] = None,
+                           chunk_size: int = DEFAULT_CHUNK_SIZE,
+                           progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """
+        Issue invoices for every account active in or owing at the end of a period
+
+        Issued invoices are never revised, so a period that has not ended
+        yet is refused with ValueError. workers=1 (or an in-memory database, which other processes cannot
+        open) computes in this process. progress is called with
+        (chunks done, chunk count). Returns the number of invoices issued.
+        """
+        now = datetime.now()
+        if month_bounds(period)[1] > now:
+            raise ValueError(f"{period} has not ended yet; invoices can only be issued for past months")
+        issued_at = now.strftime(POSTED_FORMAT)
+        ranges = list(self._account_ranges(chunk_size))
+        before = self.count_for_period(period)
+        workers = workers or os.cpu_count() or 1
+
+        if workers == 1 or len(ranges) <= 1 or self.database.path == ":memory:":
+            for done, (first_id, last_id) in enumerate(ranges, 1):
+                self._store(compute_invoice_rows(self.database.connection, period, first_id, last_id), issued_at)
+                if progress:
+                    progress(done, len(ranges))
+            return self.count_for_period(period) - before
+
+        # spawn rather than fork: the GUI process has Qt threads running
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=context) as pool:
+            futures = [
+                pool.submit(_invoice_chunk, self.database.path, period, first_id, last_id)
+                for first_id, last_id in ranges
+            ]
+            for done, future in enumerate(as_completed(futures), 1):
+                self._store(future.result(), issued_at)
+                if progress:
+                    progress(done, len(ranges))
+        return self.count_for_period(period) - before
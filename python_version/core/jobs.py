@@ -0,0 +1,62 @@
+"""
+Background Jobs
+Cancellation tokens and the context a background job runs with
+"""
+
+import threading
+from typing import Callable, Optional
+
+from .storage import Database
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once its token has been cancelled"""
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation flag shared between a job and its owner
+
+    The owner calls cancel(); the job polls check() between steps and
+    stops by raising JobCancelled.
+    """
+
+    __slots__ = ('_event',)
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Ask the job to stop"""
+        self._event.set()
+
+    def is_cancelled(self) -> bool:
+        """Check whether cancel() has been called"""
+        return self._event.is_set()
+
+    def check(self):
+        """Raise JobCancelled if cancel() has been called"""
+        if self._event.is_set():
+            raise JobCancelled()
+
+
+class JobContext:
+    """What a job function receives: its own connection, its token and a progress callback"""
+
+    __slots__ = ('database', 'token', '_progress')
+
+    def __init__(self, database: Database, token: CancellationToken,
+                 progress: Optional[Callable[[int, int], None]] = None):
+        self.database = database
+        self.token = token
+        self._progress = progress
+
+    def progress(self, done: int, total: int):
+        """Report progress, stopping here if the job was cancelled"""
+        self.token.check()
+        if self._progress:
+            self._progress(done, total)
+
+    def check(self):
+        """Stop here if the job was cancelled"""
+        self.token.check()
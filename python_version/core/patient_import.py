@@ -0,0 +1,183 @@
+"""
+Patient Import
+Streaming CSV import of patient records with validation and de-duplication
+"""
+
+import csv
+import io
+import os
+from datetime import date
+from typing import Dict, Iterator, List, Sequence, Set, Tuple
+
+from .jobs import JobContext
+from .patient_repository import MAX_QUERY_PARAMETERS, PatientRepository, patient_id
+from .patients import Patient, clean_patient_fields, today_string
+
+# Rows validated, checked and inserted per transaction; also bounds memory,
+# as nothing outside the current batch is kept. Each batch looks up at most
+# this many contacts (or emails) in one IN query.
+IMPORT_BATCH = 500
+
+# Rejected rows listed in the summary; the rest are only counted
+MAX_REPORTED_ERRORS = 200
+
+# Header names recognised for each field, compared lower-case
+COLUMN_ALIASES = {
+    'name': ("name", "full name", "patient name"),
+    'age': ("age",),
+    'gender': ("gender", "sex"),
+    'contact': ("contact", "phone", "phone number", "mobile"),
+    'email': ("email", "email address", "e-mail"),
+    'address': ("address",),
+    'registered_date': ("registered_date", "registered date", "registered", "date registered"),
+}
+
+
+class ImportSummary:
+    """Running totals of an import; read by the owner while and after it runs"""
+
+    __slots__ = ('imported', 'duplicates', 'invalid', 'errors', 'bytes_read', 'total_bytes')
+
+    def __init__(self):
+        self.imported = 0
+        self.duplicates = 0
+        self.invalid = 0
+        # (line number, message) of the first MAX_REPORTED_ERRORS rejected rows
+        self.errors: List[Tuple[int, str]] = []
+        self.bytes_read = 0
+        self.total_bytes = 0
+
+    def reject(self, line: int, message: str):
+        """Count an invalid row, keeping its message while there is room"""
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def column_positions(header: Sequence[str]) -> Dict[str, int]:
+    """Field -> column index from a header row; raises ValueError without a name column"""
+    names = [cell.strip().lower() for cell in header]
+    positions = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in names:
+                positions[field] = names.index(alias)
+                break
+    if 'name' not in positions:
+        raise ValueError("The file has no Name column")
+    return positions
+
+
+def read_rows(path: str, summary: ImportSummary) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """
+    Stream (line number, raw field values) from a CSV file, one row at a
+    time, updating summary.bytes_read as it goes
+    """
+    summary.total_bytes = os.path.getsize(path)
+    with open(path, "rb") as binary:
+        # utf-8-sig drops the byte order mark spreadsheet exports start with;
+        # the binary file's position (a buffer ahead of the rows) is the progress
+        reader = csv.reader(io.TextIOWrapper(binary, encoding="utf-8-sig", newline=""))
+        header = next(reader, None)
+        if header is None:
+            return
+        positions = column_positions(header)
+        for row in reader:
+            summary.bytes_read = binary.tell()
+            if not any(cell.strip() for cell in row):
+                continue
+            yield reader.line_num, {
+                field: row[index] if index < len(row) else ""
+                for field, index in positions.items()
+            }
+        summary.bytes_read = summary.total_bytes
+
+
+def validate_row(values: Dict[str, str]) -> Dict:
+    """A row's fields under the same rules as PatientDialog; raises ValueError"""
+    fields = clean_patient_fields(
+        values.get('name', ""), values.get('age', ""), values.get('gender', ""),
+        values.get('contact', ""), values.get('email', ""), values.get('address', ""),
+    )
+    registered = values.get('registered_date', "").strip()
+    if registered:
+        try:
+            registered = date.fromisoformat(registered).isoformat()
+        except ValueError:
+            raise ValueError(f"Registered date must be YYYY-MM-DD, not '{registered}'") from None
+    fields['registered_date'] = registered or today_string()
+    return fields
+
+
+def _existing(connection, column: str, values: Set[str]) -> Set[str]:
+    """Which of the values are already stored in a column (one indexed IN query per chunk)"""
+    found = set()
+    values = list(values)
+    for start in range(0, len(values), MAX_QUERY_PARAMETERS):
+        chunk = values[start:start + MAX_QUERY_PARAMETERS]
+        rows = connection.execute(
+            f"SELECT {column} FROM patients WHERE {column} IN ({', '.join('?' * len(chunk))})", chunk
+        )
+        found.update(row[0] for row in rows)
+    return found
+
+
+class PatientImport:
+    """
+    One CSV import, run as a background job: PatientImport(path)(context)
+
+    Rows are streamed, validated with the dialog's rules, and inserted
+    IMPORT_BATCH at a time, each batch in its own transaction. A row
+    whose contact number or email already belongs to a patient (stored
+    before, or earlier in the file) is skipped; the check is an indexed
+    lookup per batch, so memory stays bounded by the batch whatever the
+    file size. Cancelling stops between batches; batches already
+    committed stay imported.
+
+    Progress is reported in kilobytes of the file read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.summary = ImportSummary()
+
+    def __call__(self, context: JobContext) -> ImportSummary:
+        repository = PatientRepository(context.database)
+        batch: List[Dict] = []
+        for line, values in read_rows(self.path, self.summary):
+            try:
+                batch.append(validate_row(values))
+            except ValueError as error:
+                self.summary.reject(line, str(error))
+            if len(batch) >= IMPORT_BATCH:
+                self._insert(repository, batch)
+                batch = []
+                context.progress(self.summary.bytes_read // 1024, self.summary.total_bytes // 1024)
+        if batch:
+            self._insert(repository, batch)
+        context.progress(self.summary.total_bytes // 1024, self.summary.total_bytes // 1024)
+        return self.summary
+
+    def _insert(self, repository: PatientRepository, batch: List[Dict]):
+        """Drop duplicates from a batch and insert the rest under fresh IDs"""
+        with repository.batch() as connection:
+            contacts = _existing(connection, 'contact', {f['contact'] for f in batch if f['contact']})
+            emails = _existing(connection, 'email', {f['email'] for f in batch if f['email']})
+            kept = []
+            for fields in batch:
+                if fields['contact'] in contacts or fields['email'] in emails:
+                    self.summary.duplicates += 1
+                    continue
+                # Later rows of the same batch are checked against this one too
+                if fields['contact']:
+                    contacts.add(fields['contact'])
+                if fields['email']:
+                    emails.add(fields['email'])
+                kept.append(fields)
+            # One reservation covers the batch; it joins this transaction
+            patients = [
+                Patient(id=patient_id(seq), **fields)
+                for seq, fields in zip(repository.ids.take(len(kept)), kept)
+            ]
+            repository.add_many(patients)
+        self.summary.imported += len(patients)
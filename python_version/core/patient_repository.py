@@ -0,0 +1,185 @@
+"""
+Patient Repository
+SQLite-backed patient storage with paged reads
+"""
+
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+from .change_feed import ChangeFeed
+from .id_allocator import IdAllocator, id_seq, sortable_id
+from .patients import Patient
+from .storage import Database
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS patients (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    gender TEXT NOT NULL,
+    contact TEXT NOT NULL,
+    email TEXT NOT NULL,
+    address TEXT NOT NULL,
+    registered_date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_patients_name ON patients (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_patients_contact ON patients (contact);
+CREATE INDEX IF NOT EXISTS idx_patients_email ON patients (email);
+"""
+
+COLUMNS = "seq, id, name, age, gender, contact, email, address, registered_date"
+
+INSERT_SQL = (
+    "INSERT INTO patients (seq, id, name, age, gender, contact, email, address, registered_date) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+UPDATE_SQL = (
+    "UPDATE patients SET name = ?, age = ?, gender = ?, contact = ?, email = ?, address = ? "
+    "WHERE id = ?"
+)
+DELETE_SQL = "DELETE FROM patients WHERE id = ?"
+PAGE_SQL = f"SELECT {COLUMNS} FROM patients WHERE seq > ? ORDER BY seq LIMIT ?"
+GET_SQL = f"SELECT {COLUMNS} FROM patients WHERE id = ?"
+COUNT_SQL = "SELECT COUNT(*) FROM patients"
+MAX_SEQ_SQL = "SELECT COALESCE(MAX(seq), 0) FROM patients"
+
+# SQLite's default limit on host parameters in one statement
+MAX_QUERY_PARAMETERS = 999
+
+
+class PatientPage(NamedTuple):
+    """One page of patients plus the cursor to fetch the next page"""
+    patients: List[Patient]
+    cursor: int
+
+
+def patient_from_row(row) -> Patient:
+    """Build a Patient from a patients table row"""
+    return Patient(
+        id=row["id"],
+        name=row["name"],
+        age=row["age"],
+        gender=row["gender"],
+        contact=row["contact"],
+        email=row["email"],
+        address=row["address"],
+        registered_date=row["registered_date"],
+    )
+
+
+def patient_id(seq: int) -> str:
+    """Format a patient ID (P0001 ... P9999, PA10000 ...) that sorts by sequence"""
+    return sortable_id("P", seq)
+
+
+def patient_seq(patient_id: str) -> int:
+    """Get the numeric sequence encoded in a patient ID"""
+    return id_seq("P", patient_id)
+
+
+class PatientRepository:
+    """
+    Patient storage backed by SQLite
+
+    Reads are keyset-paginated on the integer sequence, so loading page N
+    costs the same as loading page 1 and nothing reads the whole table.
+    Writes run inside Database.transaction(); wrap many calls in
+    batch() to commit them together. New IDs come from an IdAllocator,
+    so terminals sharing the database never hand out the same one.
+    """
+
+    DEFAULT_PAGE_SIZE = 200
+
+    def __init__(self, database: Database):
+        self.database = database
+        self.database.connection.executescript(SCHEMA)
+        # Other terminals pick up each added, edited or deleted patient from the change log
+        self.database.log_changes('patients', 'id')
+        self.ids = IdAllocator(database, 'patients', MAX_SEQ_SQL)
+
+    def batch(self):
+        """Group several writes into one transaction"""
+        return self.database.transaction()
+
+    def change_feed(self) -> ChangeFeed:
+        """Patients written from now on, by this or any other terminal"""
+        return ChangeFeed(self.database, ('patients',))
+
+    def next_id(self) -> str:
+        """Allocate the ID for a new patient"""
+        return patient_id(self.ids.next())
+
+    def add(self, patient: Patient):
+        """Insert one patient"""
+        self.add_many([patient])
+
+    def add_many(self, patients: Iterable[Patient]):
+        """Insert patients in a single transaction"""
+        with self.database.transaction() as connection:
+            connection.executemany(INSERT_SQL, (
+                (patient_seq(p.id), p.id, p.name, p.age, p.gender,
+                 p.contact, p.email, p.address, p.registered_date)
+                for p in patients
+            ))
+
+    def update(self, patient: Patient):
+        """Save an edited patient"""
+        with self.database.transaction() as connection:
+            connection.execute(UPDATE_SQL, (
+                patient.name, patient.age, patient.gender, patient.contact,
+                patient.email, patient.address, patient.id
+            ))
+
+    def delete(self, patient_id: str):
+        """Delete one patient"""
+        with self.database.transaction() as connection:
+            connection.execute(DELETE_SQL, (patient_id,))
+
+    def get(self, patient_id: str) -> Optional[Patient]:
+        """Get one patient by ID"""
+        row = self.database.connection.execute(GET_SQL, (patient_id,)).fetchone()
+        return patient_from_row(row) if row else None
+
+    def get_many(self, patient_ids: Sequence[str]) -> List[Patient]:
+        """Get patients by ID, in the order the IDs were given"""
+        found = {}
+        for start in range(0, len(patient_ids), MAX_QUERY_PARAMETERS):
+            chunk = patient_ids[start:start + MAX_QUERY_PARAMETERS]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = self.database.connection.execute(
+                f"SELECT {COLUMNS} FROM patients WHERE id IN ({placeholders})", chunk
+            )
+            for row in rows:
+                found[row["id"]] = patient_from_row(row)
+        return [found[pid] for pid in patient_ids if pid in found]
+
+    def count(self) -> int:
+        """Count stored patients"""
+        return self.database.connection.execute(COUNT_SQL).fetchone()[0]
+
+    def page(self, cursor: int = 0, limit: int = DEFAULT_PAGE_SIZE) -> PatientPage:
+        """Get the patients after a cursor (0 for the first page)"""
+        rows = self.database.connection.execute(PAGE_SQL, (cursor, limit)).fetchall()
+        patients = [patient_from_row(row) for row in rows]
+        next_cursor = rows[-1]["seq"] if rows else cursor
+        return PatientPage(patients, next_cursor)
+
+    def iter_all(self, page_size: int = 2000) -> Iterator[Patient]:
+        """
+        Stream every patient page by page
+
+        Uses its own connection so it can run on a worker thread while the
+        GUI thread keeps writing through the main one.
+        """
+        connection = self.database.connect()
+        try:
+            cursor = 0
+            while True:
+                rows = connection.execute(PAGE_SQL, (cursor, page_size)).fetchall()
+                if not rows:
+                    return
+                for row in rows:
+                    yield patient_from_row(row)
+                cursor = rows[-1]["seq"]
+        finally:
+            connection.close()
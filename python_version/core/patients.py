@@ -0,0 +1,73 @@
+"""
+Patient Records
+Patient data model shared by storage, search and UI
+"""
+
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+_today_cache: Tuple[Optional[date], str] = (None, "")
+
+
+def today_string() -> str:
+    """Get today's date as YYYY-MM-DD, formatting it once per day"""
+    global _today_cache
+    today = date.today()
+    if _today_cache[0] != today:
+        _today_cache = (today, today.isoformat())
+    return _today_cache[1]
+
+
+class Patient:
+    """
+    Patient data model
+
+    Slotted so a record carries no per-instance __dict__, which dominates
+    memory when tens of thousands of patients are loaded at once.
+    """
+
+    __slots__ = (
+        'id', 'name', 'age', 'gender', 'contact',
+        'email', 'address', 'registered_date'
+    )
+
+    def __init__(self, id: str, name: str, age: int, gender: str, 
+                 contact: str, email: str, address: str,
+                 registered_date: Optional[str] = None):
+        self.id = id
+        self.name = name
+        self.age = age
+        self.gender = gender
+        self.contact = contact
+        self.email = email
+        self.address = address
+        self.registered_date = registered_date or today_string()
+
+
+def clean_patient_fields(name: str, age: str, gender: str, contact: str,
+                         email: str, address: str) -> Dict:
+    """
+    The rules every new or edited patient passes, from form or file text
+
+    Whitespace is trimmed, the age is a whole number (blank meaning 0)
+    and email addresses are stored lower-case so they compare equal.
+    Raises ValueError naming the first field that fails.
+    """
+    name = name.strip()
+    if not name:
+        raise ValueError("Name is required")
+    age = age.strip()
+    try:
+        age_value = int(age) if age else 0
+    except ValueError:
+        raise ValueError(f"Age must be a whole number, not '{age}'") from None
+    if age_value < 0:
+        raise ValueError("Age cannot be negative")
+    return {
+        'name': name,
+        'age': age_value,
+        'gender': gender.strip(),
+        'contact': contact.strip(),
+        'email': email.strip().lower(),
+        'address': address.strip(),
+    }
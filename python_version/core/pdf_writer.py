@@ -0,0 +1,114 @@
+"""
+PDF Writer
+Minimal monospaced text PDF written page by page to an open file
+"""
+
+from array import array
+from typing import BinaryIO, Sequence
+
+# US Letter in points
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+
+MARGIN = 54
+FONT_SIZE = 10
+LINE_HEIGHT = 14
+
+# Text lines that fit between the margins at LINE_HEIGHT
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN) // LINE_HEIGHT
+
+# Object numbers fixed up front; page objects are numbered from FIRST_PAGE_OBJECT
+CATALOG_OBJECT = 1
+PAGES_OBJECT = 2
+FONT_OBJECT = 3
+BOLD_FONT_OBJECT = 4
+FIRST_PAGE_OBJECT = 5
+
+
+def _escape(text: str) -> bytes:
+    """Encode text as a PDF literal string body (WinAnsi, Latin-1 subset)"""
+    data = text.encode("latin-1", "replace")
+    return data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+class StreamingPdfWriter:
+    """
+    Writes pages straight to the output as they are added
+
+    Only each object's byte offset is kept (16 bytes per page), so
+    memory does not grow with the text written. The page tree and cross-reference table go at the end, in
+    close().
+
+    Lines starting with '**' are set in bold (without the marker).
+    """
+
+    def __init__(self, output: BinaryIO):
+        self.output = output
+        self.offsets = array('q')
+        self.page_count = 0
+        self.position = 0
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._write_object(FONT_OBJECT, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier "
+                                        b"/Encoding /WinAnsiEncoding >>")
+        self._write_object(BOLD_FONT_OBJECT, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier-Bold "
+                                             b"/Encoding /WinAnsiEncoding >>")
+
+    def _write(self, data: bytes):
+        self.output.write(data)
+        self.position += len(data)
+
+    def _write_object_start(self, number: int):
+        # offsets is indexed by object number - 1; objects may be written out of order
+        while len(self.offsets) < number:
+            self.offsets.append(0)
+        self.offsets[number - 1] = self.position
+        self._write(b"%d 0 obj\n" % number)
+
+    def _write_object(self, number: int, body: bytes):
+        self._write_object_start(number)
+        self._write(body + b"\nendobj\n")
+
+    @staticmethod
+    def _page_object(index: int) -> int:
+        # Each page is a content stream object followed by its page object
+        return FIRST_PAGE_OBJECT + 2 * index + 1
+
+    def add_page(self, lines: Sequence[str]):
+        """Write one page of text lines (at most LINES_PER_PAGE)"""
+        content = [b"BT", b"%d TL" % LINE_HEIGHT, b"%d %d Td" % (MARGIN, PAGE_HEIGHT - MARGIN)]
+        current_font = None
+        for line in lines[:LINES_PER_PAGE]:
+            font = b"/F2" if line.startswith("**") else b"/F1"
+            if font != current_font:
+                content.append(font + b" %d Tf" % FONT_SIZE)
+                current_font = font
+            content.append(b"(" + _escape(line[2:] if font == b"/F2" else line) + b") Tj T*")
+        content.append(b"ET")
+        stream = b"\n".join(content)
+
+        page_object = self._page_object(self.page_count)
+        content_object = page_object - 1
+        self._write_object(content_object, b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        self._write_object(page_object, (
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> /Contents %d 0 R >>"
+        ) % (PAGES_OBJECT, PAGE_WIDTH, PAGE_HEIGHT, FONT_OBJECT, BOLD_FONT_OBJECT, content_object))
+        self.page_count += 1
+
+    def close(self):
+        """Write the page tree, catalog, cross-reference table and trailer"""
+        # The page tree is written kid by kid rather than built as one string
+        self._write_object_start(PAGES_OBJECT)
+        self._write(b"<< /Type /Pages /Count %d /Kids [" % self.page_count)
+        for index in range(self.page_count):
+            self._write(b"%d 0 R " % self._page_object(index))
+        self._write(b"] >>\nendobj\n")
+        self._write_object(CATALOG_OBJECT, b"<< /Type /Catalog /Pages %d 0 R >>" % PAGES_OBJECT)
+
+        xref_position = self.position
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(self.offsets) + 1))
+        for offset in self.offsets:
+            self._write(b"%010d 00000 n \n" % offset)
+        self._write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%EOF\n" % (
+            len(self.offsets) + 1, CATALOG_OBJECT, xref_position
+        ))
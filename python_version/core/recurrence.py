@@ -0,0 +1,150 @@
+"""
+Recurring Appointments
+Recurrence rules expanded lazily into occurrences of a queried window
+"""
+
+import calendar
+import heapq
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Optional
+
+from .scheduling import Appointment, INACTIVE_STATUSES, STATUS_SCHEDULED
+
+DAILY = 'daily'
+WEEKLY = 'weekly'
+MONTHLY = 'monthly'
+
+FREQUENCIES = (DAILY, WEEKLY, MONTHLY)
+
+
+def add_months(moment: datetime, months: int) -> datetime:
+    """Shift by whole months, clamping the day to the target month's length"""
+    month_index = moment.month - 1 + months
+    year, month = moment.year + month_index // 12, month_index % 12 + 1
+    day = min(moment.day, calendar.monthrange(year, month)[1])
+    return moment.replace(year=year, month=month, day=day)
+
+
+class RecurrenceRule:
+    """
+    Every interval days, weeks or months, optionally bounded
+
+    count limits the number of occurrences, until the last start. Neither
+    is required: an open-ended series is never materialized, only walked
+    over the window being asked for.
+    """
+
+    __slots__ = ('frequency', 'interval', 'count', 'until')
+
+    def __init__(self, frequency: str, interval: int = 1,
+                 count: Optional[int] = None, until: Optional[datetime] = None):
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"Unknown recurrence frequency: {frequency}")
+        if interval < 1:
+            raise ValueError("Recurrence interval must be at least 1")
+        self.frequency = frequency
+        self.interval = interval
+        self.count = count
+        self.until = until
+
+    def nth(self, first: datetime, index: int) -> datetime:
+        """Start of occurrence number index (0 is the first)"""
+        if self.frequency == MONTHLY:
+            return add_months(first, index * self.interval)
+        days = self.interval * (7 if self.frequency == WEEKLY else 1)
+        return first + timedelta(days=days * index)
+
+    def _first_index_at_or_after(self, first: datetime, moment: datetime) -> int:
+        """Smallest occurrence index whose start is >= moment, found without walking"""
+        if moment <= first:
+            return 0
+        if self.frequency == MONTHLY:
+            months = (moment.year - first.year) * 12 + moment.month - first.month
+            # Day clamping can pull an occurrence back a month's worth; start one early
+            index = max(0, months // self.interval - 1)
+            while self.nth(first, index) < moment:
+                index += 1
+            return index
+        step = timedelta(days=self.interval * (7 if self.frequency == WEEKLY else 1))
+        return -((first - moment) // step)
+
+    def starts(self, first: datetime, start: datetime, end: datetime) -> Iterator[datetime]:
+        """Occurrence starts in [start, end), generated one at a time"""
+        index = self._first_index_at_or_after(first, start)
+        while self.count is None or index < self.count:
+            moment = self.nth(first, index)
+            if moment >= end or (self.until is not None and moment > self.until):
+                return
+            yield moment
+            index += 1
+
+
+class Occurrence(Appointment):
+    """One occurrence of a series, built on demand and never stored unless overridden"""
+
+    __slots__ = ('series', 'original_start')
+
+    def __init__(self, series: 'Series', original_start: datetime, start: datetime, end: datetime,
+                 status: str = STATUS_SCHEDULED, notes: str = ""):
+        super().__init__(None, series.patient_id, series.dentist, series.chair, start, end, status, notes)
+        self.series = series
+        self.original_start = original_start
+
+
+class Series:
+    """
+    A recurring appointment: a template, a rule and its exceptions
+
+    exceptions is the side index of occurrences that differ from the
+    template, keyed by their original start. An override with an inactive
+    status (a cancelled visit) removes the occurrence; any other override
+    replaces it, possibly at a different time.
+    """
+
+    def __init__(self, id: Optional[int], patient_id: str, dentist: str, chair: str,
+                 start: datetime, end: datetime, rule: RecurrenceRule, notes: str = ""):
+        if end <= start:
+            raise ValueError("Appointment must end after it starts")
+        self.id = id
+        self.patient_id = patient_id
+        self.dentist = dentist
+        self.chair = chair
+        self.start = start
+        self.duration = end - start
+        self.rule = rule
+        self.notes = notes
+        self.exceptions: Dict[datetime, Occurrence] = {}
+
+    def _template_occurrences(self, start: datetime, end: datetime) -> Iterator[Occurrence]:
+        # Occurrences starting up to one duration before the window still overlap it
+        for moment in self.rule.starts(self.start, start - self.duration + timedelta(microseconds=1), end):
+            if moment not in self.exceptions:
+                yield Occurrence(self, moment, moment, moment + self.duration, notes=self.notes)
+
+    def occurrences(self, start: datetime, end: datetime) -> Iterator[Occurrence]:
+        """Active occurrences overlapping [start, end), in start order"""
+        overrides = sorted(
+            (o for o in self.exceptions.values()
+             if o.status not in INACTIVE_STATUSES and o.overlaps(start, end)),
+            key=Occurrence.sort_key
+        )
+        if not overrides:
+            return self._template_occurrences(start, end)
+        return heapq.merge(self._template_occurrences(start, end), overrides, key=Occurrence.sort_key)
+
+    def occurrence_at(self, original_start: datetime) -> Occurrence:
+        """The occurrence originally scheduled at original_start, overridden or not"""
+        override = self.exceptions.get(original_start)
+        if override is not None:
+            return override
+        return Occurrence(self, original_start, original_start, original_start + self.duration, notes=self.notes)
+
+    def override(self, occurrence: Occurrence):
+        """Record an occurrence that differs from the template"""
+        self.exceptions[occurrence.original_start] = occurrence
+
+    def end_before(self, moment: datetime):
+        """Stop the series: no occurrences start at or after moment"""
+        self.rule.until = moment - timedelta(minutes=1)
+        for original in [o for o in self.exceptions if o >= moment]:
+            del self.exceptions[original]
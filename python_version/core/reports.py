@@ -0,0 +1,290 @@
+"""
+Reports Engine
+Daily aggregates maintained on write, rolled up into weekly/monthly/yearly reports
+"""
+
+from array import array
+from datetime import date, timedelta
+from typing import Dict, List, NamedTuple, Tuple
+
+from .appointment_repository import SCHEMA as APPOINTMENT_SCHEMA
+from .billing import SCHEMA as LEDGER_SCHEMA
+from .patient_repository import SCHEMA as PATIENT_SCHEMA
+from .scheduling import STATUS_CANCELLED
+from .storage import Database
+
+METRIC_NEW_PATIENTS = 'new_patients'
+METRIC_APPOINTMENTS = 'appointments'
+METRIC_REVENUE = 'revenue'
+METRIC_BOOKED_MINUTES = 'booked_minutes'
+
+PERIOD_DAY = 'day'
+PERIOD_WEEK = 'week'
+PERIOD_MONTH = 'month'
+PERIOD_YEAR = 'year'
+
+# SQL expression turning a YYYY-MM-DD day into its bucket label
+BUCKET_EXPRESSIONS = {
+    PERIOD_DAY: "day",
+    PERIOD_WEEK: "date(day, '-' || ((CAST(strftime('%w', day) AS INTEGER) + 6) % 7) || ' days')",
+    PERIOD_MONTH: "substr(day, 1, 7)",
+    PERIOD_YEAR: "substr(day, 1, 4)",
+}
+
+# Chair time a dentist can be booked for on a working day (07:00-19:00),
+# used as the denominator of utilization until rosters provide real hours
+CLINIC_MINUTES_PER_DAY = 12 * 60
+
+# Sunday is the clinic's closed day (date.weekday() numbering)
+CLOSED_WEEKDAYS = (6,)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_aggregates (
+    metric TEXT NOT NULL,
+    day TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (metric, day, key)
+) WITHOUT ROWID;
+"""
+
+TRIGGER_PREFIX = "report_"
+
+# Tables reports read; their write counters tell when a report is stale
+SOURCE_TABLES = ("patients", "appointments", "ledger_entries")
+
+
+def _bump(metric: str, day: str, key: str, value: str) -> str:
+    """SQL statement adding value to one daily bucket"""
+    return (
+        f"INSERT INTO daily_aggregates (metric, day, key, value) VALUES ('{metric}', {day}, {key}, {value}) "
+        "ON CONFLICT (metric, day, key) DO UPDATE SET value = value + excluded.value;"
+    )
+
+
+def _appointment_delta(row: str, sign: str) -> str:
+    """Statements counting one appointments row in (sign '+') or out (sign '-')"""
+    day = f"date({row}.start)"
+    minutes = f"CAST(round((julianday({row}.end) - julianday({row}.start)) * 1440) AS INTEGER)"
+    return (
+        _bump(METRIC_APPOINTMENTS, day, f"{row}.status", f"{sign}1")
+        + _bump(METRIC_BOOKED_MINUTES, day, f"{row}.dentist",
+                f"CASE WHEN {row}.status = '{STATUS_CANCELLED}' THEN 0 ELSE {sign}{minutes} END")
+    )
+
+
+# Every write to the source tables moves the matching buckets inside the
+# same transaction, so aggregates can never drift from the records
+TRIGGERS = {
+    "report_patient_insert": (
+        "AFTER INSERT ON patients",
+        _bump(METRIC_NEW_PATIENTS, "NEW.registered_date", "''", "1"),
+    ),
+    "report_patient_delete": (
+        "AFTER DELETE ON patients",
+        _bump(METRIC_NEW_PATIENTS, "OLD.registered_date", "''", "-1"),
+    ),
+    "report_appointment_insert": (
+        "AFTER INSERT ON appointments",
+        _appointment_delta("NEW", "+"),
+    ),
+    "report_appointment_update": (
+        "AFTER UPDATE ON appointments",
+        _appointment_delta("OLD", "-") + _appointment_delta("NEW", "+"),
+    ),
+    "report_appointment_delete": (
+        "AFTER DELETE ON appointments",
+        _appointment_delta("OLD", "-"),
+    ),
+    "report_ledger_insert": (
+        "AFTER INSERT ON ledger_entries WHEN NEW.kind = 'charge'",
+        _bump(METRIC_REVENUE, "date(NEW.posted_at)", "NEW.treatment", "NEW.amount_cents"),
+    ),
+}
+
+# Recomputes every bucket from the raw tables (first install and repairs)
+REBUILD_SQL = f"""
+DELETE FROM daily_aggregates;
+INSERT INTO daily_aggregates (metric, day, key, value)
+    SELECT '{METRIC_NEW_PATIENTS}', registered_date, '', COUNT(*)
+    FROM patients GROUP BY registered_date;
+INSERT INTO daily_aggregates (metric, day, key, value)
+    SELECT '{METRIC_APPOINTMENTS}', date(start), status, COUNT(*)
+    FROM appointments GROUP BY date(start), status;
+INSERT INTO daily_aggregates (metric, day, key, value)
+    SELECT '{METRIC_BOOKED_MINUTES}', date(start), dentist,
+           SUM(CAST(round((julianday(end) - julianday(start)) * 1440) AS INTEGER))
+    FROM appointments WHERE status != '{STATUS_CANCELLED}' GROUP BY date(start), dentist;
+INSERT INTO daily_aggregates (metric, day, key, value)
+    SELECT '{METRIC_REVENUE}', date(posted_at), treatment, SUM(amount_cents)
+    FROM ledger_entries WHERE kind = 'charge' GROUP BY date(posted_at), treatment;
+"""
+
+
+class ReportRow(NamedTuple):
+    """One rolled-up value: bucket label, key (status, treatment, dentist or ''), value"""
+    bucket: str
+    key: str
+    value: int
+
+
+class Dashboard(NamedTuple):
+    """All report series for one range and period"""
+    start: date
+    end: date
+    period: str
+    new_patients: List[ReportRow]
+    appointments: List[ReportRow]
+    revenue: List[ReportRow]
+    utilization: List[Tuple[str, str, float]]
+
+
+def pivot(rows) -> Tuple[List[str], List[str], Dict[Tuple[str, str], float]]:
+    """Arrange (bucket, key, value) rows as sorted buckets, sorted keys and a cell map"""
+    buckets, keys, cells = {}, {}, {}
+    for bucket, key, value in rows:
+        buckets[bucket] = None
+        keys[key] = None
+        cells[bucket, key] = value
+    return sorted(buckets), sorted(keys), cells
+
+
+def working_days(start: date, end: date) -> int:
+    """Open days in [start, end]"""
+    days = (end - start).days + 1
+    if days <= 0:
+        return 0
+    full_weeks, remainder = divmod(days, 7)
+    count = full_weeks * (7 - len(CLOSED_WEEKDAYS))
+    for offset in range(remainder):
+        if (start.weekday() + offset) % 7 not in CLOSED_WEEKDAYS:
+            count += 1
+    return count
+
+
+def bucket_bounds(bucket: str, period: str) -> Tuple[date, date]:
+    """First and last day of a bucket label"""
+    if period == PERIOD_YEAR:
+        year = int(bucket)
+        return date(year, 1, 1), date(year, 12, 31)
+    if period == PERIOD_MONTH:
+        first = date.fromisoformat(f"{bucket}-01")
+        following = date(first.year + first.month // 12, first.month % 12 + 1, 1)
+        return first, following - timedelta(days=1)
+    first = date.fromisoformat(bucket)
+    if period == PERIOD_WEEK:
+        return first, first + timedelta(days=6)
+    return first, first
+
+
+class ReportStore:
+    """
+    Materialized daily aggregates
+
+    SQLite triggers on patients, appointments and ledger_entries keep one
+    row per (metric, day, key) current as records are written, whoever
+    writes them. Reports then group those buckets (a few rows per day)
+    instead of scanning the raw tables.
+
+    Occurrences of recurring series are generated on demand and never
+    stored, so they are not counted; their stored overrides are not
+    either, to keep counts consistent.
+    """
+
+    def __init__(self, database: Database):
+        self.database = database
+        connection = self.database.connection
+        for schema in (PATIENT_SCHEMA, APPOINTMENT_SCHEMA, LEDGER_SCHEMA, SCHEMA):
+            connection.executescript(schema)
+        for table in SOURCE_TABLES:
+            self.database.track_writes(table)
+        self.install()
+
+    @classmethod
+    def reader(cls, database: Database) -> 'ReportStore':
+        """A store over a database already set up by ReportStore(), skipping the schema work"""
+        store = cls.__new__(cls)
+        store.database = database
+        return store
+
+    def install(self):
+        """Create the triggers, backfilling from existing records the first time"""
+        connection = self.database.connection
+        existing = {
+            row[0] for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE ?",
+                (TRIGGER_PREFIX + "%",)
+            )
+        }
+        if existing == set(TRIGGERS):
+            return
+        with self.database.transaction() as connection:
+            for name, (event, body) in TRIGGERS.items():
+                connection.execute(f"DROP TRIGGER IF EXISTS {name}")
+                connection.execute(f"CREATE TRIGGER {name} {event} BEGIN {body} END")
+            self._rebuild(connection)
+
+    def rebuild(self):
+        """Recompute every bucket from the raw tables"""
+        with self.database.transaction() as connection:
+            self._rebuild(connection)
+
+    @staticmethod
+    def _rebuild(connection):
+        for statement in REBUILD_SQL.strip().split(";"):
+            if statement.strip():
+                connection.execute(statement)
+
+    def rollup(self, metric: str, start: date, end: date, period: str = PERIOD_DAY) -> List[ReportRow]:
+        """A metric's buckets over [start, end] grouped by day, week, month or year"""
+        bucket = BUCKET_EXPRESSIONS[period]
+        rows = self.database.connection.execute(
+            f"SELECT {bucket} AS bucket, key, SUM(value) FROM daily_aggregates "
+            "WHERE metric = ? AND day BETWEEN ? AND ? "
+            "GROUP BY bucket, key HAVING SUM(value) != 0 ORDER BY bucket, key",
+            (metric, start.isoformat(), end.isoformat())
+        )
+        return [ReportRow(*row) for row in rows]
+
+    def totals(self, metric: str, start: date, end: date) -> Dict[str, int]:
+        """A metric summed over [start, end], by key"""
+        rows = self.database.connection.execute(
+            "SELECT key, SUM(value) FROM daily_aggregates "
+            "WHERE metric = ? AND day BETWEEN ? AND ? GROUP BY key",
+            (metric, start.isoformat(), end.isoformat())
+        )
+        return dict(rows.fetchall())
+
+    def daily_series(self, metric: str, start: date, end: date) -> array:
+        """A metric summed over its keys for every day in [start, end], zeros included"""
+        values = array('d', bytes(8 * max((end - start).days + 1, 0)))
+        first = start.toordinal()
+        rows = self.database.connection.execute(
+            "SELECT day, SUM(value) FROM daily_aggregates "
+            "WHERE metric = ? AND day BETWEEN ? AND ? GROUP BY day",
+            (metric, start.isoformat(), end.isoformat())
+        )
+        for day, value in rows:
+            values[date.fromisoformat(day).toordinal() - first] = value
+        return values
+
+    def utilization(self, start: date, end: date, period: str = PERIOD_DAY) -> List[Tuple[str, str, float]]:
+        """(bucket, dentist, booked share of working time) over [start, end]"""
+        result = []
+        for bucket, dentist, minutes in self.rollup(METRIC_BOOKED_MINUTES, start, end, period):
+            first, last = bucket_bounds(bucket, period)
+            capacity = working_days(max(first, start), min(last, end)) * CLINIC_MINUTES_PER_DAY
+            result.append((bucket, dentist, minutes / capacity if capacity else 0.0))
+        return result
+
+    def dashboard(self, start: date, end: date, period: str) -> Dashboard:
+        """Every report for a range, rolled up by period"""
+        return Dashboard(
+            start=start,
+            end=end,
+            period=period,
+            new_patients=self.rollup(METRIC_NEW_PATIENTS, start, end, period),
+            appointments=self.rollup(METRIC_APPOINTMENTS, start, end, period),
+            revenue=self.rollup(METRIC_REVENUE, start, end, period),
+            utilization=self.utilization(start, end, period),
+        )
@@ -0,0 +1,572 @@
+"""
+Scheduling Engine
+Per-dentist and per-chair appointment timelines with O(log n) conflict checks
+"""
+
+import heapq
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .staff import SLOT_MINUTES
+
+STATUS_SCHEDULED = 'Scheduled'
+STATUS_COMPLETED = 'Completed'
+STATUS_CANCELLED = 'Cancelled'
+STATUS_NO_SHOW = 'No-show'
+
+# Appointments in these states do not occupy their dentist or chair
+INACTIVE_STATUSES = (STATUS_CANCELLED,)
+
+
+# How far ahead a new open-ended series is checked for clashes
+SERIES_CHECK_HORIZON = timedelta(days=2 * 365)
+
+
+def same_appointment(a: 'Appointment', b: Optional['Appointment']) -> bool:
+    """Identity, treating two objects for one series occurrence as the same"""
+    if b is None:
+        return False
+    if a is b:
+        return True
+    return a.series is not None and a.series is b.series and a.original_start == b.original_start
+
+
+class SchedulingConflict(ValueError):
+    """Raised when a booking overlaps an existing appointment"""
+
+    def __init__(self, message: str, conflicts: List['Appointment']):
+        super().__init__(message)
+        self.conflicts = conflicts
+
+
+class Appointment:
+    """Appointment data model"""
+
+    __slots__ = (
+        'id', 'patient_id', 'dentist', 'chair', 'start', 'end', 'status', 'notes'
+    )
+
+    # Set on occurrences of a recurring series (see core.recurrence)
+    series = None
+
+    def __init__(self, id: Optional[int], patient_id: str, dentist: str, chair: str,
+                 start: datetime, end: datetime, status: str = STATUS_SCHEDULED, notes: str = ""):
+        if end <= start:
+            raise ValueError("Appointment must end after it starts")
+        self.id = id
+        self.patient_id = patient_id
+        self.dentist = dentist
+        self.chair = chair
+        self.start = start
+        self.end = end
+        self.status = status
+        self.notes = notes
+
+    @property
+    def duration(self) -> timedelta:
+        return self.end - self.start
+
+    def sort_key(self) -> Tuple[datetime, int]:
+        return (self.start, self.id or 0)
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        return self.start < end and start < self.end
+
+
+class Timeline:
+    """
+    Non-overlapping appointments of one resource (a dentist or a chair)
+
+    Kept as a list sorted by start time. Because entries never overlap,
+    their end times are sorted too, so every query is a binary search
+    plus a walk over the entries actually returned.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[datetime, int]] = []
+        self._items: List[Appointment] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Appointment]:
+        return iter(self._items)
+
+    def add(self, appointment: Appointment):
+        key = appointment.sort_key()
+        position = bisect_right(self._keys, key)
+        self._keys.insert(position, key)
+        self._items.insert(position, appointment)
+
+    def remove(self, appointment: Appointment):
+        position = bisect_left(self._keys, appointment.sort_key())
+        if position < len(self._items) and self._items[position] is appointment:
+            del self._keys[position]
+            del self._items[position]
+
+    def _first_ending_after(self, moment: datetime) -> int:
+        """Index of the first appointment that ends after moment"""
+        position = bisect_right(self._keys, (moment, float('inf')))
+        if position > 0 and self._items[position - 1].end > moment:
+            return position - 1
+        return position
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Appointment]:
+        """Appointments overlapping [start, end)"""
+        result = []
+        position = self._first_ending_after(start)
+        while position < len(self._items) and self._items[position].start < end:
+            result.append(self._items[position])
+            position += 1
+        return result
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        """Check [start, end) against the timeline in O(log n)"""
+        position = self._first_ending_after(start)
+        return position >= len(self._items) or self._items[position].start >= end
+
+    def next_free(self, after: datetime, duration: timedelta) -> datetime:
+        """Earliest start >= after where duration fits between appointments"""
+        candidate = after
+        position = self._first_ending_after(candidate)
+        while position < len(self._items):
+            item = self._items[position]
+            if item.start >= candidate + duration:
+                break
+            candidate = max(candidate, item.end)
+            position += 1
+        return candidate
+
+
+class Scheduler:
+    """
+    Appointment book for all dentists and chairs
+
+    Every active appointment is held in its dentist's and its chair's
+    Timeline, so a booking is checked against both in O(log n). When
+    backed by a repository, days are loaded on demand: calendar queries
+    and conflict checks only pull the days they touch.
+
+    Recurring series (core.recurrence) are never expanded into the
+    timelines. Each dentist and chair lists its series, and queries walk
+    their occurrence generators over just the window in question.
+
+    A Timeline must never hold overlapping entries, so an appointment
+    that clashes with one already indexed (a double booking stored
+    before conflicts were checked in storage) is kept in double_booked
+    instead, which every query also looks at.
+
+    Bookings, moves and reactivations backed by a repository are checked
+    again against storage inside the write's transaction, so two
+    terminals cannot book the same dentist or chair at once.
+
+    availability: optional callable (dentist, start, end) -> bool; when
+    set, bookings outside a dentist's working hours are refused.
+    next_available: optional callable (dentist, after, duration, limit)
+    -> earliest start the availability callback accepts, or None; lets
+    next_free_slot() skip out-of-hours time in one call instead of
+    trying each slot (Roster.next_available).
+    """
+
+    def __init__(self, repository=None, availability: Optional[Callable[[str, datetime, datetime], bool]] = None,
+                 next_available: Optional[Callable[[str, datetime, timedelta, datetime], Optional[datetime]]] = None):
+        self.repository = repository
+        self.availability = availability
+        self.next_available = next_available
+        self.dentists: Dict[str, Timeline] = {}
+        self.chairs: Dict[str, Timeline] = {}
+        self.appointments: Dict[int, Appointment] = {}
+        self.double_booked: List[Appointment] = []
+        self.series: Dict[int, 'Series'] = {}
+        self._dentist_series: Dict[str, List['Series']] = {}
+        self._chair_series: Dict[str, List['Series']] = {}
+        self._loaded_days: Set[int] = set()
+        self._series_loaded = False
+        self._next_local_id = -1
+
+    # === Loading ===
+
+    def ensure_loaded(self, start: datetime, end: datetime):
+        """Load the days overlapping [start, end) from the repository"""
+        if self.repository is None:
+            return
+        if not self._series_loaded:
+            self._series_loaded = True
+            for series in self.repository.all_series():
+                self._index_series(series)
+        # An appointment can start the evening before the window
+        first_day = (start - timedelta(days=1)).date().toordinal()
+        last_day = end.date().toordinal()
+
+        missing_start = None
+        for ordinal in range(first_day, last_day + 2):
+            if ordinal <= last_day and ordinal not in self._loaded_days:
+                if missing_start is None:
+                    missing_start = ordinal
+                continue
+            if missing_start is not None:
+                self._load_days(missing_start, ordinal)
+                missing_start = None
+
+    def _load_days(self, first_ordinal: int, end_ordinal: int):
+        range_start = datetime.combine(date.fromordinal(first_ordinal), datetime.min.time())
+        range_end = datetime.combine(date.fromordinal(end_ordinal), datetime.min.time())
+        for appointment in self.repository.starting_between(range_start, range_end):
+            if appointment.id not in self.appointments:
+                self._index(appointment)
+        self._loaded_days.update(range(first_ordinal, end_ordinal))
+
+    # === Indexing ===
+
+    def _timeline(self, timelines: Dict[str, Timeline], name: str) -> Timeline:
+        timeline = timelines.get(name)
+        if timeline is None:
+            timeline = timelines[name] = Timeline()
+        return timeline
+
+    def _index(self, appointment: Appointment):
+        self.appointments[appointment.id] = appointment
+        if appointment.status in INACTIVE_STATUSES:
+            return
+        dentist = self._timeline(self.dentists, appointment.dentist)
+        chair = self._timeline(self.chairs, appointment.chair)
+        if dentist.is_free(appointment.start, appointment.end) and chair.is_free(appointment.start, appointment.end):
+            dentist.add(appointment)
+            chair.add(appointment)
+        else:
+            self.double_booked.append(appointment)
+
+    def _unindex(self, appointment: Appointment):
+        self.appointments.pop(appointment.id, None)
+        if any(booked is appointment for booked in self.double_booked):
+            self.double_booked = [booked for booked in self.double_booked if booked is not appointment]
+            return
+        if appointment.dentist in self.dentists:
+            self.dentists[appointment.dentist].remove(appointment)
+        if appointment.chair in self.chairs:
+            self.chairs[appointment.chair].remove(appointment)
+        if self.double_booked:
+            # A double booking may fit its timelines now that this one has left
+            waiting, self.double_booked = self.double_booked, []
+            for booked in waiting:
+                self._index(booked)
+
+    def _double_booked_on(self, dentist: Optional[str], chair: Optional[str],
+                          start: datetime, end: datetime) -> List[Appointment]:
+        """Double bookings on the dentist or chair (any, if neither is given) overlapping [start, end)"""
+        return [
+            booked for booked in self.double_booked
+            if booked.overlaps(start, end) and (
+                (dentist is None and chair is None) or booked.dentist == dentist or booked.chair == chair
+            )
+        ]
+
+    def _index_series(self, series: 'Series'):
+        self.series[series.id] = series
+        self._dentist_series.setdefault(series.dentist, []).append(series)
+        self._chair_series.setdefault(series.chair, []).append(series)
+
+    def _resource_series(self, dentist: Optional[str], chair: Optional[str]) -> List['Series']:
+        found = list(self._dentist_series.get(dentist, ())) if dentist is not None else []
+        for series in self._chair_series.get(chair, ()) if chair is not None else ():
+            if series not in found:
+                found.append(series)
+        return found
+
+    def _occurrences(self, dentist: Optional[str], chair: Optional[str],
+                     start: datetime, end: datetime) -> Iterator[Appointment]:
+        """Series occurrences on the dentist or chair overlapping [start, end)"""
+        for series in self._resource_series(dentist, chair):
+            yield from series.occurrences(start, end)
+
+    # === Queries ===
+
+    def conflicts(self, dentist: str, chair: str, start: datetime, end: datetime,
+                  ignore: Optional[Appointment] = None) -> List[Appointment]:
+        """Appointments that would clash with a booking"""
+        self.ensure_loaded(start, end)
+        found = []
+        for timelines, name in ((self.dentists, dentist), (self.chairs, chair)):
+            timeline = timelines.get(name)
+            if timeline is None:
+                continue
+            for appointment in timeline.overlapping(start, end):
+                if appointment is not ignore and appointment not in found:
+                    found.append(appointment)
+        for appointment in self._double_booked_on(dentist, chair, start, end):
+            if appointment is not ignore and appointment not in found:
+                found.append(appointment)
+        for occurrence in self._occurrences(dentist, chair, start, end):
+            if not same_appointment(occurrence, ignore):
+                found.append(occurrence)
+        return found
+
+    def is_free(self, dentist: str, chair: str, start: datetime, end: datetime) -> bool:
+        """Check that both the dentist and the chair are free"""
+        self.ensure_loaded(start, end)
+        for timelines, name in ((self.dentists, dentist), (self.chairs, chair)):
+            timeline = timelines.get(name)
+            if timeline is not None and not timeline.is_free(start, end):
+                return False
+        if self._double_booked_on(dentist, chair, start, end):
+            return False
+        for _ in self._occurrences(dentist, chair, start, end):
+            return False
+        if self.availability and not self.availability(dentist, start, end):
+            return False
+        return True
+
+    def window(self, start: datetime, end: datetime,
+               dentist: Optional[str] = None, chair: Optional[str] = None) -> Iterator[Appointment]:
+        """
+        Active appointments overlapping [start, end) in start order,
+        optionally for one resource
+
+        Single appointments and series occurrences are merged lazily; only
+        the window's occurrences are ever built.
+        """
+        self.ensure_loaded(start, end)
+        if dentist is not None:
+            timeline = self.dentists.get(dentist)
+            single = timeline.overlapping(start, end) if timeline else []
+            series = self._resource_series(dentist, None)
+            double_booked = self._double_booked_on(dentist, None, start, end)
+        elif chair is not None:
+            timeline = self.chairs.get(chair)
+            single = timeline.overlapping(start, end) if timeline else []
+            series = self._resource_series(None, chair)
+            double_booked = self._double_booked_on(None, chair, start, end)
+        else:
+            single = []
+            for timeline in self.chairs.values():
+                single.extend(timeline.overlapping(start, end))
+            series = list(self.series.values())
+            double_booked = self._double_booked_on(None, None, start, end)
+        if double_booked or (dentist is None and chair is None):
+            single = sorted([*single, *double_booked], key=Appointment.sort_key)
+
+        merged = heapq.merge(single, *(s.occurrences(start, end) for s in series), key=Appointment.sort_key)
+        if dentist is not None and chair is not None:
+            return (a for a in merged if a.chair == chair)
+        return merged
+
+    def next_free_slot(self, dentist: str, chair: str, after: datetime, duration: timedelta,
+                       horizon: timedelta = timedelta(days=60)) -> Optional[datetime]:
+        """
+        Earliest start >= after when both dentist and chair are free
+
+        Alternates between the two timelines' next gaps until they agree;
+        each step is a binary search. Returns None past the horizon.
+        """
+        limit = after + horizon
+        self.ensure_loaded(after, limit)
+        dentist_timeline = self.dentists.get(dentist) or Timeline()
+        chair_timeline = self.chairs.get(chair) or Timeline()
+
+        candidate = after
+        while candidate <= limit:
+            candidate = chair_timeline.next_free(dentist_timeline.next_free(candidate, duration), duration)
+            if not dentist_timeline.is_free(candidate, candidate + duration):
+                continue
+            clashes = self._double_booked_on(dentist, chair, candidate, candidate + duration)
+            clashes.extend(self._occurrences(dentist, chair, candidate, candidate + duration))
+            if clashes:
+                candidate = max(occurrence.end for occurrence in clashes)
+                continue
+            if self.availability and not self.availability(dentist, candidate, candidate + duration):
+                candidate = self._next_available(dentist, candidate, duration, limit)
+                if candidate is None:
+                    return None
+                continue
+            return candidate
+        return None
+
+    def _next_available(self, dentist: str, after: datetime, duration: timedelta,
+                        limit: datetime) -> Optional[datetime]:
+        """Earliest start >= after on a slot boundary that the availability callback accepts"""
+        if self.next_available is not None:
+            return self.next_available(dentist, after, duration, limit)
+        step = timedelta(minutes=SLOT_MINUTES)
+        # Round up to a slot boundary, where working hours start
+        candidate = datetime.combine(after.date(), datetime.min.time())
+        candidate += -(-(after - candidate) // step) * step
+        while candidate <= limit:
+            if self.availability(dentist, candidate, candidate + duration):
+                return candidate
+            candidate += step
+        return None
+
+    # === Changes ===
+
+    def book(self, appointment: Appointment) -> Appointment:
+        """Add an appointment, refusing overlaps with the dentist or chair"""
+        clashes = self.conflicts(appointment.dentist, appointment.chair, appointment.start, appointment.end)
+        if clashes:
+            raise SchedulingConflict("The dentist or chair is already booked at that time", clashes)
+        if self.availability and not self.availability(appointment.dentist, appointment.start, appointment.end):
+            raise SchedulingConflict(f"{appointment.dentist} is not on shift at that time", [])
+
+        if self.repository is not None:
+            with self.repository.database.transaction():
+                self._refuse_stored_clashes(appointment)
+                appointment.id = self.repository.add(appointment)
+        elif appointment.id is None:
+            appointment.id = self._next_local_id
+            self._next_local_id -= 1
+        self._index(appointment)
+        return appointment
+
+    def _refuse_stored_clashes(self, appointment: Appointment):
+        """
+        Check an appointment against storage before it is written
+
+        Call inside the write's transaction: BEGIN IMMEDIATE holds the
+        write lock, so no other terminal can store a clash in between.
+        """
+        clashes = self.repository.overlapping(
+            appointment.dentist, appointment.chair, appointment.start, appointment.end, ignore_id=appointment.id
+        )
+        if clashes:
+            raise SchedulingConflict("The dentist or chair was just booked at that time at another terminal", clashes)
+
+    def book_series(self, series: 'Series') -> 'Series':
+        """
+        Add a recurring series, refusing it if any occurrence clashes
+
+        Open-ended series are checked up to SERIES_CHECK_HORIZON ahead;
+        later clashes show up as overlapping blocks in the calendar.
+        """
+        limit = series.start + SERIES_CHECK_HORIZON
+        if series.rule.until is not None:
+            limit = min(limit, series.rule.until + series.duration)
+        self.ensure_loaded(series.start, limit)
+
+        for occurrence in series.occurrences(series.start, limit):
+            clashes = self.conflicts(series.dentist, series.chair, occurrence.start, occurrence.end)
+            if clashes:
+                raise SchedulingConflict(
+                    f"The occurrence on {occurrence.start:%d %b %Y %H:%M} clashes with a booking", clashes
+                )
+            if self.availability and not self.availability(series.dentist, occurrence.start, occurrence.end):
+                raise SchedulingConflict(
+                    f"{series.dentist} is not on shift on {occurrence.start:%d %b %Y %H:%M}", []
+                )
+
+        if self.repository is not None:
+            series.id = self.repository.add_series(series)
+        elif series.id is None:
+            series.id = self._next_local_id
+            self._next_local_id -= 1
+        self._index_series(series)
+        return series
+
+    def end_series(self, series: 'Series', moment: datetime):
+        """Stop a series from moment on, keeping its earlier occurrences"""
+        series.end_before(moment)
+        if self.repository is not None:
+            self.repository.update_series(series)
+
+    def _override(self, occurrence: Appointment, start: datetime, end: datetime, status: str):
+        """Record a changed occurrence in its series' exception index"""
+        changed = type(occurrence)(
+            occurrence.series, occurrence.original_start, start, end, status, occurrence.notes
+        )
+        occurrence.series.override(changed)
+        if self.repository is not None:
+            self.repository.save_exception(changed)
+
+    def reschedule(self, appointment: Appointment, dentist: str, chair: str,
+                   start: datetime, end: datetime):
+        """Move an appointment, keeping it in place if the new slot clashes"""
+        clashes = self.conflicts(dentist, chair, start, end, ignore=appointment)
+        if clashes:
+            raise SchedulingConflict("The dentist or chair is already booked at that time", clashes)
+
+        if appointment.series is not None:
+            if (dentist, chair) != (appointment.series.dentist, appointment.series.chair):
+                raise ValueError("Occurrences of a series keep the series' dentist and chair")
+            self._override(appointment, start, end, appointment.status)
+            return
+
+        moved = Appointment(appointment.id, appointment.patient_id, dentist, chair, start, end,
+                            appointment.status, appointment.notes)
+        if self.repository is not None:
+            with self.repository.database.transaction():
+                if moved.status not in INACTIVE_STATUSES:
+                    self._refuse_stored_clashes(moved)
+                self.repository.update(moved)
+        self._unindex(appointment)
+        appointment.dentist, appointment.chair = dentist, chair
+        appointment.start, appointment.end = start, end
+        self._index(appointment)
+
+    def set_status(self, appointment: Appointment, status: str):
+        """
+        Change status; cancelling frees the dentist and chair, and
+        reinstating a cancelled appointment is refused if its slot was
+        booked in the meantime
+        """
+        reinstating = appointment.status in INACTIVE_STATUSES and status not in INACTIVE_STATUSES
+        if reinstating:
+            clashes = self.conflicts(appointment.dentist, appointment.chair, appointment.start, appointment.end,
+                                     ignore=appointment)
+            if clashes:
+                raise SchedulingConflict("The dentist or chair has been booked at that time since", clashes)
+        if appointment.series is not None:
+            self._override(appointment, appointment.start, appointment.end, status)
+            return
+
+        changed = Appointment(appointment.id, appointment.patient_id, appointment.dentist, appointment.chair,
+                              appointment.start, appointment.end, status, appointment.notes)
+        if self.repository is not None:
+            with self.repository.database.transaction():
+                if reinstating:
+                    self._refuse_stored_clashes(changed)
+                self.repository.update(changed)
+        self._unindex(appointment)
+        appointment.status = status
+        self._index(appointment)
+
+    def refresh_appointments(self, appointment_ids: Iterable[int], stored: Iterable[Appointment]):
+        """
+        Bring cached appointments in line with storage after writes made
+        elsewhere (another terminal); IDs missing from stored are dropped
+
+        Cached objects are updated in place, so ones the UI still holds
+        stay current. Appointments on days not loaded yet are left for
+        ensure_loaded().
+        """
+        stored_by_id = {appointment.id: appointment for appointment in stored}
+        for appointment_id in appointment_ids:
+            appointment = stored_by_id.get(appointment_id)
+            cached = self.appointments.get(appointment_id)
+            if cached is not None:
+                self._unindex(cached)
+                if appointment is not None:
+                    for field in Appointment.__slots__:
+                        setattr(cached, field, getattr(appointment, field))
+                    appointment = cached
+            if appointment is not None and appointment.start.date().toordinal() in self._loaded_days:
+                self._index(appointment)
+
+    def reload_series(self):
+        """Forget the cached series so the next query reads them again"""
+        self.series = {}
+        self._dentist_series = {}
+        self._chair_series = {}
+        self._series_loaded = False
+
+    def reload(self):
+        """Forget everything loaded from the repository"""
+        self.reload_series()
+        self.dentists = {}
+        self.chairs = {}
+        self.appointments = {}
+        self.double_booked = []
+        self._loaded_days = set()
+
+    def load(self, appointments: Iterable[Appointment]):
+        """Index already-stored appointments (without a repository)"""
+        for appointment in appointments:
+            self._index(appointment)
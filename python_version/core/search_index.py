@@ -0,0 +1,233 @@
+"""
+Patient Search Index
+Normalized token prefix index over patient name, contact, email and ID
+"""
+
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# Separates the token from the patient ID inside an index key
+KEY_SEPARATOR = "\x1f"
+
+WORD_PATTERN = re.compile(r"\w+")
+PHONE_PATTERN = re.compile(r"^[\d\s()+\-.]+$")
+NON_DIGIT_PATTERN = re.compile(r"\D")
+
+
+def normalize(text: str) -> str:
+    """Lowercase text and strip accents so 'José' matches 'jose'"""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def query_tokens(query: str) -> List[str]:
+    """Split a search query into normalized tokens"""
+    query = query.strip()
+    if not query:
+        return []
+    # A phone number typed with separators is one digit token
+    if PHONE_PATTERN.match(query) and any(ch.isdigit() for ch in query):
+        return [NON_DIGIT_PATTERN.sub("", query)]
+    return WORD_PATTERN.findall(normalize(query))
+
+
+def patient_tokens(patient_id: str, name: str, contact: str, email: str) -> Tuple[str, ...]:
+    """Build the searchable tokens of one patient"""
+    tokens = set(WORD_PATTERN.findall(normalize(name)))
+    tokens.update(WORD_PATTERN.findall(normalize(email)))
+    if email:
+        tokens.add(normalize(email))
+
+    digits = NON_DIGIT_PATTERN.sub("", contact)
+    if digits:
+        tokens.add(digits)
+    tokens.update(WORD_PATTERN.findall(normalize(contact)))
+
+    normalized_id = normalize(patient_id)
+    tokens.add(normalized_id)
+    id_number = NON_DIGIT_PATTERN.sub("", normalized_id).lstrip("0")
+    if id_number:
+        tokens.add(id_number)
+
+    return tuple(sorted(tokens))
+
+
+class PatientSearchIndex:
+    """
+    Prefix index over patient tokens
+
+    Every token is stored as a "token<sep>patient_id" key in one sorted list,
+    so all patients with a token starting with a prefix form a contiguous
+    run found by binary search. A query matches a patient when each query
+    token is a prefix of one of that patient's tokens.
+
+    The index is shared between the GUI thread (which updates it on add,
+    edit and delete) and search workers, so access goes through a lock.
+    The lock is only held for short steps: a search scans the key list it
+    found when it started, outside the lock, and a change made while a
+    search holds that list copies it first (copy-on-write). Changes made
+    while rebuild() streams the registry are journaled and replayed onto
+    the new index, so none are lost to the swap.
+    """
+
+    # How many keys a search scans between cancellation checks
+    CANCEL_CHECK_INTERVAL = 4096
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._tokens_by_id: Dict[str, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+        # Searches scanning the current _keys list, which must then not change in place
+        self._readers = 0
+        # (patient ID, tokens or None for a removal) recorded during rebuild()
+        self._journal: Optional[List[Tuple[str, Optional[Tuple[str, ...]]]]] = None
+
+    def __len__(self) -> int:
+        return len(self._tokens_by_id)
+
+    def __contains__(self, patient_id: str) -> bool:
+        return patient_id in self._tokens_by_id
+
+    def add(self, patient):
+        """Index a new patient"""
+        tokens = patient_tokens(patient.id, patient.name, patient.contact, patient.email)
+        with self._lock:
+            self._add_locked(patient.id, tokens)
+            if self._journal is not None:
+                self._journal.append((patient.id, tokens))
+
+    def update(self, patient):
+        """Re-index an edited patient"""
+        self.add(patient)
+
+    def remove(self, patient_id: str):
+        """Drop a deleted patient from the index"""
+        with self._lock:
+            self._remove_locked(patient_id)
+            if self._journal is not None:
+                self._journal.append((patient_id, None))
+
+    def rebuild(self, patients: Iterable):
+        """
+        Replace the whole index in one sort instead of per-patient inserts
+
+        Safe to call from a worker thread while the GUI thread keeps
+        adding and removing patients.
+        """
+        with self._lock:
+            self._journal = []
+
+        tokens_by_id = {}
+        keys = []
+        try:
+            for patient in patients:
+                tokens = patient_tokens(patient.id, patient.name, patient.contact, patient.email)
+                tokens_by_id[patient.id] = tokens
+                keys.extend(token + KEY_SEPARATOR + patient.id for token in tokens)
+            keys.sort()
+        except BaseException:
+            with self._lock:
+                self._journal = None
+            raise
+
+        with self._lock:
+            journal = self._journal
+            self._journal = None
+            self._keys = keys
+            self._readers = 0
+            self._tokens_by_id = tokens_by_id
+            for patient_id, tokens in journal:
+                if tokens is None:
+                    self._remove_locked(patient_id)
+                else:
+                    self._add_locked(patient_id, tokens)
+
+    def _writable_keys(self) -> List[str]:
+        """The key list, copied first if a search is scanning it"""
+        if self._readers:
+            self._keys = list(self._keys)
+            self._readers = 0
+        return self._keys
+
+    def _add_locked(self, patient_id: str, tokens: Tuple[str, ...]):
+        self._remove_locked(patient_id)
+        self._tokens_by_id[patient_id] = tokens
+        keys = self._writable_keys()
+        for token in tokens:
+            insort(keys, token + KEY_SEPARATOR + patient_id)
+
+    def _remove_locked(self, patient_id: str):
+        tokens = self._tokens_by_id.pop(patient_id, None)
+        if not tokens:
+            return
+        keys = self._writable_keys()
+        for token in tokens:
+            key = token + KEY_SEPARATOR + patient_id
+            position = bisect_left(keys, key)
+            if position < len(keys) and keys[position] == key:
+                del keys[position]
+
+    def matches(self, patient_id: str, query: str) -> bool:
+        """Check one indexed patient against a query without a full search"""
+        tokens = self._tokens_by_id.get(patient_id)
+        if tokens is None:
+            return False
+        return all(
+            any(token.startswith(prefix) for token in tokens)
+            for prefix in query_tokens(query)
+        )
+
+    def search(self, query: str,
+               is_cancelled: Optional[Callable[[], bool]] = None) -> Optional[List[str]]:
+        """
+        Get the IDs of all patients matching a query, sorted by ID
+
+        Returns None if is_cancelled() turns true while the search runs.
+        """
+        prefixes = query_tokens(query)
+        if not prefixes:
+            with self._lock:
+                ids = list(self._tokens_by_id)
+            return sorted(ids)
+
+        # Longest prefixes are the most selective, so scan them first
+        prefixes.sort(key=len, reverse=True)
+        result: Optional[Set[str]] = None
+        for prefix in prefixes:
+            ids = self._ids_with_prefix(prefix, is_cancelled)
+            if ids is None:
+                return None
+            result = ids if result is None else result & ids
+            if not result:
+                return []
+        return sorted(result)
+
+    def _ids_with_prefix(self, prefix: str,
+                         is_cancelled: Optional[Callable[[], bool]]) -> Optional[Set[str]]:
+        ids = set()
+        with self._lock:
+            keys = self._keys
+            self._readers += 1
+        try:
+            position = bisect_left(keys, prefix)
+            scanned = 0
+            while position < len(keys):
+                key = keys[position]
+                if not key.startswith(prefix):
+                    break
+                ids.add(key[key.index(KEY_SEPARATOR) + 1:])
+                position += 1
+                scanned += 1
+                if is_cancelled and scanned % self.CANCEL_CHECK_INTERVAL == 0 and is_cancelled():
+                    return None
+        finally:
+            with self._lock:
+                # A change made meanwhile left this list to the searches and copied it
+                if keys is self._keys:
+                    self._readers -= 1
+        return ids
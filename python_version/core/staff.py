@@ -0,0 +1,411 @@
+"""
+Staff Roster
+Staff members, weekly shifts and time off as per-day bitsets of time slots
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .storage import Database
+
+# The day is cut into fixed slots; bit i of a day mask is the slot starting at i * SLOT_MINUTES
+SLOT_MINUTES = 15
+MINUTES_PER_DAY = 24 * 60
+SLOTS_PER_DAY = MINUTES_PER_DAY // SLOT_MINUTES
+
+ROLE_DENTIST = 'Dentist'
+ROLE_HYGIENIST = 'Hygienist'
+ROLE_ASSISTANT = 'Assistant'
+ROLE_RECEPTIONIST = 'Receptionist'
+
+ROLES = (ROLE_DENTIST, ROLE_HYGIENIST, ROLE_ASSISTANT, ROLE_RECEPTIONIST)
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS staff_members (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    role TEXT NOT NULL,
+    email TEXT NOT NULL DEFAULT '',
+    phone TEXT NOT NULL DEFAULT '',
+    active INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS staff_shifts (
+    id INTEGER PRIMARY KEY,
+    staff_id INTEGER NOT NULL REFERENCES staff_members (id) ON DELETE CASCADE,
+    weekday INTEGER NOT NULL,
+    start_minute INTEGER NOT NULL,
+    end_minute INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_staff_shifts_member ON staff_shifts (staff_id, weekday);
+CREATE TABLE IF NOT EXISTS staff_time_off (
+    id INTEGER PRIMARY KEY,
+    staff_id INTEGER NOT NULL REFERENCES staff_members (id) ON DELETE CASCADE,
+    day TEXT NOT NULL,
+    start_minute INTEGER NOT NULL,
+    end_minute INTEGER NOT NULL,
+    reason TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_staff_time_off_member ON staff_time_off (staff_id, day);
+"""
+
+# Write counters of these tables tell a Roster when another writer changed them
+TABLES = ("staff_members", "staff_shifts", "staff_time_off")
+
+MEMBER_COLUMNS = "id, name, role, email, phone, active"
+TIME_OFF_COLUMNS = "id, staff_id, day, start_minute, end_minute, reason"
+
+VERSION_SQL = f"SELECT COALESCE(SUM(version), 0) FROM write_versions WHERE name IN ({', '.join('?' * len(TABLES))})"
+
+
+class StaffMember(NamedTuple):
+    """Someone on the clinic roster"""
+    id: Optional[int]
+    name: str
+    role: str
+    email: str = ""
+    phone: str = ""
+    active: bool = True
+
+
+class Shift(NamedTuple):
+    """A weekly working period, in minutes from midnight"""
+    weekday: int
+    start_minute: int
+    end_minute: int
+
+
+class TimeOff(NamedTuple):
+    """Hours a member is away on one date (the whole day is 0 to MINUTES_PER_DAY)"""
+    id: Optional[int]
+    staff_id: int
+    day: date
+    start_minute: int
+    end_minute: int
+    reason: str = ""
+
+
+def member_from_row(row) -> StaffMember:
+    """Build a StaffMember from a staff_members row"""
+    return StaffMember(
+        id=row["id"],
+        name=row["name"],
+        role=row["role"],
+        email=row["email"],
+        phone=row["phone"],
+        active=bool(row["active"]),
+    )
+
+
+def time_off_from_row(row) -> TimeOff:
+    """Build a TimeOff from a staff_time_off row"""
+    return TimeOff(
+        id=row["id"],
+        staff_id=row["staff_id"],
+        day=date.fromisoformat(row["day"]),
+        start_minute=row["start_minute"],
+        end_minute=row["end_minute"],
+        reason=row["reason"],
+    )
+
+
+# === Slot bitsets ===
+
+def slot_mask(start_minute: int, end_minute: int) -> int:
+    """Bits of every slot touched by [start_minute, end_minute)"""
+    first = max(start_minute, 0) // SLOT_MINUTES
+    last = -(-min(end_minute, MINUTES_PER_DAY) // SLOT_MINUTES)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def slots_for(minutes: int) -> int:
+    """Slots needed to hold a duration"""
+    return max(-(-minutes // SLOT_MINUTES), 1)
+
+
+def free_starts(mask: int, slots: int) -> int:
+    """
+    Bits of the slots where a run of `slots` free slots begins
+
+    Shifting and AND-ing doubles the run length each step, so a
+    45-minute question is two ANDs rather than a walk over the day.
+    """
+    run, length = mask, 1
+    while length < slots and run:
+        step = min(length, slots - length)
+        run &= run >> step
+        length += step
+    return run
+
+
+def windows(mask: int) -> List[Tuple[int, int]]:
+    """The runs of set bits in a day mask as (start, end) minutes"""
+    found = []
+    slot = 0
+    while mask:
+        # Skip to the next set bit, then to the end of its run
+        gap = (mask & -mask).bit_length() - 1
+        mask >>= gap
+        slot += gap
+        run = (~mask & (mask + 1)).bit_length() - 1
+        found.append((slot * SLOT_MINUTES, (slot + run) * SLOT_MINUTES))
+        mask >>= run
+        slot += run
+    return found
+
+
+def minute_label(minute: int) -> str:
+    """A minute of the day as HH:MM"""
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def minute_of(moment: datetime) -> int:
+    """Minutes since midnight of a datetime"""
+    return moment.hour * 60 + moment.minute
+
+
+class Roster:
+    """
+    Staff members and when they work
+
+    Each member's week is seven day masks built from their shifts;
+    time off is kept as masks per (member, date) to clear from them.
+    Whether someone works a slot, or who is free for a stretch of a
+    day, is then a couple of integer ANDs, which lets is_available()
+    serve as the Scheduler's availability callback for every
+    candidate slot it tries, and next_available() jump straight to
+    the next slot that would pass.
+
+    The masks are built when the roster is loaded and after its own
+    writes; refresh() picks up writes made through another Roster.
+    """
+
+    def __init__(self, database: Database):
+        self.database = database
+        self.database.connection.executescript(SCHEMA)
+        for table in TABLES:
+            self.database.track_writes(table)
+        self.members: Dict[int, StaffMember] = {}
+        self._by_name: Dict[str, int] = {}
+        self._weeks: Dict[int, List[int]] = {}
+        self._time_off: Dict[Tuple[int, int], int] = {}
+        self._version = -1
+        self.refresh()
+
+    # === Loading ===
+
+    def _current_version(self) -> int:
+        return self.database.connection.execute(VERSION_SQL, TABLES).fetchone()[0]
+
+    def refresh(self) -> bool:
+        """Reload if the staff tables changed since the last load; True if they had"""
+        version = self._current_version()
+        if version == self._version:
+            return False
+        connection = self.database.connection
+        members = {}
+        for row in connection.execute(f"SELECT {MEMBER_COLUMNS} FROM staff_members ORDER BY name"):
+            member = member_from_row(row)
+            members[member.id] = member
+        weeks = {member_id: [0] * 7 for member_id in members}
+        for staff_id, weekday, start, end in connection.execute(
+            "SELECT staff_id, weekday, start_minute, end_minute FROM staff_shifts"
+        ):
+            weeks[staff_id][weekday] |= slot_mask(start, end)
+        time_off: Dict[Tuple[int, int], int] = {}
+        for staff_id, day, start, end in connection.execute(
+            "SELECT staff_id, day, start_minute, end_minute FROM staff_time_off"
+        ):
+            key = (staff_id, date.fromisoformat(day).toordinal())
+            time_off[key] = time_off.get(key, 0) | slot_mask(start, end)
+
+        self.members = members
+        self._by_name = {member.name: member.id for member in members.values()}
+        self._weeks = weeks
+        self._time_off = time_off
+        self._version = version
+        return True
+
+    # === Members ===
+
+    def all(self, role: Optional[str] = None, active_only: bool = True) -> List[StaffMember]:
+        """Members by name, optionally of one role"""
+        return [
+            member for member in self.members.values()
+            if (role is None or member.role == role) and (member.active or not active_only)
+        ]
+
+    def get(self, name: str) -> Optional[StaffMember]:
+        """A member by name"""
+        member_id = self._by_name.get(name)
+        return self.members.get(member_id) if member_id is not None else None
+
+    def save(self, member: StaffMember) -> StaffMember:
+        """Add a member (id None) or update one"""
+        if not member.name.strip():
+            raise ValueError("A staff member needs a name")
+        if member.role not in ROLES:
+            raise ValueError(f"Unknown role: {member.role}")
+        existing = self.get(member.name)
+        if existing is not None and existing.id != member.id:
+            raise ValueError(f"{member.name} is already on the roster")
+        values = (member.name, member.role, member.email, member.phone, int(member.active))
+        with self.database.transaction() as connection:
+            if member.id is None:
+                cursor = connection.execute(
+                    "INSERT INTO staff_members (name, role, email, phone, active) VALUES (?, ?, ?, ?, ?)", values
+                )
+                member = member._replace(id=cursor.lastrowid)
+            else:
+                connection.execute(
+                    "UPDATE staff_members SET name = ?, role = ?, email = ?, phone = ?, active = ? WHERE id = ?",
+                    values + (member.id,)
+                )
+        self.refresh()
+        return member
+
+    def set_active(self, member_id: int, active: bool):
+        """Take a member off the roster (or back on) without losing their history"""
+        with self.database.transaction() as connection:
+            connection.execute("UPDATE staff_members SET active = ? WHERE id = ?", (int(active), member_id))
+        self.refresh()
+
+    # === Shifts and time off ===
+
+    def shifts(self, member_id: int) -> List[Shift]:
+        """A member's weekly shifts, by weekday and start"""
+        rows = self.database.connection.execute(
+            "SELECT weekday, start_minute, end_minute FROM staff_shifts WHERE staff_id = ? "
+            "ORDER BY weekday, start_minute", (member_id,)
+        )
+        return [Shift(*row) for row in rows]
+
+    def set_shifts(self, member_id: int, shifts: Iterable[Shift]):
+        """Replace a member's weekly shifts"""
+        shifts = list(shifts)
+        for shift in shifts:
+            if not 0 <= shift.weekday < 7:
+                raise ValueError(f"Unknown weekday: {shift.weekday}")
+            if not 0 <= shift.start_minute < shift.end_minute <= MINUTES_PER_DAY:
+                raise ValueError(
+                    f"A shift must end after it starts: {minute_label(shift.start_minute)}-"
+                    f"{minute_label(shift.end_minute)}"
+                )
+        with self.database.transaction() as connection:
+            connection.execute("DELETE FROM staff_shifts WHERE staff_id = ?", (member_id,))
+            connection.executemany(
+                "INSERT INTO staff_shifts (staff_id, weekday, start_minute, end_minute) VALUES (?, ?, ?, ?)",
+                [(member_id,) + tuple(shift) for shift in shifts]
+            )
+        self.refresh()
+
+    def time_off(self, member_id: int, start: date, end: date) -> List[TimeOff]:
+        """A member's time off on days [start, end]"""
+        rows = self.database.connection.execute(
+            f"SELECT {TIME_OFF_COLUMNS} FROM staff_time_off WHERE staff_id = ? AND day BETWEEN ? AND ? "
+            "ORDER BY day, start_minute", (member_id, start.isoformat(), end.isoformat())
+        )
+        return [time_off_from_row(row) for row in rows]
+
+    def add_time_off(self, time_off: TimeOff) -> TimeOff:
+        """Record hours (or a whole day) a member is away"""
+        if not 0 <= time_off.start_minute < time_off.end_minute <= MINUTES_PER_DAY:
+            raise ValueError("Time off must end after it starts")
+        with self.database.transaction() as connection:
+            cursor = connection.execute(
+                "INSERT INTO staff_time_off (staff_id, day, start_minute, end_minute, reason) VALUES (?, ?, ?, ?, ?)",
+                (time_off.staff_id, time_off.day.isoformat(), time_off.start_minute,
+                 time_off.end_minute, time_off.reason)
+            )
+        self.refresh()
+        return time_off._replace(id=cursor.lastrowid)
+
+    def remove_time_off(self, time_off_id: int):
+        """Delete a time off entry"""
+        with self.database.transaction() as connection:
+            connection.execute("DELETE FROM staff_time_off WHERE id = ?", (time_off_id,))
+        self.refresh()
+
+    # === Availability ===
+
+    def day_mask(self, member_id: int, day: date) -> int:
+        """Slots a member works on a date: the weekday's shifts less any time off"""
+        week = self._weeks.get(member_id)
+        if week is None or not self.members[member_id].active:
+            return 0
+        return week[day.weekday()] & ~self._time_off.get((member_id, day.toordinal()), 0)
+
+    def is_available(self, name: str, start: datetime, end: datetime) -> bool:
+        """
+        Whether a member works all of [start, end); the Scheduler's
+        availability callback
+
+        Names not on the roster are not restricted, so books kept before
+        the roster (or for visiting dentists) keep working.
+        """
+        member_id = self._by_name.get(name)
+        if member_id is None:
+            return True
+        day = start.date()
+        end_minute = minute_of(end) + MINUTES_PER_DAY * (end.date() - day).days
+        if end_minute > MINUTES_PER_DAY:
+            return False
+        needed = slot_mask(minute_of(start), end_minute)
+        return self.day_mask(member_id, day) & needed == needed
+
+    def next_available(self, name: str, after: datetime, duration: timedelta,
+                       limit: datetime) -> Optional[datetime]:
+        """
+        Earliest start >= after, on a slot boundary and no later than
+        limit, where a member works all of duration; the Scheduler's
+        next_available callback
+
+        One free_starts() per day, taking its lowest set bit at or after
+        the first candidate slot, rather than trying every slot in turn.
+        """
+        member_id = self._by_name.get(name)
+        if member_id is None:
+            return after
+        slots = slots_for(-(-duration // timedelta(minutes=1)))
+        day = after.date()
+        # First slot starting at or after `after`
+        first_slot = -(-(after - datetime.combine(day, time())) // timedelta(minutes=SLOT_MINUTES))
+        while day <= limit.date():
+            starts = free_starts(self.day_mask(member_id, day), slots) >> first_slot << first_slot
+            if starts:
+                slot = (starts & -starts).bit_length() - 1
+                start = datetime.combine(day, time()) + timedelta(minutes=slot * SLOT_MINUTES)
+                return start if start <= limit else None
+            day += timedelta(days=1)
+            first_slot = 0
+        return None
+
+    def free_members(self, day: date, minutes: int, role: Optional[str] = None) -> List[Tuple[StaffMember, int]]:
+        """
+        Members who work a stretch of at least `minutes` on a date, with
+        the mask of slots such a stretch can start at
+        """
+        slots = slots_for(minutes)
+        found = []
+        for member in self.all(role):
+            starts = free_starts(self.day_mask(member.id, day), slots)
+            if starts:
+                found.append((member, starts))
+        return found
+
+    def common_starts(self, member_ids: Sequence[int], day: date, minutes: int) -> int:
+        """Slots where every given member is free for `minutes` together"""
+        mask = (1 << SLOTS_PER_DAY) - 1
+        for member_id in member_ids:
+            mask &= self.day_mask(member_id, day)
+        return free_starts(mask, slots_for(minutes)) if member_ids else 0
+
+    def working_minutes(self, day: date, role: Optional[str] = None) -> int:
+        """Staffed minutes on a date, summed over members"""
+        return sum(
+            bin(self.day_mask(member.id, day)).count("1") for member in self.all(role)
+        ) * SLOT_MINUTES
+
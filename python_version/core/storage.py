@@ -0,0 +1,220 @@
+"""
+Local Storage
+SQLite database shared by the clinic repositories
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+# Environment variable that overrides where the clinic database lives
+DATABASE_PATH_ENV = "SMILEY_DENTAL_DB"
+
+# sqlite3 keeps this many compiled statements per connection, so the fixed
+# SQL strings used by the repositories are prepared once and then reused
+STATEMENT_CACHE_SIZE = 256
+
+
+# One counter per tracked table, bumped by triggers on every write
+WRITE_VERSIONS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS write_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Every logged write, in commit order: writers hold the write lock while the
+# AUTOINCREMENT id is assigned, so ids only grow and are never reused
+CHANGE_LOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS change_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    row_key TEXT NOT NULL,
+    operation TEXT NOT NULL
+);
+"""
+
+
+def default_database_path() -> str:
+    """Get the database path, honouring SMILEY_DENTAL_DB"""
+    path = os.environ.get(DATABASE_PATH_ENV)
+    if path:
+        return path
+    return os.path.join(os.path.expanduser("~"), ".smiley_dental", "clinic.db")
+
+
+class _ConnectionState:
+    """A connection and the transaction() bookkeeping that goes with it"""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        self.transaction_depth = 0
+        self.rollback_callbacks = []
+
+
+class Database:
+    """
+    SQLite database in WAL mode
+
+    WAL lets readers (search index builds, reports) run while another
+    connection writes. Each thread gets its own connection, opened on
+    first use of .connection, so one thread's schema setup or reads can
+    never land inside (or, with executescript, commit) another thread's
+    open transaction. An in-memory database exists only in its one
+    connection, so there every thread shares it; keep such a database
+    on one thread.
+
+    Writes are grouped with transaction(): nested blocks join the outer
+    one, so a batch of repository calls commits once.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._states = []
+        self._states_lock = threading.Lock()
+        self._shared = self._open_state() if path == ":memory:" else None
+        if self._shared is None:
+            # The creating thread's connection is opened now, so a bad path fails here
+            self._local.state = self._open_state()
+
+    def _open_state(self) -> _ConnectionState:
+        state = _ConnectionState(self.connect())
+        with self._states_lock:
+            self._states.append(state)
+        return state
+
+    @property
+    def _state(self) -> _ConnectionState:
+        if self._shared is not None:
+            return self._shared
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            state = self._local.state = self._open_state()
+        return state
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """The calling thread's connection"""
+        return self._state.connection
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a new connection with the clinic pragmas applied"""
+        connection = sqlite3.connect(
+            self.path,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        connection.execute("PRAGMA busy_timeout=5000")
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        """Run a block of writes in one transaction on the calling thread's connection"""
+        state = self._state
+        if state.transaction_depth:
+            state.transaction_depth += 1
+            try:
+                yield state.connection
+            finally:
+                state.transaction_depth -= 1
+            return
+
+        state.connection.execute("BEGIN IMMEDIATE")
+        state.transaction_depth = 1
+        try:
+            yield state.connection
+        except BaseException:
+            state.transaction_depth = 0
+            state.connection.execute("ROLLBACK")
+            callbacks, state.rollback_callbacks = state.rollback_callbacks, []
+            for callback in callbacks:
+                callback()
+            raise
+        state.transaction_depth = 0
+        state.connection.execute("COMMIT")
+        state.rollback_callbacks = []
+
+    def on_rollback(self, callback):
+        """
+        Call back if the current transaction rolls back
+
+        For state kept outside the database that is only true once the
+        transaction commits, such as a reserved block of IDs.
+        """
+        self._state.rollback_callbacks.append(callback)
+
+    def track_writes(self, table: str):
+        """
+        Keep a write counter for a table
+
+        Caches built from the table compare write_version() before and
+        after instead of re-reading it. The counter moves in the writer's
+        transaction, so every write path and process is covered.
+        """
+        connection = self.connection
+        connection.executescript(WRITE_VERSIONS_SCHEMA)
+        connection.execute(
+            "INSERT OR IGNORE INTO write_versions (name, version) VALUES (?, 0)", (table,)
+        )
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            connection.execute(
+                f"CREATE TRIGGER IF NOT EXISTS write_version_{table}_{event.lower()} "
+                f"AFTER {event} ON {table} "
+                f"BEGIN UPDATE write_versions SET version = version + 1 WHERE name = '{table}'; END"
+            )
+
+    def log_changes(self, table: str, key_column: str):
+        """
+        Record each written row of a table in change_log
+
+        Like track_writes() but per row, so other terminals can apply just
+        the rows that changed (see core.change_feed). The row is identified
+        by key_column; a delete logs the old row's key.
+        """
+        connection = self.connection
+        connection.executescript(CHANGE_LOG_SCHEMA)
+        for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            connection.execute(
+                f"CREATE TRIGGER IF NOT EXISTS change_log_{table}_{event.lower()} "
+                f"AFTER {event} ON {table} "
+                f"BEGIN INSERT INTO change_log (name, row_key, operation) "
+                f"VALUES ('{table}', {row}.{key_column}, '{event.lower()}'); END"
+            )
+
+    def write_version(self, table: str) -> int:
+        """Current write counter of a table tracked with track_writes()"""
+        row = self.connection.execute(
+            "SELECT version FROM write_versions WHERE name = ?", (table,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def close(self):
+        """Close every thread's connection"""
+        with self._states_lock:
+            states, self._states = self._states, []
+        for state in states:
+            state.connection.close()
+
+
+_default_database: Optional[Database] = None
+_default_database_lock = threading.Lock()
+
+
+def get_database() -> Database:
+    """Get the application-wide database, opening it on first use"""
+    global _default_database
+    with _default_database_lock:
+        if _default_database is None:
+            _default_database = Database(default_database_path())
+        return _default_database
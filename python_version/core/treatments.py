@@ -0,0 +1,363 @@
+"""
+Treatments
+Procedure catalog and per-patient treatment history keyed by tooth
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .billing import from_cents, to_cents
+from .patient_repository import MAX_QUERY_PARAMETERS
+from .storage import Database
+
+# Universal numbering: 1-32 from the upper right third molar; 0 is the whole mouth
+TOOTH_COUNT = 32
+WHOLE_MOUTH = 0
+
+# Surfaces a restoration can cover: Mesial, Occlusal (Incisal), Distal, Buccal, Lingual
+SURFACES = "MODBL"
+
+STATUS_PLANNED = 'Planned'
+STATUS_COMPLETED = 'Completed'
+
+STATUSES = (STATUS_PLANNED, STATUS_COMPLETED)
+
+# Whole-tooth markers on the chart, chosen by procedure code prefix (CDT categories)
+MARKER_CROWN = 'crown'
+MARKER_ROOT_CANAL = 'root canal'
+MARKER_MISSING = 'missing'
+
+MARKER_PREFIXES = (
+    ("D27", MARKER_CROWN),
+    ("D3", MARKER_ROOT_CANAL),
+    ("D71", MARKER_MISSING),
+    ("D72", MARKER_MISSING),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS treatment_catalog (
+    code TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    price_cents INTEGER NOT NULL,
+    duration_minutes INTEGER NOT NULL,
+    active INTEGER NOT NULL DEFAULT 1
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS treatment_records (
+    id INTEGER PRIMARY KEY,
+    patient_id TEXT NOT NULL,
+    tooth INTEGER NOT NULL,
+    surfaces TEXT NOT NULL DEFAULT '',
+    code TEXT NOT NULL REFERENCES treatment_catalog (code),
+    status TEXT NOT NULL,
+    dentist TEXT NOT NULL DEFAULT '',
+    performed_on TEXT NOT NULL,
+    notes TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_treatments_patient ON treatment_records (patient_id, tooth, performed_on);
+CREATE INDEX IF NOT EXISTS idx_treatments_code ON treatment_records (code, patient_id);
+"""
+
+# Seeded into an empty catalog; prices are editable afterwards
+DEFAULT_CATALOG = (
+    ("D0120", "Periodic oral evaluation", 4500, 15),
+    ("D0150", "Comprehensive oral evaluation", 8500, 30),
+    ("D0210", "Full mouth X-rays", 12000, 30),
+    ("D1110", "Prophylaxis - adult cleaning", 9500, 45),
+    ("D2391", "Composite filling, one surface, posterior", 15000, 45),
+    ("D2392", "Composite filling, two surfaces, posterior", 19500, 60),
+    ("D2740", "Crown - porcelain/ceramic", 110000, 90),
+    ("D3310", "Root canal - anterior", 75000, 90),
+    ("D3330", "Root canal - molar", 110000, 120),
+    ("D7140", "Extraction, erupted tooth", 17500, 45),
+    ("D8080", "Comprehensive orthodontic treatment", 550000, 60),
+)
+
+CATALOG_COLUMNS = "code, name, price_cents, duration_minutes, active"
+RECORD_COLUMNS = "id, patient_id, tooth, surfaces, code, status, dentist, performed_on, notes"
+
+UPSERT_PROCEDURE_SQL = (
+    "INSERT INTO treatment_catalog (code, name, price_cents, duration_minutes, active) "
+    "VALUES (?, ?, ?, ?, ?) ON CONFLICT (code) DO UPDATE SET name = excluded.name, "
+    "price_cents = excluded.price_cents, duration_minutes = excluded.duration_minutes, "
+    "active = excluded.active"
+)
+INSERT_RECORD_SQL = (
+    "INSERT INTO treatment_records (patient_id, tooth, surfaces, code, status, dentist, performed_on, notes) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+# Served by idx_treatments_patient: the rows come back already in chart order
+CHART_SQL = f"SELECT {RECORD_COLUMNS} FROM treatment_records WHERE patient_id = ? ORDER BY tooth, performed_on, id"
+TOOTH_SQL = (
+    f"SELECT {RECORD_COLUMNS} FROM treatment_records WHERE patient_id = ? AND tooth = ? "
+    "ORDER BY performed_on, id"
+)
+# Answered from idx_treatments_code alone, without reading the records
+PATIENTS_WITH_SQL = "SELECT DISTINCT patient_id FROM treatment_records WHERE code = ? ORDER BY patient_id"
+
+
+class Procedure(NamedTuple):
+    """A catalog entry: what a procedure code costs and how long it takes"""
+    code: str
+    name: str
+    price: Decimal
+    duration: int
+    active: bool = True
+
+
+class TreatmentRecord(NamedTuple):
+    """One procedure planned or done on a patient's tooth (tooth 0 for the whole mouth)"""
+    id: Optional[int]
+    patient_id: str
+    tooth: int
+    surfaces: str
+    code: str
+    status: str
+    dentist: str
+    performed_on: date
+    notes: str
+
+
+class ToothState(NamedTuple):
+    """
+    What the chart shows on one tooth: the status of each surface (in
+    SURFACES order, '' when untreated) and a whole-tooth marker
+    """
+    surfaces: Tuple[str, ...] = ('',) * len(SURFACES)
+    marker: str = ''
+    marker_status: str = ''
+
+
+EMPTY_TOOTH = ToothState()
+
+
+def procedure_from_row(row) -> Procedure:
+    """Build a Procedure from a treatment_catalog row"""
+    return Procedure(
+        code=row["code"],
+        name=row["name"],
+        price=from_cents(row["price_cents"]),
+        duration=row["duration_minutes"],
+        active=bool(row["active"]),
+    )
+
+
+def record_from_row(row) -> TreatmentRecord:
+    """Build a TreatmentRecord from a treatment_records row"""
+    return TreatmentRecord(
+        id=row["id"],
+        patient_id=row["patient_id"],
+        tooth=row["tooth"],
+        surfaces=row["surfaces"],
+        code=row["code"],
+        status=row["status"],
+        dentist=row["dentist"],
+        performed_on=date.fromisoformat(row["performed_on"]),
+        notes=row["notes"],
+    )
+
+
+def normalize_surfaces(surfaces: str) -> str:
+    """Upper-case surface letters in SURFACES order, rejecting unknown ones"""
+    letters = set(surfaces.upper().replace(" ", ""))
+    unknown = letters - set(SURFACES)
+    if unknown:
+        raise ValueError(f"Unknown tooth surface: {''.join(sorted(unknown))}")
+    return "".join(surface for surface in SURFACES if surface in letters)
+
+
+def marker_for(code: str) -> str:
+    """The whole-tooth marker a procedure code draws, or ''"""
+    for prefix, marker in MARKER_PREFIXES:
+        if code.startswith(prefix):
+            return marker
+    return ''
+
+
+class PatientChart:
+    """
+    A patient's whole treatment history, grouped by tooth
+
+    Built from one query; tooth lookups afterwards are dictionary reads.
+    """
+
+    __slots__ = ('patient_id', 'teeth')
+
+    def __init__(self, patient_id: str, records: Iterable[TreatmentRecord] = ()):
+        self.patient_id = patient_id
+        self.teeth: Dict[int, List[TreatmentRecord]] = {}
+        for record in records:
+            self.teeth.setdefault(record.tooth, []).append(record)
+
+    def __len__(self) -> int:
+        return sum(len(records) for records in self.teeth.values())
+
+    def records(self) -> List[TreatmentRecord]:
+        """Every record, newest first"""
+        every = [record for records in self.teeth.values() for record in records]
+        every.sort(key=lambda record: (record.performed_on, record.id or 0), reverse=True)
+        return every
+
+    def for_tooth(self, tooth: int) -> List[TreatmentRecord]:
+        """A tooth's records, oldest first"""
+        return self.teeth.get(tooth, [])
+
+    def tooth_states(self) -> Dict[int, ToothState]:
+        """
+        The chart's picture of each treated tooth; the latest record
+        on a surface (or with a marker) decides what it shows
+        """
+        states = {}
+        for tooth, records in self.teeth.items():
+            if tooth == WHOLE_MOUTH:
+                continue
+            surfaces = dict.fromkeys(SURFACES, '')
+            marker = marker_status = ''
+            for record in records:
+                for surface in record.surfaces:
+                    surfaces[surface] = record.status
+                if marker_for(record.code):
+                    marker, marker_status = marker_for(record.code), record.status
+            state = ToothState(tuple(surfaces.values()), marker, marker_status)
+            if state != EMPTY_TOOTH:
+                states[tooth] = state
+        return states
+
+
+class TreatmentCatalog:
+    """
+    Procedure codes with prices and durations
+
+    The catalog is small and read on every chart, so it is held in
+    memory and reloaded only after it is edited.
+    """
+
+    def __init__(self, database: Database):
+        self.database = database
+        self.database.connection.executescript(SCHEMA)
+        self._procedures: Optional[Dict[str, Procedure]] = None
+        if not self.database.connection.execute("SELECT 1 FROM treatment_catalog LIMIT 1").fetchone():
+            self.save_many(Procedure(code, name, from_cents(price), minutes)
+                           for code, name, price, minutes in DEFAULT_CATALOG)
+
+    def _load(self) -> Dict[str, Procedure]:
+        if self._procedures is None:
+            rows = self.database.connection.execute(
+                f"SELECT {CATALOG_COLUMNS} FROM treatment_catalog ORDER BY code"
+            )
+            self._procedures = {row["code"]: procedure_from_row(row) for row in rows}
+        return self._procedures
+
+    def all(self, active_only: bool = True) -> List[Procedure]:
+        """Catalog entries ordered by code"""
+        return [p for p in self._load().values() if p.active or not active_only]
+
+    def get(self, code: str) -> Optional[Procedure]:
+        """One catalog entry, active or not"""
+        return self._load().get(code)
+
+    def save(self, procedure: Procedure):
+        """Add or edit one entry"""
+        self.save_many([procedure])
+
+    def save_many(self, procedures: Iterable[Procedure]):
+        """Add or edit entries in one transaction"""
+        with self.database.transaction() as connection:
+            connection.executemany(UPSERT_PROCEDURE_SQL, (
+                (p.code.strip().upper(), p.name, to_cents(p.price), p.duration, int(p.active))
+                for p in procedures
+            ))
+        self._procedures = None
+
+    def set_active(self, code: str, active: bool):
+        """Retire or restore a code; records that use it keep it"""
+        procedure = self.get(code)
+        if procedure is not None:
+            self.save(procedure._replace(active=active))
+
+
+class TreatmentHistory:
+    """
+    Treatment records by patient, tooth and procedure code
+
+    idx_treatments_patient (patient_id, tooth, performed_on) serves
+    opening a chart and a single tooth's history; idx_treatments_code
+    (code, patient_id) serves finding the patients who had a procedure.
+    Neither path reads records of other patients or codes.
+    """
+
+    def __init__(self, database: Database):
+        self.database = database
+        self.catalog = TreatmentCatalog(database)
+
+    def add(self, record: TreatmentRecord) -> TreatmentRecord:
+        """Insert one record and return it with its ID"""
+        return self.add_many([record])[0]
+
+    def add_many(self, records: Iterable[TreatmentRecord]) -> List[TreatmentRecord]:
+        """Insert records in one transaction"""
+        added = []
+        with self.database.transaction() as connection:
+            for record in records:
+                if not WHOLE_MOUTH <= record.tooth <= TOOTH_COUNT:
+                    raise ValueError(f"Tooth must be 1-{TOOTH_COUNT}, or {WHOLE_MOUTH} for the whole mouth")
+                if record.status not in STATUSES:
+                    raise ValueError(f"Unknown treatment status: {record.status}")
+                if self.catalog.get(record.code) is None:
+                    raise ValueError(f"Unknown procedure code: {record.code}")
+                record = record._replace(surfaces=normalize_surfaces(record.surfaces))
+                record_id = connection.execute(INSERT_RECORD_SQL, (
+                    record.patient_id, record.tooth, record.surfaces, record.code, record.status,
+                    record.dentist, record.performed_on.isoformat(), record.notes,
+                )).lastrowid
+                added.append(record._replace(id=record_id))
+        return added
+
+    def set_status(self, record_id: int, status: str, performed_on: Optional[date] = None):
+        """Mark a planned treatment done (or back to planned), optionally re-dating it"""
+        if status not in STATUSES:
+            raise ValueError(f"Unknown treatment status: {status}")
+        with self.database.transaction() as connection:
+            if performed_on is None:
+                connection.execute("UPDATE treatment_records SET status = ? WHERE id = ?", (status, record_id))
+            else:
+                connection.execute(
+                    "UPDATE treatment_records SET status = ?, performed_on = ? WHERE id = ?",
+                    (status, performed_on.isoformat(), record_id)
+                )
+
+    def delete(self, record_id: int):
+        """Remove a record entered by mistake"""
+        with self.database.transaction() as connection:
+            connection.execute("DELETE FROM treatment_records WHERE id = ?", (record_id,))
+
+    def chart(self, patient_id: str) -> PatientChart:
+        """A patient's full history in one query"""
+        rows = self.database.connection.execute(CHART_SQL, (patient_id,))
+        return PatientChart(patient_id, (record_from_row(row) for row in rows))
+
+    def charts(self, patient_ids: Sequence[str]) -> Dict[str, PatientChart]:
+        """Several patients' histories, one query per MAX_QUERY_PARAMETERS patients"""
+        charts = {patient_id: PatientChart(patient_id) for patient_id in patient_ids}
+        unique = list(charts)
+        for start in range(0, len(unique), MAX_QUERY_PARAMETERS):
+            chunk = unique[start:start + MAX_QUERY_PARAMETERS]
+            rows = self.database.connection.execute(
+                f"SELECT {RECORD_COLUMNS} FROM treatment_records "
+                f"WHERE patient_id IN ({', '.join('?' * len(chunk))}) ORDER BY patient_id, tooth, performed_on, id",
+                chunk
+            )
+            for row in rows:
+                record = record_from_row(row)
+                charts[record.patient_id].teeth.setdefault(record.tooth, []).append(record)
+        return charts
+
+    def for_tooth(self, patient_id: str, tooth: int) -> List[TreatmentRecord]:
+        """One tooth's records, oldest first"""
+        rows = self.database.connection.execute(TOOTH_SQL, (patient_id, tooth))
+        return [record_from_row(row) for row in rows]
+
+    def patients_with(self, code: str) -> List[str]:
+        """IDs of every patient with a record of a procedure code"""
+        rows = self.database.connection.execute(PATIENTS_WITH_SQL, (code,))
+        return [row[0] for row in rows]
@@ -0,0 +1,66 @@
+"""
+Smiley Dental Clinic Management System - Python/PyQt6 Version
+Main Application Entry Point
+
+Usage:
+    python main.py [--profile-startup]
+
+--profile-startup prints per-module import times (like -X importtime),
+QApplication creation time and time to first paint of the login screen.
+"""
+
+import time
+
+# Taken before any other import so profiling covers the whole startup
+STARTUP_TIME = time.perf_counter()
+
+import sys
+
+PROFILE_STARTUP_FLAG = "--profile-startup"
+
+
+def main():
+    """Main application entry point"""
+    profiler = None
+    if PROFILE_STARTUP_FLAG in sys.argv:
+        sys.argv.remove(PROFILE_STARTUP_FLAG)
+        from startup_profiler import StartupProfiler
+        profiler = StartupProfiler(STARTUP_TIME)
+        profiler.install_import_timer()
+    
+    # Qt is imported here rather than at module level so the import timer
+    # above sees it
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import Qt
+    
+    # Enable High DPI scaling
+    QApplication.setHighDpiScaleFactorRoundingPolicy(
+        Qt.HighDpiScaleFactorRoundingPolicy.PassThrough
+    )
+    
+    # Create application
+    if profiler:
+        profiler.phase("QApplication creation")
+    app = QApplication(sys.argv)
+    app.setApplicationName("Smiley Dental Clinic")
+    app.setApplicationVersion("1.0.0")
+    if profiler:
+        profiler.end_phase()
+    
+    # Only the login screen is loaded here; the dashboard loads after login
+    if profiler:
+        profiler.phase("MainWindow + login screen")
+    from ui.main_window import MainWindow
+    window = MainWindow()
+    if profiler:
+        profiler.end_phase()
+        profiler.watch_first_paint(window.login_window)
+    
+    # Create and show main window
+    window.show()
+    
+    # Execute application
+    sys.exit(app.exec())
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Smiley Dental Clinic Management System - Python/PyQt6 Version
+Headless API Server Entry Point
+
+Usage:
+    python server.py [--host HOST] [--port PORT] [--database PATH]
+
+Serves patients, appointments, billing and reports as HTTP/JSON for thin
+clients. Start the desktop app on another machine with
+SMILEY_DENTAL_SERVER=http://HOST:PORT to work through this server instead
+of a local database file.
+"""
+
+import argparse
+import asyncio
+
+from core.api_server import DEFAULT_HOST, DEFAULT_PORT, ApiServer
+from core.storage import Database, get_database
+
+
+def main():
+    """API server entry point"""
+    parser = argparse.ArgumentParser(description="Smiley Dental API server")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help=f"address to listen on (default {DEFAULT_HOST}; 0.0.0.0 for the whole network)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port to listen on (default {DEFAULT_PORT})")
+    parser.add_argument("--database", help="database file (default: the application's own)")
+    args = parser.parse_args()
+
+    database = Database(args.database) if args.database else get_database()
+    server = ApiServer(database, args.host, args.port)
+    print(f"Serving {database.path} on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Startup Profiler
+Timing report for main.py --profile-startup
+"""
+
+import sys
+import time
+from importlib.abc import MetaPathFinder
+from typing import List, Optional, Tuple
+
+
+class _TimedLoader:
+    """Wraps a module loader and reports its create/exec time"""
+
+    def __init__(self, loader, name: str, timer: 'ImportTimer'):
+        self._loader = loader
+        self._name = name
+        self._timer = timer
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        self._timer.enter(self._name)
+        create = getattr(self._loader, 'create_module', None)
+        try:
+            return create(spec) if create else None
+        except BaseException:
+            self._timer.leave(self._name)
+            raise
+
+    def exec_module(self, module):
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._timer.leave(self._name)
+
+
+class ImportTimer(MetaPathFinder):
+    """
+    Meta path finder that times every module loaded after install()
+
+    Records self and cumulative time per module, nested by import depth,
+    in the same shape as the interpreter's -X importtime output.
+    """
+
+    def __init__(self):
+        # (depth, module name, self us, cumulative us) in completion order
+        self.records: List[Tuple[int, str, int, int]] = []
+        # Open imports: [module name, start, time spent in nested imports]
+        self._stack: List[list] = []
+        self._finding = set()
+
+    def install(self):
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, name, path=None, target=None):
+        if name in self._finding:
+            return None
+        self._finding.add(name)
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                        spec.loader = _TimedLoader(spec.loader, name, self)
+                    return spec
+            return None
+        finally:
+            self._finding.discard(name)
+
+    def enter(self, name: str):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def leave(self, name: str):
+        if not self._stack or self._stack[-1][0] != name:
+            return
+        _, start, nested = self._stack.pop()
+        cumulative = time.perf_counter() - start
+        if self._stack:
+            self._stack[-1][2] += cumulative
+        self.records.append((
+            len(self._stack), name,
+            int((cumulative - nested) * 1e6), int(cumulative * 1e6)
+        ))
+
+    def report(self, stream=None):
+        stream = stream or sys.stderr
+        print("import time: self [us] | cumulative | imported package", file=stream)
+        for depth, name, self_us, cumulative_us in self.records:
+            print(f"import time: {self_us:>9} | {cumulative_us:>10} | {'  ' * depth}{name}", file=stream)
+
+
+class StartupProfiler:
+    """
+    Collects startup timings and prints them once the login screen paints
+
+    Phases are timed with phase()/end_phase(); time to first paint is
+    measured from process start (the timestamp main.py takes before any
+    other import) to the first Paint event of the watched widget.
+    """
+
+    def __init__(self, start: float):
+        self.start = start
+        self.imports = ImportTimer()
+        self.phases: List[Tuple[str, float]] = []
+        self._phase_start: Optional[Tuple[str, float]] = None
+        self._paint_filter = None
+
+    def install_import_timer(self):
+        self.imports.install()
+
+    def phase(self, label: str):
+        self._phase_start = (label, time.perf_counter())
+
+    def end_phase(self):
+        if self._phase_start:
+            label, start = self._phase_start
+            self.phases.append((label, time.perf_counter() - start))
+            self._phase_start = None
+
+    def watch_first_paint(self, widget, on_painted=None):
+        """Report once widget receives its first Paint event"""
+        from PyQt6.QtCore import QObject, QEvent
+
+        profiler = self
+
+        class _FirstPaintFilter(QObject):
+            def eventFilter(self, watched, event):
+                if event.type() == QEvent.Type.Paint:
+                    watched.removeEventFilter(self)
+                    profiler.first_paint(time.perf_counter())
+                    if on_painted:
+                        on_painted()
+                return False
+
+        self._paint_filter = _FirstPaintFilter()
+        widget.installEventFilter(self._paint_filter)
+
+    def first_paint(self, painted_at: float):
+        self.imports.uninstall()
+        self.report(painted_at - self.start)
+
+    def report(self, first_paint: float, stream=None):
+        stream = stream or sys.stderr
+        self.imports.report(stream)
+        print("", file=stream)
+        print("startup phases:", file=stream)
+        for label, seconds in self.phases:
+            print(f"    {label:<28} {seconds * 1000:9.1f} ms", file=stream)
+        print(f"    {'time to first paint':<28} {first_paint * 1000:9.1f} ms", file=stream)
@@ -0,0 +1,69 @@
+"""
+Row Actions Delegate
+Paints per-row action buttons without creating a widget per row
+"""
+
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle
+from PyQt6.QtCore import Qt, QEvent, QRect, pyqtSignal
+from PyQt6.QtGui import QColor, QPainter
+from typing import List, Tuple
+
+
+class RowActionsDelegate(QStyledItemDelegate):
+    """
+    Delegate that draws a row of buttons inside a cell
+
+    Buttons are only painted, so a table with thousands of rows still
+    holds no button widgets. Clicks are hit-tested in editorEvent and
+    reported through action_triggered.
+    """
+
+    # Signal emitted with (action id, row) when a painted button is clicked
+    action_triggered = pyqtSignal(str, int)
+
+    BUTTON_SPACING = 8
+    BUTTON_MARGIN = 4
+
+    def __init__(self, actions: List[Tuple[str, str, str]], parent=None):
+        """
+        actions: list of (action id, label, background color)
+        """
+        super().__init__(parent)
+        self.actions = actions
+
+    def button_rects(self, cell: QRect) -> List[QRect]:
+        """Split a cell into one rect per action button"""
+        count = len(self.actions)
+        inner = cell.adjusted(
+            self.BUTTON_MARGIN, self.BUTTON_MARGIN,
+            -self.BUTTON_MARGIN, -self.BUTTON_MARGIN
+        )
+        width = (inner.width() - self.BUTTON_SPACING * (count - 1)) // count
+        return [
+            QRect(inner.left() + i * (width + self.BUTTON_SPACING), inner.top(), width, inner.height())
+            for i in range(count)
+        ]
+
+    def paint(self, painter, option, index):
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        for (action_id, label, color), rect in zip(self.actions, self.button_rects(option.rect)):
+            painter.setBrush(QColor(color))
+            painter.drawRoundedRect(rect, 8, 8)
+            painter.setPen(QColor("#ffffff"))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, label)
+            painter.setPen(Qt.PenStyle.NoPen)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton:
+            pos = event.position().toPoint()
+            for (action_id, label, color), rect in zip(self.actions, self.button_rects(option.rect)):
+                if rect.contains(pos):
+                    self.action_triggered.emit(action_id, index.row())
+                    return True
+        return super().editorEvent(event, model, option, index)
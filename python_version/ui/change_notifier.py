@@ -0,0 +1,134 @@
+"""
+Change Notifier
+Wakes open modules when the shared data is written, by any terminal
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Union
+
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+
+from core.api_client import CHANGE_WAIT_SECONDS, ApiClient, ApiError, RemoteChangeFeed
+from core.change_feed import ChangeFeed, trim_change_log
+
+# Writes come in bursts (a batch, an import); wake listeners at most this often
+NOTIFY_INTERVAL_MS = 50
+
+# Wake-up for file systems that report no changes, such as some network shares
+HEARTBEAT_MS = 10_000
+
+# Pause before asking an unreachable server again (seconds)
+RECONNECT_DELAY = 5
+
+
+class ChangeNotifier(QObject):
+    """
+    Emits changed() soon after the database file is written
+
+    In WAL mode every commit, from whichever process, is appended to the
+    -wal file, so watching it (and the database and its directory, which
+    checkpoints and the first connection touch) tells an open window that
+    something changed without it asking. The signal carries no data:
+    each listener reads its own ChangeFeed for what changed. A slow
+    heartbeat covers file systems that do not deliver watch events; it
+    costs one indexed read per listener, not a reload.
+    """
+
+    changed = pyqtSignal()
+
+    def __init__(self, path: str, parent=None):
+        super().__init__(parent)
+        self.path = path
+
+        self.notify_timer = QTimer(self)
+        self.notify_timer.setSingleShot(True)
+        self.notify_timer.setInterval(NOTIFY_INTERVAL_MS)
+        self.notify_timer.timeout.connect(self.changed.emit)
+
+        self.heartbeat_timer = QTimer(self)
+        self.heartbeat_timer.setInterval(HEARTBEAT_MS)
+        self.heartbeat_timer.timeout.connect(self.changed.emit)
+        self.heartbeat_timer.start()
+
+        self.watcher = None
+        if path != ":memory:":
+            self.watcher = QFileSystemWatcher(self)
+            self.watcher.fileChanged.connect(self.file_changed)
+            self.watcher.directoryChanged.connect(self.file_changed)
+            self.watch_files()
+
+    def watch_files(self):
+        """Watch the database, its WAL and its directory; replaced files drop off the list"""
+        database_path = os.path.abspath(self.path)
+        watched = set(self.watcher.files()) | set(self.watcher.directories())
+        for path in (database_path, database_path + "-wal", os.path.dirname(database_path)):
+            if path not in watched and os.path.exists(path):
+                self.watcher.addPath(path)
+
+    def file_changed(self, path: str):
+        """Schedule one changed() for a burst of file events"""
+        # The WAL is deleted and recreated as connections close and open
+        self.watch_files()
+        if not self.notify_timer.isActive():
+            self.notify_timer.start()
+
+
+class RemoteChangeNotifier(QObject):
+    """
+    Emits changed() soon after the API server's data is written
+
+    A daemon thread keeps one long poll open on /changes: the server
+    answers as soon as a change commits (or after CHANGE_WAIT_SECONDS
+    with nothing), and the thread asks again. The signal is delivered
+    on the GUI thread like ChangeNotifier's.
+    """
+
+    changed = pyqtSignal()
+
+    def __init__(self, client: ApiClient, parent=None):
+        super().__init__(parent)
+        self.client = client
+        self.thread = threading.Thread(target=self.listen, name="change-notifier", daemon=True)
+        self.thread.start()
+
+    def listen(self):
+        feed = None
+        while True:
+            try:
+                if feed is None:
+                    feed = RemoteChangeFeed(self.client, ())
+                changes = feed.read(wait=CHANGE_WAIT_SECONDS)
+            except (ApiError, LookupError, TypeError):
+                # Unreachable, or an answer without the expected fields: one
+                # bad reply must not end syncing for the session
+                time.sleep(RECONNECT_DELAY)
+                continue
+            if changes is None or changes:
+                self.changed.emit()
+
+
+_notifiers: Dict[str, Union[ChangeNotifier, RemoteChangeNotifier]] = {}
+
+
+def change_notifier(feed: Union[ChangeFeed, RemoteChangeFeed]) -> Union[ChangeNotifier, RemoteChangeNotifier]:
+    """
+    The notifier shared by every module reading the same data as feed
+
+    The first call per database file also trims the change log, so it
+    stays small however long the clinic has been running.
+    """
+    if isinstance(feed, RemoteChangeFeed):
+        notifier = _notifiers.get(feed.client.base_url)
+        if notifier is None:
+            notifier = _notifiers[feed.client.base_url] = RemoteChangeNotifier(feed.client)
+        return notifier
+
+    database = feed.database
+    key = database.path if database.path == ":memory:" else os.path.abspath(database.path)
+    notifier = _notifiers.get(key)
+    if notifier is None:
+        trim_change_log(database)
+        notifier = _notifiers[key] = ChangeNotifier(database.path)
+    return notifier
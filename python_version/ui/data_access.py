@@ -0,0 +1,125 @@
+"""
+Data Access
+Storage reads and writes from the GUI, run on a worker thread and answered by signal
+"""
+
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional
+
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+
+
+class _Listener(NamedTuple):
+    """Callbacks one read() or write() asked for"""
+    finished: Optional[Callable[[Any], None]]
+    failed: Optional[Callable[[Exception], None]]
+
+
+class DataAccess(QObject):
+    """
+    Repository calls off the GUI thread
+
+    Slots hand the storage work to read() or write() as a function and
+    return at once; the function runs on one worker thread and its
+    result (or exception) is passed to the slot's callbacks back on the
+    GUI thread, in the order the calls were made. The worker uses its
+    own connection to the Database (see Database.connection), so schema
+    setup or a quick query still made on the GUI thread cannot land in
+    one of its transactions. With a single worker a write never
+    interleaves with another, and a read made after a write sees it.
+
+    Each call returns its concurrent.futures.Future; completion reaches
+    the GUI thread through a queued signal, so callbacks never run
+    inside the read()/write() call itself, even when the work was quick.
+
+    A read may carry a key naming what it reads. While a read with that
+    key is in flight, another one joins it instead of querying again:
+    a page the view asks for twice, or the same account opened from two
+    places, costs one query. A write ends the sharing, so reads made
+    after it run after it.
+    """
+
+    # Emitted on the worker thread with each completed future
+    future_done = pyqtSignal(object)
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="data-access")
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._listeners: Dict[Future, List[_Listener]] = {}
+        self.future_done.connect(self._future_done, Qt.ConnectionType.QueuedConnection)
+        # Reads run and reads that joined one in flight, for benchmarks
+        self.reads_run = 0
+        self.reads_joined = 0
+
+    def read(self, function: Callable[[], Any], on_finished: Callable[[Any], None],
+             on_failed: Optional[Callable[[Exception], None]] = None,
+             key: Optional[Hashable] = None) -> Future:
+        """
+        Run function() on the worker and pass its result to on_finished
+
+        key: joins a read with the same key that is still in flight; None
+        (for reads that consume something, like a change feed) never joins
+        """
+        listener = _Listener(on_finished, on_failed)
+        if key is not None:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.reads_joined += 1
+                self._listeners[future].append(listener)
+                return future
+
+        future = self._submit(function, listener)
+        self.reads_run += 1
+        if key is not None:
+            self._in_flight[key] = future
+            future.key = key
+        return future
+
+    def write(self, function: Callable[[], Any], on_finished: Optional[Callable[[Any], None]] = None,
+              on_failed: Optional[Callable[[Exception], None]] = None) -> Future:
+        """Run function() on the worker after every call made so far; never joined"""
+        # Reads already in flight may miss this write, so later ones must not join them
+        self._in_flight.clear()
+        return self._submit(function, _Listener(on_finished, on_failed))
+
+    def close(self):
+        """Finish the calls already made and stop the worker"""
+        self.executor.shutdown(wait=True)
+
+    def _submit(self, function: Callable[[], Any], listener: _Listener) -> Future:
+        future = self.executor.submit(function)
+        # Listeners are registered before the future can be reported done
+        self._listeners[future] = [listener]
+        future.add_done_callback(self.future_done.emit)
+        return future
+
+    def _future_done(self, future: Future):
+        key = getattr(future, 'key', None)
+        if key is not None and self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        listeners = self._listeners.pop(future, [])
+        error = future.exception()
+        for listener in listeners:
+            if error is None:
+                if listener.finished:
+                    listener.finished(future.result())
+            elif listener.failed:
+                listener.failed(error)
+            else:
+                traceback.print_exception(type(error), error, error.__traceback__)
+
+
+_data_access: Optional[DataAccess] = None
+_data_access_lock = threading.Lock()
+
+
+def get_data_access() -> DataAccess:
+    """The application-wide data access worker, started on first use"""
+    global _data_access
+    with _data_access_lock:
+        if _data_access is None:
+            _data_access = DataAccess()
+        return _data_access
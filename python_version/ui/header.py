@@ -4,7 +4,7 @@ Equivalent to Header.tsx
 """
 
 from PyQt6.QtWidgets import (
-    QWidget, QHBoxLayout, QLabel, QPushButton, QFrame
+    QWidget, QHBoxLayout, QVBoxLayout, QLabel, QPushButton, QFrame
 )
 from PyQt6.QtCore import Qt, pyqtSignal
 
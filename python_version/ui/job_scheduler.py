@@ -0,0 +1,221 @@
+"""
+Job Scheduler
+Runs report jobs on the Qt thread pool with cancellation, progress and a result cache
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Sequence
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from core.jobs import CancellationToken, JobCancelled, JobContext
+from core.storage import Database
+
+# Results kept per scheduler, least recently used dropped first
+MAX_CACHED_RESULTS = 32
+
+
+class CachedResult(NamedTuple):
+    """A finished job's result and the write versions of the data it read"""
+    result: Any
+    versions: Dict[str, int]
+    computed_at: datetime
+
+
+class _Listener(NamedTuple):
+    """Callbacks one submit() asked for"""
+    finished: Callable[[Any], None]
+    progress: Optional[Callable[[int, int], None]]
+    failed: Optional[Callable[[str], None]]
+    cancelled: Optional[Callable[[], None]]
+
+
+class _JobSignals(QObject):
+    """Signals of a background job"""
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+
+class Job(QRunnable):
+    """
+    One function call on a pool thread
+
+    The function receives a JobContext with its own database connection,
+    so it may take as long as it needs without blocking the window.
+    An in-memory database cannot be reopened: its jobs share its one
+    connection and JobScheduler runs them on the calling thread instead.
+    """
+
+    def __init__(self, key: Hashable, function: Callable[[JobContext], Any],
+                 database: Database, tables: Sequence[str]):
+        super().__init__()
+        self.key = key
+        self.function = function
+        self.database = database
+        self.tables = tuple(tables)
+        self.versions: Dict[str, int] = {}
+        self.token = CancellationToken()
+        self.signals = _JobSignals()
+
+    def cancel(self):
+        """Ask the job to stop at its next check"""
+        self.token.cancel()
+
+    def run(self):
+        if self.token.is_cancelled():
+            self.signals.cancelled.emit()
+            return
+        shared = self.database.path == ":memory:"
+        database = self.database if shared else Database(self.database.path)
+        try:
+            # Versions are read first, so a write during the run marks the result stale
+            self.versions = {table: database.write_version(table) for table in self.tables}
+            result = self.function(JobContext(database, self.token, self.signals.progress.emit))
+            self.token.check()
+        except JobCancelled:
+            self.signals.cancelled.emit()
+            return
+        except Exception as error:
+            self.signals.failed.emit(str(error))
+            return
+        finally:
+            if not shared:
+                database.close()
+        self.signals.finished.emit(result)
+
+
+class JobScheduler(QObject):
+    """
+    Background jobs keyed by their parameters
+
+    - a finished result is cached under its key and returned at once
+      while the tables it read (see Database.track_writes) are unchanged
+    - submitting a key that is already running joins that job
+    - a job submitted on a channel cancels the channel's previous job,
+      so only the latest request of a view runs to completion
+    """
+
+    def __init__(self, database: Database, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.database = database
+        self.pool = QThreadPool.globalInstance()
+        self._cache: 'OrderedDict[Hashable, CachedResult]' = OrderedDict()
+        self._running: Dict[Hashable, Job] = {}
+        self._channels: Dict[str, Job] = {}
+        self._listeners: Dict[Job, List[_Listener]] = {}
+
+    def submit(self, key: Hashable, function: Callable[[JobContext], Any],
+               on_finished: Callable[[Any], None], tables: Sequence[str] = (),
+               on_progress: Optional[Callable[[int, int], None]] = None,
+               on_failed: Optional[Callable[[str], None]] = None,
+               on_cancelled: Optional[Callable[[], None]] = None,
+               channel: Optional[str] = None, refresh: bool = False) -> Optional[Job]:
+        """
+        Run function(context) in the background and pass its result to on_finished
+
+        A fresh cached result is passed to on_finished before this
+        returns, and None is returned; otherwise the running Job is.
+        refresh=True ignores the cache. Jobs on an in-memory database
+        run to completion before this returns (and None is returned).
+        """
+        if not refresh:
+            cached = self._cache.get(key)
+            if cached is not None and not self._changed(cached.versions):
+                self._cache.move_to_end(key)
+                self.cancel_channel(channel)
+                on_finished(cached.result)
+                return None
+
+        job = self._running.get(key)
+        # A cancelled job still winds down, but must not take new listeners
+        if job is None or refresh or job.token.is_cancelled():
+            job = Job(key, function, self.database, tables)
+            # Signals are wired before the job starts so none can be missed;
+            # callers' callbacks are kept here and called on the GUI thread
+            job.signals.progress.connect(lambda done, total, job=job: self._job_progress(job, done, total))
+            job.signals.finished.connect(lambda result, job=job: self._job_finished(job, result))
+            job.signals.cancelled.connect(lambda job=job: self._job_ended(job, 'cancelled'))
+            job.signals.failed.connect(lambda message, job=job: self._job_ended(job, 'failed', message))
+            self._running[key] = job
+            self._listeners[job] = []
+            started = True
+        else:
+            started = False
+
+        if channel is not None:
+            previous = self._channels.get(channel)
+            if previous is not None and previous is not job:
+                self._cancel(previous)
+            self._channels[channel] = job
+
+        self._listeners[job].append(_Listener(on_finished, on_progress, on_failed, on_cancelled))
+        if started:
+            if self.database.path == ":memory:":
+                # Its one connection must not be used from a pool thread
+                job.run()
+                return None
+            self.pool.start(job)
+        return job
+
+    def cancel_channel(self, channel: Optional[str]):
+        """Cancel the job last submitted on a channel, if still running"""
+        job = self._channels.pop(channel, None) if channel is not None else None
+        if job is not None:
+            self._cancel(job)
+
+    def is_running(self, channel: str) -> bool:
+        """Check whether a channel has a job in progress"""
+        return channel in self._channels
+
+    def cached(self, key: Hashable) -> Optional[CachedResult]:
+        """The cached result for a key, fresh or stale"""
+        return self._cache.get(key)
+
+    def is_stale(self, key: Hashable) -> bool:
+        """Check whether the data behind a cached result has been written since"""
+        cached = self._cache.get(key)
+        return cached is not None and self._changed(cached.versions)
+
+    def invalidate(self):
+        """Forget every cached result"""
+        self._cache.clear()
+
+    def _cancel(self, job: Job):
+        """Cancel a job and stop offering it to submit() under its key"""
+        job.cancel()
+        if self._running.get(job.key) is job:
+            del self._running[job.key]
+
+    def _changed(self, versions: Dict[str, int]) -> bool:
+        return any(self.database.write_version(table) != version for table, version in versions.items())
+
+    def _job_progress(self, job: Job, done: int, total: int):
+        for listener in self._listeners.get(job, ()):
+            if listener.progress:
+                listener.progress(done, total)
+
+    def _job_finished(self, job: Job, result: Any):
+        self._cache[job.key] = CachedResult(result, job.versions, datetime.now())
+        self._cache.move_to_end(job.key)
+        while len(self._cache) > MAX_CACHED_RESULTS:
+            self._cache.popitem(last=False)
+        for listener in self._forget(job):
+            listener.finished(result)
+
+    def _job_ended(self, job: Job, outcome: str, *args):
+        for listener in self._forget(job):
+            callback = getattr(listener, outcome)
+            if callback:
+                callback(*args)
+
+    def _forget(self, job: Job):
+        """Drop a finished job from the bookkeeping, returning its listeners"""
+        if self._running.get(job.key) is job:
+            del self._running[job.key]
+        for channel, running in list(self._channels.items()):
+            if running is job:
+                del self._channels[channel]
+        return self._listeners.pop(job, [])
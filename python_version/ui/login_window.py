@@ -8,9 +8,13 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
     QLineEdit, QPushButton, QFrame, QComboBox
 )
-from PyQt6.QtCore import Qt, pyqtSignal, pyqtSlot, QSize
+from PyQt6.QtCore import Qt, pyqtSignal, pyqtSlot, QSize, QObject, QRunnable, QThreadPool
 from PyQt6.QtGui import QPixmap, QIcon, QCursor
-from typing import Dict, List
+from typing import Dict, List, Optional
+import threading
+
+from core.auth import CredentialStore
+from .theme import set_state, stylesheet
 
 # Mock users - equivalent to mockUsers in LoginPage.tsx
 MOCK_USERS = [
@@ -31,6 +35,44 @@ MOCK_USERS = [
 ]
 
 
+_credential_store: Optional[CredentialStore] = None
+_credential_store_lock = threading.Lock()
+
+
+def get_credential_store() -> CredentialStore:
+    """
+    Get the login credential store
+
+    Only password hashes are kept at runtime; the seed accounts are hashed
+    on first use, which happens on the login worker thread.
+    """
+    global _credential_store
+    with _credential_store_lock:
+        if _credential_store is None:
+            _credential_store = CredentialStore.from_accounts(MOCK_USERS)
+        return _credential_store
+
+
+class _LoginSignals(QObject):
+    """Signals of a login task"""
+    finished = pyqtSignal(object)
+
+
+class _LoginTask(QRunnable):
+    """Verifies credentials on a pool thread so hashing never blocks the UI"""
+
+    def __init__(self, username: str, password: str, account_type: str):
+        super().__init__()
+        self.username = username
+        self.password = password
+        self.account_type = account_type
+        self.signals = _LoginSignals()
+
+    def run(self):
+        user = get_credential_store().verify(self.username, self.password, self.account_type)
+        self.signals.finished.emit(user)
+
+
 class LoginWindow(QWidget):
     """
     Login window widget
@@ -52,13 +94,14 @@ class LoginWindow(QWidget):
     def __init__(self):
         super().__init__()
         self.password_visible = False
+        self.login_in_progress = False
         self.setup_ui()
     
     def setup_ui(self):
         """Set up the user interface"""
-        # Set window background
-        self.setStyleSheet("QWidget#LoginWindow { background-color: #2d3e50; }")
+        # Set window background and all login styles as a single sheet
         self.setObjectName("LoginWindow")
+        self.setStyleSheet(stylesheet('login'))
         
         # Main layout
         main_layout = QVBoxLayout(self)
@@ -70,13 +113,6 @@ class LoginWindow(QWidget):
         self.login_card.setObjectName("loginCard")
         self.login_card.setMinimumWidth(600)
         self.login_card.setMaximumWidth(600)
-        self.login_card.setStyleSheet("""
-            QFrame#loginCard {
-                background-color: rgba(26, 45, 63, 0.95);
-                border: 4px solid #4fb3d4;
-                border-radius: 12px;
-            }
-        """)
         
         card_layout = QVBoxLayout(self.login_card)
         card_layout.setContentsMargins(32, 32, 32, 32)
@@ -116,14 +152,6 @@ class LoginWindow(QWidget):
         self.logo_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.logo_label.setMinimumSize(80, 80)
         self.logo_label.setMaximumSize(80, 80)
-        self.logo_label.setStyleSheet("""
-            QLabel#logoLabel {
-                background-color: #3a4f5f;
-                border-radius: 16px;
-                color: #4fb3d4;
-                font-size: 14px;
-            }
-        """)
         
         # Try to load logo, fallback to placeholder
         try:
@@ -137,24 +165,10 @@ class LoginWindow(QWidget):
                 self.logo_label.setPixmap(scaled_pixmap)
             else:
                 self.logo_label.setText("🦷")
-                self.logo_label.setStyleSheet("""
-                    QLabel#logoLabel {
-                        background-color: #3a4f5f;
-                        border-radius: 16px;
-                        color: #4fb3d4;
-                        font-size: 40px;
-                    }
-                """)
+                set_state(self.logo_label, "fallback", True)
         except:
             self.logo_label.setText("🦷")
-            self.logo_label.setStyleSheet("""
-                QLabel#logoLabel {
-                    background-color: #3a4f5f;
-                    border-radius: 16px;
-                    color: #4fb3d4;
-                    font-size: 40px;
-                }
-            """)
+            set_state(self.logo_label, "fallback", True)
         
         logo_layout.addWidget(self.logo_label)
         parent_layout.addWidget(logo_container)
@@ -173,26 +187,12 @@ class LoginWindow(QWidget):
         welcome_label = QLabel("WELCOME BACK")
         welcome_label.setObjectName("welcomeLabel")
         welcome_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        welcome_label.setStyleSheet("""
-            QLabel#welcomeLabel {
-                color: white;
-                font-size: 32px;
-                font-weight: bold;
-            }
-        """)
         title_layout.addWidget(welcome_label)
         
         # Subtitle
         subtitle_label = QLabel("Sign in to Smiley Dental Clinic")
         subtitle_label.setObjectName("subtitleLabel")
         subtitle_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        subtitle_label.setStyleSheet("""
-            QLabel#subtitleLabel {
-                color: #4fb3d4;
-                font-size: 20px;
-                font-weight: 600;
-            }
-        """)
         title_layout.addWidget(subtitle_label)
         
         parent_layout.addWidget(title_container)
@@ -219,17 +219,6 @@ class LoginWindow(QWidget):
         self.error_label = QLabel()
         self.error_label.setObjectName("errorLabel")
         self.error_label.setWordWrap(True)
-        self.error_label.setStyleSheet("""
-            QLabel#errorLabel {
-                background-color: #cc0000;
-                color: white;
-                border: 2px solid #ff3333;
-                border-radius: 8px;
-                padding: 12px;
-                font-size: 14px;
-                font-weight: bold;
-            }
-        """)
         self.error_label.hide()
         form_layout.addWidget(self.error_label)
         
@@ -247,13 +236,6 @@ class LoginWindow(QWidget):
         # Label
         label = QLabel("Account Type")
         label.setObjectName("accountTypeLabel")
-        label.setStyleSheet("""
-            QLabel#accountTypeLabel {
-                color: white;
-                font-size: 16px;
-                font-weight: bold;
-            }
-        """)
         layout.addWidget(label)
         
         # ComboBox
@@ -262,34 +244,6 @@ class LoginWindow(QWidget):
         self.account_type_combo.addItems(["Admin", "Employee"])
         self.account_type_combo.setMinimumHeight(44)
         self.account_type_combo.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
-        self.account_type_combo.setStyleSheet("""
-            QComboBox#accountTypeComboBox {
-                background-color: #2d3e50;
-                color: white;
-                border: 2px solid #4fb3d4;
-                border-radius: 8px;
-                padding: 12px;
-                font-size: 16px;
-            }
-            QComboBox#accountTypeComboBox:hover {
-                border-color: #5dd9c1;
-            }
-            QComboBox#accountTypeComboBox:focus {
-                border-color: #4fb3d4;
-            }
-            QComboBox#accountTypeComboBox::drop-down {
-                border: none;
-                width: 30px;
-            }
-            QComboBox#accountTypeComboBox QAbstractItemView {
-                background-color: #2d3e50;
-                color: white;
-                border: 2px solid #4fb3d4;
-                selection-background-color: #4fb3d4;
-                selection-color: white;
-                padding: 4px;
-            }
-        """)
         layout.addWidget(self.account_type_combo)
         
         parent_layout.addWidget(container)
@@ -306,13 +260,6 @@ class LoginWindow(QWidget):
         # Label
         label = QLabel("Username")
         label.setObjectName("usernameLabel")
-        label.setStyleSheet("""
-            QLabel#usernameLabel {
-                color: white;
-                font-size: 16px;
-                font-weight: bold;
-            }
-        """)
         layout.addWidget(label)
         
         # Input field
@@ -320,26 +267,9 @@ class LoginWindow(QWidget):
         self.username_input.setObjectName("usernameLineEdit")
         self.username_input.setPlaceholderText("Enter your username")
         self.username_input.setMinimumHeight(44)
-        self.username_input.setStyleSheet("""
-            QLineEdit#usernameLineEdit {
-                background-color: #2d3e50;
-                color: white;
-                border: 2px solid #4fb3d4;
-                border-radius: 8px;
-                padding: 12px;
-                padding-left: 40px;
-                font-size: 16px;
-            }
-            QLineEdit#usernameLineEdit:hover {
-                border-color: #5dd9c1;
-            }
-            QLineEdit#usernameLineEdit:focus {
-                border-color: #4fb3d4;
-            }
-        """)
-        
-        # Connect Enter key to move to password field
-        self.username_input.returnPressed.connect(self.password_input.setFocus)
+        
+        # Connect Enter key to move to password field (created after this one)
+        self.username_input.returnPressed.connect(lambda: self.password_input.setFocus())
         
         layout.addWidget(self.username_input)
         
@@ -347,14 +277,6 @@ class LoginWindow(QWidget):
         icon_label = QLabel(self.username_input)
         icon_label.setObjectName("usernameIcon")
         icon_label.setText("👤")
-        icon_label.setStyleSheet("""
-            QLabel#usernameIcon {
-                background: transparent;
-                border: none;
-                color: #4fb3d4;
-                font-size: 16px;
-            }
-        """)
         icon_label.setGeometry(12, 12, 20, 20)
         
         parent_layout.addWidget(container)
@@ -371,13 +293,6 @@ class LoginWindow(QWidget):
         # Label
         label = QLabel("Password")
         label.setObjectName("passwordLabel")
-        label.setStyleSheet("""
-            QLabel#passwordLabel {
-                color: white;
-                font-size: 16px;
-                font-weight: bold;
-            }
-        """)
         layout.addWidget(label)
         
         # Password input container (for input + toggle button)
@@ -393,27 +308,6 @@ class LoginWindow(QWidget):
         self.password_input.setPlaceholderText("Enter your password")
         self.password_input.setEchoMode(QLineEdit.EchoMode.Password)
         self.password_input.setMinimumHeight(44)
-        self.password_input.setStyleSheet("""
-            QLineEdit#passwordLineEdit {
-                background-color: #2d3e50;
-                color: white;
-                border: 2px solid #4fb3d4;
-                border-top-left-radius: 8px;
-                border-bottom-left-radius: 8px;
-                border-top-right-radius: 0px;
-                border-bottom-right-radius: 0px;
-                padding: 12px;
-                padding-left: 40px;
-                padding-right: 12px;
-                font-size: 16px;
-            }
-            QLineEdit#passwordLineEdit:hover {
-                border-color: #5dd9c1;
-            }
-            QLineEdit#passwordLineEdit:focus {
-                border-color: #4fb3d4;
-            }
-        """)
         self.password_input.returnPressed.connect(self.handle_login)
         input_layout.addWidget(self.password_input)
         
@@ -424,24 +318,6 @@ class LoginWindow(QWidget):
         self.toggle_password_btn.setMinimumSize(44, 44)
         self.toggle_password_btn.setMaximumSize(44, 44)
         self.toggle_password_btn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
-        self.toggle_password_btn.setStyleSheet("""
-            QPushButton#togglePasswordButton {
-                background-color: #2d3e50;
-                border: 2px solid #4fb3d4;
-                border-left: none;
-                border-top-right-radius: 8px;
-                border-bottom-right-radius: 8px;
-                padding: 12px;
-                font-size: 16px;
-            }
-            QPushButton#togglePasswordButton:hover {
-                background-color: #3a4f5f;
-                border-color: #5dd9c1;
-            }
-            QPushButton#togglePasswordButton:pressed {
-                background-color: #1a2d3f;
-            }
-        """)
         self.toggle_password_btn.clicked.connect(self.toggle_password_visibility)
         input_layout.addWidget(self.toggle_password_btn)
         
@@ -451,14 +327,6 @@ class LoginWindow(QWidget):
         lock_icon = QLabel(self.password_input)
         lock_icon.setObjectName("passwordIcon")
         lock_icon.setText("🔒")
-        lock_icon.setStyleSheet("""
-            QLabel#passwordIcon {
-                background: transparent;
-                border: none;
-                color: #4fb3d4;
-                font-size: 16px;
-            }
-        """)
         lock_icon.setGeometry(12, 12, 20, 20)
         
         parent_layout.addWidget(container)
@@ -478,23 +346,11 @@ class LoginWindow(QWidget):
         # Shield icon
         shield_icon = QLabel("🛡️")
         shield_icon.setObjectName("securityIcon")
-        shield_icon.setStyleSheet("""
-            QLabel#securityIcon {
-                color: #4fb3d4;
-                font-size: 14px;
-            }
-        """)
         security_layout.addWidget(shield_icon)
         
         # Security label
         security_label = QLabel("Secure Connection")
         security_label.setObjectName("securityLabel")
-        security_label.setStyleSheet("""
-            QLabel#securityLabel {
-                color: #4fb3d4;
-                font-size: 12px;
-            }
-        """)
         security_layout.addWidget(security_label)
         
         parent_layout.addWidget(security_container)
@@ -514,27 +370,6 @@ class LoginWindow(QWidget):
         self.sign_in_btn.setMinimumHeight(48)
         self.sign_in_btn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
         self.sign_in_btn.setDefault(True)
-        self.sign_in_btn.setStyleSheet("""
-            QPushButton#signInButton {
-                background-color: #4fb3d4;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 16px;
-                font-size: 16px;
-                font-weight: bold;
-            }
-            QPushButton#signInButton:hover {
-                background-color: #3a9cb8;
-            }
-            QPushButton#signInButton:pressed {
-                background-color: #2d8aa3;
-            }
-            QPushButton#signInButton:disabled {
-                background-color: #6b7280;
-                color: #9ca3af;
-            }
-        """)
         self.sign_in_btn.clicked.connect(self.handle_login)
         button_layout.addWidget(self.sign_in_btn)
         
@@ -544,21 +379,6 @@ class LoginWindow(QWidget):
         forgot_password_btn.setMinimumHeight(32)
         forgot_password_btn.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
         forgot_password_btn.setFlat(True)
-        forgot_password_btn.setStyleSheet("""
-            QPushButton#forgotPasswordButton {
-                background-color: transparent;
-                color: #4fb3d4;
-                border: none;
-                font-size: 14px;
-                text-decoration: underline;
-            }
-            QPushButton#forgotPasswordButton:hover {
-                color: #5dd9c1;
-            }
-            QPushButton#forgotPasswordButton:pressed {
-                color: #3a9cb8;
-            }
-        """)
         forgot_password_btn.clicked.connect(self.handle_forgot_password)
         button_layout.addWidget(forgot_password_btn)
         
@@ -596,6 +416,9 @@ class LoginWindow(QWidget):
         Handle login button click
         Equivalent to handleSubmit in LoginPage.tsx
         """
+        if self.login_in_progress:
+            return
+        
         username = self.username_input.text().strip()
         password = self.password_input.text()
         account_type = self.account_type_combo.currentText()
@@ -608,22 +431,28 @@ class LoginWindow(QWidget):
             self.show_error("Please enter both username and password")
             return
         
-        # Validate credentials
-        user = None
-        for mock_user in MOCK_USERS:
-            if (mock_user['username'] == username and 
-                mock_user['password'] == password and
-                mock_user['role'] == account_type):
-                user = mock_user
-                break
+        # Validate credentials on a worker thread (password hashing is slow by design)
+        self.login_in_progress = True
+        self.sign_in_btn.setEnabled(False)
+        self.sign_in_btn.setText("Signing In...")
+        
+        task = _LoginTask(username, password, account_type)
+        task.signals.finished.connect(self.handle_login_result)
+        QThreadPool.globalInstance().start(task)
+    
+    def handle_login_result(self, user):
+        """Handle the result of a credential check"""
+        self.login_in_progress = False
+        self.sign_in_btn.setEnabled(True)
+        self.sign_in_btn.setText("Sign In")
         
         if user:
             # Successful login
             self.login_successful.emit({
-                'id': user['id'],
-                'username': user['username'],
-                'role': user['role'],
-                'full_name': user['full_name']
+                'id': user.id,
+                'username': user.username,
+                'role': user.role,
+                'full_name': user.full_name
             })
         else:
             # Failed login
@@ -4,22 +4,30 @@ Equivalent to App.tsx and Dashboard.tsx
 """
 
 from PyQt6.QtWidgets import (
-    QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
+    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QStackedWidget, QMessageBox
 )
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QPalette, QColor
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
+import importlib
+import time
 
+# Only the login screen is imported up front; the dashboard (header,
+# sidebar, modules and their storage layers) is imported after login
 from .login_window import LoginWindow
-from .header import Header
-from .sidebar import Sidebar
-from .modules.patients_module import PatientsModule
-from .modules.appointments_module import AppointmentsModule
-from .modules.treatments_module import TreatmentsModule
-from .modules.billing_module import BillingModule
-from .modules.staff_module import StaffModule
-from .modules.reports_module import ReportsModule
+from .theme import apply_app_theme
+
+# Dashboard modules: name -> (module path relative to ui, class name)
+DASHBOARD_MODULES: Dict[str, Tuple[str, str]] = {
+    'patients': ('.modules.patients_module', 'PatientsModule'),
+    'appointments': ('.modules.appointments_module', 'AppointmentsModule'),
+    'treatments': ('.modules.treatments_module', 'TreatmentsModule'),
+    'billing': ('.modules.billing_module', 'BillingModule'),
+    'staff': ('.modules.staff_module', 'StaffModule'),
+    'reports': ('.modules.reports_module', 'ReportsModule'),
+}
+ADMIN_ONLY_MODULES = ('staff', 'reports')
 
 
 class User:
@@ -35,12 +43,41 @@ class MainWindow(QMainWindow):
     """
     Main application window
     Combines functionality of App.tsx and Dashboard.tsx
+    
+    Dashboard modules are built lazily: each one is imported and
+    constructed the first time change_module selects it. After a switch, the modules a user is
+    likely to open next are prefetched one per idle tick.
     """
     
-    def __init__(self):
+    # Signal emitted with (module name, seconds) after a module is imported and constructed
+    module_constructed = pyqtSignal(str, float)
+    
+    # Modules likely to be opened next from each module, in prefetch order
+    PREFETCH_ORDER: Dict[str, List[str]] = {
+        'patients': ['appointments', 'treatments'],
+        'appointments': ['patients', 'treatments'],
+        'treatments': ['patients', 'billing'],
+        'billing': ['patients', 'reports'],
+        'staff': ['reports'],
+        'reports': ['billing', 'staff'],
+    }
+    
+    # Delay after a module switch before prefetching starts (ms)
+    PREFETCH_DELAY_MS = 500
+    
+    def __init__(self, prefetch_modules: bool = True):
         super().__init__()
         self.current_user: Optional[User] = None
         self.current_module = 'patients'
+        self.prefetch_modules = prefetch_modules
+        self.modules: Dict[str, QWidget] = {}
+        self.module_factories: Dict[str, Tuple[str, str]] = {}
+        self.module_build_times: Dict[str, float] = {}
+        self.prefetch_queue: List[str] = []
+        
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.timeout.connect(self.prefetch_next_module)
         
         self.setWindowTitle("Smiley Dental Clinic and Services")
         self.setMinimumSize(1200, 800)
@@ -68,71 +105,16 @@ class MainWindow(QMainWindow):
         
         self.setPalette(palette)
         
-        # Apply stylesheet
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #949494;
-            }
-            QWidget {
-                font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
-                font-size: 16px;
-            }
-            QPushButton {
-                background-color: #4fb3d4;
-                color: white;
-                border: 2px solid #4fb3d4;
-                border-radius: 8px;
-                padding: 12px 24px;
-                font-weight: bold;
-                font-size: 16px;
-            }
-            QPushButton:hover {
-                background-color: #3a9cb8;
-            }
-            QPushButton:pressed {
-                background-color: #2d8aa3;
-            }
-            QPushButton[danger="true"] {
-                background-color: #cc0000;
-                border-color: #ff3333;
-            }
-            QPushButton[danger="true"]:hover {
-                background-color: #ff3333;
-            }
-            QLineEdit {
-                background-color: #2d3e50;
-                color: white;
-                border: 2px solid #4fb3d4;
-                border-radius: 8px;
-                padding: 12px;
-                font-size: 16px;
-            }
-            QLineEdit:focus {
-                border-color: #4fb3d4;
-            }
-            QLabel {
-                color: white;
-                font-size: 16px;
-                font-weight: bold;
-            }
-            QTableWidget {
-                background-color: #2d3e50;
-                color: white;
-                border: 2px solid #4fb3d4;
-                border-radius: 8px;
-                gridline-color: #1a2d3f;
-            }
-            QHeaderView::section {
-                background-color: #1a2d3f;
-                color: white;
-                padding: 12px;
-                border: none;
-                font-weight: bold;
-            }
-        """)
+        # Apply the shared application stylesheet (built and parsed once)
+        apply_app_theme(QApplication.instance())
     
     def show_login(self):
         """Show login window"""
+        self.prefetch_timer.stop()
+        self.prefetch_queue = []
+        self.modules = {}
+        self.module_factories = {}
+        
         self.login_window = LoginWindow()
         self.login_window.login_successful.connect(self.handle_login)
         self.setCentralWidget(self.login_window)
@@ -155,6 +137,9 @@ class MainWindow(QMainWindow):
         Set up main dashboard after login
         Equivalent to Dashboard.tsx
         """
+        from .header import Header
+        from .sidebar import Sidebar
+        
         # Create central widget
         central_widget = QWidget()
         main_layout = QHBoxLayout(central_widget)
@@ -185,23 +170,13 @@ class MainWindow(QMainWindow):
             }
         """)
         
-        # Initialize modules
-        self.modules = {
-            'patients': PatientsModule(self.current_user),
-            'appointments': AppointmentsModule(self.current_user),
-            'treatments': TreatmentsModule(self.current_user),
-            'billing': BillingModule(self.current_user),
+        # Register modules; each is imported and constructed on first use
+        self.modules = {}
+        self.module_factories = {
+            name: location for name, location in DASHBOARD_MODULES.items()
+            if name not in ADMIN_ONLY_MODULES or self.current_user.role == 'Admin'
         }
         
-        # Add admin-only modules
-        if self.current_user.role == 'Admin':
-            self.modules['staff'] = StaffModule(self.current_user)
-            self.modules['reports'] = ReportsModule(self.current_user)
-        
-        # Add modules to stack
-        for module_name, module in self.modules.items():
-            self.module_stack.addWidget(module)
-        
         right_layout.addWidget(self.module_stack)
         main_layout.addWidget(right_widget, 1)
         
@@ -216,9 +191,58 @@ class MainWindow(QMainWindow):
         Switch active module
         Equivalent to setCurrentModule in Dashboard.tsx
         """
-        if module_name in self.modules:
-            self.current_module = module_name
-            self.module_stack.setCurrentWidget(self.modules[module_name])
+        module = self.get_module(module_name)
+        if module is None:
+            return
+        
+        self.current_module = module_name
+        self.module_stack.setCurrentWidget(module)
+        self.schedule_prefetch(module_name)
+    
+    def get_module(self, module_name: str) -> Optional[QWidget]:
+        """Get a module, constructing it on first use"""
+        module = self.modules.get(module_name)
+        if module is not None:
+            return module
+        
+        location = self.module_factories.get(module_name)
+        if location is None:
+            return None
+        
+        start = time.perf_counter()
+        module_path, class_name = location
+        module_class = getattr(importlib.import_module(module_path, __package__), class_name)
+        module = module_class(self.current_user)
+        elapsed = time.perf_counter() - start
+        
+        self.modules[module_name] = module
+        self.module_stack.addWidget(module)
+        self.module_build_times[module_name] = elapsed
+        self.module_constructed.emit(module_name, elapsed)
+        return module
+    
+    def schedule_prefetch(self, module_name: str):
+        """Queue the modules likely to be opened after module_name"""
+        if not self.prefetch_modules:
+            return
+        
+        self.prefetch_queue = [
+            name for name in self.PREFETCH_ORDER.get(module_name, [])
+            if name in self.module_factories and name not in self.modules
+        ]
+        if self.prefetch_queue:
+            self.prefetch_timer.start(self.PREFETCH_DELAY_MS)
+    
+    def prefetch_next_module(self):
+        """Build one queued module, then yield to the event loop"""
+        while self.prefetch_queue:
+            module_name = self.prefetch_queue.pop(0)
+            if module_name not in self.modules:
+                self.get_module(module_name)
+                break
+        
+        if self.prefetch_queue:
+            self.prefetch_timer.start(0)
     
     def handle_logout(self):
         """
@@ -0,0 +1 @@
+# Models Package
\ No newline at end of file
@@ -0,0 +1,236 @@
+"""
+Patient Table Model
+Virtualized model behind the patients table
+"""
+
+import traceback
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from typing import Dict, List, Optional
+
+from core.patients import Patient
+from core.patient_repository import PatientRepository
+from ..data_access import DataAccess, get_data_access
+
+
+class PatientTableModel(QAbstractTableModel):
+    """
+    Table model over the patient repository
+
+    Cells are produced on demand in data(), so the view only asks for
+    the rows that are actually visible instead of owning one item per cell.
+    Rows are read from storage in pages through canFetchMore/fetchMore as
+    the view scrolls, either in registry order or, after a search, in the
+    order of the matching IDs. Pages are read through DataAccess and
+    inserted when they arrive, so scrolling never waits on storage; a
+    page requested before reload() is dropped.
+
+    Single-record changes are reported with row-level notifications
+    (insert/dataChanged/remove) instead of a model reset. Rows are located
+    through an id-to-row index; a delete only marks the index stale from
+    the removed row onward, and the tail is renumbered lazily by the next
+    lookup that lands there, so a burst of deletes costs one pass.
+    """
+
+    COLUMNS = [
+        "ID", "Name", "Age", "Gender", "Contact",
+        "Email", "Registered", "Actions"
+    ]
+    ACTIONS_COLUMN = 7
+    PAGE_SIZE = 200
+
+    def __init__(self, repository: PatientRepository, parent=None, data_access: Optional[DataAccess] = None):
+        super().__init__(parent)
+        self._repository = repository
+        self._data = data_access or get_data_access()
+        # A page is being read; bumped generations drop pages read for an older reload()
+        self._loading = False
+        self._generation = 0
+        # Registry order: keyset cursor of the last loaded page
+        self._cursor = 0
+        # Search results: IDs to show and how many of them are loaded
+        self._filter_ids: Optional[List[str]] = None
+        self._filter_offset = 0
+        self._exhausted = False
+        self._patients: List[Patient] = []
+        self._row_by_id: Dict[str, int] = {}
+        # Index entries at rows >= _stale_from may be off after a removal
+        self._stale_from = 0
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._patients)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+
+        column = index.column()
+        if column == self.ACTIONS_COLUMN:
+            return None
+
+        patient = self._patients[index.row()]
+        if column == 0:
+            return patient.id
+        if column == 1:
+            return patient.name
+        if column == 2:
+            return str(patient.age)
+        if column == 3:
+            return patient.gender
+        if column == 4:
+            return patient.contact
+        if column == 5:
+            return patient.email
+        if column == 6:
+            return patient.registered_date
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted or self._loading:
+            return
+
+        self._loading = True
+        generation = self._generation
+        failed = lambda error: self._page_failed(generation, error)
+        if self._filter_ids is None:
+            cursor = self._cursor
+            self._data.read(
+                lambda: self._repository.page(cursor, self.PAGE_SIZE),
+                lambda page: self._page_loaded(generation, page.patients, page.cursor, 0),
+                failed, key=(self._repository, 'page', cursor, self.PAGE_SIZE),
+            )
+        else:
+            chunk = self._filter_ids[self._filter_offset:self._filter_offset + self.PAGE_SIZE]
+            self._data.read(
+                lambda: self._repository.get_many(chunk),
+                lambda patients: self._page_loaded(generation, patients, self._cursor, len(chunk)),
+                failed, key=(self._repository, 'ids', tuple(chunk)),
+            )
+
+    def _page_loaded(self, generation: int, patients: List[Patient], cursor: int, ids_read: int):
+        """Append a page read by fetchMore(), unless the model was reloaded since"""
+        if generation != self._generation:
+            return
+        self._loading = False
+        if self._filter_ids is None:
+            self._cursor = cursor
+            self._exhausted = len(patients) < self.PAGE_SIZE
+        else:
+            self._filter_offset += ids_read
+            self._exhausted = self._filter_offset >= len(self._filter_ids)
+
+        if not patients:
+            return
+
+        first = len(self._patients)
+        self.beginInsertRows(QModelIndex(), first, first + len(patients) - 1)
+        self._patients.extend(patients)
+        for row, patient in enumerate(patients, first):
+            self._row_by_id[patient.id] = row
+        if self._stale_from == first:
+            self._stale_from = len(self._patients)
+        self.endInsertRows()
+
+    def _page_failed(self, generation: int, error: Exception):
+        """Let the next fetchMore() try the page again"""
+        if generation != self._generation:
+            return
+        self._loading = False
+        traceback.print_exception(type(error), error, error.__traceback__)
+
+    def reload(self, patient_ids: Optional[List[str]] = None):
+        """
+        Drop loaded rows and start paging again
+
+        patient_ids: show only these patients, in this order (None for all)
+        """
+        self.beginResetModel()
+        self._generation += 1
+        self._loading = False
+        self._cursor = 0
+        self._filter_ids = patient_ids
+        self._filter_offset = 0
+        self._exhausted = False
+        self._patients = []
+        self._row_by_id = {}
+        self._stale_from = 0
+        self.endResetModel()
+
+    def patient_at(self, row: int) -> Optional[Patient]:
+        """Get the patient shown at a row"""
+        if 0 <= row < len(self._patients):
+            return self._patients[row]
+        return None
+
+    def row_of(self, patient_id: str) -> Optional[int]:
+        """Get the row showing a patient, or None if it is not displayed"""
+        row = self._row_by_id.get(patient_id)
+        if row is None or row < self._stale_from:
+            return row
+
+        # Renumber the rows shifted by earlier removals
+        for tail_row in range(self._stale_from, len(self._patients)):
+            self._row_by_id[self._patients[tail_row].id] = tail_row
+        self._stale_from = len(self._patients)
+        return self._row_by_id.get(patient_id)
+
+    def insert_patient(self, patient: Patient):
+        """Append one new patient as a row"""
+        if not self._exhausted:
+            # Not all pages are loaded; the patient arrives with a later page
+            if self._filter_ids is not None:
+                self._filter_ids.append(patient.id)
+            return
+
+        row = len(self._patients)
+        if self._stale_from == row:
+            self._stale_from += 1
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._patients.append(patient)
+        self._row_by_id[patient.id] = row
+        self.endInsertRows()
+
+    def update_patient(self, patient: Patient) -> bool:
+        """Refresh the cells of one patient's row"""
+        row = self.row_of(patient.id)
+        if row is None:
+            return False
+        self._patients[row] = patient
+        self.dataChanged.emit(
+            self.index(row, 0),
+            self.index(row, self.ACTIONS_COLUMN - 1),
+            [Qt.ItemDataRole.DisplayRole]
+        )
+        return True
+
+    def remove_patient(self, patient_id: str) -> bool:
+        """Remove one patient's row"""
+        row = self.row_of(patient_id)
+        if row is None:
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._patients[row]
+        del self._row_by_id[patient_id]
+        self._stale_from = min(self._stale_from, row)
+        self.endRemoveRows()
+        return True
@@ -3,23 +3,194 @@ Appointments Module
 Equivalent to AppointmentsModule.tsx
 """
 
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
-from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit,
+    QDialog, QFormLayout, QComboBox, QDateTimeEdit, QSpinBox, QMessageBox, QMenu
+)
+from PyQt6.QtCore import Qt, QDateTime
+from PyQt6.QtGui import QCursor
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from core.appointment_repository import AppointmentRepository
+from core.change_feed import ChangeFeed, keys_by_table
+from core.recurrence import MONTHLY, WEEKLY, RecurrenceRule, Series
+from core.scheduling import (
+    Appointment, Scheduler, SchedulingConflict,
+    STATUS_CANCELLED, STATUS_COMPLETED, STATUS_NO_SHOW
+)
+from core.staff import ROLE_DENTIST, Roster
+from core.storage import get_database
+from ..change_notifier import change_notifier
+from ..data_access import get_data_access
+from ..widgets.calendar_view import CalendarView
+
+DEFAULT_DENTISTS = ["Dr. Admin User", "Dr. Santos", "Dr. Reyes"]
+DEFAULT_CHAIRS = ["Chair 1", "Chair 2", "Chair 3"]
+
+# Tables whose changes at other terminals the calendar follows
+SYNCED_TABLES = ('appointments', 'appointment_series', 'appointment_exceptions')
+
+# Repeat choices: label -> (frequency, interval), None for a one-off visit
+REPEAT_OPTIONS = {
+    "Does not repeat": None,
+    "Every week": (WEEKLY, 1),
+    "Every 4 weeks": (WEEKLY, 4),
+    "Every month": (MONTHLY, 1),
+    "Every 6 months": (MONTHLY, 6),
+    "Every year": (MONTHLY, 12),
+}
+
+
+class AppointmentDialog(QDialog):
+    """Dialog for booking an appointment"""
+
+    def __init__(self, scheduler: Scheduler, dentists: List[str], chairs: List[str],
+                 parent=None, start: Optional[datetime] = None, chair: str = ""):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.data = get_data_access()
+        self.dentists = dentists
+        self.chairs = chairs
+
+        self.setWindowTitle("Book Appointment")
+        self.setModal(True)
+        self.setMinimumWidth(500)
+
+        self.setup_ui(start or datetime.now().replace(second=0, microsecond=0), chair)
+
+    def setup_ui(self, start: datetime, chair: str):
+        """Set up dialog UI"""
+        layout = QFormLayout(self)
+        layout.setSpacing(16)
+
+        self.patient_input = QLineEdit()
+        self.patient_input.setPlaceholderText("Patient ID, e.g. P0001")
+
+        self.dentist_input = QComboBox()
+        self.dentist_input.addItems(self.dentists)
+
+        self.chair_input = QComboBox()
+        self.chair_input.addItems(self.chairs)
+        if chair in self.chairs:
+            self.chair_input.setCurrentText(chair)
+
+        self.start_input = QDateTimeEdit(QDateTime(start))
+        self.start_input.setCalendarPopup(True)
+        self.start_input.setDisplayFormat("yyyy-MM-dd HH:mm")
+
+        self.duration_input = QSpinBox()
+        self.duration_input.setRange(15, 480)
+        self.duration_input.setSingleStep(15)
+        self.duration_input.setValue(30)
+        self.duration_input.setSuffix(" min")
+
+        self.repeat_input = QComboBox()
+        self.repeat_input.addItems(list(REPEAT_OPTIONS))
+
+        self.occurrences_input = QSpinBox()
+        self.occurrences_input.setRange(0, 999)
+        self.occurrences_input.setSpecialValueText("No end")
+
+        self.notes_input = QLineEdit()
+        self.notes_input.setPlaceholderText("Notes")
+
+        layout.addRow("Patient:", self.patient_input)
+        layout.addRow("Dentist:", self.dentist_input)
+        layout.addRow("Chair:", self.chair_input)
+        layout.addRow("Start:", self.start_input)
+        layout.addRow("Duration:", self.duration_input)
+        layout.addRow("Repeat:", self.repeat_input)
+        layout.addRow("Occurrences:", self.occurrences_input)
+        layout.addRow("Notes:", self.notes_input)
+
+        # Buttons
+        button_layout = QHBoxLayout()
+
+        find_button = QPushButton("Find Next Free Slot")
+        find_button.clicked.connect(self.find_next_free_slot)
+
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(self.reject)
+
+        save_button = QPushButton("Book")
+        save_button.clicked.connect(self.accept)
+
+        button_layout.addWidget(find_button)
+        button_layout.addStretch()
+        button_layout.addWidget(cancel_button)
+        button_layout.addWidget(save_button)
+        layout.addRow("", button_layout)
+
+    def find_next_free_slot(self):
+        """Move the start to the next time both dentist and chair are free"""
+        request = (
+            self.dentist_input.currentText(),
+            self.chair_input.currentText(),
+            self.start_input.dateTime().toPyDateTime(),
+            timedelta(minutes=self.duration_input.value()),
+        )
+        # Days not yet loaded are read from storage on the way
+        self.data.read(lambda: self.scheduler.next_free_slot(*request), self.show_free_slot,
+                       key=(self.scheduler, 'next_free_slot', request))
+
+    def show_free_slot(self, slot: Optional[datetime]):
+        """Move the start to a slot found by find_next_free_slot()"""
+        if slot is None:
+            QMessageBox.information(self, "No Free Slot", "No free slot found in the next 60 days.")
+            return
+        self.start_input.setDateTime(QDateTime(slot))
+
+    def get_data(self) -> Dict:
+        """Get form data"""
+        start = self.start_input.dateTime().toPyDateTime().replace(second=0, microsecond=0)
+        repeat = REPEAT_OPTIONS[self.repeat_input.currentText()]
+        rule = None
+        if repeat is not None:
+            rule = RecurrenceRule(repeat[0], repeat[1], count=self.occurrences_input.value() or None)
+        return {
+            'patient_id': self.patient_input.text().strip(),
+            'dentist': self.dentist_input.currentText(),
+            'chair': self.chair_input.currentText(),
+            'start': start,
+            'end': start + timedelta(minutes=self.duration_input.value()),
+            'notes': self.notes_input.text(),
+            'rule': rule,
+        }
 
 
 class AppointmentsModule(QWidget):
     """Appointments module - manages appointment scheduling"""
-    
-    def __init__(self, user):
+
+    def __init__(self, user, scheduler: Optional[Scheduler] = None, roster: Optional[Roster] = None):
         super().__init__()
         self.user = user
+        # Storage calls from the slots below run here, off the GUI thread
+        self.data = get_data_access()
+        self.roster = roster or Roster(get_database())
+        self.dentists = self.dentist_names()
+        self.chairs = list(DEFAULT_CHAIRS)
+        # Shift checks are bitset lookups, cheap enough for every slot the scheduler tries
+        self.scheduler = scheduler or Scheduler(
+            AppointmentRepository(get_database()), self.roster.is_available, self.roster.next_available
+        )
+        # Bookings made at other terminals; opened before the first window is loaded
+        self.changes = None
+        if self.scheduler.repository is not None:
+            self.changes = ChangeFeed(self.scheduler.repository.database, SYNCED_TABLES)
         self.setup_ui()
-    
+        if self.changes is not None:
+            change_notifier(self.changes).changed.connect(self.apply_changes)
+
     def setup_ui(self):
         """Set up the user interface"""
         layout = QVBoxLayout(self)
         layout.setContentsMargins(24, 24, 24, 24)
-        
+        layout.setSpacing(16)
+
+        # Header section
+        header_layout = QHBoxLayout()
+
         title = QLabel("Appointments Management")
         title.setStyleSheet("""
             QLabel {
@@ -28,12 +199,207 @@ class AppointmentsModule(QWidget):
                 font-weight: bold;
             }
         """)
-        layout.addWidget(title)
-        
-        # TODO: Implement appointments table, calendar, forms
-        # Similar structure to PatientsModule
-        info = QLabel("Appointments module - Calendar view and appointment management")
-        info.setStyleSheet("QLabel { color: white; font-size: 16px; margin-top: 20px; }")
-        layout.addWidget(info)
-        
-        layout.addStretch()
+        header_layout.addWidget(title)
+        header_layout.addStretch()
+
+        book_button = QPushButton("+ Book Appointment")
+        book_button.clicked.connect(lambda: self.book_appointment())
+        header_layout.addWidget(book_button)
+
+        layout.addLayout(header_layout)
+
+        # Navigation: view mode and date
+        nav_layout = QHBoxLayout()
+
+        self.day_button = QPushButton("Day")
+        self.day_button.clicked.connect(lambda: self.set_mode('day'))
+        self.week_button = QPushButton("Week")
+        self.week_button.clicked.connect(lambda: self.set_mode('week'))
+        prev_button = QPushButton("◀")
+        prev_button.clicked.connect(lambda: self.step(-1))
+        today_button = QPushButton("Today")
+        today_button.clicked.connect(lambda: self.go_to(date.today()))
+        next_button = QPushButton("▶")
+        next_button.clicked.connect(lambda: self.step(1))
+
+        self.range_label = QLabel()
+
+        for button in (self.day_button, self.week_button, prev_button, today_button, next_button):
+            nav_layout.addWidget(button)
+        nav_layout.addSpacing(16)
+        nav_layout.addWidget(self.range_label)
+        nav_layout.addStretch()
+        layout.addLayout(nav_layout)
+
+        # Calendar
+        self.calendar = CalendarView(self.chairs)
+        self.calendar.appointment_clicked.connect(self.show_appointment_menu)
+        self.calendar.slot_double_clicked.connect(
+            lambda start, chair: self.book_appointment(start, chair)
+        )
+        layout.addWidget(self.calendar, 1)
+
+        self.refresh_calendar()
+
+    def refresh_calendar(self):
+        """Load only the visible window and repaint"""
+        start, end = self.calendar.visible_range()
+        self.data.read(lambda: list(self.scheduler.window(start, end)),
+                       lambda appointments: self.show_window(start, end, appointments),
+                       key=(self.scheduler, 'window', start, end))
+
+        days = self.calendar.visible_days()
+        if len(days) == 1:
+            self.range_label.setText(days[0].strftime("%A, %d %B %Y"))
+        else:
+            self.range_label.setText(f"{days[0]:%d %b} – {days[-1]:%d %b %Y}")
+
+    def show_window(self, start: datetime, end: datetime, appointments: List[Appointment]):
+        """Paint a window read by refresh_calendar(), if it is still the one shown"""
+        if (start, end) == self.calendar.visible_range():
+            self.calendar.set_appointments(appointments)
+
+    def set_mode(self, mode: str):
+        """Switch between day and week view"""
+        self.calendar.set_mode(mode)
+        self.refresh_calendar()
+
+    def step(self, direction: int):
+        """Move one day or one week back or forward"""
+        days = 1 if self.calendar.mode == 'day' else 7
+        self.go_to(self.calendar.anchor + timedelta(days=days * direction))
+
+    def go_to(self, day: date):
+        """Show the given day (or its week)"""
+        self.calendar.set_anchor(day)
+        self.refresh_calendar()
+
+    def dentist_names(self) -> List[str]:
+        """The default dentists followed by any others on the staff roster"""
+        names = list(DEFAULT_DENTISTS)
+        names.extend(m.name for m in self.roster.all(ROLE_DENTIST) if m.name not in names)
+        return names
+
+    def book_appointment(self, start: Optional[datetime] = None, chair: str = ""):
+        """Book a new appointment"""
+        # Pick up shift changes made in the Staff module since the last booking
+        self.data.read(lambda: self.dentist_names() if self.roster.refresh() else None,
+                       lambda names: self.show_booking_dialog(start, chair, names),
+                       key=(self.roster, 'dentist_names'))
+
+    def show_booking_dialog(self, start: Optional[datetime], chair: str, dentists: Optional[List[str]]):
+        """Ask for the booking's details and save it"""
+        if dentists is not None:
+            self.dentists = dentists
+        dialog = AppointmentDialog(self.scheduler, self.dentists, self.chairs, self, start, chair)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+
+        data = dialog.get_data()
+        if not data['patient_id']:
+            QMessageBox.warning(self, "Book Appointment", "Please enter a patient ID.")
+            return
+
+        if data['rule'] is not None:
+            series = Series(
+                id=None,
+                patient_id=data['patient_id'],
+                dentist=data['dentist'],
+                chair=data['chair'],
+                start=data['start'],
+                end=data['end'],
+                rule=data['rule'],
+                notes=data['notes'],
+            )
+            book = lambda: self.scheduler.book_series(series)
+        else:
+            appointment = Appointment(
+                id=None,
+                patient_id=data['patient_id'],
+                dentist=data['dentist'],
+                chair=data['chair'],
+                start=data['start'],
+                end=data['end'],
+                notes=data['notes'],
+            )
+            book = lambda: self.scheduler.book(appointment)
+        self.data.write(book, lambda _: self.go_to(data['start'].date()), self.booking_failed)
+
+    def booking_failed(self, error: Exception):
+        """Explain why a booking was refused"""
+        if not isinstance(error, SchedulingConflict):
+            QMessageBox.warning(self, "Book Appointment", str(error))
+            return
+        details = "\n".join(
+            f"{a.start:%d %b %H:%M}–{a.end:%H:%M}  {a.patient_id}  {a.dentist}, {a.chair}"
+            for a in error.conflicts
+        )
+        QMessageBox.warning(self, "Scheduling Conflict", f"{error}\n\n{details}".strip())
+
+    def show_appointment_menu(self, appointment: Appointment):
+        """Offer status changes for a clicked appointment"""
+        menu = QMenu(self)
+        menu.addAction("Mark Completed", lambda: self.change_status(appointment, STATUS_COMPLETED))
+        menu.addAction("Mark No-show", lambda: self.change_status(appointment, STATUS_NO_SHOW))
+        menu.addSeparator()
+        menu.addAction("Cancel Appointment", lambda: self.cancel_appointment(appointment))
+        if appointment.series is not None:
+            menu.addAction("End Series Here", lambda: self.end_series(appointment))
+        menu.exec(QCursor.pos())
+
+    def change_status(self, appointment: Appointment, status: str):
+        """Set an appointment's status"""
+        self.data.write(lambda: self.scheduler.set_status(appointment, status),
+                        lambda _: self.refresh_calendar(), self.booking_failed)
+
+    def cancel_appointment(self, appointment: Appointment):
+        """Cancel an appointment after confirmation"""
+        reply = QMessageBox.question(
+            self,
+            "Cancel Appointment",
+            f"Cancel the {appointment.start:%d %b %H:%M} appointment of {appointment.patient_id}?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+
+        if reply == QMessageBox.StandardButton.Yes:
+            self.change_status(appointment, STATUS_CANCELLED)
+
+    def end_series(self, occurrence: Appointment):
+        """Stop a recurring series from the given occurrence on"""
+        reply = QMessageBox.question(
+            self,
+            "End Series",
+            f"Remove this and all later visits of {occurrence.patient_id}'s series?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+
+        if reply == QMessageBox.StandardButton.Yes:
+            self.data.write(lambda: self.scheduler.end_series(occurrence.series, occurrence.original_start),
+                            lambda _: self.refresh_calendar())
+
+    def apply_changes(self):
+        """Show bookings made, moved or cancelled at other terminals"""
+        # Never joined: each read moves the feed on
+        self.data.read(self.read_changes, self.changes_applied)
+
+    def read_changes(self) -> bool:
+        """On the data thread: bring the scheduler up to date; True if anything changed"""
+        changes = self.changes.read()
+        if changes is None:
+            self.scheduler.reload()
+        elif not changes:
+            return False
+        else:
+            keys = keys_by_table(changes)
+            if 'appointment_series' in keys or 'appointment_exceptions' in keys:
+                self.scheduler.reload_series()
+            appointment_ids = [int(key) for key in keys.get('appointments', ())]
+            if appointment_ids:
+                stored = self.scheduler.repository.get_many(appointment_ids)
+                self.scheduler.refresh_appointments(appointment_ids, stored)
+        return True
+
+    def changes_applied(self, changed: bool):
+        """Repaint after read_changes() brought the scheduler up to date"""
+        if changed:
+            self.refresh_calendar()
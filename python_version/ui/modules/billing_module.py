@@ -3,22 +3,191 @@ Billing Module
 Equivalent to BillingModule.tsx
 """
 
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit,
+    QDialog, QFormLayout, QMessageBox, QTableWidget, QTableWidgetItem,
+    QHeaderView, QAbstractItemView, QProgressBar, QFileDialog
+)
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+import threading
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional
+
+from core.billing import KIND_ADJUSTMENT, KIND_CHARGE, KIND_PAYMENT, Ledger, LedgerEntry, format_money
+from core.invoice_export import FORMAT_CSV, FORMAT_PDF, ExportCancelled, export_period
+from core.invoicing import InvoiceRepository
+from core.storage import Database, get_database
+from ..data_access import get_data_access
+from ..theme import stylesheet
+
+ENTRY_TITLES = {
+    KIND_CHARGE: "Add Charge",
+    KIND_PAYMENT: "Record Payment",
+    KIND_ADJUSTMENT: "Post Adjustment",
+}
+
+
+def previous_period(today: Optional[date] = None) -> str:
+    """The 'YYYY-MM' period of the month before today"""
+    today = today or date.today()
+    if today.month == 1:
+        return f"{today.year - 1}-12"
+    return f"{today.year}-{today.month - 1:02d}"
+
+
+class EntryDialog(QDialog):
+    """Dialog for posting a charge, payment or adjustment"""
+
+    def __init__(self, kind: str, parent=None):
+        super().__init__(parent)
+        self.kind = kind
+
+        self.setWindowTitle(ENTRY_TITLES[kind])
+        self.setModal(True)
+        self.setMinimumWidth(420)
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Set up dialog UI"""
+        layout = QFormLayout(self)
+        layout.setSpacing(16)
+
+        self.amount_input = QLineEdit()
+        self.amount_input.setPlaceholderText(
+            "Amount, negative to credit" if self.kind == KIND_ADJUSTMENT else "Amount"
+        )
+        self.description_input = QLineEdit()
+        self.description_input.setPlaceholderText("Description")
+        self.treatment_input = QLineEdit()
+        self.treatment_input.setPlaceholderText("Treatment code")
+
+        layout.addRow("Amount:", self.amount_input)
+        layout.addRow("Description:", self.description_input)
+        if self.kind == KIND_CHARGE:
+            layout.addRow("Treatment:", self.treatment_input)
+
+        button_layout = QHBoxLayout()
+
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(self.reject)
+
+        save_button = QPushButton("Post")
+        save_button.clicked.connect(self.accept)
+
+        button_layout.addWidget(cancel_button)
+        button_layout.addWidget(save_button)
+        layout.addRow("", button_layout)
+
+    def get_data(self) -> Dict:
+        """Get form data; amount is None when it is not a valid number"""
+        try:
+            amount = Decimal(self.amount_input.text().strip().replace(",", ""))
+        except InvalidOperation:
+            amount = None
+        return {
+            'amount': amount,
+            'description': self.description_input.text().strip(),
+            'treatment': self.treatment_input.text().strip(),
+        }
+
+
+class _MonthEndSignals(QObject):
+    """Signals of a month-end run"""
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(str, int)
+    failed = pyqtSignal(str)
+
+
+class _MonthEndTask(QRunnable):
+    """Runs month-end invoicing on a pool thread (which fans out to processes)"""
+
+    def __init__(self, database_path: str, period: str):
+        super().__init__()
+        self.database_path = database_path
+        self.period = period
+        self.signals = _MonthEndSignals()
+
+    def run(self):
+        # Own connection: the GUI thread keeps using the shared one
+        database = Database(self.database_path)
+        try:
+            invoices = InvoiceRepository(database)
+            issued = invoices.generate_month_end(self.period, progress=self.signals.progress.emit)
+        except Exception as error:
+            self.signals.failed.emit(str(error))
+            return
+        finally:
+            database.close()
+        self.signals.finished.emit(self.period, issued)
+
+
+class _ExportSignals(QObject):
+    """Signals of an invoice export"""
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(str, int)
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+
+class _ExportTask(QRunnable):
+    """Streams a range of periods' invoices to a file on a pool thread"""
+
+    def __init__(self, database_path: str, first_period: str, last_period: str, path: str, export_format: str):
+        super().__init__()
+        self.database_path = database_path
+        self.first_period = first_period
+        self.last_period = last_period
+        self.path = path
+        self.export_format = export_format
+        self.cancel_requested = threading.Event()
+        self.signals = _ExportSignals()
+
+    def run(self):
+        database = Database(self.database_path)
+        try:
+            count = export_period(
+                InvoiceRepository(database), self.first_period, self.last_period, self.path, self.export_format,
+                progress=self.signals.progress.emit,
+                is_cancelled=self.cancel_requested.is_set,
+            )
+        except ExportCancelled:
+            self.signals.cancelled.emit()
+            return
+        except Exception as error:
+            self.signals.failed.emit(str(error))
+            return
+        finally:
+            database.close()
+        self.signals.finished.emit(self.path, count)
 
 
 class BillingModule(QWidget):
     """Billing module - manages invoices and payments"""
-    
-    def __init__(self, user):
+
+    # Ledger rows shown when an account is opened
+    RECENT_ENTRY_LIMIT = 100
+
+    def __init__(self, user, ledger: Optional[Ledger] = None):
         super().__init__()
         self.user = user
+        # Storage calls from the slots below run here, off the GUI thread
+        self.data = get_data_access()
+        self.ledger = ledger or Ledger(get_database())
+        self.invoices = InvoiceRepository(self.ledger.database)
+        self.patient_id = ""
+        self.month_end_running = False
+        self.export_task: Optional[_ExportTask] = None
         self.setup_ui()
-    
+
     def setup_ui(self):
         """Set up the user interface"""
+        self.setStyleSheet(stylesheet('module'))
         layout = QVBoxLayout(self)
         layout.setContentsMargins(24, 24, 24, 24)
-        
+        layout.setSpacing(16)
+
         title = QLabel("Billing & Invoicing")
         title.setStyleSheet("""
             QLabel {
@@ -28,9 +197,273 @@ class BillingModule(QWidget):
             }
         """)
         layout.addWidget(title)
-        
-        info = QLabel("Billing module - Invoice generation and payment tracking")
-        info.setStyleSheet("QLabel { color: white; font-size: 16px; margin-top: 20px; }")
-        layout.addWidget(info)
-        
-        layout.addStretch()
+
+        # Account lookup
+        account_layout = QHBoxLayout()
+
+        self.patient_input = QLineEdit()
+        self.patient_input.setPlaceholderText("Patient ID, e.g. P0001")
+        self.patient_input.setFixedWidth(240)
+        self.patient_input.returnPressed.connect(self.open_account)
+        account_layout.addWidget(self.patient_input)
+
+        open_button = QPushButton("Open Account")
+        open_button.clicked.connect(self.open_account)
+        account_layout.addWidget(open_button)
+
+        self.balance_label = QLabel()
+        self.balance_label.setProperty("heading", True)
+        account_layout.addSpacing(16)
+        account_layout.addWidget(self.balance_label)
+        account_layout.addStretch()
+
+        self.entry_buttons = []
+        for kind in (KIND_CHARGE, KIND_PAYMENT, KIND_ADJUSTMENT):
+            button = QPushButton(ENTRY_TITLES[kind])
+            button.clicked.connect(lambda checked=False, kind=kind: self.post_entry(kind))
+            button.setEnabled(False)
+            account_layout.addWidget(button)
+            self.entry_buttons.append(button)
+
+        layout.addLayout(account_layout)
+
+        # Recent ledger entries of the open account
+        self.entries_table = QTableWidget(0, 5)
+        self.entries_table.setHorizontalHeaderLabels(["Posted", "Type", "Description", "Treatment", "Amount"])
+        self.entries_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.entries_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.entries_table.verticalHeader().hide()
+        self.entries_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        self.entries_table.setColumnWidth(0, 160)
+        layout.addWidget(self.entries_table, 1)
+
+        # Month-end invoicing
+        month_end_layout = QHBoxLayout()
+
+        month_end_label = QLabel("Month-end invoices for")
+        month_end_layout.addWidget(month_end_label)
+
+        self.period_input = QLineEdit(previous_period())
+        self.period_input.setPlaceholderText("YYYY-MM")
+        self.period_input.setFixedWidth(120)
+        month_end_layout.addWidget(self.period_input)
+
+        self.month_end_button = QPushButton("Generate Invoices")
+        self.month_end_button.clicked.connect(self.run_month_end)
+        month_end_layout.addWidget(self.month_end_button)
+
+        month_end_layout.addSpacing(16)
+        month_end_layout.addWidget(QLabel("Export"))
+        self.export_from_input = QLineEdit(previous_period())
+        self.export_from_input.setPlaceholderText("YYYY-MM")
+        self.export_from_input.setFixedWidth(120)
+        month_end_layout.addWidget(self.export_from_input)
+        month_end_layout.addWidget(QLabel("to"))
+        self.export_to_input = QLineEdit(previous_period())
+        self.export_to_input.setPlaceholderText("YYYY-MM")
+        self.export_to_input.setFixedWidth(120)
+        month_end_layout.addWidget(self.export_to_input)
+
+        self.export_csv_button = QPushButton("Export CSV")
+        self.export_csv_button.clicked.connect(lambda: self.export_invoices(FORMAT_CSV))
+        month_end_layout.addWidget(self.export_csv_button)
+
+        self.export_pdf_button = QPushButton("Export PDF")
+        self.export_pdf_button.clicked.connect(lambda: self.export_invoices(FORMAT_PDF))
+        month_end_layout.addWidget(self.export_pdf_button)
+
+        self.cancel_export_button = QPushButton("Cancel Export")
+        self.cancel_export_button.clicked.connect(self.cancel_export)
+        self.cancel_export_button.hide()
+        month_end_layout.addWidget(self.cancel_export_button)
+
+        self.month_end_progress = QProgressBar()
+        self.month_end_progress.hide()
+        month_end_layout.addWidget(self.month_end_progress, 1)
+
+        self.month_end_status = QLabel()
+        month_end_layout.addWidget(self.month_end_status)
+        month_end_layout.addStretch()
+
+        layout.addLayout(month_end_layout)
+
+    # === Account ===
+
+    def open_account(self):
+        """Show the balance and latest entries of the entered patient"""
+        self.patient_id = self.patient_input.text().strip().upper()
+        for button in self.entry_buttons:
+            button.setEnabled(bool(self.patient_id))
+        self.refresh_account()
+
+    def refresh_account(self):
+        """Reload the open account (the balance is a single stored row)"""
+        if not self.patient_id:
+            self.balance_label.clear()
+            self.entries_table.setRowCount(0)
+            return
+
+        patient_id = self.patient_id
+        self.data.read(
+            lambda: (self.ledger.balance(patient_id), self.ledger.recent_entries(patient_id, self.RECENT_ENTRY_LIMIT)),
+            lambda account: self.show_account(patient_id, *account),
+            lambda error: QMessageBox.warning(self, "Billing", str(error)),
+            key=(self.ledger, 'account', patient_id),
+        )
+
+    def show_account(self, patient_id: str, balance: Decimal, entries: List[LedgerEntry]):
+        """Fill in an account read by refresh_account(), if it is still the one open"""
+        if patient_id != self.patient_id:
+            return
+        self.balance_label.setText(f"{patient_id} balance: {format_money(balance)}")
+
+        self.entries_table.setRowCount(len(entries))
+        for row, entry in enumerate(entries):
+            amount = QTableWidgetItem(format_money(entry.amount))
+            amount.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            self.entries_table.setItem(row, 0, QTableWidgetItem(f"{entry.posted_at:%Y-%m-%d %H:%M}"))
+            self.entries_table.setItem(row, 1, QTableWidgetItem(entry.kind.title()))
+            self.entries_table.setItem(row, 2, QTableWidgetItem(entry.description))
+            self.entries_table.setItem(row, 3, QTableWidgetItem(entry.treatment))
+            self.entries_table.setItem(row, 4, amount)
+
+    def post_entry(self, kind: str):
+        """Post a charge, payment or adjustment to the open account"""
+        dialog = EntryDialog(kind, self)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+
+        data = dialog.get_data()
+        if data['amount'] is None:
+            QMessageBox.warning(self, ENTRY_TITLES[kind], "Please enter a valid amount.")
+            return
+
+        patient_id = self.patient_id
+        if kind == KIND_CHARGE:
+            post = lambda: self.ledger.charge(patient_id, data['amount'], data['description'], data['treatment'])
+        elif kind == KIND_PAYMENT:
+            post = lambda: self.ledger.payment(patient_id, data['amount'], data['description'] or "Payment")
+        else:
+            post = lambda: self.ledger.adjust(patient_id, data['amount'], data['description'])
+        self.data.write(post, lambda _: self.refresh_account(),
+                        lambda error: QMessageBox.warning(self, ENTRY_TITLES[kind], str(error)))
+
+    # === Month end ===
+
+    def selected_period(self, title: str, field: Optional[QLineEdit] = None) -> Optional[str]:
+        """The period entered in field, or None (after a warning) if it is not YYYY-MM"""
+        period = (field or self.period_input).text().strip()
+        try:
+            date.fromisoformat(f"{period}-01")
+        except ValueError:
+            QMessageBox.warning(self, title, "Please enter the period as YYYY-MM.")
+            return None
+        return period
+
+    def run_month_end(self):
+        """Generate the period's invoices in the background"""
+        if self.month_end_running or self.export_task is not None:
+            return
+        period = self.selected_period("Month-End Invoicing")
+        if period is None:
+            return
+
+        self.month_end_running = True
+        self.month_end_button.setEnabled(False)
+        self.month_end_progress.setValue(0)
+        self.month_end_progress.show()
+        self.month_end_status.setText("Generating...")
+
+        task = _MonthEndTask(self.ledger.database.path, period)
+        task.signals.progress.connect(self.show_month_end_progress)
+        task.signals.finished.connect(self.month_end_finished)
+        task.signals.failed.connect(self.month_end_failed)
+        QThreadPool.globalInstance().start(task)
+
+    def show_month_end_progress(self, done: int, total: int):
+        """Advance the progress bar as chunks complete"""
+        self.month_end_progress.setMaximum(total)
+        self.month_end_progress.setValue(done)
+
+    def month_end_finished(self, period: str, issued: int):
+        """Report a completed month-end run"""
+        self.month_end_running = False
+        self.month_end_button.setEnabled(True)
+        self.month_end_progress.hide()
+        self.month_end_status.setText(f"{issued:,} invoices issued for {period}")
+
+    def month_end_failed(self, message: str):
+        """Report a failed month-end run"""
+        self.month_end_running = False
+        self.month_end_button.setEnabled(True)
+        self.month_end_progress.hide()
+        self.month_end_status.clear()
+        QMessageBox.critical(self, "Month-End Invoicing", message)
+
+    # === Export ===
+
+    def export_invoices(self, export_format: str):
+        """Stream the selected periods' invoices to a CSV or PDF file in the background"""
+        if self.month_end_running or self.export_task is not None:
+            return
+        first_period = self.selected_period("Export Invoices", self.export_from_input)
+        if first_period is None:
+            return
+        last_period = self.selected_period("Export Invoices", self.export_to_input)
+        if last_period is None:
+            return
+        if first_period > last_period:
+            QMessageBox.warning(self, "Export Invoices", "The first period must not be after the last.")
+            return
+
+        name = first_period if first_period == last_period else f"{first_period}-to-{last_period}"
+        extension = "CSV files (*.csv)" if export_format == FORMAT_CSV else "PDF files (*.pdf)"
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Invoices", f"invoices-{name}.{export_format}", extension
+        )
+        if not path:
+            return
+        self.start_export(first_period, last_period, path, export_format)
+
+    def start_export(self, first_period: str, last_period: str, path: str, export_format: str):
+        """Run an export task, showing its progress"""
+        self.export_task = _ExportTask(self.ledger.database.path, first_period, last_period, path, export_format)
+        self.export_task.signals.progress.connect(self.show_month_end_progress)
+        self.export_task.signals.finished.connect(self.export_finished)
+        self.export_task.signals.cancelled.connect(self.export_cancelled)
+        self.export_task.signals.failed.connect(self.export_failed)
+
+        self.set_export_running(True)
+        self.month_end_status.setText("Exporting...")
+        QThreadPool.globalInstance().start(self.export_task)
+
+    def set_export_running(self, running: bool):
+        """Swap the month-end controls for a progress bar while exporting"""
+        for button in (self.month_end_button, self.export_csv_button, self.export_pdf_button):
+            button.setEnabled(not running)
+        self.cancel_export_button.setVisible(running)
+        self.month_end_progress.setValue(0)
+        self.month_end_progress.setVisible(running)
+        if not running:
+            self.export_task = None
+
+    def cancel_export(self):
+        """Ask the running export to stop"""
+        if self.export_task is not None:
+            self.export_task.cancel_requested.set()
+
+    def export_finished(self, path: str, count: int):
+        """Report a completed export"""
+        self.set_export_running(False)
+        self.month_end_status.setText(f"{count:,} invoices exported to {path}")
+
+    def export_cancelled(self):
+        """Report a cancelled export"""
+        self.set_export_running(False)
+        self.month_end_status.setText("Export cancelled")
+
+    def export_failed(self, message: str):
+        """Report a failed export"""
+        self.set_export_running(False)
+        self.month_end_status.clear()
+        QMessageBox.critical(self, "Export Invoices", message)
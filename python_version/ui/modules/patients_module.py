@@ -5,26 +5,27 @@ Equivalent to PatientsModule.tsx
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-    QPushButton, QLineEdit, QTableWidget, QTableWidgetItem,
-    QDialog, QFormLayout, QMessageBox, QHeaderView
+    QPushButton, QLineEdit, QTableView, QAbstractItemView,
+    QDialog, QFormLayout, QMessageBox, QHeaderView, QMenu,
+    QFileDialog, QProgressDialog
 )
-from PyQt6.QtCore import Qt
-from typing import List, Dict, Optional
-from datetime import datetime
+from PyQt6.QtCore import Qt, QThreadPool
+from typing import Dict, Optional
 
-
-class Patient:
-    """Patient data model"""
-    def __init__(self, id: str, name: str, age: int, gender: str, 
-                 contact: str, email: str, address: str):
-        self.id = id
-        self.name = name
-        self.age = age
-        self.gender = gender
-        self.contact = contact
-        self.email = email
-        self.address = address
-        self.registered_date = datetime.now().strftime("%Y-%m-%d")
+from core.api_client import RemotePatientRepository, get_client
+from core.change_feed import keys_by_table
+from core.patient_import import PatientImport
+from core.patients import Patient, clean_patient_fields
+from core.patient_repository import PatientRepository
+from core.search_index import PatientSearchIndex
+from core.storage import get_database
+from ..action_delegate import RowActionsDelegate
+from ..change_notifier import change_notifier
+from ..data_access import get_data_access
+from ..job_scheduler import Job
+from ..models.patient_table_model import PatientTableModel
+from ..patient_search import PatientSearchController
+from ..theme import COLORS
 
 
 class PatientDialog(QDialog):
@@ -105,15 +106,15 @@ class PatientDialog(QDialog):
         layout.addRow("", button_layout)
     
     def get_data(self) -> Dict:
-        """Get form data"""
-        return {
-            'name': self.name_input.text(),
-            'age': int(self.age_input.text()) if self.age_input.text() else 0,
-            'gender': self.gender_input.text(),
-            'contact': self.contact_input.text(),
-            'email': self.email_input.text(),
-            'address': self.address_input.text(),
-        }
+        """Get form data; raises ValueError if a field breaks the patient rules"""
+        return clean_patient_fields(
+            self.name_input.text(),
+            self.age_input.text(),
+            self.gender_input.text(),
+            self.contact_input.text(),
+            self.email_input.text(),
+            self.address_input.text(),
+        )
 
 
 class PatientsModule(QWidget):
@@ -122,21 +123,40 @@ class PatientsModule(QWidget):
     Equivalent to PatientsModule component
     """
     
-    def __init__(self, user):
+    # Typing must pause this long before a search runs
+    SEARCH_DEBOUNCE_MS = 250
+    
+    def __init__(self, user, repository: Optional[PatientRepository] = None):
         super().__init__()
         self.user = user
-        self.patients: List[Patient] = []
-        self.next_id = 1
+        # Patients live in storage, or behind the API server when one is
+        # configured; the table pages them in as it scrolls
+        if repository is None:
+            client = get_client()
+            repository = RemotePatientRepository(client) if client else PatientRepository(get_database())
+        self.repository = repository
+        # Storage calls from the slots below run here, off the GUI thread
+        self.data = get_data_access()
+        
+        # Patients written at other terminals; opened before anything is loaded
+        self.changes = self.repository.change_feed()
+        # Set while a reload after too many changes is rebuilding the index
+        self.resyncing = False
         
-        # Initialize with some mock data
-        self.init_mock_data()
+        # Search index is kept in step with add/edit/delete
+        self.search_index = PatientSearchIndex()
+        self.search = PatientSearchController(self.search_index, self.SEARCH_DEBOUNCE_MS, self)
+        self.search.results_ready.connect(self.show_search_results)
+        self.search.index_ready.connect(self.index_ready)
+        self.search.build_index(self.repository.iter_all)
+        
+        # The running CSV import, if any
+        self.import_job: Optional[Job] = None
+        self.patient_import: Optional[PatientImport] = None
+        self.import_progress: Optional[QProgressDialog] = None
         
         self.setup_ui()
-    
-    def init_mock_data(self):
-        """Initialize with mock patient data"""
-        # Empty by default - can add mock data here if needed
-        pass
+        change_notifier(self.changes).changed.connect(self.apply_changes)
     
     def setup_ui(self):
         """Set up the user interface"""
@@ -177,26 +197,36 @@ class PatientsModule(QWidget):
         """)
         header_layout.addWidget(add_button)
         
+        # Bulk import button
+        self.import_button = QPushButton("Import CSV")
+        self.import_button.clicked.connect(self.import_patients)
+        # Imports write straight to the database file
+        self.import_button.setVisible(isinstance(self.repository, PatientRepository))
+        header_layout.addWidget(self.import_button)
+        
         layout.addLayout(header_layout)
         
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(8)
-        self.table.setHorizontalHeaderLabels([
-            "ID", "Name", "Age", "Gender", "Contact", 
-            "Email", "Registered", "Actions"
-        ])
+        self.table_model = PatientTableModel(self.repository, self, self.data)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.table.customContextMenuRequested.connect(self.show_context_menu)
+        self.table.doubleClicked.connect(lambda index: self.edit_row(index.row()))
         
         # Style table
         self.table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #2d3e50;
                 color: white;
                 border: 2px solid #4fb3d4;
                 border-radius: 8px;
                 font-size: 16px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 12px;
             }
             QHeaderView::section {
@@ -208,12 +238,27 @@ class PatientsModule(QWidget):
             }
         """)
         
-        # Set column widths
+        # Fixed row height lets the view skip measuring rows it never shows
+        vertical_header = self.table.verticalHeader()
+        vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical_header.setDefaultSectionSize(48)
+        vertical_header.hide()
+        
+        # Set column widths (ResizeToContents would measure every row)
         header = self.table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
         header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
-        header.setSectionResizeMode(7, QHeaderView.ResizeMode.Fixed)
-        self.table.setColumnWidth(7, 200)
+        header.setSectionResizeMode(PatientTableModel.ACTIONS_COLUMN, QHeaderView.ResizeMode.Fixed)
+        self.table.setColumnWidth(0, 100)
+        self.table.setColumnWidth(PatientTableModel.ACTIONS_COLUMN, 200)
+        
+        # Edit/Delete buttons are painted by a delegate, not one widget per row
+        self.actions_delegate = RowActionsDelegate([
+            ('edit', "Edit", COLORS['primary']),
+            ('delete', "Delete", COLORS['danger']),
+        ], self.table)
+        self.actions_delegate.action_triggered.connect(self.handle_row_action)
+        self.table.setItemDelegateForColumn(PatientTableModel.ACTIONS_COLUMN, self.actions_delegate)
         
         layout.addWidget(self.table)
         
@@ -221,79 +266,118 @@ class PatientsModule(QWidget):
     
     def refresh_table(self):
         """Refresh table with current patient data"""
-        self.table.setRowCount(0)
-        
-        search_query = self.search_input.text().lower() if hasattr(self, 'search_input') else ""
+        self.search.set_query(self.search_input.text())
+        self.search.run_query()
+    
+    def show_search_results(self, query: str, patient_ids):
+        """Show the patients returned by a finished search"""
+        self.table_model.reload(patient_ids)
+    
+    def handle_row_action(self, action: str, row: int):
+        """Dispatch a click on a painted Edit/Delete button"""
+        if action == 'edit':
+            self.edit_row(row)
+        elif action == 'delete':
+            self.delete_row(row)
+    
+    def show_context_menu(self, pos):
+        """Show Edit/Delete actions for the row under the cursor"""
+        index = self.table.indexAt(pos)
+        if not index.isValid():
+            return
         
-        for patient in self.patients:
-            # Filter by search query
-            if search_query and search_query not in patient.name.lower():
-                continue
-            
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-            
-            # Add data
-            self.table.setItem(row, 0, QTableWidgetItem(patient.id))
-            self.table.setItem(row, 1, QTableWidgetItem(patient.name))
-            self.table.setItem(row, 2, QTableWidgetItem(str(patient.age)))
-            self.table.setItem(row, 3, QTableWidgetItem(patient.gender))
-            self.table.setItem(row, 4, QTableWidgetItem(patient.contact))
-            self.table.setItem(row, 5, QTableWidgetItem(patient.email))
-            self.table.setItem(row, 6, QTableWidgetItem(patient.registered_date))
-            
-            # Action buttons
-            action_widget = QWidget()
-            action_layout = QHBoxLayout(action_widget)
-            action_layout.setContentsMargins(4, 4, 4, 4)
-            
-            edit_btn = QPushButton("Edit")
-            edit_btn.clicked.connect(lambda checked, p=patient: self.edit_patient(p))
-            edit_btn.setStyleSheet("QPushButton { background-color: #4fb3d4; padding: 6px 12px; }")
-            
-            delete_btn = QPushButton("Delete")
-            delete_btn.clicked.connect(lambda checked, p=patient: self.delete_patient(p))
-            delete_btn.setStyleSheet("QPushButton { background-color: #cc0000; padding: 6px 12px; }")
-            
-            action_layout.addWidget(edit_btn)
-            action_layout.addWidget(delete_btn)
-            
-            self.table.setCellWidget(row, 7, action_widget)
+        row = index.row()
+        menu = QMenu(self)
+        menu.addAction("Edit", lambda: self.edit_row(row))
+        menu.addAction("Delete", lambda: self.delete_row(row))
+        menu.exec(self.table.viewport().mapToGlobal(pos))
     
-    def filter_patients(self):
-        """Filter patients based on search"""
-        self.refresh_table()
+    def edit_row(self, row: int):
+        """Edit the patient shown at a table row"""
+        patient = self.table_model.patient_at(row)
+        if patient:
+            self.edit_patient(patient)
+    
+    def delete_row(self, row: int):
+        """Delete the patient shown at a table row"""
+        patient = self.table_model.patient_at(row)
+        if patient:
+            self.delete_patient(patient)
+    
+    def filter_patients(self, text: str):
+        """Filter patients based on search (debounced, runs off the GUI thread)"""
+        self.search.set_query(text)
     
     def add_patient(self):
         """Add new patient"""
         dialog = PatientDialog(self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            data = dialog.get_data()
-            patient = Patient(
-                id=f"P{self.next_id:04d}",
-                name=data['name'],
-                age=data['age'],
-                gender=data['gender'],
-                contact=data['contact'],
-                email=data['email'],
-                address=data['address']
-            )
-            self.patients.append(patient)
-            self.next_id += 1
-            self.refresh_table()
+            try:
+                data = dialog.get_data()
+            except ValueError as error:
+                QMessageBox.warning(self, "Add Patient", str(error))
+                return
+            
+            def save():
+                patient = Patient(
+                    id=self.repository.next_id(),
+                    name=data['name'],
+                    age=data['age'],
+                    gender=data['gender'],
+                    contact=data['contact'],
+                    email=data['email'],
+                    address=data['address']
+                )
+                self.repository.add(patient)
+                return patient
+            
+            self.data.write(save, self.patient_added,
+                            lambda error: QMessageBox.warning(self, "Add Patient", str(error)))
+    
+    def patient_added(self, patient: Patient):
+        """Show a patient once saved"""
+        self.search_index.add(patient)
+        
+        if self.search.matches(patient.id):
+            self.table_model.insert_patient(patient)
     
     def edit_patient(self, patient: Patient):
         """Edit existing patient"""
+        # The table may hold only the columns it shows
+        self.data.read(
+            lambda: self.repository.get(patient.id),
+            lambda stored: self.show_edit_dialog(stored or patient),
+            lambda error: QMessageBox.warning(self, "Edit Patient", str(error)),
+            key=(self.repository, 'get', patient.id),
+        )
+    
+    def show_edit_dialog(self, patient: Patient):
+        """Edit a patient's full record"""
         dialog = PatientDialog(self, patient)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            data = dialog.get_data()
+            try:
+                data = dialog.get_data()
+            except ValueError as error:
+                QMessageBox.warning(self, "Edit Patient", str(error))
+                return
             patient.name = data['name']
             patient.age = data['age']
             patient.gender = data['gender']
             patient.contact = data['contact']
             patient.email = data['email']
             patient.address = data['address']
-            self.refresh_table()
+            self.data.write(lambda: self.repository.update(patient),
+                            lambda _: self.patient_updated(patient),
+                            lambda error: QMessageBox.warning(self, "Edit Patient", str(error)))
+    
+    def patient_updated(self, patient: Patient):
+        """Show a patient's saved changes"""
+        self.search_index.update(patient)
+        
+        if self.search.matches(patient.id):
+            self.table_model.update_patient(patient)
+        else:
+            self.table_model.remove_patient(patient.id)
     
     def delete_patient(self, patient: Patient):
         """Delete patient"""
@@ -305,5 +389,139 @@ class PatientsModule(QWidget):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            self.patients.remove(patient)
-            self.refresh_table()
+            self.data.write(lambda: self.repository.delete(patient.id),
+                            lambda _: self.patient_deleted(patient.id),
+                            lambda error: QMessageBox.warning(self, "Delete Patient", str(error)))
+    
+    def patient_deleted(self, patient_id: str):
+        """Drop a deleted patient from the index and the table"""
+        self.search_index.remove(patient_id)
+        self.table_model.remove_patient(patient_id)
+    
+    def import_patients(self):
+        """Import patients from a CSV file on a worker thread"""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Patients", "", "CSV files (*.csv);;All files (*)"
+        )
+        if not path:
+            return
+        self.start_import(path)
+    
+    def start_import(self, path: str):
+        """Run an import of a CSV file, showing progress until it ends"""
+        if self.import_job is not None:
+            return
+        self.patient_import = PatientImport(path)
+        self.import_job = Job(('patient_import', path), self.patient_import, self.repository.database, ())
+        
+        self.import_progress = QProgressDialog("Importing patients...", "Cancel", 0, 0, self)
+        self.import_progress.setWindowTitle("Import Patients")
+        self.import_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self.import_progress.setMinimumDuration(0)
+        self.import_progress.setAutoClose(False)
+        self.import_progress.setAutoReset(False)
+        self.import_progress.canceled.connect(self.import_job.cancel)
+        
+        signals = self.import_job.signals
+        signals.progress.connect(self.show_import_progress)
+        signals.finished.connect(lambda summary: self.import_ended("Import Finished"))
+        signals.cancelled.connect(lambda: self.import_ended("Import Cancelled"))
+        signals.failed.connect(self.import_failed)
+        self.import_button.setEnabled(False)
+        QThreadPool.globalInstance().start(self.import_job)
+    
+    def show_import_progress(self, done: int, total: int):
+        """Advance the progress dialog (kilobytes of the file read)"""
+        summary = self.patient_import.summary
+        self.import_progress.setLabelText(
+            f"Imported {summary.imported:,} patients "
+            f"({summary.duplicates:,} duplicates, {summary.invalid:,} invalid rows skipped)"
+        )
+        self.import_progress.setMaximum(max(total, 1))
+        # Last: a modal progress dialog processes events here, which may end the import
+        self.import_progress.setValue(min(done, max(total, 1)))
+    
+    def import_ended(self, title: str):
+        """Report an import that finished or was cancelled, then refresh the table once"""
+        summary = self.patient_import.summary
+        self.close_import()
+        # One rebuild of the search index and one reload of the table for the whole import
+        self.resync()
+        
+        lines = [
+            f"Imported: {summary.imported:,}",
+            f"Skipped as duplicates (same contact or email): {summary.duplicates:,}",
+            f"Skipped as invalid: {summary.invalid:,}",
+        ]
+        if summary.errors:
+            lines.append("")
+            lines.extend(f"Line {line}: {message}" for line, message in summary.errors[:10])
+            if summary.invalid > 10:
+                lines.append(f"... and {summary.invalid - 10:,} more")
+        QMessageBox.information(self, title, "\n".join(lines))
+    
+    def import_failed(self, message: str):
+        """Report an import that stopped with an error (batches already saved are kept)"""
+        imported = self.patient_import.summary.imported
+        self.close_import()
+        if imported:
+            self.resync()
+        QMessageBox.warning(self, "Import Failed", f"{message}\n\nPatients imported before the error: {imported:,}")
+    
+    def close_import(self):
+        """Drop the finished import's job and progress dialog"""
+        self.import_progress.close()
+        self.import_progress = None
+        self.import_job = None
+        self.import_button.setEnabled(True)
+    
+    def apply_changes(self):
+        """Apply patients added, edited or deleted at other terminals, row by row"""
+        # A running import and a reload under way both end in a full read
+        if self.import_job is not None or self.resyncing:
+            return
+        # Never joined: each read moves the feed on
+        self.data.read(self.read_changes, self.changes_loaded)
+    
+    def read_changes(self):
+        """On the data thread: the changed IDs and their stored records, or None to resync"""
+        changes = self.changes.read()
+        if changes is None:
+            return None
+        patient_ids = keys_by_table(changes).get('patients', [])
+        return patient_ids, self.repository.get_many(patient_ids) if patient_ids else []
+    
+    def changes_loaded(self, loaded):
+        """Apply changed patients read by read_changes()"""
+        if loaded is None:
+            if not self.resyncing:
+                self.resync()
+            return
+        patient_ids, stored = loaded
+        
+        # Our own writes come back too; re-applying them changes nothing
+        for patient in stored:
+            known = patient.id in self.search_index
+            self.search_index.update(patient)
+            if not self.table_model.update_patient(patient) and not known and self.search.matches(patient.id):
+                self.table_model.insert_patient(patient)
+        for patient_id in set(patient_ids).difference(patient.id for patient in stored):
+            self.search_index.remove(patient_id)
+            self.table_model.remove_patient(patient_id)
+    
+    def resync(self):
+        """Re-read everything, for more changes than are worth applying one by one"""
+        self.resyncing = True
+        # Moved to the end of the log before anything is re-read, so nothing is missed
+        self.data.write(self.changes.skip, lambda _: self.reload_all())
+    
+    def reload_all(self):
+        """Rebuild the index and the table from storage"""
+        self.search.build_index(self.repository.iter_all)
+        self.refresh_table()
+    
+    def index_ready(self):
+        """Catch up on changes made while the index was being rebuilt"""
+        if self.resyncing:
+            self.resyncing = False
+            self.apply_changes()
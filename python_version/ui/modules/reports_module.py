@@ -4,38 +4,359 @@ Equivalent to ReportsModule.tsx
 Admin Only
 """
 
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton,
+    QTabWidget, QTableWidget, QTableWidgetItem, QAbstractItemView, QFrame,
+    QProgressBar, QMessageBox
+)
+from PyQt6.QtCore import Qt, QTimer
+from datetime import date, timedelta
+from typing import Callable, Optional
+
+from core.analytics import PatientAnalytics, PatientSnapshot, analytics_available
+from core.billing import format_money, from_cents
+from core.jobs import JobContext
+from core.reports import (
+    METRIC_APPOINTMENTS, METRIC_NEW_PATIENTS, METRIC_REVENUE, PERIOD_DAY, PERIOD_MONTH,
+    PERIOD_WEEK, PERIOD_YEAR, SOURCE_TABLES, Dashboard, ReportStore, pivot
+)
+from core.storage import get_database
+from ..job_scheduler import JobScheduler
+from ..theme import stylesheet
+from ..widgets.time_series_chart import TimeSeriesChart
+
+PERIOD_OPTIONS = {
+    "Daily": PERIOD_DAY,
+    "Weekly": PERIOD_WEEK,
+    "Monthly": PERIOD_MONTH,
+    "Yearly": PERIOD_YEAR,
+}
+
+# Range label -> days back from today (inclusive of today)
+RANGE_OPTIONS = {
+    "Last 30 days": 30,
+    "Last 3 months": 91,
+    "Last 12 months": 365,
+    "Last 5 years": 5 * 365,
+    "Last 10 years": 10 * 365,
+}
+
+# Daily trend chart: label -> (metric, axis label format)
+TREND_OPTIONS = {
+    "Revenue": (METRIC_REVENUE, lambda cents: f"{cents / 100:,.0f}"),
+    "Appointments": (METRIC_APPOINTMENTS, lambda count: f"{count:,.0f}"),
+    "New Patients": (METRIC_NEW_PATIENTS, lambda count: f"{count:,.0f}"),
+}
+
+# How often a shown report checks whether its data has changed (ms)
+STALE_CHECK_INTERVAL = 2000
+
+
+def compute_reports(context: JobContext, start: date, end: date, period: str,
+                    analytics: Optional[PatientAnalytics]):
+    """Background job: the dashboard for a range, its daily trends and the demographics snapshot"""
+    context.progress(0, 3)
+    reports = ReportStore.reader(context.database)
+    dashboard = reports.dashboard(start, end, period)
+    context.progress(1, 3)
+    trends = {metric: reports.daily_series(metric, start, end) for metric, _ in TREND_OPTIONS.values()}
+    context.progress(2, 3)
+    snapshot = analytics.snapshot(context.database, context.token) if analytics else None
+    context.progress(3, 3)
+    return dashboard, trends, snapshot
 
 
 class ReportsModule(QWidget):
     """Reports module - analytics and statistics (Admin only)"""
-    
-    def __init__(self, user):
+
+    def __init__(self, user, reports: Optional[ReportStore] = None,
+                 analytics: Optional[PatientAnalytics] = None):
         super().__init__()
         self.user = user
+        self.reports = reports or ReportStore(get_database())
+        if analytics is None and analytics_available():
+            analytics = PatientAnalytics(self.reports.database)
+        self.analytics = analytics
+        self.jobs = JobScheduler(self.reports.database, self)
+        self.report_key = None
         self.setup_ui()
-    
+
     def setup_ui(self):
         """Set up the user interface"""
+        self.setStyleSheet(stylesheet('module'))
         layout = QVBoxLayout(self)
         layout.setContentsMargins(24, 24, 24, 24)
-        
+        layout.setSpacing(16)
+
+        header_layout = QHBoxLayout()
+
         title = QLabel("Reports & Analytics")
-        title.setStyleSheet("""
-            QLabel {
-                color: white;
-                font-size: 24px;
-                font-weight: bold;
-            }
-        """)
-        layout.addWidget(title)
-        
+        title.setObjectName("moduleTitle")
+        header_layout.addWidget(title)
+
         subtitle = QLabel("🔒 Admin Only")
-        subtitle.setStyleSheet("QLabel { color: #4fb3d4; font-size: 16px; font-weight: bold; }")
-        layout.addWidget(subtitle)
-        
-        info = QLabel("Reports module - Statistics, charts, and analytics")
-        info.setStyleSheet("QLabel { color: white; font-size: 16px; margin-top: 20px; }")
-        layout.addWidget(info)
-        
-        layout.addStretch()
+        subtitle.setObjectName("moduleSubtitle")
+        header_layout.addWidget(subtitle)
+        header_layout.addStretch()
+
+        self.range_input = QComboBox()
+        self.range_input.addItems(list(RANGE_OPTIONS))
+        self.range_input.setCurrentText("Last 12 months")
+        header_layout.addWidget(self.range_input)
+
+        self.period_input = QComboBox()
+        self.period_input.addItems(list(PERIOD_OPTIONS))
+        self.period_input.setCurrentText("Monthly")
+        header_layout.addWidget(self.period_input)
+
+        refresh_button = QPushButton("Refresh")
+        refresh_button.clicked.connect(lambda: self.refresh_reports(refresh=True))
+        header_layout.addWidget(refresh_button)
+
+        layout.addLayout(header_layout)
+
+        # Reports compute in the background; this row shows how that is going
+        status_layout = QHBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(240)
+        self.progress_bar.hide()
+        status_layout.addWidget(self.progress_bar)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_reports)
+        self.cancel_button.hide()
+        status_layout.addWidget(self.cancel_button)
+        self.status_label = QLabel()
+        self.status_label.setProperty("hint", True)
+        status_layout.addWidget(self.status_label)
+        self.stale_label = QLabel("⚠ Data has changed since this report was computed - Refresh to update")
+        self.stale_label.setObjectName("staleLabel")
+        self.stale_label.hide()
+        status_layout.addWidget(self.stale_label)
+        status_layout.addStretch()
+        layout.addLayout(status_layout)
+
+        self.stale_timer = QTimer(self)
+        self.stale_timer.setInterval(STALE_CHECK_INTERVAL)
+        self.stale_timer.timeout.connect(self.check_stale)
+        self.stale_timer.start()
+
+        # Summary figures for the whole range
+        summary_layout = QHBoxLayout()
+        self.summary_labels = {}
+        for key, caption in (('patients', "New Patients"), ('appointments', "Appointments"),
+                             ('revenue', "Revenue"), ('utilization', "Avg. Utilization")):
+            card = QFrame()
+            card.setObjectName("summaryCard")
+            card_layout = QVBoxLayout(card)
+            caption_label = QLabel(caption)
+            caption_label.setProperty("caption", True)
+            value_label = QLabel("–")
+            value_label.setObjectName("summaryValue")
+            card_layout.addWidget(caption_label)
+            card_layout.addWidget(value_label)
+            summary_layout.addWidget(card)
+            self.summary_labels[key] = value_label
+        layout.addLayout(summary_layout)
+
+        # One pivot table per report: buckets down, keys across
+        self.tabs = QTabWidget()
+        self.tables = {}
+        for key, caption in (('patients', "New Patients"), ('appointments', "Appointments by Status"),
+                             ('revenue', "Revenue by Treatment"), ('utilization', "Dentist Utilization")):
+            table = QTableWidget()
+            table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+            table.verticalHeader().setDefaultSectionSize(32)
+            self.tabs.addTab(table, caption)
+            self.tables[key] = table
+
+        # Daily values over the whole range, decimated to the chart's width
+        trend = QWidget()
+        trend_layout = QVBoxLayout(trend)
+        self.trend_input = QComboBox()
+        self.trend_input.addItems(list(TREND_OPTIONS))
+        self.trend_input.currentTextChanged.connect(lambda _: self.show_trend())
+        trend_header = QHBoxLayout()
+        trend_header.addWidget(self.trend_input)
+        hint = QLabel("Scroll to zoom, drag to pan, double-click to reset")
+        hint.setProperty("hint", True)
+        trend_header.addWidget(hint)
+        trend_header.addStretch()
+        trend_layout.addLayout(trend_header)
+        self.trend_chart = TimeSeriesChart()
+        trend_layout.addWidget(self.trend_chart, 1)
+        self.trends = {}
+        self.trend_start = date.today()
+        self.tabs.addTab(trend, "Daily Trends")
+
+        # Demographics come from the NumPy snapshot rather than the aggregates
+        demographics = QWidget()
+        demographics_layout = QHBoxLayout(demographics)
+        if self.analytics is not None:
+            for key in ('age_bands', 'genders', 'percentiles'):
+                table = QTableWidget()
+                table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+                table.verticalHeader().setDefaultSectionSize(32)
+                table.horizontalHeader().setStretchLastSection(True)
+                demographics_layout.addWidget(table)
+                self.tables[key] = table
+        else:
+            note = QLabel("Install NumPy to enable patient demographics.")
+            note.setProperty("caption", True)
+            demographics_layout.addWidget(note)
+        self.tabs.addTab(demographics, "Patient Demographics")
+        layout.addWidget(self.tabs, 1)
+
+        self.range_input.currentTextChanged.connect(lambda _: self.refresh_reports())
+        self.period_input.currentTextChanged.connect(lambda _: self.refresh_reports())
+
+        self.refresh_reports()
+
+    def selected_range(self):
+        """(start, end, period) chosen in the header"""
+        end = date.today()
+        start = end - timedelta(days=RANGE_OPTIONS[self.range_input.currentText()] - 1)
+        return start, end, PERIOD_OPTIONS[self.period_input.currentText()]
+
+    def refresh_reports(self, refresh: bool = False):
+        """
+        Compute the selected reports in the background
+
+        A result already computed for the same range and period is shown
+        at once unless its data has changed (or refresh is True).
+        """
+        start, end, period = self.selected_range()
+        key = self.report_key = ('reports', start, end, period)
+        job = self.jobs.submit(
+            key,
+            lambda context: compute_reports(context, start, end, period, self.analytics),
+            lambda result: self.reports_finished(key, result),
+            tables=SOURCE_TABLES,
+            on_progress=self.show_progress,
+            on_failed=self.reports_failed,
+            on_cancelled=lambda: self.reports_cancelled(key),
+            channel='reports',
+            refresh=refresh,
+        )
+        if job is not None:
+            self.set_running(True)
+            self.status_label.setText("Computing reports...")
+
+    def set_running(self, running: bool):
+        """Show the progress bar and Cancel button while a report computes"""
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(running)
+        self.cancel_button.setVisible(running)
+
+    def show_progress(self, done: int, total: int):
+        """Advance the progress bar"""
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+
+    def cancel_reports(self):
+        """Stop the report being computed"""
+        self.jobs.cancel_channel('reports')
+
+    def reports_finished(self, key, result):
+        """Show a computed (or cached) result, unless another range was chosen since"""
+        if key != self.report_key:
+            return
+        dashboard, self.trends, snapshot = result
+        self.trend_start = key[1]
+        self.set_running(False)
+        self.show_dashboard(dashboard)
+        self.show_trend()
+        if snapshot is not None:
+            self.show_demographics(snapshot)
+        self.status_label.setText(f"Computed at {self.jobs.cached(key).computed_at:%H:%M:%S}")
+        self.check_stale()
+
+    def reports_cancelled(self, key):
+        """Note a cancelled computation, unless a newer request replaced it"""
+        if key == self.report_key and not self.jobs.is_running('reports'):
+            self.set_running(False)
+            self.status_label.setText("Cancelled")
+
+    def reports_failed(self, message: str):
+        """Report a failed computation"""
+        self.set_running(False)
+        self.status_label.clear()
+        QMessageBox.critical(self, "Reports", message)
+
+    def check_stale(self):
+        """Flag the shown report if its data has been written since it was computed"""
+        if self.report_key is None or not self.isVisible():
+            return
+        self.stale_label.setVisible(self.jobs.is_stale(self.report_key))
+
+    def show_dashboard(self, dashboard: Dashboard):
+        """Fill the summary cards and pivot tables"""
+        patients = sum(row.value for row in dashboard.new_patients)
+        appointments = sum(row.value for row in dashboard.appointments)
+        revenue = from_cents(sum(row.value for row in dashboard.revenue))
+        shares = [share for _, _, share in dashboard.utilization]
+
+        self.summary_labels['patients'].setText(f"{patients:,}")
+        self.summary_labels['appointments'].setText(f"{appointments:,}")
+        self.summary_labels['revenue'].setText(format_money(revenue))
+        self.summary_labels['utilization'].setText(
+            f"{sum(shares) / len(shares):.0%}" if shares else "–"
+        )
+
+        self.fill_table(self.tables['patients'], dashboard.new_patients, lambda v: f"{v:,}", "New")
+        self.fill_table(self.tables['appointments'], dashboard.appointments, lambda v: f"{v:,}")
+        self.fill_table(self.tables['revenue'], dashboard.revenue,
+                        lambda v: format_money(from_cents(v)), blank_key="(none)")
+        self.fill_table(self.tables['utilization'], dashboard.utilization, lambda v: f"{v:.0%}")
+
+    def show_trend(self):
+        """Chart the selected metric's daily values"""
+        metric, value_format = TREND_OPTIONS[self.trend_input.currentText()]
+        if metric in self.trends:
+            self.trend_chart.set_series(self.trend_start, self.trends[metric], value_format)
+
+    def show_demographics(self, snapshot: PatientSnapshot):
+        """Fill the age band and per-gender tables"""
+        bands = snapshot.age_bands()
+        self.fill_rows(self.tables['age_bands'], ["Patients", "Share"],
+                       [band.label for band in bands],
+                       [(f"{band.count:,}", f"{band.share:.1%}") for band in bands])
+
+        groups = snapshot.age_by_gender()
+        self.fill_rows(self.tables['genders'], ["Patients", "Mean Age", "Median Age"],
+                       [group.gender for group in groups],
+                       [(f"{g.count:,}", f"{g.mean_age:.1f}", f"{g.median_age:g}") for g in groups])
+
+        percentiles = snapshot.age_percentiles()
+        self.fill_rows(self.tables['percentiles'], ["Age"],
+                       [f"{p:g}th percentile" for p in percentiles],
+                       [(f"{age:g}",) for age in percentiles.values()])
+
+    def fill_rows(self, table: QTableWidget, columns, labels, rows):
+        """Show already formatted rows under the given headers"""
+        table.clear()
+        table.setRowCount(len(rows))
+        table.setColumnCount(len(columns))
+        table.setHorizontalHeaderLabels(columns)
+        table.setVerticalHeaderLabels(labels)
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                table.setItem(row, column, item)
+
+    def fill_table(self, table: QTableWidget, rows, fmt: Callable, blank_key: str = ""):
+        """Show (bucket, key, value) rows as a bucket x key grid"""
+        buckets, keys, cells = pivot(rows)
+        table.clear()
+        table.setRowCount(len(buckets))
+        table.setColumnCount(len(keys))
+        table.setHorizontalHeaderLabels([key or blank_key for key in keys])
+        table.setVerticalHeaderLabels(buckets)
+        for row, bucket in enumerate(buckets):
+            for column, key in enumerate(keys):
+                value = cells.get((bucket, key))
+                if value is None:
+                    continue
+                item = QTableWidgetItem(fmt(value))
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                table.setItem(row, column, item)
@@ -4,38 +4,437 @@ Equivalent to StaffModule.tsx
 Admin Only
 """
 
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
+import re
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit,
+    QDialog, QFormLayout, QComboBox, QDateEdit, QTimeEdit, QSpinBox, QCheckBox,
+    QMessageBox, QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView, QTabWidget
+)
+from PyQt6.QtCore import QDate, QTime
+
+from core.staff import (
+    MINUTES_PER_DAY, ROLES, SLOT_MINUTES, WEEKDAYS,
+    Roster, Shift, StaffMember, TimeOff, minute_label, windows
+)
+from core.storage import get_database
+from ..data_access import get_data_access
+from ..theme import stylesheet
+
+# "08:00-12:00, 13:00-17:00"
+SHIFT_PATTERN = re.compile(r"^(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})$")
+
+
+def format_shifts(shifts: List[Shift]) -> str:
+    """One weekday's shifts as text"""
+    return ", ".join(f"{minute_label(s.start_minute)}-{minute_label(s.end_minute)}" for s in shifts)
+
+
+def parse_shifts(weekday: int, text: str) -> List[Shift]:
+    """Shifts typed as comma-separated HH:MM-HH:MM ranges; raises ValueError"""
+    shifts = []
+    for part in filter(None, (piece.strip() for piece in text.split(","))):
+        match = SHIFT_PATTERN.match(part)
+        if not match:
+            raise ValueError(f"{WEEKDAYS[weekday]}: '{part}' is not a HH:MM-HH:MM range")
+        start_hour, start_minute, end_hour, end_minute = map(int, match.groups())
+        start, end = start_hour * 60 + start_minute, end_hour * 60 + end_minute
+        if start % SLOT_MINUTES or end % SLOT_MINUTES:
+            raise ValueError(f"{WEEKDAYS[weekday]}: shifts start and end on {SLOT_MINUTES}-minute marks")
+        shifts.append(Shift(weekday, start, end))
+    return shifts
+
+
+class StaffDialog(QDialog):
+    """Dialog for adding or editing a staff member"""
+
+    def __init__(self, parent=None, member: Optional[StaffMember] = None):
+        super().__init__(parent)
+        self.member = member
+
+        self.setWindowTitle("Edit Staff Member" if member else "Add Staff Member")
+        self.setModal(True)
+        self.setMinimumWidth(460)
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Set up dialog UI"""
+        layout = QFormLayout(self)
+        layout.setSpacing(16)
+
+        self.name_input = QLineEdit()
+        self.name_input.setPlaceholderText("Full name, e.g. Dr. Santos")
+        self.role_input = QComboBox()
+        self.role_input.addItems(list(ROLES))
+        self.email_input = QLineEdit()
+        self.email_input.setPlaceholderText("Email")
+        self.phone_input = QLineEdit()
+        self.phone_input.setPlaceholderText("Phone")
+        self.active_input = QCheckBox("On the roster")
+        self.active_input.setChecked(True)
+
+        if self.member:
+            self.name_input.setText(self.member.name)
+            self.role_input.setCurrentText(self.member.role)
+            self.email_input.setText(self.member.email)
+            self.phone_input.setText(self.member.phone)
+            self.active_input.setChecked(self.member.active)
+
+        layout.addRow("Name:", self.name_input)
+        layout.addRow("Role:", self.role_input)
+        layout.addRow("Email:", self.email_input)
+        layout.addRow("Phone:", self.phone_input)
+        layout.addRow("", self.active_input)
+
+        button_layout = QHBoxLayout()
+
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(self.reject)
+
+        save_button = QPushButton("Save")
+        save_button.clicked.connect(self.accept)
+
+        button_layout.addWidget(cancel_button)
+        button_layout.addWidget(save_button)
+        layout.addRow("", button_layout)
+
+    def get_data(self) -> Dict:
+        """Get form data"""
+        return {
+            'name': self.name_input.text().strip(),
+            'role': self.role_input.currentText(),
+            'email': self.email_input.text().strip(),
+            'phone': self.phone_input.text().strip(),
+            'active': self.active_input.isChecked(),
+        }
+
+
+class ShiftsDialog(QDialog):
+    """Dialog for editing a member's weekly shifts, one line per weekday"""
+
+    def __init__(self, name: str, shifts: List[Shift], parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Weekly Shifts - {name}")
+        self.setModal(True)
+        self.setMinimumWidth(460)
+        self.setup_ui(shifts)
+
+    def setup_ui(self, shifts: List[Shift]):
+        """Set up dialog UI"""
+        layout = QFormLayout(self)
+        layout.setSpacing(12)
+
+        self.day_inputs: List[QLineEdit] = []
+        for weekday, name in enumerate(WEEKDAYS):
+            day_input = QLineEdit(format_shifts([s for s in shifts if s.weekday == weekday]))
+            day_input.setPlaceholderText("Off, or e.g. 08:00-12:00, 13:00-17:00")
+            self.day_inputs.append(day_input)
+            layout.addRow(f"{name}:", day_input)
+
+        button_layout = QHBoxLayout()
+
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(self.reject)
+
+        save_button = QPushButton("Save")
+        save_button.clicked.connect(self.accept)
+
+        button_layout.addWidget(cancel_button)
+        button_layout.addWidget(save_button)
+        layout.addRow("", button_layout)
+
+    def get_data(self) -> List[Shift]:
+        """The week's shifts; raises ValueError on a malformed line"""
+        shifts = []
+        for weekday, day_input in enumerate(self.day_inputs):
+            shifts.extend(parse_shifts(weekday, day_input.text()))
+        return shifts
+
+
+class TimeOffDialog(QDialog):
+    """Dialog for recording time off"""
+
+    def __init__(self, name: str, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Time Off - {name}")
+        self.setModal(True)
+        self.setMinimumWidth(420)
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Set up dialog UI"""
+        layout = QFormLayout(self)
+        layout.setSpacing(16)
+
+        self.day_input = QDateEdit(QDate(date.today()))
+        self.day_input.setCalendarPopup(True)
+        self.day_input.setDisplayFormat("yyyy-MM-dd")
+        self.whole_day_input = QCheckBox("Whole day")
+        self.whole_day_input.setChecked(True)
+        self.start_input = QTimeEdit(QTime(8, 0))
+        self.end_input = QTimeEdit(QTime(12, 0))
+        for time_input in (self.start_input, self.end_input):
+            time_input.setDisplayFormat("HH:mm")
+            time_input.setEnabled(False)
+            self.whole_day_input.toggled.connect(
+                lambda whole, time_input=time_input: time_input.setEnabled(not whole)
+            )
+        self.reason_input = QLineEdit()
+        self.reason_input.setPlaceholderText("Reason (optional)")
+
+        layout.addRow("Date:", self.day_input)
+        layout.addRow("", self.whole_day_input)
+        layout.addRow("From:", self.start_input)
+        layout.addRow("Until:", self.end_input)
+        layout.addRow("Reason:", self.reason_input)
+
+        button_layout = QHBoxLayout()
+
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(self.reject)
+
+        save_button = QPushButton("Save")
+        save_button.clicked.connect(self.accept)
+
+        button_layout.addWidget(cancel_button)
+        button_layout.addWidget(save_button)
+        layout.addRow("", button_layout)
+
+    def get_data(self) -> Dict:
+        """Get form data"""
+        if self.whole_day_input.isChecked():
+            start, end = 0, MINUTES_PER_DAY
+        else:
+            start_time, end_time = self.start_input.time(), self.end_input.time()
+            start = start_time.hour() * 60 + start_time.minute()
+            end = end_time.hour() * 60 + end_time.minute()
+        return {
+            'day': self.day_input.date().toPyDate(),
+            'start_minute': start,
+            'end_minute': end,
+            'reason': self.reason_input.text().strip(),
+        }
 
 
 class StaffModule(QWidget):
     """Staff module - manages staff members (Admin only)"""
-    
-    def __init__(self, user):
+
+    def __init__(self, user, roster: Optional[Roster] = None):
         super().__init__()
         self.user = user
+        # Storage calls from the slots below run here, off the GUI thread
+        self.data = get_data_access()
+        self.roster = roster or Roster(get_database())
+        self.shown_members: List[StaffMember] = []
+        # Weekly shifts of the shown members, read with them
+        self.shown_shifts: Dict[int, List[Shift]] = {}
         self.setup_ui()
-    
+
     def setup_ui(self):
         """Set up the user interface"""
+        self.setStyleSheet(stylesheet('module'))
         layout = QVBoxLayout(self)
         layout.setContentsMargins(24, 24, 24, 24)
-        
+        layout.setSpacing(16)
+
         title = QLabel("Staff Management")
-        title.setStyleSheet("""
-            QLabel {
-                color: white;
-                font-size: 24px;
-                font-weight: bold;
-            }
-        """)
+        title.setObjectName("moduleTitle")
         layout.addWidget(title)
-        
+
         subtitle = QLabel("🔒 Admin Only")
-        subtitle.setStyleSheet("QLabel { color: #4fb3d4; font-size: 16px; font-weight: bold; }")
+        subtitle.setObjectName("moduleSubtitle")
         layout.addWidget(subtitle)
-        
-        info = QLabel("Staff module - Employee management and scheduling")
-        info.setStyleSheet("QLabel { color: white; font-size: 16px; margin-top: 20px; }")
-        layout.addWidget(info)
-        
-        layout.addStretch()
+
+        self.tabs = QTabWidget()
+        self.tabs.addTab(self.build_roster_tab(), "Roster")
+        self.tabs.addTab(self.build_free_tab(), "Who's Free")
+        layout.addWidget(self.tabs, 1)
+
+        self.refresh_roster()
+
+    def build_roster_tab(self) -> QWidget:
+        """Members with their weekly hours, and the selected member's shifts"""
+        tab = QWidget()
+        layout = QVBoxLayout(tab)
+
+        button_layout = QHBoxLayout()
+        for label, handler in (
+            ("+ Add Staff", lambda: self.edit_member(None)),
+            ("Edit", self.edit_selected_member),
+            ("Shifts", self.edit_shifts),
+            ("Time Off", self.add_time_off),
+        ):
+            button = QPushButton(label)
+            button.clicked.connect(handler)
+            button_layout.addWidget(button)
+        self.show_inactive_input = QCheckBox("Show former staff")
+        self.show_inactive_input.toggled.connect(lambda _: self.refresh_roster())
+        button_layout.addWidget(self.show_inactive_input)
+        button_layout.addStretch()
+        layout.addLayout(button_layout)
+
+        self.members_table = QTableWidget(0, 5)
+        self.members_table.setHorizontalHeaderLabels(["Name", "Role", "Email", "Phone", "Hours / Week"])
+        self.members_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.members_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.members_table.verticalHeader().hide()
+        self.members_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.members_table.horizontalHeader().setSectionResizeMode(4, QHeaderView.ResizeMode.ResizeToContents)
+        self.members_table.doubleClicked.connect(lambda _: self.edit_selected_member())
+        self.members_table.currentCellChanged.connect(lambda *_: self.show_week())
+        layout.addWidget(self.members_table, 1)
+
+        self.week_table = QTableWidget(len(WEEKDAYS), 2)
+        self.week_table.setHorizontalHeaderLabels(["Day", "Shifts"])
+        self.week_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.week_table.verticalHeader().hide()
+        self.week_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        for weekday, name in enumerate(WEEKDAYS):
+            self.week_table.setItem(weekday, 0, QTableWidgetItem(name))
+        layout.addWidget(self.week_table, 1)
+        return tab
+
+    def build_free_tab(self) -> QWidget:
+        """Who works a stretch of a given length on a given day"""
+        tab = QWidget()
+        layout = QVBoxLayout(tab)
+
+        query_layout = QHBoxLayout()
+        self.free_day_input = QDateEdit(QDate(date.today()))
+        self.free_day_input.setCalendarPopup(True)
+        self.free_day_input.setDisplayFormat("ddd yyyy-MM-dd")
+        self.free_minutes_input = QSpinBox()
+        self.free_minutes_input.setRange(SLOT_MINUTES, 8 * 60)
+        self.free_minutes_input.setSingleStep(SLOT_MINUTES)
+        self.free_minutes_input.setValue(45)
+        self.free_minutes_input.setSuffix(" min")
+        self.free_role_input = QComboBox()
+        self.free_role_input.addItem("Any role", None)
+        for role in ROLES:
+            self.free_role_input.addItem(role, role)
+        find_button = QPushButton("Find")
+        find_button.clicked.connect(self.find_free)
+        for widget in (self.free_day_input, self.free_minutes_input, self.free_role_input, find_button):
+            query_layout.addWidget(widget)
+        query_layout.addStretch()
+        layout.addLayout(query_layout)
+
+        self.free_table = QTableWidget(0, 3)
+        self.free_table.setHorizontalHeaderLabels(["Name", "Role", "Can Start"])
+        self.free_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.free_table.verticalHeader().hide()
+        self.free_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.free_table, 1)
+        return tab
+
+    # === Roster ===
+
+    def refresh_roster(self):
+        """Reload the member table"""
+        active_only = not self.show_inactive_input.isChecked()
+        self.data.read(lambda: self.read_roster(active_only), self.show_roster,
+                       key=(self.roster, 'roster', active_only))
+
+    def read_roster(self, active_only: bool) -> List[Tuple[StaffMember, List[Shift]]]:
+        """On the data thread: the members to show, each with their weekly shifts"""
+        self.roster.refresh()
+        return [(member, self.roster.shifts(member.id)) for member in self.roster.all(active_only=active_only)]
+
+    def show_roster(self, roster: List[Tuple[StaffMember, List[Shift]]]):
+        """Fill the member table with what read_roster() found"""
+        self.shown_members = [member for member, _ in roster]
+        self.shown_shifts = {member.id: shifts for member, shifts in roster}
+        self.members_table.setRowCount(len(self.shown_members))
+        for row, member in enumerate(self.shown_members):
+            minutes = sum(s.end_minute - s.start_minute for s in self.shown_shifts[member.id])
+            name = member.name if member.active else f"{member.name} (former)"
+            values = (name, member.role, member.email, member.phone, f"{minutes / 60:g}")
+            for column, value in enumerate(values):
+                self.members_table.setItem(row, column, QTableWidgetItem(value))
+        self.show_week()
+
+    def selected_member(self) -> Optional[StaffMember]:
+        """The member of the selected row"""
+        row = self.members_table.currentRow()
+        return self.shown_members[row] if 0 <= row < len(self.shown_members) else None
+
+    def show_week(self):
+        """The selected member's shifts by weekday"""
+        member = self.selected_member()
+        shifts = self.shown_shifts.get(member.id, []) if member else []
+        for weekday in range(len(WEEKDAYS)):
+            text = format_shifts([s for s in shifts if s.weekday == weekday]) if member else ""
+            self.week_table.setItem(weekday, 1, QTableWidgetItem(text or ("Off" if member else "")))
+
+    def edit_selected_member(self):
+        """Edit the selected member"""
+        member = self.selected_member()
+        if member is not None:
+            self.edit_member(member)
+
+    def edit_member(self, member: Optional[StaffMember]):
+        """Add a member, or edit one"""
+        dialog = StaffDialog(self, member)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        saved = StaffMember(member.id if member else None, **dialog.get_data())
+        self.data.write(lambda: self.roster.save(saved), lambda _: self.refresh_roster(),
+                        lambda error: QMessageBox.warning(self, "Staff", str(error)))
+
+    def edit_shifts(self):
+        """Edit the selected member's weekly shifts"""
+        member = self.selected_member()
+        if member is None:
+            return
+        dialog = ShiftsDialog(member.name, self.shown_shifts.get(member.id, []), self)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        try:
+            shifts = dialog.get_data()
+        except ValueError as error:
+            QMessageBox.warning(self, "Shifts", str(error))
+            return
+        self.data.write(lambda: self.roster.set_shifts(member.id, shifts), lambda _: self.refresh_roster(),
+                        lambda error: QMessageBox.warning(self, "Shifts", str(error)))
+
+    def add_time_off(self):
+        """Record time off for the selected member"""
+        member = self.selected_member()
+        if member is None:
+            return
+        dialog = TimeOffDialog(member.name, self)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        time_off = TimeOff(None, member.id, **dialog.get_data())
+        self.data.write(lambda: self.roster.add_time_off(time_off), None,
+                        lambda error: QMessageBox.warning(self, "Time Off", str(error)))
+
+    # === Who's free ===
+
+    def find_free(self):
+        """List who works the chosen stretch on the chosen day, and when it can start"""
+        query = (self.free_day_input.date().toPyDate(), self.free_minutes_input.value(),
+                 self.free_role_input.currentData())
+        self.data.read(lambda: self.read_free(*query), self.show_free, key=(self.roster, 'free_members', query))
+
+    def read_free(self, day: date, minutes: int, role: Optional[str]) -> List[Tuple[StaffMember, int]]:
+        """On the data thread: free_members() on an up-to-date roster"""
+        self.roster.refresh()
+        return self.roster.free_members(day, minutes, role)
+
+    def show_free(self, found: List[Tuple[StaffMember, int]]):
+        """Fill the Who's Free table with what find_free() found"""
+        self.free_table.setRowCount(len(found))
+        for row, (member, starts) in enumerate(found):
+            # Runs of start slots read as "earliest-latest start"
+            ranges = ", ".join(
+                minute_label(start) if end - start == SLOT_MINUTES
+                else f"{minute_label(start)}-{minute_label(end - SLOT_MINUTES)}"
+                for start, end in windows(starts)
+            )
+            self.free_table.setItem(row, 0, QTableWidgetItem(member.name))
+            self.free_table.setItem(row, 1, QTableWidgetItem(member.role))
+            self.free_table.setItem(row, 2, QTableWidgetItem(ranges))
@@ -3,34 +3,489 @@ Treatments Module
 Equivalent to TreatmentsModule.tsx
 """
 
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QLineEdit,
+    QDialog, QFormLayout, QComboBox, QDateEdit, QSpinBox, QCheckBox, QMessageBox,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView, QTabWidget
+)
+from PyQt6.QtCore import Qt, QDate
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional
+
+from core.billing import Ledger, format_money
+from core.treatments import (
+    STATUS_COMPLETED, STATUSES, TOOTH_COUNT, WHOLE_MOUTH,
+    PatientChart, Procedure, TreatmentCatalog, TreatmentHistory, TreatmentRecord
+)
+from core.storage import get_database
+from ..data_access import get_data_access
+from ..theme import stylesheet
+from ..widgets.odontogram import Odontogram
+from .appointments_module import DEFAULT_DENTISTS
+
+
+def tooth_label(tooth: int) -> str:
+    """Display name of a tooth number"""
+    return "Whole mouth" if tooth == WHOLE_MOUTH else f"#{tooth}"
+
+
+class TreatmentDialog(QDialog):
+    """Dialog for recording a planned or completed treatment"""
+
+    def __init__(self, catalog: TreatmentCatalog, dentist: str = "", tooth: int = WHOLE_MOUTH, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.procedures = catalog.all()
+
+        self.setWindowTitle("Record Treatment")
+        self.setModal(True)
+        self.setMinimumWidth(500)
+
+        self.setup_ui(dentist, tooth)
+
+    def setup_ui(self, dentist: str, tooth: int):
+        """Set up dialog UI"""
+        layout = QFormLayout(self)
+        layout.setSpacing(16)
+
+        self.tooth_input = QComboBox()
+        for number in range(WHOLE_MOUTH, TOOTH_COUNT + 1):
+            self.tooth_input.addItem(tooth_label(number), number)
+        self.tooth_input.setCurrentIndex(tooth)
+
+        self.surfaces_input = QLineEdit()
+        self.surfaces_input.setPlaceholderText("Surfaces, e.g. MOD (optional)")
+
+        self.procedure_input = QComboBox()
+        for procedure in self.procedures:
+            self.procedure_input.addItem(
+                f"{procedure.code} - {procedure.name} ({format_money(procedure.price)})", procedure.code
+            )
+
+        self.status_input = QComboBox()
+        self.status_input.addItems(list(STATUSES))
+        self.status_input.setCurrentText(STATUS_COMPLETED)
+
+        self.date_input = QDateEdit(QDate(date.today()))
+        self.date_input.setCalendarPopup(True)
+        self.date_input.setDisplayFormat("yyyy-MM-dd")
+
+        self.dentist_input = QComboBox()
+        self.dentist_input.setEditable(True)
+        self.dentist_input.addItems(DEFAULT_DENTISTS)
+        if dentist:
+            self.dentist_input.setCurrentText(dentist)
+
+        self.notes_input = QLineEdit()
+        self.notes_input.setPlaceholderText("Notes")
+
+        self.charge_input = QCheckBox("Post the catalog price to the patient's account")
+        self.charge_input.setChecked(True)
+        self.status_input.currentTextChanged.connect(
+            lambda status: self.charge_input.setEnabled(status == STATUS_COMPLETED)
+        )
+
+        layout.addRow("Tooth:", self.tooth_input)
+        layout.addRow("Surfaces:", self.surfaces_input)
+        layout.addRow("Procedure:", self.procedure_input)
+        layout.addRow("Status:", self.status_input)
+        layout.addRow("Date:", self.date_input)
+        layout.addRow("Dentist:", self.dentist_input)
+        layout.addRow("Notes:", self.notes_input)
+        layout.addRow("Charge:", self.charge_input)
+
+        button_layout = QHBoxLayout()
+
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(self.reject)
+
+        save_button = QPushButton("Save")
+        save_button.clicked.connect(self.accept)
+
+        button_layout.addWidget(cancel_button)
+        button_layout.addWidget(save_button)
+        layout.addRow("", button_layout)
+
+    def get_data(self) -> Dict:
+        """Get form data"""
+        status = self.status_input.currentText()
+        return {
+            'tooth': self.tooth_input.currentData(),
+            'surfaces': self.surfaces_input.text().strip(),
+            'code': self.procedure_input.currentData(),
+            'status': status,
+            'performed_on': self.date_input.date().toPyDate(),
+            'dentist': self.dentist_input.currentText().strip(),
+            'notes': self.notes_input.text().strip(),
+            'charge': status == STATUS_COMPLETED and self.charge_input.isChecked(),
+        }
+
+
+class ProcedureDialog(QDialog):
+    """Dialog for adding or editing a catalog entry"""
+
+    def __init__(self, parent=None, procedure: Optional[Procedure] = None):
+        super().__init__(parent)
+        self.procedure = procedure
+
+        self.setWindowTitle("Edit Procedure" if procedure else "Add Procedure")
+        self.setModal(True)
+        self.setMinimumWidth(460)
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Set up dialog UI"""
+        layout = QFormLayout(self)
+        layout.setSpacing(16)
+
+        self.code_input = QLineEdit()
+        self.code_input.setPlaceholderText("Procedure code, e.g. D2391")
+        self.name_input = QLineEdit()
+        self.name_input.setPlaceholderText("Name")
+        self.price_input = QLineEdit()
+        self.price_input.setPlaceholderText("Price")
+        self.duration_input = QSpinBox()
+        self.duration_input.setRange(5, 480)
+        self.duration_input.setSingleStep(5)
+        self.duration_input.setValue(30)
+        self.duration_input.setSuffix(" min")
+        self.active_input = QCheckBox("Offered")
+        self.active_input.setChecked(True)
+
+        if self.procedure:
+            self.code_input.setText(self.procedure.code)
+            self.code_input.setEnabled(False)
+            self.name_input.setText(self.procedure.name)
+            self.price_input.setText(str(self.procedure.price))
+            self.duration_input.setValue(self.procedure.duration)
+            self.active_input.setChecked(self.procedure.active)
+
+        layout.addRow("Code:", self.code_input)
+        layout.addRow("Name:", self.name_input)
+        layout.addRow("Price:", self.price_input)
+        layout.addRow("Duration:", self.duration_input)
+        layout.addRow("", self.active_input)
+
+        button_layout = QHBoxLayout()
+
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(self.reject)
+
+        save_button = QPushButton("Save")
+        save_button.clicked.connect(self.accept)
+
+        button_layout.addWidget(cancel_button)
+        button_layout.addWidget(save_button)
+        layout.addRow("", button_layout)
+
+    def get_data(self) -> Dict:
+        """Get form data; price is None when it is not a valid number"""
+        try:
+            price = Decimal(self.price_input.text().strip().replace(",", ""))
+        except InvalidOperation:
+            price = None
+        return {
+            'code': self.code_input.text().strip().upper(),
+            'name': self.name_input.text().strip(),
+            'price': price,
+            'duration': self.duration_input.value(),
+            'active': self.active_input.isChecked(),
+        }
 
 
 class TreatmentsModule(QWidget):
     """Treatments module - manages treatment records"""
-    
-    def __init__(self, user):
+
+    def __init__(self, user, history: Optional[TreatmentHistory] = None, ledger: Optional[Ledger] = None):
         super().__init__()
         self.user = user
+        # Storage calls from the slots below run here, off the GUI thread
+        self.data = get_data_access()
+        self.history = history or TreatmentHistory(get_database())
+        self.catalog = self.history.catalog
+        self.ledger = ledger or Ledger(self.history.database)
+        self.chart: Optional[PatientChart] = None
+        self.shown_records: List[TreatmentRecord] = []
         self.setup_ui()
-    
+
     def setup_ui(self):
         """Set up the user interface"""
+        self.setStyleSheet(stylesheet('module'))
         layout = QVBoxLayout(self)
         layout.setContentsMargins(24, 24, 24, 24)
-        
+        layout.setSpacing(16)
+
         title = QLabel("Treatments Management")
-        title.setStyleSheet("""
-            QLabel {
-                color: white;
-                font-size: 24px;
-                font-weight: bold;
-            }
-        """)
+        title.setObjectName("moduleTitle")
         layout.addWidget(title)
-        
-        info = QLabel("Treatments module - Patient treatment records and procedures")
-        info.setStyleSheet("QLabel { color: white; font-size: 16px; margin-top: 20px; }")
-        layout.addWidget(info)
-        
-        layout.addStretch()
+
+        self.tabs = QTabWidget()
+        self.tabs.addTab(self.build_chart_tab(), "Patient Chart")
+        self.tabs.addTab(self.build_catalog_tab(), "Procedure Catalog")
+        layout.addWidget(self.tabs, 1)
+
+        self.refresh_catalog()
+
+    def build_chart_tab(self) -> QWidget:
+        """Patient lookup, tooth filter and the treatment history table"""
+        tab = QWidget()
+        layout = QVBoxLayout(tab)
+
+        lookup_layout = QHBoxLayout()
+
+        self.patient_input = QLineEdit()
+        self.patient_input.setPlaceholderText("Patient ID, e.g. P0001")
+        self.patient_input.setFixedWidth(240)
+        self.patient_input.returnPressed.connect(self.open_chart)
+        lookup_layout.addWidget(self.patient_input)
+
+        open_button = QPushButton("Open Chart")
+        open_button.clicked.connect(self.open_chart)
+        lookup_layout.addWidget(open_button)
+
+        self.tooth_filter = QComboBox()
+        self.tooth_filter.addItem("All teeth", None)
+        for number in range(WHOLE_MOUTH, TOOTH_COUNT + 1):
+            self.tooth_filter.addItem(tooth_label(number), number)
+        self.tooth_filter.currentIndexChanged.connect(self.tooth_filter_changed)
+        lookup_layout.addWidget(self.tooth_filter)
+
+        self.chart_label = QLabel()
+        self.chart_label.setProperty("heading", True)
+        lookup_layout.addSpacing(16)
+        lookup_layout.addWidget(self.chart_label)
+        lookup_layout.addStretch()
+
+        self.record_button = QPushButton("Record Treatment")
+        self.record_button.clicked.connect(
+            lambda: self.record_treatment(self.tooth_filter.currentData() or WHOLE_MOUTH)
+        )
+        self.record_button.setEnabled(False)
+        lookup_layout.addWidget(self.record_button)
+
+        self.complete_button = QPushButton("Mark Completed")
+        self.complete_button.clicked.connect(self.complete_selected)
+        self.complete_button.setEnabled(False)
+        lookup_layout.addWidget(self.complete_button)
+
+        layout.addLayout(lookup_layout)
+
+        self.odontogram = Odontogram()
+        self.odontogram.tooth_clicked.connect(self.filter_tooth)
+        self.odontogram.tooth_double_clicked.connect(self.record_treatment)
+        layout.addWidget(self.odontogram)
+
+        self.records_table = QTableWidget(0, 7)
+        self.records_table.setHorizontalHeaderLabels(
+            ["Date", "Tooth", "Surfaces", "Code", "Procedure", "Status", "Dentist"]
+        )
+        self.records_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.records_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.records_table.verticalHeader().hide()
+        self.records_table.horizontalHeader().setSectionResizeMode(4, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.records_table, 1)
+        return tab
+
+    def build_catalog_tab(self) -> QWidget:
+        """The procedure catalog and a lookup of patients by procedure"""
+        tab = QWidget()
+        layout = QVBoxLayout(tab)
+
+        button_layout = QHBoxLayout()
+        add_button = QPushButton("Add Procedure")
+        add_button.clicked.connect(lambda: self.edit_procedure(None))
+        button_layout.addWidget(add_button)
+        edit_button = QPushButton("Edit Procedure")
+        edit_button.clicked.connect(self.edit_selected_procedure)
+        button_layout.addWidget(edit_button)
+        find_button = QPushButton("Find Patients")
+        find_button.clicked.connect(self.find_patients)
+        button_layout.addWidget(find_button)
+        self.find_label = QLabel()
+        self.find_label.setWordWrap(True)
+        button_layout.addWidget(self.find_label, 1)
+        layout.addLayout(button_layout)
+
+        self.catalog_table = QTableWidget(0, 5)
+        self.catalog_table.setHorizontalHeaderLabels(["Code", "Procedure", "Price", "Duration", "Offered"])
+        self.catalog_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.catalog_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.catalog_table.verticalHeader().hide()
+        self.catalog_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.catalog_table.doubleClicked.connect(lambda _: self.edit_selected_procedure())
+        layout.addWidget(self.catalog_table, 1)
+        return tab
+
+    # === Patient chart ===
+
+    def open_chart(self):
+        """Load the entered patient's whole history (one query)"""
+        patient_id = self.patient_input.text().strip().upper()
+        if not patient_id:
+            self.show_chart(None)
+            return
+        self.data.read(lambda: self.history.chart(patient_id), self.show_chart,
+                       lambda error: QMessageBox.warning(self, "Treatments", str(error)),
+                       key=(self.history, 'chart', patient_id))
+
+    def show_chart(self, chart: Optional[PatientChart]):
+        """Show a chart read by open_chart()"""
+        if chart is not None and chart.patient_id != self.patient_input.text().strip().upper():
+            return
+        self.chart = chart
+        patient_id = chart.patient_id if chart else ""
+        self.record_button.setEnabled(self.chart is not None)
+        self.complete_button.setEnabled(self.chart is not None)
+        self.chart_label.setText(f"{patient_id}: {len(self.chart)} records" if self.chart else "")
+        # Only the teeth that differ from the previous patient's are repainted
+        self.odontogram.set_states(self.chart.tooth_states() if self.chart else {})
+        self.show_records()
+
+    def filter_tooth(self, tooth: int):
+        """Show one tooth's history (a tooth clicked on the chart)"""
+        self.tooth_filter.setCurrentIndex(self.tooth_filter.findData(tooth))
+
+    def tooth_filter_changed(self):
+        """Keep the chart's highlight in step with the tooth filter"""
+        self.odontogram.select_tooth(self.tooth_filter.currentData())
+        self.show_records()
+
+    def show_records(self):
+        """Fill the table from the loaded chart, filtered to one tooth if chosen"""
+        tooth = self.tooth_filter.currentData()
+        if self.chart is None:
+            records = []
+        elif tooth is None:
+            records = self.chart.records()
+        else:
+            records = list(reversed(self.chart.for_tooth(tooth)))
+        self.shown_records = records
+
+        self.records_table.setRowCount(len(records))
+        for row, record in enumerate(records):
+            procedure = self.catalog.get(record.code)
+            values = (
+                record.performed_on.isoformat(), tooth_label(record.tooth), record.surfaces,
+                record.code, procedure.name if procedure else "", record.status, record.dentist,
+            )
+            for column, value in enumerate(values):
+                self.records_table.setItem(row, column, QTableWidgetItem(value))
+
+    def record_treatment(self, tooth: int = WHOLE_MOUTH):
+        """Add a planned or completed treatment to the open chart"""
+        if self.chart is None:
+            return
+        dialog = TreatmentDialog(self.catalog, getattr(self.user, 'full_name', ""), tooth, self)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+
+        data = dialog.get_data()
+        if data['code'] is None:
+            QMessageBox.warning(self, "Record Treatment", "The procedure catalog is empty.")
+            return
+        record = TreatmentRecord(
+            None, self.chart.patient_id, data['tooth'], data['surfaces'], data['code'],
+            data['status'], data['dentist'], data['performed_on'], data['notes'],
+        )
+
+        def save():
+            with self.history.database.transaction():
+                added = self.history.add(record)
+                if data['charge']:
+                    self.charge(added)
+
+        self.data.write(save, lambda _: self.open_chart(),
+                        lambda error: QMessageBox.warning(self, "Record Treatment", str(error)))
+
+    def complete_selected(self):
+        """Mark the selected planned treatment done today and charge it"""
+        row = self.records_table.currentRow()
+        if row < 0 or row >= len(self.shown_records):
+            return
+        record = self.shown_records[row]
+        if record.status == STATUS_COMPLETED:
+            return
+        today = date.today()
+
+        def complete():
+            with self.history.database.transaction():
+                self.history.set_status(record.id, STATUS_COMPLETED, today)
+                self.charge(record._replace(performed_on=today))
+
+        self.data.write(complete, lambda _: self.open_chart(),
+                        lambda error: QMessageBox.warning(self, "Complete Treatment", str(error)))
+
+    def charge(self, record: TreatmentRecord):
+        """Post a record's catalog price to the patient's ledger (on the data thread)"""
+        procedure = self.catalog.get(record.code)
+        if procedure is None or procedure.price <= 0:
+            return
+        description = procedure.name
+        if record.tooth != WHOLE_MOUTH:
+            description += f", tooth {record.tooth}{' ' + record.surfaces if record.surfaces else ''}"
+        self.ledger.charge(record.patient_id, procedure.price, description, record.code)
+
+    # === Catalog ===
+
+    def refresh_catalog(self):
+        """Reload the catalog table (retired codes included)"""
+        procedures = self.catalog.all(active_only=False)
+        self.catalog_table.setRowCount(len(procedures))
+        for row, procedure in enumerate(procedures):
+            price = QTableWidgetItem(format_money(procedure.price))
+            price.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            self.catalog_table.setItem(row, 0, QTableWidgetItem(procedure.code))
+            self.catalog_table.setItem(row, 1, QTableWidgetItem(procedure.name))
+            self.catalog_table.setItem(row, 2, price)
+            self.catalog_table.setItem(row, 3, QTableWidgetItem(f"{procedure.duration} min"))
+            self.catalog_table.setItem(row, 4, QTableWidgetItem("Yes" if procedure.active else "No"))
+
+    def selected_code(self) -> Optional[str]:
+        """Code of the selected catalog row"""
+        row = self.catalog_table.currentRow()
+        item = self.catalog_table.item(row, 0) if row >= 0 else None
+        return item.text() if item else None
+
+    def edit_selected_procedure(self):
+        """Edit the selected catalog entry"""
+        code = self.selected_code()
+        if code is not None:
+            self.edit_procedure(self.catalog.get(code))
+
+    def edit_procedure(self, procedure: Optional[Procedure]):
+        """Add a catalog entry, or edit one"""
+        dialog = ProcedureDialog(self, procedure)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+
+        data = dialog.get_data()
+        if not data['code'] or not data['name']:
+            QMessageBox.warning(self, "Procedure", "Please enter a code and a name.")
+            return
+        if data['price'] is None or data['price'] < 0:
+            QMessageBox.warning(self, "Procedure", "Please enter a valid price.")
+            return
+        if procedure is None and self.catalog.get(data['code']) is not None:
+            QMessageBox.warning(self, "Procedure", f"{data['code']} is already in the catalog.")
+            return
+
+        saved = Procedure(data['code'], data['name'], data['price'], data['duration'], data['active'])
+        self.data.write(lambda: self.catalog.save(saved), lambda _: self.refresh_catalog(),
+                        lambda error: QMessageBox.warning(self, "Procedure", str(error)))
+
+    def find_patients(self):
+        """List the patients who have had the selected procedure"""
+        code = self.selected_code()
+        if code is None:
+            return
+        self.data.read(lambda: self.history.patients_with(code),
+                       lambda patient_ids: self.show_patients_with(code, patient_ids),
+                       key=(self.history, 'patients_with', code))
+
+    def show_patients_with(self, code: str, patient_ids: List[str]):
+        """Show what find_patients() found"""
+        shown = ", ".join(patient_ids[:20]) + (" ..." if len(patient_ids) > 20 else "")
+        self.find_label.setText(f"{len(patient_ids):,} patients with {code}: {shown}" if patient_ids
+                                else f"No patients with {code}")
@@ -0,0 +1,139 @@
+"""
+Patient Search Controller
+Debounces search input and runs index queries off the GUI thread
+"""
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+from core.search_index import PatientSearchIndex
+
+
+class _SearchSignals(QObject):
+    """Signals of a search task (QRunnable cannot carry signals itself)"""
+    finished = pyqtSignal(int, str, object)
+
+
+class _IndexBuildSignals(QObject):
+    """Signals of an index build task"""
+    finished = pyqtSignal()
+
+
+class _IndexBuildTask(QRunnable):
+    """Streams the registry into the search index on a pool thread"""
+
+    def __init__(self, index: PatientSearchIndex, patients_factory, controller):
+        super().__init__()
+        self.index = index
+        self.patients_factory = patients_factory
+        self.signals = _IndexBuildSignals()
+        self.signals.finished.connect(controller.index_built)
+
+    def run(self):
+        self.index.rebuild(self.patients_factory())
+        self.signals.finished.emit()
+
+
+class _SearchTask(QRunnable):
+    """Runs one index query on a pool thread"""
+
+    def __init__(self, index: PatientSearchIndex, query: str, generation: int, controller):
+        super().__init__()
+        self.index = index
+        self.query = query
+        self.generation = generation
+        self.controller = controller
+        self.signals = _SearchSignals()
+        self.signals.finished.connect(controller.deliver_results)
+
+    def run(self):
+        ids = self.index.search(
+            self.query,
+            is_cancelled=lambda: self.generation != self.controller.generation
+        )
+        if ids is not None:
+            self.signals.finished.emit(self.generation, self.query, ids)
+
+
+class PatientSearchController(QObject):
+    """
+    Debounced, asynchronous patient search
+
+    Keystrokes restart a single-shot timer; only when typing pauses for
+    debounce_ms is a query sent to a worker thread. Each query gets a new
+    generation number, and results from an older generation are dropped,
+    so a slow query can never overwrite the results of a newer one.
+    """
+
+    # Signal emitted with (query, matching patient IDs or None for "all")
+    results_ready = pyqtSignal(str, object)
+    
+    # Signal emitted once a background index build has finished
+    index_ready = pyqtSignal()
+
+    DEFAULT_DEBOUNCE_MS = 250
+
+    def __init__(self, index: PatientSearchIndex, debounce_ms: int = DEFAULT_DEBOUNCE_MS, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.generation = 0
+        self.query = ""
+
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(1)
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(debounce_ms)
+        self.debounce_timer.timeout.connect(self.run_query)
+
+    def build_index(self, patients_factory):
+        """
+        Fill the index in the background
+
+        patients_factory: callable returning an iterable of patients; it is
+        called on the worker thread so the registry is streamed there
+        """
+        QThreadPool.globalInstance().start(_IndexBuildTask(self.index, patients_factory, self))
+
+    def index_built(self):
+        """Re-run an active query against the completed index"""
+        if self.query.strip():
+            self.run_query()
+        self.index_ready.emit()
+
+    def set_debounce_ms(self, debounce_ms: int):
+        """Change how long typing must pause before a query runs"""
+        self.debounce_timer.setInterval(debounce_ms)
+
+    def set_query(self, text: str):
+        """Schedule a query for the given search text"""
+        self.query = text
+        # Invalidate anything in flight right away, not only once the timer fires
+        self.generation += 1
+        self.debounce_timer.start()
+
+    def run_query(self):
+        """Run the pending query now, skipping the debounce delay"""
+        self.debounce_timer.stop()
+        self.generation += 1
+
+        if not self.query.strip():
+            self.thread_pool.clear()
+            self.results_ready.emit(self.query, None)
+            return
+
+        # Queued tasks that have not started yet are superseded
+        self.thread_pool.clear()
+        self.thread_pool.start(_SearchTask(self.index, self.query, self.generation, self))
+
+    def deliver_results(self, generation: int, query: str, ids):
+        """Forward worker results unless a newer query has been issued"""
+        if generation != self.generation:
+            return
+        self.results_ready.emit(query, ids)
+
+    def matches(self, patient_id: str) -> bool:
+        """Check one patient against the active query"""
+        if not self.query.strip():
+            return True
+        return self.index.matches(patient_id, self.query)
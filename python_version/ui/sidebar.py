@@ -10,6 +10,8 @@ from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QIcon
 from typing import List, Dict
 
+from .theme import set_state, stylesheet
+
 
 class Sidebar(QWidget):
     """
@@ -29,12 +31,9 @@ class Sidebar(QWidget):
     def setup_ui(self):
         """Set up the user interface"""
         self.setFixedWidth(256)
-        self.setStyleSheet("""
-            QWidget {
-                background-color: rgba(26, 45, 63, 0.95);
-                border-right: 4px solid #4fb3d4;
-            }
-        """)
+        # Includes the menu button rules; switching modules only flips the
+        # "active" property of two buttons instead of re-parsing stylesheets
+        self.setStyleSheet(stylesheet('sidebar'))
         
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
@@ -89,7 +88,7 @@ class Sidebar(QWidget):
         for item in filtered_items:
             button = QPushButton(f"{item['icon']}  {item['label']}")
             button.setCursor(Qt.CursorShape.PointingHandCursor)
-            button.setStyleSheet(self.get_button_style(False))
+            button.setProperty("nav", True)
             button.clicked.connect(lambda checked, module_id=item['id']: self.change_module(module_id))
             
             self.menu_buttons[item['id']] = button
@@ -101,39 +100,6 @@ class Sidebar(QWidget):
         # Set initial active module
         self.update_active_button('patients')
     
-    def get_button_style(self, active: bool) -> str:
-        """Get button stylesheet based on active state"""
-        if active:
-            return """
-                QPushButton {
-                    background-color: #4fb3d4;
-                    color: white;
-                    border: 2px solid #4fb3d4;
-                    border-radius: 8px;
-                    padding: 12px;
-                    font-size: 16px;
-                    font-weight: bold;
-                    text-align: left;
-                }
-            """
-        else:
-            return """
-                QPushButton {
-                    background-color: transparent;
-                    color: white;
-                    border: 2px solid transparent;
-                    border-radius: 8px;
-                    padding: 12px;
-                    font-size: 16px;
-                    font-weight: bold;
-                    text-align: left;
-                }
-                QPushButton:hover {
-                    background-color: #2d3e50;
-                    border-color: #4fb3d4;
-                }
-            """
-    
     def change_module(self, module_id: str):
         """Change active module"""
         self.current_module = module_id
@@ -143,4 +109,4 @@ class Sidebar(QWidget):
     def update_active_button(self, module_id: str):
         """Update button styles to show active module"""
         for btn_id, button in self.menu_buttons.items():
-            button.setStyleSheet(self.get_button_style(btn_id == module_id))
+            set_state(button, "active", btn_id == module_id)
@@ -0,0 +1,375 @@
+"""
+Theme
+Central stylesheets and state styling for the whole application
+"""
+
+from functools import lru_cache
+from string import Template
+
+from PyQt6.QtWidgets import QWidget
+
+# Theme colors, substituted into the stylesheet templates below
+COLORS = {
+    'primary': "#4fb3d4",
+    'surface': "#2d3e50",
+    'surface_dark': "#1a2d3f",
+    'danger': "#cc0000",
+    'danger_light': "#ff3333",
+    'warning': "#f0ad4e",
+}
+
+# Application-wide stylesheet (formerly set by MainWindow.apply_dark_theme)
+APP_TEMPLATE = """
+    QMainWindow {
+        background-color: #949494;
+    }
+    QWidget {
+        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
+        font-size: 16px;
+    }
+    QPushButton {
+        background-color: $primary;
+        color: white;
+        border: 2px solid $primary;
+        border-radius: 8px;
+        padding: 12px 24px;
+        font-weight: bold;
+        font-size: 16px;
+    }
+    QPushButton:hover {
+        background-color: #3a9cb8;
+    }
+    QPushButton:pressed {
+        background-color: #2d8aa3;
+    }
+    QPushButton[danger="true"] {
+        background-color: $danger;
+        border-color: $danger_light;
+    }
+    QPushButton[danger="true"]:hover {
+        background-color: $danger_light;
+    }
+    QLineEdit {
+        background-color: $surface;
+        color: white;
+        border: 2px solid $primary;
+        border-radius: 8px;
+        padding: 12px;
+        font-size: 16px;
+    }
+    QLineEdit:focus {
+        border-color: $primary;
+    }
+    QLabel {
+        color: white;
+        font-size: 16px;
+        font-weight: bold;
+    }
+    QTableView {
+        background-color: $surface;
+        color: white;
+        border: 2px solid $primary;
+        border-radius: 8px;
+        gridline-color: $surface_dark;
+    }
+    QHeaderView::section {
+        background-color: $surface_dark;
+        color: white;
+        padding: 12px;
+        border: none;
+        font-weight: bold;
+    }
+"""
+
+# Login screen, set once on the LoginWindow root
+LOGIN_TEMPLATE = """
+    QWidget#LoginWindow {
+        background-color: $surface;
+    }
+    QFrame#loginCard {
+        background-color: rgba(26, 45, 63, 0.95);
+        border: 4px solid $primary;
+        border-radius: 12px;
+    }
+    QLabel#logoLabel {
+        background-color: #3a4f5f;
+        border-radius: 16px;
+        color: $primary;
+        font-size: 14px;
+    }
+    QLabel#logoLabel[fallback="true"] {
+        font-size: 40px;
+    }
+    QLabel#welcomeLabel {
+        color: white;
+        font-size: 32px;
+        font-weight: bold;
+    }
+    QLabel#subtitleLabel {
+        color: $primary;
+        font-size: 20px;
+        font-weight: 600;
+    }
+    QLabel#errorLabel {
+        background-color: $danger;
+        color: white;
+        border: 2px solid $danger_light;
+        border-radius: 8px;
+        padding: 12px;
+        font-size: 14px;
+        font-weight: bold;
+    }
+    QLabel#accountTypeLabel {
+        color: white;
+        font-size: 16px;
+        font-weight: bold;
+    }
+    QComboBox#accountTypeComboBox {
+        background-color: $surface;
+        color: white;
+        border: 2px solid $primary;
+        border-radius: 8px;
+        padding: 12px;
+        font-size: 16px;
+    }
+    QComboBox#accountTypeComboBox:hover {
+        border-color: #5dd9c1;
+    }
+    QComboBox#accountTypeComboBox:focus {
+        border-color: $primary;
+    }
+    QComboBox#accountTypeComboBox::drop-down {
+        border: none;
+        width: 30px;
+    }
+    QComboBox#accountTypeComboBox QAbstractItemView {
+        background-color: $surface;
+        color: white;
+        border: 2px solid $primary;
+        selection-background-color: $primary;
+        selection-color: white;
+        padding: 4px;
+    }
+    QLabel#usernameLabel {
+        color: white;
+        font-size: 16px;
+        font-weight: bold;
+    }
+    QLineEdit#usernameLineEdit {
+        background-color: $surface;
+        color: white;
+        border: 2px solid $primary;
+        border-radius: 8px;
+        padding: 12px;
+        padding-left: 40px;
+        font-size: 16px;
+    }
+    QLineEdit#usernameLineEdit:hover {
+        border-color: #5dd9c1;
+    }
+    QLineEdit#usernameLineEdit:focus {
+        border-color: $primary;
+    }
+    QLabel#usernameIcon {
+        background: transparent;
+        border: none;
+        color: $primary;
+        font-size: 16px;
+    }
+    QLabel#passwordLabel {
+        color: white;
+        font-size: 16px;
+        font-weight: bold;
+    }
+    QLineEdit#passwordLineEdit {
+        background-color: $surface;
+        color: white;
+        border: 2px solid $primary;
+        border-top-left-radius: 8px;
+        border-bottom-left-radius: 8px;
+        border-top-right-radius: 0px;
+        border-bottom-right-radius: 0px;
+        padding: 12px;
+        padding-left: 40px;
+        padding-right: 12px;
+        font-size: 16px;
+    }
+    QLineEdit#passwordLineEdit:hover {
+        border-color: #5dd9c1;
+    }
+    QLineEdit#passwordLineEdit:focus {
+        border-color: $primary;
+    }
+    QPushButton#togglePasswordButton {
+        background-color: $surface;
+        border: 2px solid $primary;
+        border-left: none;
+        border-top-right-radius: 8px;
+        border-bottom-right-radius: 8px;
+        padding: 12px;
+        font-size: 16px;
+    }
+    QPushButton#togglePasswordButton:hover {
+        background-color: #3a4f5f;
+        border-color: #5dd9c1;
+    }
+    QPushButton#togglePasswordButton:pressed {
+        background-color: $surface_dark;
+    }
+    QLabel#passwordIcon {
+        background: transparent;
+        border: none;
+        color: $primary;
+        font-size: 16px;
+    }
+    QLabel#securityIcon {
+        color: $primary;
+        font-size: 14px;
+    }
+    QLabel#securityLabel {
+        color: $primary;
+        font-size: 12px;
+    }
+    QPushButton#signInButton {
+        background-color: $primary;
+        color: white;
+        border: none;
+        border-radius: 8px;
+        padding: 16px;
+        font-size: 16px;
+        font-weight: bold;
+    }
+    QPushButton#signInButton:hover {
+        background-color: #3a9cb8;
+    }
+    QPushButton#signInButton:pressed {
+        background-color: #2d8aa3;
+    }
+    QPushButton#signInButton:disabled {
+        background-color: #6b7280;
+        color: #9ca3af;
+    }
+    QPushButton#forgotPasswordButton {
+        background-color: transparent;
+        color: $primary;
+        border: none;
+        font-size: 14px;
+        text-decoration: underline;
+    }
+    QPushButton#forgotPasswordButton:hover {
+        color: #5dd9c1;
+    }
+    QPushButton#forgotPasswordButton:pressed {
+        color: #3a9cb8;
+    }
+"""
+
+# Sidebar, set once on the Sidebar; menu buttons switch on the "active" property
+SIDEBAR_TEMPLATE = """
+    QWidget {
+        background-color: rgba(26, 45, 63, 0.95);
+        border-right: 4px solid $primary;
+    }
+    QPushButton[nav="true"] {
+        background-color: transparent;
+        color: white;
+        border: 2px solid transparent;
+        border-radius: 8px;
+        padding: 12px;
+        font-size: 16px;
+        font-weight: bold;
+        text-align: left;
+    }
+    QPushButton[nav="true"]:hover {
+        background-color: $surface;
+        border-color: $primary;
+    }
+    QPushButton[nav="true"][active="true"],
+    QPushButton[nav="true"][active="true"]:hover {
+        background-color: $primary;
+        border-color: $primary;
+    }
+"""
+
+# Dashboard modules, set once on each module's root widget; headings,
+# captions and hints are labels with the "heading", "caption" or "hint"
+# property set
+MODULE_TEMPLATE = """
+    QLabel#moduleTitle {
+        color: white;
+        font-size: 24px;
+        font-weight: bold;
+    }
+    QLabel#moduleSubtitle {
+        color: $primary;
+        font-size: 16px;
+        font-weight: bold;
+    }
+    QLabel[heading="true"] {
+        color: white;
+        font-size: 18px;
+        font-weight: bold;
+    }
+    QLabel[caption="true"] {
+        color: $primary;
+        font-size: 14px;
+    }
+    QLabel[hint="true"] {
+        color: $primary;
+        font-size: 13px;
+    }
+    QLabel#staleLabel {
+        color: $warning;
+        font-size: 13px;
+        font-weight: bold;
+    }
+    QFrame#summaryCard {
+        background-color: $surface;
+        border-radius: 8px;
+    }
+    QLabel#summaryValue {
+        color: white;
+        font-size: 22px;
+        font-weight: bold;
+    }
+    QCheckBox {
+        color: white;
+    }
+"""
+
+TEMPLATES = {
+    'app': APP_TEMPLATE,
+    'login': LOGIN_TEMPLATE,
+    'sidebar': SIDEBAR_TEMPLATE,
+    'module': MODULE_TEMPLATE,
+}
+
+
+@lru_cache(maxsize=None)
+def stylesheet(name: str) -> str:
+    """Get a generated stylesheet; each one is built once per process"""
+    return Template(TEMPLATES[name]).substitute(COLORS)
+
+
+def apply_app_theme(app):
+    """Install the application stylesheet unless it is already installed"""
+    sheet = stylesheet('app')
+    if app.styleSheet() != sheet:
+        app.setStyleSheet(sheet)
+
+
+def set_state(widget: QWidget, name: str, value) -> bool:
+    """
+    Set a dynamic property used by stylesheet selectors, e.g. [active="true"]
+
+    The already-parsed stylesheet is re-applied to this widget only, and
+    only when the value actually changes. Returns whether it changed.
+    """
+    if widget.property(name) == value:
+        return False
+    widget.setProperty(name, value)
+    style = widget.style()
+    style.unpolish(widget)
+    style.polish(widget)
+    widget.update()
+    return True
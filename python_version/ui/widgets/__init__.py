@@ -0,0 +1 @@
+# Widgets Package
\ No newline at end of file
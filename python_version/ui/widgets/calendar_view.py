@@ -0,0 +1,239 @@
+"""
+Calendar View
+Custom-painted day/week appointment grid
+"""
+
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtCore import Qt, QRectF, pyqtSignal
+from PyQt6.QtGui import QPainter, QColor, QPen
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from ..theme import COLORS
+
+STATUS_COLORS = {
+    'Scheduled': COLORS['primary'],
+    'Completed': "#3fa66b",
+    'No-show': "#d4a24f",
+}
+
+
+class CalendarView(QWidget):
+    """
+    Day or week calendar grid
+
+    Day mode shows one column per chair; week mode shows one column per
+    day. The widget only paints what it is given; the owner asks for
+    visible_range() and passes in the appointments of that window.
+    """
+
+    # Signal emitted when an appointment block is clicked
+    appointment_clicked = pyqtSignal(object)
+
+    # Signal emitted with (start, column label) when an empty slot is double-clicked
+    slot_double_clicked = pyqtSignal(object, str)
+
+    DAY_START_HOUR = 7
+    DAY_END_HOUR = 19
+    HEADER_HEIGHT = 36
+    FOOTER_HEIGHT = 12
+    GUTTER_WIDTH = 64
+    SLOT_MINUTES = 15
+
+    def __init__(self, chairs: List[str], parent=None):
+        super().__init__(parent)
+        self.chairs = chairs
+        self.mode = 'day'
+        self.anchor = date.today()
+        self.appointments = []
+        # Appointment -> (lane, lane count) for overlapping blocks in one column.
+        # Keyed by object: series occurrences have no ID of their own
+        self.lanes: Dict[object, Tuple[int, int]] = {}
+        self.setMinimumHeight(400)
+        self.setMouseTracking(True)
+
+    # === Visible window ===
+
+    def visible_days(self) -> List[date]:
+        if self.mode == 'day':
+            return [self.anchor]
+        monday = self.anchor - timedelta(days=self.anchor.weekday())
+        return [monday + timedelta(days=i) for i in range(7)]
+
+    def visible_range(self) -> Tuple[datetime, datetime]:
+        """The [start, end) window the owner should load appointments for"""
+        days = self.visible_days()
+        return (
+            datetime.combine(days[0], time(self.DAY_START_HOUR)),
+            datetime.combine(days[-1], time(self.DAY_END_HOUR)),
+        )
+
+    def columns(self) -> List[str]:
+        if self.mode == 'day':
+            return self.chairs
+        return [day.strftime("%a %d %b") for day in self.visible_days()]
+
+    def set_mode(self, mode: str):
+        self.mode = mode
+        self.update()
+
+    def set_anchor(self, anchor: date):
+        self.anchor = anchor
+        self.update()
+
+    def set_appointments(self, appointments):
+        """Show the appointments of the visible window (any iterable, consumed once)"""
+        self.appointments = list(appointments)
+        self._assign_lanes()
+        self.update()
+
+    def _assign_lanes(self):
+        """Place overlapping appointments of a column side by side"""
+        self.lanes = {}
+        by_column: Dict[int, list] = {}
+        for appointment in self.appointments:
+            column = self._column_of(appointment)
+            if column is not None:
+                by_column.setdefault(column, []).append(appointment)
+
+        for column_appointments in by_column.values():
+            column_appointments.sort(key=lambda a: a.start)
+            lane_ends = []
+            assigned = []
+            for appointment in column_appointments:
+                for lane, lane_end in enumerate(lane_ends):
+                    if lane_end <= appointment.start:
+                        lane_ends[lane] = appointment.end
+                        break
+                else:
+                    lane = len(lane_ends)
+                    lane_ends.append(appointment.end)
+                assigned.append((appointment, lane))
+            for appointment, lane in assigned:
+                self.lanes[appointment] = (lane, len(lane_ends))
+
+    # === Geometry ===
+
+    def _grid_rect(self) -> QRectF:
+        return QRectF(
+            self.GUTTER_WIDTH, self.HEADER_HEIGHT,
+            self.width() - self.GUTTER_WIDTH - 1,
+            self.height() - self.HEADER_HEIGHT - self.FOOTER_HEIGHT
+        )
+
+    def _column_width(self) -> float:
+        return self._grid_rect().width() / max(1, len(self.columns()))
+
+    def _minutes_to_y(self, minutes: float) -> float:
+        grid = self._grid_rect()
+        total = (self.DAY_END_HOUR - self.DAY_START_HOUR) * 60
+        return grid.top() + grid.height() * minutes / total
+
+    def _column_of(self, appointment) -> Optional[int]:
+        if self.mode == 'day':
+            return self.chairs.index(appointment.chair) if appointment.chair in self.chairs else None
+        offset = (appointment.start.date() - self.visible_days()[0]).days
+        return offset if 0 <= offset < 7 else None
+
+    def _block_rect(self, appointment) -> Optional[QRectF]:
+        column = self._column_of(appointment)
+        if column is None:
+            return None
+        day_start = datetime.combine(appointment.start.date(), time(self.DAY_START_HOUR))
+        top = self._minutes_to_y((appointment.start - day_start).total_seconds() / 60)
+        bottom = self._minutes_to_y((appointment.end - day_start).total_seconds() / 60)
+        lane, lane_count = self.lanes.get(appointment, (0, 1))
+        width = self._column_width() / lane_count
+        left = self._grid_rect().left() + column * self._column_width() + lane * width
+        return QRectF(left + 3, top + 1, width - 6, max(bottom - top - 2, 12))
+
+    def _slot_at(self, x: float, y: float) -> Optional[Tuple[datetime, str]]:
+        grid = self._grid_rect()
+        if not grid.contains(x, y):
+            return None
+        column = int((x - grid.left()) // self._column_width())
+        minutes = (y - grid.top()) / grid.height() * (self.DAY_END_HOUR - self.DAY_START_HOUR) * 60
+        minutes = int(minutes // self.SLOT_MINUTES * self.SLOT_MINUTES)
+        if self.mode == 'day':
+            day, label = self.anchor, self.chairs[column]
+        else:
+            day, label = self.visible_days()[column], ""
+        return datetime.combine(day, time(self.DAY_START_HOUR)) + timedelta(minutes=minutes), label
+
+    # === Painting ===
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.fillRect(self.rect(), QColor(COLORS['surface']))
+
+        grid = self._grid_rect()
+        columns = self.columns()
+        width = self._column_width()
+
+        # Column headers
+        painter.setPen(QColor("#ffffff"))
+        for i, label in enumerate(columns):
+            header = QRectF(grid.left() + i * width, 0, width, self.HEADER_HEIGHT)
+            painter.drawText(header, Qt.AlignmentFlag.AlignCenter, label)
+
+        # Hour lines and labels
+        grid_pen = QPen(QColor(COLORS['surface_dark']))
+        for hour in range(self.DAY_START_HOUR, self.DAY_END_HOUR + 1):
+            y = self._minutes_to_y((hour - self.DAY_START_HOUR) * 60)
+            painter.setPen(grid_pen)
+            painter.drawLine(int(grid.left()), int(y), int(grid.right()), int(y))
+            painter.setPen(QColor("#ffffff"))
+            painter.drawText(QRectF(0, y - 10, self.GUTTER_WIDTH - 8, 20),
+                             Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+                             f"{hour:02d}:00")
+
+        painter.setPen(grid_pen)
+        for i in range(len(columns) + 1):
+            x = int(grid.left() + i * width)
+            painter.drawLine(x, int(grid.top()), x, int(grid.bottom()))
+
+        # Appointment blocks
+        for appointment in self.appointments:
+            rect = self._block_rect(appointment)
+            if rect is None or not rect.intersects(QRectF(event.rect())):
+                continue
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor(STATUS_COLORS.get(appointment.status, COLORS['primary'])))
+            painter.drawRoundedRect(rect, 6, 6)
+            painter.setPen(QColor("#ffffff"))
+            label = f"{appointment.start:%H:%M} {appointment.patient_id}"
+            if appointment.series is not None:
+                label += " ↻"
+            detail = appointment.dentist if self.mode == 'day' else f"{appointment.dentist} · {appointment.chair}"
+            painter.drawText(rect.adjusted(6, 2, -4, -2),
+                             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop | Qt.TextFlag.TextWordWrap,
+                             f"{label}\n{detail}")
+        painter.end()
+
+    # === Mouse ===
+
+    def appointment_at(self, x: float, y: float):
+        for appointment in reversed(self.appointments):
+            rect = self._block_rect(appointment)
+            if rect is not None and rect.contains(x, y):
+                return appointment
+        return None
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            pos = event.position()
+            appointment = self.appointment_at(pos.x(), pos.y())
+            if appointment is not None:
+                self.appointment_clicked.emit(appointment)
+                return
+        super().mousePressEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        pos = event.position()
+        if self.appointment_at(pos.x(), pos.y()) is None:
+            slot = self._slot_at(pos.x(), pos.y())
+            if slot is not None:
+                self.slot_double_clicked.emit(slot[0], slot[1])
+                return
+        super().mouseDoubleClickEvent(event)
@@ -0,0 +1,331 @@
+"""
+Odontogram
+Custom-painted chart of the 32 permanent teeth with surface states
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from PyQt6.QtWidgets import QWidget, QSizePolicy
+from PyQt6.QtCore import Qt, QPointF, QRect, QRectF, QSize, pyqtSignal
+from PyQt6.QtGui import QPainter, QColor, QPen, QPixmap, QPolygonF, QRegion
+
+from core.treatments import (
+    EMPTY_TOOTH, MARKER_CROWN, MARKER_MISSING, MARKER_ROOT_CANAL, STATUS_COMPLETED,
+    STATUS_PLANNED, SURFACES, TOOTH_COUNT, ToothState
+)
+from ..theme import COLORS
+
+STATUS_COLORS = {
+    STATUS_PLANNED: "#e0604f",
+    STATUS_COMPLETED: COLORS['primary'],
+}
+
+TOOTH_COLOR = "#f4f6f8"
+LINE_COLOR = "#5b6b7a"
+
+# Upper per-tooth pixmaps kept; distinct surface/marker combinations stay far below it
+MAX_CACHED_TEETH = 1024
+
+
+class Odontogram(QWidget):
+    """
+    The upper arch (teeth 1-16) above the lower arch (32-17), as seen
+    facing the patient, each tooth split into five surfaces
+
+    Painting is layered so a repaint is mostly pixmap blits: the
+    tooth bases and labels, then one pixmap per distinct tooth state
+    (shared by every tooth and patient showing that state), then the
+    outlines on top. The layers are rendered in device pixels at the
+    screen's exact, possibly fractional, scale factor and laid out on
+    whole device pixels, so lines stay sharp under the PassThrough
+    rounding policy. set_states() repaints only the teeth that changed.
+    """
+
+    # Signal emitted with the tooth number when a tooth is clicked
+    tooth_clicked = pyqtSignal(int)
+
+    # Signal emitted with the tooth number when a tooth is double-clicked
+    tooth_double_clicked = pyqtSignal(int)
+
+    PADDING = 12
+    GAP = 6
+    MIDLINE_GAP = 18
+    ARCH_GAP = 10
+    LABEL_HEIGHT = 18
+    MIN_TOOTH = 20
+    MAX_TOOTH = 64
+    # Side of the occlusal square as a share of the tooth
+    INNER = 0.4
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.states: Dict[int, ToothState] = {}
+        self.selected: Optional[int] = None
+        self._layout_key: Optional[Tuple[int, int, float]] = None
+        self._scale = 1.0
+        self._size = 0
+        self._device_rects: Dict[int, QRect] = {}
+        self._rects: Dict[int, QRectF] = {}
+        self._base: Optional[QPixmap] = None
+        self._outlines: Optional[QPixmap] = None
+        self._teeth: Dict[tuple, QPixmap] = {}
+        # The base layer covers every pixel, so nothing behind the widget needs repainting
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        self.setMinimumHeight(self._height_for(self.MIN_TOOTH))
+
+    def sizeHint(self) -> QSize:
+        tooth = 44
+        width = 2 * self.PADDING + 16 * tooth + 15 * self.GAP + self.MIDLINE_GAP
+        return QSize(width, self._height_for(tooth))
+
+    def _height_for(self, tooth: int) -> int:
+        return 2 * self.PADDING + 2 * tooth + 2 * self.LABEL_HEIGHT + self.ARCH_GAP
+
+    # === Data ===
+
+    def set_states(self, states: Dict[int, ToothState]):
+        """Show a patient's tooth states (absent teeth are untreated), repainting only changes"""
+        dirty = QRegion()
+        for tooth in range(1, TOOTH_COUNT + 1):
+            if states.get(tooth, EMPTY_TOOTH) != self.states.get(tooth, EMPTY_TOOTH):
+                dirty += self._dirty_rect(tooth)
+        self.states = dict(states)
+        if not dirty.isEmpty():
+            self.update(dirty)
+
+    def clear(self):
+        """Show no treatments"""
+        self.set_states({})
+
+    def select_tooth(self, tooth: Optional[int]):
+        """Highlight one tooth (None for none)"""
+        if tooth == self.selected:
+            return
+        dirty = QRegion()
+        for changed in (self.selected, tooth):
+            if changed:
+                dirty += self._dirty_rect(changed)
+        self.selected = tooth if tooth else None
+        self.update(dirty)
+
+    def tooth_rect(self, tooth: int) -> QRectF:
+        """Where a tooth is drawn, in widget coordinates"""
+        self._ensure_layout()
+        return self._rects[tooth]
+
+    def tooth_at(self, position: QPointF) -> Optional[int]:
+        """The tooth under a point, if any"""
+        self._ensure_layout()
+        for tooth, rect in self._rects.items():
+            if rect.contains(position):
+                return tooth
+        return None
+
+    def _dirty_rect(self, tooth: int) -> QRect:
+        # Aligned outward and padded for the selection frame
+        return self.tooth_rect(tooth).toAlignedRect().adjusted(-3, -3, 3, 3)
+
+    # === Layout ===
+
+    @staticmethod
+    def _column(tooth: int) -> Tuple[int, bool]:
+        """(column 0-15 from the left, upper arch) of a tooth"""
+        if tooth <= 16:
+            return tooth - 1, True
+        return TOOTH_COUNT - tooth, False
+
+    def _ensure_layout(self):
+        """Lay the teeth out on whole device pixels; drop the layers if the size or scale changed"""
+        scale = self.devicePixelRatioF()
+        key = (self.width(), self.height(), scale)
+        if key == self._layout_key:
+            return
+        self._layout_key = key
+        self._scale = scale
+        self._base = self._outlines = None
+        self._teeth.clear()
+
+        fit_width = (self.width() - 2 * self.PADDING - 15 * self.GAP - self.MIDLINE_GAP) / 16
+        fit_height = (self.height() - 2 * self.PADDING - 2 * self.LABEL_HEIGHT - self.ARCH_GAP) / 2
+        tooth = min(max(min(fit_width, fit_height), self.MIN_TOOTH), self.MAX_TOOTH)
+
+        size = int(tooth * scale)
+        gap = round(self.GAP * scale)
+        midline = round(self.MIDLINE_GAP * scale)
+        label = round(self.LABEL_HEIGHT * scale)
+        total = 16 * size + 15 * gap + midline
+        left = max((int(self.width() * scale) - total) // 2, 0)
+        upper_top = round(self.PADDING * scale) + label
+        lower_top = upper_top + size + round(self.ARCH_GAP * scale)
+
+        self._size = size
+        self._device_rects = {}
+        self._rects = {}
+        for number in range(1, TOOTH_COUNT + 1):
+            column, upper = self._column(number)
+            x = left + column * (size + gap) + (midline if column >= 8 else 0)
+            device = QRect(x, upper_top if upper else lower_top, size, size)
+            self._device_rects[number] = device
+            self._rects[number] = QRectF(device.x() / scale, device.y() / scale, size / scale, size / scale)
+
+    @staticmethod
+    def _faces(tooth: int, state: ToothState) -> Tuple[str, ...]:
+        """
+        A tooth's surface statuses by drawn face: buccal faces out of the
+        mouth (up on the upper arch, down on the lower), mesial faces the
+        midline
+        """
+        surfaces = dict(zip(SURFACES, state.surfaces))
+        column, upper = Odontogram._column(tooth)
+        outer, inner = surfaces['B'], surfaces['L']
+        toward_midline, away = surfaces['M'], surfaces['D']
+        top, bottom = (outer, inner) if upper else (inner, outer)
+        right, left = (toward_midline, away) if column < 8 else (away, toward_midline)
+        return top, right, bottom, left, surfaces['O']
+
+    # === Layers ===
+
+    def _new_layer(self, width: int, height: int) -> Tuple[QPixmap, QPainter]:
+        pixmap = QPixmap(max(width, 1), max(height, 1))
+        pixmap.fill(Qt.GlobalColor.transparent)
+        return pixmap, QPainter(pixmap)
+
+    def _face_polygons(self, rect: QRect) -> List[QPolygonF]:
+        """The five face polygons of a tooth, in device pixels, in _faces() order"""
+        outer = QRectF(rect)
+        margin = rect.width() * (1 - self.INNER) / 2
+        inner = outer.adjusted(margin, margin, -margin, -margin)
+        return [
+            QPolygonF([outer.topLeft(), outer.topRight(), inner.topRight(), inner.topLeft()]),
+            QPolygonF([outer.topRight(), outer.bottomRight(), inner.bottomRight(), inner.topRight()]),
+            QPolygonF([outer.bottomRight(), outer.bottomLeft(), inner.bottomLeft(), inner.bottomRight()]),
+            QPolygonF([outer.bottomLeft(), outer.topLeft(), inner.topLeft(), inner.bottomLeft()]),
+            QPolygonF(inner),
+        ]
+
+    def _line_width(self) -> int:
+        return max(round(self._scale), 1)
+
+    def _build_base(self) -> QPixmap:
+        """Background, blank teeth and tooth numbers"""
+        width, height = int(self.width() * self._scale), int(self.height() * self._scale)
+        pixmap, painter = self._new_layer(width, height)
+        painter.fillRect(0, 0, width, height, QColor(COLORS['surface']))
+        font = painter.font()
+        font.setPixelSize(max(round(12 * self._scale), 8))
+        painter.setFont(font)
+        label = round(self.LABEL_HEIGHT * self._scale)
+        for tooth, rect in self._device_rects.items():
+            painter.fillRect(rect, QColor(TOOTH_COLOR))
+            _, upper = self._column(tooth)
+            label_rect = QRect(rect.x(), rect.y() - label if upper else rect.bottom() + 1, rect.width(), label)
+            painter.setPen(QColor("#ffffff"))
+            painter.drawText(label_rect, Qt.AlignmentFlag.AlignCenter, str(tooth))
+        painter.end()
+        pixmap.setDevicePixelRatio(self._scale)
+        return pixmap
+
+    def _build_outlines(self) -> QPixmap:
+        """Tooth and surface outlines, drawn over the states"""
+        width, height = int(self.width() * self._scale), int(self.height() * self._scale)
+        pixmap, painter = self._new_layer(width, height)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        line = self._line_width()
+        painter.setPen(QPen(QColor(LINE_COLOR), line))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        for rect in self._device_rects.values():
+            # Half a pen inside the tooth so the border lands on whole pixels
+            outer = QRectF(rect).adjusted(line / 2, line / 2, -line / 2, -line / 2)
+            margin = rect.width() * (1 - self.INNER) / 2
+            inner = QRectF(rect).adjusted(margin, margin, -margin, -margin)
+            painter.drawRect(outer)
+            painter.drawRect(inner)
+            painter.drawLine(outer.topLeft(), inner.topLeft())
+            painter.drawLine(outer.topRight(), inner.topRight())
+            painter.drawLine(outer.bottomLeft(), inner.bottomLeft())
+            painter.drawLine(outer.bottomRight(), inner.bottomRight())
+        painter.end()
+        pixmap.setDevicePixelRatio(self._scale)
+        return pixmap
+
+    def _tooth_pixmap(self, faces: Tuple[str, ...], marker: str, marker_status: str) -> QPixmap:
+        """Surface fills and marker of one tooth state, shared by every tooth drawn that way"""
+        key = (faces, marker, marker_status)
+        pixmap = self._teeth.get(key)
+        if pixmap is not None:
+            return pixmap
+        if len(self._teeth) >= MAX_CACHED_TEETH:
+            self._teeth.clear()
+
+        size = self._size
+        pixmap, painter = self._new_layer(size, size)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        for polygon, status in zip(self._face_polygons(QRect(0, 0, size, size)), faces):
+            if status:
+                painter.setBrush(QColor(STATUS_COLORS[status]))
+                painter.drawPolygon(polygon)
+
+        if marker:
+            width = max(size // 10, self._line_width())
+            painter.setPen(QPen(QColor(STATUS_COLORS[marker_status]), width,
+                                cap=Qt.PenCapStyle.FlatCap))
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            inset = width / 2
+            if marker == MARKER_CROWN:
+                painter.drawEllipse(QRectF(inset, inset, size - width, size - width))
+            elif marker == MARKER_ROOT_CANAL:
+                painter.drawLine(QPointF(size / 2, 0), QPointF(size / 2, size))
+            elif marker == MARKER_MISSING:
+                painter.drawLine(QPointF(inset, inset), QPointF(size - inset, size - inset))
+                painter.drawLine(QPointF(size - inset, inset), QPointF(inset, size - inset))
+        painter.end()
+        pixmap.setDevicePixelRatio(self._scale)
+        self._teeth[key] = pixmap
+        return pixmap
+
+    # === Painting ===
+
+    def paintEvent(self, event):
+        self._ensure_layout()
+        if self._base is None:
+            self._base = self._build_base()
+            self._outlines = self._build_outlines()
+
+        region = event.region()
+        painter = QPainter(self)
+        # The painter is clipped to the dirty region, so the full-size layers only blit that part
+        painter.drawPixmap(0, 0, self._base)
+        for tooth, state in self.states.items():
+            rect = self._rects.get(tooth)
+            if rect is None or not region.intersects(rect.toAlignedRect()):
+                continue
+            device = self._device_rects[tooth]
+            pixmap = self._tooth_pixmap(self._faces(tooth, state), state.marker, state.marker_status)
+            painter.drawPixmap(QPointF(device.x() / self._scale, device.y() / self._scale), pixmap)
+        painter.drawPixmap(0, 0, self._outlines)
+
+        if self.selected:
+            pen = QPen(QColor("#ffffff"), 2)
+            painter.setPen(pen)
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            painter.drawRect(self._rects[self.selected].adjusted(-2, -2, 2, 2))
+        painter.end()
+
+    # === Mouse ===
+
+    def mousePressEvent(self, event):
+        tooth = self.tooth_at(event.position())
+        if event.button() == Qt.MouseButton.LeftButton and tooth is not None:
+            self.select_tooth(tooth)
+            self.tooth_clicked.emit(tooth)
+            return
+        super().mousePressEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        tooth = self.tooth_at(event.position())
+        if event.button() == Qt.MouseButton.LeftButton and tooth is not None:
+            self.tooth_double_clicked.emit(tooth)
+            return
+        super().mouseDoubleClickEvent(event)
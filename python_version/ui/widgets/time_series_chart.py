@@ -0,0 +1,267 @@
+"""
+Time Series Chart
+Custom-painted daily series with min/max decimation, zoom and pan
+"""
+
+import math
+from datetime import date, timedelta
+from typing import Callable, Dict, Optional, Sequence, Set, Tuple
+
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtCore import Qt, QObject, QPointF, QRectF, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QPainter, QColor, QPen, QPolygonF, QTransform
+
+from core.decimation import MinMaxPyramid
+from ..theme import COLORS
+
+
+def nice_ceiling(value: float) -> float:
+    """The smallest 1, 2 or 5 x 10^k at or above value"""
+    if value <= 0:
+        return 1.0
+    magnitude = 10 ** math.floor(math.log10(value))
+    for step in (1, 2, 5, 10):
+        if step * magnitude >= value:
+            return step * magnitude
+    return 10 * magnitude
+
+
+class _RefineSignals(QObject):
+    """Signals of a zoom level build"""
+    built = pyqtSignal(object, int)
+
+
+class _RefineTask(QRunnable):
+    """Builds one zoom level of a series on a pool thread"""
+
+    def __init__(self, pyramid: MinMaxPyramid, level: int):
+        super().__init__()
+        self.pyramid = pyramid
+        self.level = level
+        self.signals = _RefineSignals()
+
+    def run(self):
+        self.pyramid.build(self.level)
+        self.signals.built.emit(self.pyramid, self.level)
+
+
+class TimeSeriesChart(QWidget):
+    """
+    One value per day over a long range
+
+    Only about two points per pixel column are drawn, whatever the
+    series length: the view draws the min/max envelope whose bucket
+    size matches its zoom (MinMaxPyramid). Panning reuses the level
+    already built; zooming in draws the nearest built level at once
+    and swaps in the exact one when a worker has built it.
+
+    Wheel zooms around the cursor, dragging pans, double-click resets.
+    """
+
+    MARGIN_LEFT = 80
+    MARGIN_RIGHT = 16
+    MARGIN_TOP = 16
+    MARGIN_BOTTOM = 32
+    Y_TICKS = 4
+    X_TICKS = 6
+    ZOOM_STEP = 1.25
+    MIN_SPAN_DAYS = 14
+    # Buckets per cached polyline chunk
+    CHUNK_BUCKETS = 4096
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.first_day: Optional[date] = None
+        self.pyramid: Optional[MinMaxPyramid] = None
+        self.value_format: Callable[[float], str] = lambda value: f"{value:,.0f}"
+        self.view_start = 0.0
+        self.view_end = 0.0
+        self.drawn_level = 0
+        self._pending: Set[int] = set()
+        self._polylines: Dict[Tuple[int, int], QPolygonF] = {}
+        self._drag_x: Optional[float] = None
+        self.setMinimumHeight(240)
+        self.setMouseTracking(True)
+
+    # === Data and view ===
+
+    def set_series(self, first_day: date, values: Sequence[float],
+                   value_format: Optional[Callable[[float], str]] = None):
+        """Show one value per day starting at first_day"""
+        self.first_day = first_day
+        self.pyramid = MinMaxPyramid(values)
+        self._pending = set()
+        self._polylines = {}
+        if value_format is not None:
+            self.value_format = value_format
+        self.reset_view()
+
+    def reset_view(self):
+        """Show the whole series"""
+        if self.pyramid is None:
+            return
+        self.view_start, self.view_end = 0.0, float(max(len(self.pyramid), 1))
+        # The full view's level is built here, so there is always a coarse stand-in
+        level = MinMaxPyramid.level_for(self.view_end, self._pixels())
+        self.pyramid.build_direct(level)
+        self.update()
+
+    def set_view(self, start: float, end: float):
+        """Show days [start, end) counted from first_day, kept inside the series"""
+        if self.pyramid is None:
+            return
+        length = float(max(len(self.pyramid), 1))
+        span = min(max(end - start, min(self.MIN_SPAN_DAYS, length)), length)
+        start = min(max(start, 0.0), length - span)
+        self.view_start, self.view_end = start, start + span
+        self.update()
+
+    def _plot_rect(self) -> QRectF:
+        return QRectF(self.MARGIN_LEFT, self.MARGIN_TOP,
+                      max(self.width() - self.MARGIN_LEFT - self.MARGIN_RIGHT, 1),
+                      max(self.height() - self.MARGIN_TOP - self.MARGIN_BOTTOM, 1))
+
+    def _pixels(self) -> int:
+        return int(self._plot_rect().width())
+
+    def _envelope(self):
+        """(level, envelope) to draw now, asking for the exact level if it is not built"""
+        level = MinMaxPyramid.level_for(self.view_end - self.view_start, self._pixels())
+        built, envelope = self.pyramid.nearest(level)
+        if built != level and level not in self._pending:
+            self._pending.add(level)
+            task = _RefineTask(self.pyramid, level)
+            task.signals.built.connect(self._level_built)
+            QThreadPool.globalInstance().start(task)
+        return built, envelope
+
+    def _level_built(self, pyramid: MinMaxPyramid, level: int):
+        if pyramid is self.pyramid:
+            self._pending.discard(level)
+            self.update()
+
+    # === Painting ===
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.fillRect(self.rect(), QColor(COLORS['surface']))
+        if self.pyramid is None or not len(self.pyramid):
+            painter.end()
+            return
+
+        plot = self._plot_rect()
+        span = self.view_end - self.view_start
+        level, (mins, maxs) = self._envelope()
+        self.drawn_level = level
+        bucket = 2 ** level
+        first = max(int(self.view_start) // bucket, 0)
+        last = min(int(math.ceil(self.view_end)) // bucket + 1, len(mins))
+
+        top = nice_ceiling(max(maxs[first:last], default=0))
+        bottom = min(0.0, min(mins[first:last], default=0))
+
+        def x_of(day: float) -> float:  # labels only; the series is drawn through a transform
+            return plot.left() + (day - self.view_start) / span * plot.width()
+
+        def y_of(value: float) -> float:
+            return plot.bottom() - (value - bottom) / (top - bottom) * plot.height()
+
+        # Grid and value labels
+        grid_pen = QPen(QColor(COLORS['surface_dark']))
+        for tick in range(self.Y_TICKS + 1):
+            value = bottom + (top - bottom) * tick / self.Y_TICKS
+            y = y_of(value)
+            painter.setPen(grid_pen)
+            painter.drawLine(QPointF(plot.left(), y), QPointF(plot.right(), y))
+            painter.setPen(QColor("#ffffff"))
+            painter.drawText(QRectF(0, y - 10, self.MARGIN_LEFT - 8, 20),
+                             Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+                             self.value_format(value))
+
+        # Date labels
+        date_format = "%d %b %Y" if span < 400 else "%b %Y"
+        for tick in range(self.X_TICKS):
+            day = self.view_start + span * (tick + 0.5) / self.X_TICKS
+            label = (self.first_day + timedelta(days=int(day))).strftime(date_format)
+            x = x_of(day)
+            painter.drawText(QRectF(x - 60, plot.bottom() + 4, 120, self.MARGIN_BOTTOM - 4),
+                             Qt.AlignmentFlag.AlignHCenter | Qt.AlignmentFlag.AlignTop, label)
+
+        # Cached polylines are in (day, value) units; one transform maps them to pixels
+        painter.setClipRect(plot)
+        painter.setTransform(QTransform(
+            plot.width() / span, 0, 0, -plot.height() / (top - bottom),
+            plot.left() - self.view_start * plot.width() / span,
+            plot.bottom() + bottom * plot.height() / (top - bottom),
+        ))
+        # A one-pixel cosmetic pen keeps its width under the transform; wider
+        # pens send the zig-zag through the path stroker, which is far slower
+        pen = QPen(QColor(COLORS['primary']), 1)
+        pen.setCosmetic(True)
+        painter.setPen(pen)
+        # Decimated strokes are pixel columns already; antialiasing them only costs time
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, level == 0)
+        points_per_bucket = 2 if level else 1
+        for chunk in range(first // self.CHUNK_BUCKETS, (last - 1) // self.CHUNK_BUCKETS + 1):
+            polyline = self._polyline(level, chunk, mins, maxs)
+            offset = chunk * self.CHUNK_BUCKETS
+            start = max(first - offset, 0) * points_per_bucket
+            end = (min(last - offset, self.CHUNK_BUCKETS) + 1) * points_per_bucket
+            painter.drawPolyline(polyline.mid(start, end - start))
+        painter.end()
+
+    def _polyline(self, level: int, chunk: int, mins, maxs) -> QPolygonF:
+        """
+        One chunk of a level as a polyline: a min-max stroke per bucket
+        (at level 0, the plain line), plus the next chunk's first point
+        so chunks join up
+        """
+        key = (level, chunk)
+        polyline = self._polylines.get(key)
+        if polyline is None:
+            bucket = 2 ** level
+            polyline = QPolygonF()
+            first = chunk * self.CHUNK_BUCKETS
+            for index in range(first, min(first + self.CHUNK_BUCKETS + 1, len(mins))):
+                x = index * bucket + bucket / 2
+                polyline.append(QPointF(x, mins[index]))
+                if level:
+                    polyline.append(QPointF(x, maxs[index]))
+            self._polylines[key] = polyline
+        return polyline
+
+    # === Mouse ===
+
+    def wheelEvent(self, event):
+        if self.pyramid is None:
+            return
+        plot = self._plot_rect()
+        span = self.view_end - self.view_start
+        anchor = self.view_start + (event.position().x() - plot.left()) / plot.width() * span
+        factor = 1 / self.ZOOM_STEP if event.angleDelta().y() > 0 else self.ZOOM_STEP
+        new_span = span * factor
+        share = (anchor - self.view_start) / span
+        self.set_view(anchor - share * new_span, anchor + (1 - share) * new_span)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self._drag_x = event.position().x()
+            return
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self._drag_x is None or self.pyramid is None:
+            return
+        x = event.position().x()
+        span = self.view_end - self.view_start
+        shift = (self._drag_x - x) / self._plot_rect().width() * span
+        self._drag_x = x
+        self.set_view(self.view_start + shift, self.view_end + shift)
+
+    def mouseReleaseEvent(self, event):
+        self._drag_x = None
+        super().mouseReleaseEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        self.reset_view()